@@ -1,6 +1,10 @@
 """
 Authentication utilities for JWT token handling and password security.
 """
+import hashlib
+import secrets
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,9 +12,12 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from .cache import TTLCache
 from .database import get_db
 from ..modules.V1.AuthManager.models import User
+from .revocation import revocation_list
 from .settings import settings
+from .token_versions import token_versions
 import os
 
 # Password hashing configuration
@@ -19,6 +26,25 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+# Verified access token payloads by SHA-256 digest of the token, so a token
+# presented on every request of a session is verified once. Only signature and
+# exp checks are skipped: token version and revocation are checked per request.
+token_cache = TTLCache(ttl_seconds=settings.AUTH_TOKEN_CACHE_SECONDS, maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+class TokenPrincipal:
+    """
+    The caller as described by a verified access token, used instead of the
+    User row in stateless mode. Carries the fields authorization needs.
+    """
+    is_active = True
+
+    def __init__(self, user_id: int, username: Optional[str], is_admin: bool, token_version: int):
+        self.user_id = user_id
+        self.username = username
+        self.is_admin = is_admin
+        self.token_version = token_version
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -30,9 +56,24 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def generate_refresh_token() -> str:
+    """Generate an opaque refresh token (256 random bits, URL-safe)."""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Hash a refresh token for storage and lookup.
+    
+    Refresh tokens are random and high-entropy, so a fast SHA-256 digest is
+    enough; bcrypt's work factor only protects guessable passwords.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
-    Create a JWT access token.
+    Create a JWT access token with a unique ``jti`` claim (used to revoke it).
     
     Args:
         data: Dictionary containing claims to encode in the token
@@ -48,6 +89,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -56,17 +98,34 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT token.
     
+    Valid tokens are cached (see token_cache) until their exp, at most
+    AUTH_TOKEN_CACHE_SECONDS; invalid ones are verified again every time.
+    
     Args:
         token: JWT token string
     
     Returns:
         Decoded token payload or None if invalid
     """
+    use_cache = settings.AUTH_TOKEN_CACHE_SIZE > 0
+    if use_cache:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = token_cache.get(key)
+        if payload is not None:
+            return dict(payload)
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    
+    if use_cache:
+        ttl = settings.AUTH_TOKEN_CACHE_SECONDS
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            token_cache.set(key, payload, ttl_seconds=ttl)
+    return dict(payload)
 
 
 async def get_current_user(
@@ -76,15 +135,21 @@ async def get_current_user(
     """
     Dependency to get the current authenticated user from JWT token.
     
+    The token's ``ver`` claim must match the user's current token_version
+    (tokens issued before versioning count as version 0), and its ``jti`` must
+    not be in the revocation list (logout, admin revoke). In stateless mode
+    (AUTH_STATELESS) the user row is not loaded: the version is checked against
+    the token version map and a TokenPrincipal built from the claims is returned.
+    
     Args:
         token: JWT token from request header
         db: Database session
     
     Returns:
-        Current authenticated user
+        Current authenticated user (a TokenPrincipal in stateless mode)
     
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: If token is invalid, outdated or revoked, or user not found
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -105,6 +170,17 @@ async def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(jti):
+        raise credentials_exception
+    
+    token_version = payload.get("ver", 0)
+    if settings.AUTH_STATELESS:
+        # Missing and inactive users have no current version
+        if token_versions.get(db, user_id) != token_version:
+            raise credentials_exception
+        return TokenPrincipal(user_id, payload.get("username"), bool(payload.get("is_admin")), token_version)
+    
     user = db.query(User).filter(User.user_id == user_id).first()
     if user is None:
         raise credentials_exception
@@ -115,6 +191,9 @@ async def get_current_user(
             detail="Inactive user"
         )
     
+    if user.token_version != token_version:
+        raise credentials_exception
+    
     return user
 
 
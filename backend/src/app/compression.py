@@ -0,0 +1,235 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; brotli ("br") and zstandard ("zstd") are used when
+their packages are installed. Small, already-encoded, already-compressed
+and streaming responses are sent as-is. Bytes saved and compression CPU time
+are recorded per endpoint.
+"""
+import gzip
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content types whose payload is already compressed; recompressing only burns CPU
+INCOMPRESSIBLE_PREFIXES = (
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip",
+    "application/zstd", "application/x-brotli", "application/octet-stream",
+)
+# Except for text-based image formats
+COMPRESSIBLE_EXCEPTIONS = ("image/svg+xml",)
+
+
+def available_encoders(gzip_level: int = 6, brotli_quality: int = 4,
+                       zstd_level: int = 3) -> Dict[str, Callable[[bytes], bytes]]:
+    """Encoders installed in this process, in server preference order."""
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if brotli is not None:
+        encoders["br"] = lambda data: brotli.compress(data, quality=brotli_quality)
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=zstd_level)
+        encoders["zstd"] = compressor.compress
+    encoders["gzip"] = lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    return encoders
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    Pick the content coding to use for a request.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        encodings: Codings the server supports, most preferred first
+
+    Returns:
+        The coding with the highest client q-value (server order breaks ties),
+        or None to send the response uncompressed
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[token] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Whether a content type is worth compressing."""
+    content_type = content_type.lower()
+    if content_type.startswith(COMPRESSIBLE_EXCEPTIONS):
+        return True
+    return bool(content_type) and not content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+
+
+class EndpointCompressionStats:
+    """Compression counters for one endpoint."""
+
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+        self.encodings: Dict[str, int] = {}
+
+    def as_dict(self) -> dict:
+        saved = self.bytes_in - self.bytes_out
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": saved,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+            "cpu_ms": round(self.cpu_ms, 3),
+            "cpu_us_per_kb_saved": round(self.cpu_ms * 1000 / (saved / 1024), 3) if saved > 0 else None,
+            "encodings": dict(self.encodings),
+        }
+
+
+class CompressionMetrics:
+    """Per-endpoint bytes saved and CPU cost, kept in memory for this worker."""
+
+    def __init__(self):
+        self._stats: Dict[str, EndpointCompressionStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, bytes_in: int, bytes_out: int,
+               encoding: Optional[str], cpu_ms: float) -> None:
+        """Record one response (encoding None = sent uncompressed)."""
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointCompressionStats())
+            stats.responses += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.cpu_ms += cpu_ms
+            if encoding:
+                stats.compressed += 1
+                stats.encodings[encoding] = stats.encodings.get(encoding, 0) + 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Counters per endpoint ("METHOD /path/template")."""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._stats.items())}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+compression_metrics = CompressionMetrics()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete (non-streaming) responses.
+
+    The response body is buffered until the app signals it is complete; a body
+    sent in several chunks (StreamingResponse, FileResponse, server-sent
+    events) is passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6,
+                 brotli_quality: int = 4, zstd_level: int = 3,
+                 metrics: CompressionMetrics = compression_metrics):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encoders(gzip_level, brotli_quality, zstd_level)
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), list(self.encoders))
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Streaming: send as produced, uncompressed
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body, used, cpu_ms = self._encode(start_message, body, encoding)
+            self.metrics.record(self._endpoint(scope), len(message.get("body", b"")), len(body),
+                                used, cpu_ms)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _encode(self, start_message: Message, body: bytes,
+                encoding: Optional[str]) -> Tuple[bytes, Optional[str], float]:
+        """Compress a complete body in place of the original if worthwhile."""
+        headers = MutableHeaders(scope=start_message)
+        if (
+            "content-encoding" in headers
+            or not is_compressible(headers.get("content-type", ""))
+            or len(body) < self.minimum_size
+        ):
+            return body, None, 0.0
+
+        # From here on the representation depends on Accept-Encoding
+        headers.add_vary_header("Accept-Encoding")
+        if encoding is None:
+            return body, None, 0.0
+
+        start = time.thread_time()
+        compressed = self.encoders[encoding](body)
+        cpu_ms = (time.thread_time() - start) * 1000
+        if len(compressed) >= len(body):
+            return body, None, cpu_ms
+
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        return compressed, encoding, cpu_ms
+
+    @staticmethod
+    def _endpoint(scope: Scope) -> str:
+        """Metrics key: the matched route template, so ids do not explode cardinality."""
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "<unmatched>"
+        return f"{scope['method']} {path}"
@@ -0,0 +1,373 @@
+"""
+Scheduler for periodic maintenance jobs.
+
+Each registered job runs on a fixed interval inside every worker process, but a
+database lease elects a single leader per job, so in a multi-worker deployment
+only one worker actually executes it per interval. If the leader dies its lease
+expires and another worker takes over on its next tick.
+"""
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import Column, String, DateTime, Text, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .database import Base, SessionLocal
+from .settings import settings
+
+# Identifies this process as a lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobLease(Base):
+    """
+    Leader-election lease for a scheduled job.
+    The worker whose lease has not expired is the only one allowed to run the job.
+    """
+    __tablename__ = "job_leases"
+    job_name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    # JSON state a job carries from one run to the next, whichever worker runs it
+    state = Column(Text, nullable=True)
+
+
+def acquire_lease(db: Session, job_name: str, owner: str, ttl_seconds: int) -> bool:
+    """
+    Try to take (or renew) the lease for a job.
+
+    Args:
+        db: Database session
+        job_name: Name of the job
+        owner: Identifier of the worker asking for the lease
+        ttl_seconds: How long the lease stays valid
+
+    Returns:
+        True if this owner now holds the lease, False if another worker does
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    # Take over an expired lease or renew our own in a single statement
+    updated = (
+        db.query(JobLease)
+        .filter(JobLease.job_name == job_name)
+        .filter((JobLease.expires_at <= now) | (JobLease.owner == owner))
+        .update({"owner": owner, "expires_at": expires_at}, synchronize_session=False)
+    )
+    if updated:
+        db.commit()
+        return True
+
+    # No row yet: first worker to insert it wins
+    try:
+        db.add(JobLease(job_name=job_name, owner=owner, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def get_job_state(db: Session, job_name: str) -> Optional[dict]:
+    """Get the state a job's previous run (on any worker) left on its lease row."""
+    lease = db.query(JobLease).filter(JobLease.job_name == job_name).first()
+    return json.loads(lease.state) if lease is not None and lease.state else None
+
+
+def set_job_state(db: Session, job_name: str, state: dict) -> None:
+    """Keep state on a job's lease row for its next run (caller commits)."""
+    db.query(JobLease).filter(JobLease.job_name == job_name).update(
+        {"state": json.dumps(state)}, synchronize_session=False
+    )
+
+
+def release_lease(db: Session, job_name: str, owner: str) -> None:
+    """Release a lease held by the given owner."""
+    db.query(JobLease).filter(
+        JobLease.job_name == job_name, JobLease.owner == owner
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+class JobMetrics:
+    """Per-job run counters and timings, kept in memory for this worker."""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.skipped_not_leader = 0
+        self.total_duration_ms = 0.0
+        self.max_duration_ms = 0.0
+        self.last_duration_ms: Optional[float] = None
+        self.last_run_at: Optional[datetime] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_result: Optional[dict] = None
+
+    def record(self, started_at: datetime, duration_ms: float, result: Optional[dict],
+               error: Optional[str]) -> None:
+        """Record the outcome of a single run."""
+        self.runs += 1
+        self.total_duration_ms += duration_ms
+        self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+        self.last_duration_ms = duration_ms
+        self.last_run_at = started_at
+        self.last_result = result
+        self.last_error = error
+        self.last_status = "failed" if error else "succeeded"
+        if error:
+            self.failures += 1
+
+    @property
+    def avg_duration_ms(self) -> Optional[float]:
+        """Mean run duration, or None if the job never ran."""
+        return self.total_duration_ms / self.runs if self.runs else None
+
+
+class ScheduledJob:
+    """A named job function run on a fixed interval."""
+
+    def __init__(self, name: str, func: Callable[[Session], dict], interval_seconds: int):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.metrics = JobMetrics()
+        self.next_run: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether this worker is currently executing the job."""
+        return self._lock.locked()
+
+
+class JobAlreadyRunning(Exception):
+    """Raised when a job is triggered while this worker is already running it."""
+
+
+class JobLeaseHeld(Exception):
+    """Raised when a job is triggered while another worker holds its lease."""
+
+
+class Scheduler:
+    """In-process scheduler that runs registered jobs under leader election."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def job(self, name: str, interval_seconds: int):
+        """Decorator registering a function ``func(db) -> dict`` as a scheduled job."""
+        def decorator(func: Callable[[Session], dict]):
+            self.jobs[name] = ScheduledJob(name, func, interval_seconds)
+            return func
+        return decorator
+
+    def get_job(self, name: str) -> Optional[ScheduledJob]:
+        """Get a registered job by name."""
+        return self.jobs.get(name)
+
+    def run_job(self, job: ScheduledJob, db: Session) -> dict:
+        """
+        Execute a job immediately in this worker and record its metrics.
+
+        Args:
+            job: Job to run
+            db: Database session the job should use
+
+        Returns:
+            Run record with status, timing, result and error
+
+        Raises:
+            JobAlreadyRunning: If this worker is already running the job
+        """
+        if not job._lock.acquire(blocking=False):
+            raise JobAlreadyRunning(job.name)
+
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = job.func(db)
+        except Exception as e:
+            db.rollback()
+            error = str(e)
+            print(f"Warning: Scheduled job '{job.name}' failed: {error}")
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            job.metrics.record(started_at, duration_ms, result, error)
+            job._lock.release()
+
+        return {
+            "job_name": job.name,
+            "status": job.metrics.last_status,
+            "started_at": started_at,
+            "duration_ms": duration_ms,
+            "result": result,
+            "error": error,
+        }
+
+    def run_now(self, job: ScheduledJob, db: Session) -> dict:
+        """
+        Run a job on demand (manual trigger) under its lease.
+
+        Taking the lease first keeps a manual run from overlapping the elected
+        leader's run on another worker.
+
+        Args:
+            job: Job to run
+            db: Database session the job should use
+
+        Returns:
+            Run record with status, timing, result and error
+
+        Raises:
+            JobLeaseHeld: If another worker holds the job's lease
+            JobAlreadyRunning: If this worker is already running the job
+        """
+        if not acquire_lease(db, job.name, WORKER_ID, job.interval_seconds):
+            raise JobLeaseHeld(job.name)
+        return self.run_job(job, db)
+
+    def run_scheduled(self, job: ScheduledJob) -> Optional[dict]:
+        """Run a due job if this worker wins (or already holds) its lease."""
+        db = self.session_factory()
+        try:
+            # The lease covers the whole interval so other workers skip this slot
+            if not acquire_lease(db, job.name, WORKER_ID, job.interval_seconds):
+                job.metrics.skipped_not_leader += 1
+                return None
+            return self.run_job(job, db)
+        except JobAlreadyRunning:
+            return None
+        finally:
+            db.close()
+
+    async def _run_loop(self) -> None:
+        """Sleep until the next job is due, run every due job, repeat."""
+        while True:
+            now = time.monotonic()
+            for job in list(self.jobs.values()):
+                if job.next_run <= now:
+                    job.next_run = now + job.interval_seconds
+                    await run_in_threadpool(self.run_scheduled, job)
+
+            next_due = min((job.next_run for job in self.jobs.values()), default=now + 60)
+            await asyncio.sleep(max(next_due - time.monotonic(), 0.1))
+
+    def start(self) -> None:
+        """Start the scheduler loop on the running event loop."""
+        if self._task is not None:
+            return
+        now = time.monotonic()
+        for job in self.jobs.values():
+            job.next_run = now + job.interval_seconds
+        self._task = asyncio.get_running_loop().create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Cancel the scheduler loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+scheduler = Scheduler()
+
+
+# ==================== PURGE REGISTRY ====================
+
+# Callables ``purger(db, now) -> int`` deleting expired rows, run by purge_expired
+PURGERS: Dict[str, Callable[[Session, datetime], int]] = {}
+
+
+def register_purger(name: str):
+    """Decorator registering a function that deletes expired data."""
+    def decorator(func: Callable[[Session, datetime], int]):
+        PURGERS[name] = func
+        return func
+    return decorator
+
+
+@register_purger("job_leases")
+def purge_expired_leases(db: Session, now: datetime) -> int:
+    """Delete leases that expired more than a day ago (jobs no longer scheduled)."""
+    return db.query(JobLease).filter(
+        JobLease.expires_at < now - timedelta(days=1)
+    ).delete(synchronize_session=False)
+
+
+# ==================== JOBS ====================
+
+@scheduler.job("low_stock_scan", interval_seconds=settings.LOW_STOCK_SCAN_INTERVAL_SECONDS)
+def low_stock_scan(db: Session) -> dict:
+    """
+    Detect sweets below the low-stock threshold.
+    Reads only the partial low-stock index and reports what changed since the last scan.
+    The previous scan's ids are kept on the job's lease row, so the diff holds
+    when the lease moves to another worker.
+    """
+    from ..modules.V1.SweetsManager.dao import SweetsDAO
+
+    rows = SweetsDAO.get_low_stock_sweets(db)
+    current = {row.sweet_id for row in rows}
+    previous = set((get_job_state(db, "low_stock_scan") or {}).get("low_stock_ids", []))
+    newly_low = sorted(current - previous)
+    recovered = sorted(previous - current)
+    set_job_state(db, "low_stock_scan", {"low_stock_ids": sorted(current)})
+    db.commit()
+
+    return {
+        "threshold": settings.LOW_STOCK_THRESHOLD,
+        "low_stock_count": len(current),
+        "newly_low": newly_low,
+        "recovered": recovered,
+    }
+
+
+@scheduler.job("db_maintenance", interval_seconds=settings.DB_MAINTENANCE_INTERVAL_SECONDS)
+def db_maintenance(db: Session) -> dict:
+    """Refresh planner statistics: PRAGMA optimize on SQLite, VACUUM ANALYZE on PostgreSQL."""
+    bind = db.get_bind()
+    dialect = bind.dialect.name
+
+    if dialect == "sqlite":
+        db.execute(text("PRAGMA optimize"))
+        db.commit()
+        statement = "PRAGMA optimize"
+    elif dialect == "postgresql":
+        # VACUUM cannot run inside a transaction block
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE)"))
+        statement = "VACUUM (ANALYZE)"
+    else:
+        db.execute(text("ANALYZE"))
+        db.commit()
+        statement = "ANALYZE"
+
+    return {"dialect": dialect, "statement": statement}
+
+
+@scheduler.job("purge_expired", interval_seconds=settings.PURGE_EXPIRED_INTERVAL_SECONDS)
+def purge_expired(db: Session) -> dict:
+    """Run every registered purger and commit the deletions together."""
+    now = datetime.utcnow()
+    purged = {name: purger(db, now) for name, purger in PURGERS.items()}
+    db.commit()
+    return {"purged": purged}
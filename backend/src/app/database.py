@@ -1,7 +1,7 @@
 """
 Database configuration, models, and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, literal, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .settings import settings
@@ -17,15 +17,59 @@ def init_models():
     Initialize and register all models with Base.
     Call this function after database setup to avoid circular imports.
     """
-    from ..modules.V1.AuthManager.models import User
-    from ..modules.V1.SweetsManager.models import Sweet, Transaction
+    from ..modules.V1.AuthManager.models import User, RefreshToken
+    from ..modules.V1.SweetsManager.models import (
+        Sweet, Transaction, Reservation, SweetTombstone, CatalogSequence
+    )
+    from ..modules.V1.SweetsManager.dao import SweetsDAO
+    from ..modules.V1.OrdersManager.models import Order
+    from ..modules.V1.OutboxManager.models import OutboxEvent, OutboxDelivery
+    from .cron import JobLease
+    from .idempotency import IdempotencyRecord
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    
+    # Data migrations
+    db = SessionLocal()
+    try:
+        SweetsDAO.backfill_categories(db)
+    finally:
+        db.close()
     
     return User, Sweet, Transaction
 
 
+def upgrade_schema(bind) -> None:
+    """
+    Add columns and indexes that create_all() skips on tables that already exist.
+    Columns with a scalar default are added as NOT NULL with that default.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    default = literal(column.default.arg).compile(
+                        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    ddl += f" NOT NULL DEFAULT {default}"
+                conn.execute(text(ddl))
+            
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+
+
 def get_db():
     """Database session dependency for FastAPI routes."""
     db = SessionLocal()
@@ -0,0 +1,288 @@
+"""
+Stock change events pushed to dashboards over SSE and WebSocket.
+
+Writers mark a changed sweet on their session with ``track_stock_change``;
+once the session commits, ``{sweet_id, new_stock, updated_at}`` is published
+through a pluggable pub/sub (in-process by default, Redis when REDIS_URL is
+set so every worker sees every change) and fanned out to this worker's
+subscribers.
+
+Backpressure: each subscriber holds at most one pending event per sweet, so a
+slow client receives the latest stock instead of every intermediate value.
+A client that falls behind on more than STOCK_EVENTS_MAX_PENDING distinct
+sweets is disconnected and has to resubscribe.
+"""
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .redis import get_redis
+from .settings import settings
+
+_TRACKED = "stock_events_tracked"
+_READY = "stock_events_ready"
+
+
+class SlowConsumer(Exception):
+    """Raised to a subscriber that fell too far behind and must reconnect."""
+
+
+class PubSub(ABC):
+    """Transport carrying published events to every worker's broadcaster."""
+
+    @abstractmethod
+    def start(self, deliver: Callable[[dict], None]) -> None:
+        """Begin handing received events to deliver."""
+
+    @abstractmethod
+    def publish(self, message: dict) -> None:
+        """Send an event to every worker (including this one)."""
+
+    def stop(self) -> None:
+        """Stop receiving events."""
+
+
+class InProcessPubSub(PubSub):
+    """Single-worker transport: publishing delivers directly."""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    def start(self, deliver: Callable[[dict], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, message: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+    def stop(self) -> None:
+        self._deliver = None
+
+
+class RedisPubSub(PubSub):
+    """Multi-worker transport over a Redis-compatible PUBLISH/SUBSCRIBE channel."""
+
+    def __init__(self, channel: str = "stock-events"):
+        self.channel = channel
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[dict], None]) -> None:
+        self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+
+        def listen():
+            try:
+                for message in self._pubsub.listen():
+                    deliver(json.loads(message["data"]))
+            except Exception as e:
+                if self._pubsub is not None:
+                    print(f"Warning: Stock event listener stopped: {e}")
+
+        self._thread = threading.Thread(target=listen, name="stock-events", daemon=True)
+        self._thread.start()
+
+    def publish(self, message: dict) -> None:
+        get_redis().publish(self.channel, json.dumps(message))
+
+    def stop(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            pubsub.close()
+
+
+class Subscription:
+    """One connected client: its sweet filter and its coalesced pending events."""
+
+    def __init__(self, sweet_ids: Optional[Set[int]], transport: str, max_pending: int):
+        self.sweet_ids = sweet_ids
+        self.transport = transport
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._pending: "OrderedDict[int, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def offer(self, message: dict) -> str:
+        """
+        Queue an event for this client (called from any thread).
+
+        Returns:
+            "filtered", "queued", "coalesced" (replaced a pending event for the
+            same sweet) or "overflow" (client is too far behind)
+        """
+        sweet_id = message["sweet_id"]
+        if self.sweet_ids is not None and sweet_id not in self.sweet_ids:
+            return "filtered"
+        with self._lock:
+            if self.overflowed:
+                return "overflow"
+            coalesced = sweet_id in self._pending
+            self._pending[sweet_id] = message
+            self._pending.move_to_end(sweet_id)
+            if len(self._pending) > self.max_pending:
+                self.overflowed = True
+        self._loop.call_soon_threadsafe(self._ready.set)
+        if self.overflowed:
+            return "overflow"
+        return "coalesced" if coalesced else "queued"
+
+    async def next_batch(self, timeout: float) -> List[dict]:
+        """
+        Wait up to timeout for pending events and take them all.
+
+        Raises:
+            SlowConsumer: If the client overflowed its pending events
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        with self._lock:
+            self._ready.clear()
+            if self.overflowed:
+                raise SlowConsumer()
+            batch = list(self._pending.values())
+            self._pending.clear()
+        return batch
+
+
+class StreamMetrics:
+    """Connection and delivery counters for this worker."""
+
+    def __init__(self):
+        self.active: Dict[str, int] = {}
+        self.total_connections = 0
+        self.published = 0
+        self.received = 0
+        self.queued = 0
+        self.coalesced = 0
+        self.filtered = 0
+        self.slow_consumers_dropped = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "active_connections": sum(self.active.values()),
+            "active_by_transport": dict(self.active),
+            "total_connections": self.total_connections,
+            "events_published": self.published,
+            "events_received": self.received,
+            "events_queued": self.queued,
+            "events_coalesced": self.coalesced,
+            "events_filtered": self.filtered,
+            "slow_consumers_dropped": self.slow_consumers_dropped,
+        }
+
+
+class StockBroadcaster:
+    """Fans stock events out to this worker's subscribers."""
+
+    def __init__(self, pubsub: Optional[PubSub] = None,
+                 max_pending: int = settings.STOCK_EVENTS_MAX_PENDING):
+        self.max_pending = max_pending
+        self.metrics = StreamMetrics()
+        self._subscriptions: Set[Subscription] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self.pubsub = pubsub or InProcessPubSub()
+        self.pubsub.start(self._deliver)
+
+    def use(self, pubsub: PubSub) -> None:
+        """Switch to another pub/sub transport."""
+        self.pubsub.stop()
+        self.pubsub = pubsub
+        pubsub.start(self._deliver)
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Call listener(event) for every stock event this worker receives (e.g. to drop caches)."""
+        self._listeners.append(listener)
+
+    def publish(self, message: dict) -> None:
+        """Publish an event to every worker."""
+        with self._lock:
+            self.metrics.published += 1
+        try:
+            self.pubsub.publish(message)
+        except Exception as e:
+            print(f"Warning: Failed to publish stock event: {e}")
+
+    def _deliver(self, message: dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self.metrics.received += 1
+        for listener in self._listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                print(f"Warning: Stock event listener failed: {e}")
+        outcomes = [subscription.offer(message) for subscription in subscriptions]
+        with self._lock:
+            self.metrics.queued += outcomes.count("queued")
+            self.metrics.coalesced += outcomes.count("coalesced")
+            self.metrics.filtered += outcomes.count("filtered")
+
+    @contextmanager
+    def subscribe(self, sweet_ids: Optional[Set[int]], transport: str) -> Iterator[Subscription]:
+        """Register a subscriber for the duration of the block (call from the event loop)."""
+        subscription = Subscription(sweet_ids, transport, self.max_pending)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            self.metrics.total_connections += 1
+            self.metrics.active[transport] = self.metrics.active.get(transport, 0) + 1
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+                self.metrics.active[transport] -= 1
+                if subscription.overflowed:
+                    self.metrics.slow_consumers_dropped += 1
+
+
+stock_broadcaster = StockBroadcaster()
+
+
+# ==================== SESSION HOOKS ====================
+
+def track_stock_change(db: Session, sweet) -> None:
+    """Publish this sweet's stock once the session's current transaction commits."""
+    db.info.setdefault(_TRACKED, {})[id(sweet)] = sweet
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _capture_stock_events(session: Session, flush_context) -> None:
+    """Snapshot tracked sweets after each flush, while their new values are loaded."""
+    tracked = session.info.get(_TRACKED)
+    if not tracked:
+        return
+    ready = session.info.setdefault(_READY, {})
+    for sweet in tracked.values():
+        ready[sweet.sweet_id] = {
+            "sweet_id": sweet.sweet_id,
+            "new_stock": sweet.quantity_in_stock,
+            "updated_at": sweet.updated_at.isoformat() if sweet.updated_at else None,
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_stock_events(session: Session) -> None:
+    """Publish the snapshots of a committed transaction."""
+    ready = session.info.pop(_READY, None)
+    session.info.pop(_TRACKED, None)
+    for message in (ready or {}).values():
+        stock_broadcaster.publish(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stock_events(session: Session) -> None:
+    """Drop snapshots of a rolled back transaction."""
+    session.info.pop(_READY, None)
+    session.info.pop(_TRACKED, None)
@@ -0,0 +1,261 @@
+"""
+Idempotency-Key support for non-idempotent POST endpoints.
+
+The first request with a key claims it with a pending row, runs, and stores
+its serialized response in the same database transaction as its side
+effects. Retries with the same key get the stored response back without
+running again. A duplicate arriving while the first is still running waits
+for it: on a per-key lock inside this worker, or by polling the pending row
+when the first request is running in another worker.
+"""
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .cron import register_purger
+from .database import Base
+from .responses import FastJSONResponse
+from .settings import settings
+
+PENDING = "pending"
+COMPLETED = "completed"
+
+_CLAIM = "idempotency_claim"
+
+
+class IdempotencyRecord(Base):
+    """
+    A client-supplied Idempotency-Key with the outcome of the request that first used it.
+    Keys are scoped per user; request_hash detects a key reused for a different request.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_idempotency_user_key"),
+    )
+    record_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default=PENDING)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.transaction_id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Pending: when the claim is considered abandoned. Completed: end of the replay window.
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+@register_purger("idempotency_keys")
+def purge_expired_idempotency_keys(db: Session, now: datetime) -> int:
+    """Delete keys whose replay window (or abandoned claim) has expired."""
+    return db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.expires_at < now
+    ).delete(synchronize_session=False)
+
+
+def request_hash(scope: str, payload: Any) -> str:
+    """Fingerprint of an operation and its request body."""
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    canonical = json.dumps([scope, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _KeyLocks:
+    """Per-key locks for this worker, dropped once no request holds or waits on them."""
+
+    def __init__(self):
+        self._locks: Dict[Tuple[int, str], list] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: Tuple[int, str]) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+
+_key_locks = _KeyLocks()
+
+
+def _replay(record: IdempotencyRecord) -> FastJSONResponse:
+    """The stored response, marked as a replay."""
+    return FastJSONResponse(
+        json.loads(record.response_body),
+        status_code=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _claim(db: Session, user_id: int, key: str, fingerprint: str) -> Union[IdempotencyRecord, FastJSONResponse]:
+    """
+    Claim a key with a pending row, or get the stored response if it already completed.
+
+    Raises:
+        HTTPException: 422 if the key was used for a different request, 409 if
+            another worker is still running it after the wait timeout
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.utcnow()
+        record = db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.idempotency_key == key
+        ).first()
+
+        if record is not None and record.expires_at <= now:
+            # Replay window over, or the worker that claimed it died: start afresh
+            db.delete(record)
+            db.commit()
+            record = None
+
+        if record is None:
+            record = IdempotencyRecord(
+                user_id=user_id,
+                idempotency_key=key,
+                request_hash=fingerprint,
+                status=PENDING,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            )
+            try:
+                db.add(record)
+                db.commit()
+                return record
+            except IntegrityError:
+                # Another worker claimed it between our read and insert
+                db.rollback()
+                continue
+
+        if record.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if record.status == COMPLETED:
+            return _replay(record)
+
+        # Still running in another worker
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        db.expire_all()
+        time.sleep(0.05)
+
+
+class Claim:
+    """The claimed key of an operation in progress: its record and the status code to store."""
+
+    def __init__(self, record_id: int, status_code: int):
+        self.record_id = record_id
+        self.status_code = status_code
+
+
+def _completed_values(status_code: int, result: BaseModel) -> dict:
+    """Column values of a claim completed with a response."""
+    return {
+        "status": COMPLETED,
+        "status_code": status_code,
+        "response_body": result.model_dump_json(),
+        "transaction_id": getattr(result, "transaction_id", None),
+        "expires_at": datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    }
+
+
+def current_claim(db: Session) -> Optional[Claim]:
+    """The claim of the idempotent operation running on this session (None without an Idempotency-Key)."""
+    return db.info.get(_CLAIM)
+
+
+def complete_claim(db: Session, claim: Claim, result: BaseModel) -> None:
+    """
+    Store an operation's response on its claim in another session's transaction, without committing.
+
+    For operations whose side effects are committed by someone else (e.g. the
+    flash-sale group commit): the response is then stored atomically with them.
+    """
+    db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.record_id == claim.record_id
+    ).update(_completed_values(claim.status_code, result), synchronize_session=False)
+
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    user_id: int,
+    scope: str,
+    payload: Any,
+    operation: Callable[[], BaseModel],
+    status_code: int = status.HTTP_200_OK,
+) -> Union[BaseModel, FastJSONResponse]:
+    """
+    Run an operation at most once per Idempotency-Key.
+
+    The operation must make its changes without committing; they are committed
+    here together with the stored response. An operation whose changes are
+    committed elsewhere must store the response in that transaction itself
+    (see current_claim and complete_claim). Failed operations release the key
+    so the client can retry.
+
+    Args:
+        db: Database session
+        key: Idempotency-Key header value (None runs the operation normally)
+        user_id: User the key belongs to
+        scope: Operation identifier, e.g. "POST /sweets/3/purchase"
+        payload: Request body, fingerprinted to detect key reuse
+        operation: Performs the work and returns the response model
+        status_code: Status code of a successful response
+
+    Returns:
+        The operation's response, or the stored response on a replay
+    """
+    if key is None:
+        result = operation()
+        db.commit()
+        return result
+
+    fingerprint = request_hash(scope, payload)
+    with _key_locks.hold((user_id, key)):
+        claimed = _claim(db, user_id, key, fingerprint)
+        if isinstance(claimed, FastJSONResponse):
+            return claimed
+
+        try:
+            db.info[_CLAIM] = Claim(claimed.record_id, status_code)
+            try:
+                result = operation()
+            finally:
+                db.info.pop(_CLAIM, None)
+            for column, value in _completed_values(status_code, result).items():
+                setattr(claimed, column, value)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Forget the claim before deleting its row: SQLite reuses the id for the next claim
+            record_id = claimed.record_id
+            db.expunge(claimed)
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.record_id == record_id
+            ).delete(synchronize_session=False)
+            db.commit()
+            raise
+        return result
@@ -8,6 +8,18 @@ from dotenv import load_dotenv
 from .database import engine, Base, init_models
 from .settings import settings
 from .routers import api_router
+from .cron import scheduler
+from .compression import CompressionMiddleware
+from .events import stock_broadcaster, RedisPubSub
+from .redis import redis_enabled
+from .ratelimit import RateLimitMiddleware, RedisBucketStore, rate_limiter
+from .revocation import revocation_list
+from .token_versions import token_versions
+from ..modules.V1.SweetsManager.search_index import build_search_indexes
+from ..modules.V1.SweetsManager.flash_sale import reconcile_flash_sales
+from ..modules.V1.SweetsManager.holds import load_hold_index
+from ..modules.V1.OrdersManager.consumer import order_consumers
+from ..modules.V1.OutboxManager import outbox_dispatcher
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +37,10 @@ app = FastAPI(
     redoc_url="/api/redoc",
 )
 
+# Limit requests per client IP (inside CORS, so browsers can read 429 responses)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,12 +48,108 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
+# Compress responses (outermost, so CORS headers are set before encoding)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
 # Include main API router (which includes all versioned routers)
 app.include_router(api_router)
 
 
+@app.on_event("startup")
+def load_search_indexes():
+    """Build the in-memory sweets search indexes."""
+    build_search_indexes()
+
+
+@app.on_event("startup")
+def restore_flash_sales():
+    """Reload flash-sale stock counters from the committed stock."""
+    reconcile_flash_sales()
+
+
+@app.on_event("startup")
+def load_reservations():
+    """Load active stock reservations into the in-memory hold index."""
+    load_hold_index()
+
+
+@app.on_event("startup")
+def connect_stock_events():
+    """Share stock events between workers through Redis when it is configured."""
+    if redis_enabled():
+        stock_broadcaster.use(RedisPubSub())
+
+
+@app.on_event("startup")
+def connect_rate_limiter():
+    """Share rate limit buckets between workers through Redis when it is configured."""
+    if redis_enabled():
+        rate_limiter.use(RedisBucketStore())
+
+
+@app.on_event("startup")
+def connect_token_versions():
+    """Share token versions between workers through Redis when it is configured."""
+    if redis_enabled():
+        token_versions.use_redis()
+
+
+@app.on_event("startup")
+def connect_revocation_list():
+    """Share revoked tokens between workers through Redis when it is configured."""
+    if redis_enabled():
+        revocation_list.use_redis()
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    """Start the periodic maintenance jobs scheduler."""
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    """Stop the periodic maintenance jobs scheduler."""
+    await scheduler.stop()
+
+
+@app.on_event("startup")
+def start_order_consumers():
+    """Start the consumers processing asynchronous orders."""
+    if settings.ORDER_CONSUMERS > 0:
+        order_consumers.start()
+
+
+@app.on_event("shutdown")
+def stop_order_consumers():
+    """Stop the order consumers after their current batch."""
+    order_consumers.stop()
+
+
+@app.on_event("startup")
+def start_outbox_dispatcher():
+    """Start delivering outbox events to the configured webhook endpoints."""
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+
+
+@app.on_event("shutdown")
+def stop_outbox_dispatcher():
+    """Stop the outbox dispatcher after the batches in flight."""
+    outbox_dispatcher.stop()
+
+
 @app.get("/")
 def read_root():
     """Root endpoint."""
@@ -0,0 +1,316 @@
+"""
+Token-bucket rate limiting.
+
+A limit written ``"<count>/<second|minute|hour>"`` allows bursts of ``count``
+requests and refills evenly over the period. Buckets are keyed by client IP,
+authenticated user or route, and live in a store: in-process by default (each
+worker limits on its own), or a Redis-compatible server when REDIS_URL is set,
+so that all workers share the buckets.
+
+``RateLimitMiddleware`` applies the global per-IP limit before routing, and
+``rate_limit(...)`` dependencies add per-route limits, e.g. on login (bcrypt)
+and purchases (the hot stock row). Rejected requests get 429 with Retry-After.
+Once a bucket rejects a request, the limiter remembers when its next token is
+due. Later rejections before then cost one dict lookup and never reach the
+store.
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .auth import get_current_user
+from .redis import get_redis
+from .settings import settings
+from ..modules.V1.AuthManager.models import User
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+KEY_TYPES = ("ip", "user", "route")
+
+
+class Limit:
+    """A named token-bucket limit: burst size, refill rate and what the buckets are keyed by."""
+
+    def __init__(self, name: str, count: int, period_seconds: float, key: str = "ip"):
+        if key not in KEY_TYPES:
+            raise ValueError(f"Unknown rate limit key '{key}', expected one of {KEY_TYPES}")
+        self.name = name
+        self.key = key
+        self.burst = count
+        self.rate = count / period_seconds
+
+    @classmethod
+    def parse(cls, name: str, spec: Optional[str], key: str = "ip") -> Optional["Limit"]:
+        """
+        Build a limit from a "<count>/<period>" setting.
+
+        Returns:
+            The limit, or None if spec is empty or "0" (limit disabled)
+
+        Raises:
+            ValueError: If spec is malformed
+        """
+        spec = (spec or "").strip()
+        if spec in ("", "0"):
+            return None
+        count, _, period = spec.partition("/")
+        if period.strip() not in PERIODS or not count.strip().isdigit():
+            raise ValueError(f"Invalid rate limit '{spec}', expected e.g. '10/minute'")
+        return cls(name, int(count), PERIODS[period.strip()], key)
+
+
+class InProcessBucketStore:
+    """Buckets for this worker, in a dict bounded to max_keys entries."""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = settings.RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """
+        Take a token from a bucket.
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                tokens = float(burst)
+            else:
+                tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+            return wait
+
+    def _evict(self, now: float) -> None:
+        """Drop buckets that refilled completely (same as absent); else the oldest one."""
+        full = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in full:
+            del self._buckets[key]
+        if not full:
+            del self._buckets[next(iter(self._buckets))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Atomic refill-and-take; the bucket expires once it would be full again
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker in a Redis-compatible server (one Lua call per take)."""
+
+    name = "redis"
+
+    def __init__(self, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._script = get_redis().register_script(_TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        return float(self._script(keys=[self.prefix + key], args=[rate, burst, now]))
+
+    def clear(self) -> None:
+        client = get_redis()
+        for key in client.scan_iter(match=self.prefix + "*"):
+            client.delete(key)
+
+
+class RateLimiter:
+    """Checks requests against limits, with per-limit allowed/rejected counters."""
+
+    def __init__(self, store=None, enabled: bool = settings.RATE_LIMIT_ENABLED):
+        self.store = store or InProcessBucketStore()
+        self.enabled = enabled
+        # bucket key -> wall-clock time its next token is due, for rejected buckets
+        self._blocked: Dict[str, float] = {}
+        self._allowed: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+
+    def use(self, store) -> None:
+        """Switch to another bucket store (e.g. Redis at startup)."""
+        self.store = store
+        self._blocked.clear()
+
+    def check(self, limit: Limit, identity: str) -> float:
+        """
+        Take a token for one request.
+
+        Args:
+            limit: Limit to apply
+            identity: Client IP, user id or route the bucket belongs to
+
+        Returns:
+            0 if the request may proceed, otherwise seconds to wait before retrying
+        """
+        if not self.enabled:
+            return 0.0
+        key = f"{limit.name}:{identity}"
+        now = time.time()
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if now < blocked_until:
+                self._rejected[limit.name] = self._rejected.get(limit.name, 0) + 1
+                return blocked_until - now
+            self._blocked.pop(key, None)
+
+        try:
+            wait = self.store.take(key, limit.rate, limit.burst, now)
+        except Exception as e:
+            # Fail open: an unreachable store must not take the API down
+            print(f"Warning: Rate limit store unavailable, allowing request: {e}")
+            return 0.0
+        if wait:
+            if len(self._blocked) >= settings.RATE_LIMIT_MAX_KEYS:
+                self._blocked = {k: due for k, due in self._blocked.items() if due > now}
+            self._blocked[key] = now + wait
+            self._rejected[limit.name] = self._rejected.get(limit.name, 0) + 1
+        else:
+            self._allowed[limit.name] = self._allowed.get(limit.name, 0) + 1
+        return wait
+
+    def stats(self) -> dict:
+        """Store in use and counters per limit name."""
+        names = sorted(set(self._allowed) | set(self._rejected))
+        return {
+            "enabled": self.enabled,
+            "store": self.store.name,
+            "blocked_keys": len(self._blocked),
+            "limits": [
+                {"name": name, "allowed": self._allowed.get(name, 0), "rejected": self._rejected.get(name, 0)}
+                for name in names
+            ],
+        }
+
+    def reset(self) -> None:
+        """Forget every bucket and counter."""
+        self.store.clear()
+        self._blocked.clear()
+        self._allowed.clear()
+        self._rejected.clear()
+
+
+rate_limiter = RateLimiter()
+
+# Limits configured in settings (None when disabled)
+global_limit = Limit.parse("global", settings.RATE_LIMIT_GLOBAL, key="ip")
+login_limit = Limit.parse("login", settings.RATE_LIMIT_LOGIN, key="ip")
+purchase_limit = Limit.parse("purchase", settings.RATE_LIMIT_PURCHASE, key="user")
+
+
+def client_ip(scope: Scope, trust_forwarded: bool = settings.RATE_LIMIT_TRUST_FORWARDED) -> str:
+    """Client address of a request; the first X-Forwarded-For hop when behind a trusted proxy."""
+    if trust_forwarded:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def retry_after(wait: float) -> str:
+    """Retry-After header value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(wait)))
+
+
+def too_many_requests(wait: float) -> HTTPException:
+    """429 error telling the client when to retry."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many requests. Retry in {retry_after(wait)} seconds.",
+        headers={"Retry-After": retry_after(wait)},
+    )
+
+
+def rate_limit(limit: Optional[Limit], limiter: RateLimiter = rate_limiter) -> Callable:
+    """
+    Build a route dependency enforcing a limit.
+
+    User-keyed limits resolve the current user (shared with the route's own
+    dependency, so it is loaded once); IP- and route-keyed limits run before
+    authentication and body handling.
+
+    Args:
+        limit: Limit to enforce (None: no limit)
+        limiter: Limiter holding the buckets
+
+    Returns:
+        A dependency raising 429 with Retry-After when the bucket is empty
+    """
+    if limit is not None and limit.key == "user":
+        def check_user(current_user: User = Depends(get_current_user)) -> None:
+            wait = limiter.check(limit, str(current_user.user_id))
+            if wait:
+                raise too_many_requests(wait)
+        return check_user
+
+    def check(request: Request) -> None:
+        if limit is None:
+            return
+        if limit.key == "route":
+            # Keyed on the endpoint, not the path, so /api and /api/v1 share a bucket
+            endpoint = request.scope["endpoint"]
+            identity = f"{request.method} {endpoint.__module__}.{endpoint.__qualname__}"
+        else:
+            identity = client_ip(request.scope)
+        wait = limiter.check(limit, identity)
+        if wait:
+            raise too_many_requests(wait)
+    return check
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying a per-IP limit to every HTTP request before routing.
+    Rejections are answered here, without running the app.
+    """
+
+    def __init__(self, app: ASGIApp, limit: Optional[Limit] = global_limit,
+                 limiter: RateLimiter = rate_limiter, exempt_paths: tuple = ("/health",)):
+        self.app = app
+        self.limit = limit
+        self.limiter = limiter
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.limit is not None and scope["path"] not in self.exempt_paths:
+            wait = self.limiter.check(self.limit, client_ip(scope))
+            if wait:
+                error = too_many_requests(wait)
+                response = JSONResponse({"detail": error.detail}, status_code=error.status_code,
+                                        headers=error.headers)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
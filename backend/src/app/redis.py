@@ -0,0 +1,42 @@
+"""
+Shared Redis-compatible client for multi-worker deployments.
+
+Redis is optional: features that can share state through it fall back to
+in-process state when REDIS_URL is not set. The ``redis`` package is only
+imported when a client is actually requested.
+"""
+import threading
+from typing import Any, Optional
+
+from .settings import settings
+
+_client: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def redis_enabled() -> bool:
+    """Whether a Redis-compatible server is configured."""
+    return bool(settings.REDIS_URL)
+
+
+def get_redis() -> Any:
+    """
+    Get the process-wide Redis client (created on first use).
+
+    Raises:
+        RuntimeError: If REDIS_URL is not set or the redis package is not installed
+    """
+    global _client
+    if _client is not None:
+        return _client
+    if not redis_enabled():
+        raise RuntimeError("REDIS_URL is not configured")
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed")
+
+    with _lock:
+        if _client is None:
+            _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
@@ -0,0 +1,40 @@
+"""
+Fast JSON responses for endpoints that build their payload from plain rows.
+"""
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode the few non-JSON types our rows contain (stdlib fallback only)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain dicts/lists to JSON bytes, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered straight from plain Python data.
+
+    Returning it from an endpoint skips FastAPI's response_model validation,
+    so it is only for payloads the application built itself in the documented
+    shape (keep response_model on the route for the OpenAPI schema).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
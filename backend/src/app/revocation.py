@@ -0,0 +1,180 @@
+"""
+Revocation list of access tokens, by their ``jti`` claim.
+
+Logout and admin revocation record a token's jti until the token would have
+expired anyway. Every authenticated request asks whether its jti is revoked,
+and nearly every answer is no, so checks go through a Bloom filter of the
+revoked jtis first. A jti the filter has never seen is not revoked: no dict
+lookup and no network call. Only filter hits (revoked tokens and rare false
+positives) look further: the in-memory TTL set, then Redis.
+
+With REDIS_URL set, revocations are also stored as ``revoked:<jti>`` keys
+expiring with the token, and announced on a pub/sub channel so every worker
+adds them to its filter; workers load the existing keys at startup. Without
+Redis the list is per worker and lost on restart; tokens still expire after
+ACCESS_TOKEN_EXPIRE_MINUTES.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .events import PubSub, RedisPubSub
+from .redis import get_redis
+from .settings import settings
+
+_KEY_PREFIX = "revoked:"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives; false positives at about error_rate)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        """Bit positions of an item (double hashing over one 128-bit digest)."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Revoked jtis: a Bloom filter in front of an in-memory TTL set and, optionally, Redis."""
+
+    def __init__(self, capacity: int = settings.REVOCATION_BLOOM_CAPACITY,
+                 error_rate: float = settings.REVOCATION_BLOOM_ERROR_RATE):
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        # jti -> wall-clock expiry of the revoked token
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._pubsub: Optional[PubSub] = None
+        self.metrics = {"checks": 0, "bloom_negatives": 0, "remote_lookups": 0, "revoked_hits": 0}
+
+    def use_redis(self, pubsub: Optional[PubSub] = None) -> int:
+        """
+        Share revocations through Redis: load the revoked keys and follow new ones.
+
+        Returns:
+            Number of revocations loaded
+        """
+        client = get_redis()
+        now = time.time()
+        loaded = 0
+        for key in client.scan_iter(match=_KEY_PREFIX + "*"):
+            ttl = client.ttl(key)
+            if ttl and ttl > 0:
+                self._remember(key[len(_KEY_PREFIX):], now + ttl)
+                loaded += 1
+        self._pubsub = pubsub or RedisPubSub(channel="token-revocations")
+        self._pubsub.start(lambda message: self._remember(message["jti"], message["expires_at"]))
+        return loaded
+
+    def stop(self) -> None:
+        """Stop following revocations of other workers."""
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            pubsub.stop()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            jti: Token id
+            expires_at: Token's exp (Unix time); the entry is dropped after it
+        """
+        if expires_at <= time.time():
+            return
+        self._remember(jti, expires_at)
+        if self._pubsub is not None:
+            get_redis().set(_KEY_PREFIX + jti, 1, exat=math.ceil(expires_at))
+            self._pubsub.publish({"jti": jti, "expires_at": expires_at})
+
+    def _remember(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            if jti not in self._revoked:
+                if self.bloom.count >= self.bloom.capacity:
+                    self._rebuild(time.time())
+                self.bloom.add(jti)
+            self._revoked[jti] = expires_at
+
+    def _rebuild(self, now: float) -> None:
+        """
+        Drop expired revocations and rebuild the filter from the rest (grown if still full).
+
+        Checks read the filter without the lock, so the new one is filled
+        before it replaces the old: a check never sees a partial filter.
+        """
+        live = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        capacity = self.bloom.capacity
+        while len(live) >= capacity // 2:
+            capacity *= 2
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in live:
+            bloom.add(jti)
+        self.bloom = bloom
+        self._revoked = live
+
+    def is_revoked(self, jti: str) -> bool:
+        """Whether a token id was revoked (and the token has not expired yet)."""
+        self.metrics["checks"] += 1
+        if jti not in self.bloom:
+            self.metrics["bloom_negatives"] += 1
+            return False
+
+        expires_at = self._revoked.get(jti)
+        if expires_at is not None:
+            revoked = expires_at > time.time()
+        elif self._pubsub is not None:
+            # Filter false positive, or a revocation whose announcement has not arrived yet
+            self.metrics["remote_lookups"] += 1
+            try:
+                revoked = bool(get_redis().exists(_KEY_PREFIX + jti))
+            except Exception as e:
+                # Fail closed: only filter hits get here, so few valid tokens are refused
+                print(f"Warning: Revocation store unavailable, refusing token: {e}")
+                revoked = True
+        else:
+            revoked = False
+        if revoked:
+            self.metrics["revoked_hits"] += 1
+        return revoked
+
+    def stats(self) -> dict:
+        """Filter size and check counters of this worker."""
+        return {
+            "shared": self._pubsub is not None,
+            "revoked": len(self._revoked),
+            "bloom_bits": self.bloom.size,
+            "bloom_hashes": self.bloom.hashes,
+            "bloom_items": self.bloom.count,
+            **self.metrics,
+        }
+
+    def clear(self) -> None:
+        """Forget every local revocation and counter."""
+        with self._lock:
+            self.bloom = BloomFilter(self.bloom.capacity, self.error_rate)
+            self._revoked = {}
+        self.metrics = dict.fromkeys(self.metrics, 0)
+
+
+revocation_list = RevocationList()
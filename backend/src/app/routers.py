@@ -12,5 +12,6 @@ api_router = APIRouter()
 
 # Include all API version routers
 api_router.include_router(v1_router, prefix="/api/v1")
+api_router.include_router(v1_router, prefix="/api", include_in_schema=False)
 
 __all__ = ["api_router"]
@@ -20,6 +20,17 @@ class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+    # Verified access tokens kept per worker (0 disables); entries never outlive the token's exp
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_TOKEN_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_SECONDS", "300"))
+    # Trust token claims instead of loading the user row; only token_version is checked
+    AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() == "true"
+    # How long a worker trusts its cached token versions (without Redis)
+    AUTH_VERSION_CACHE_SECONDS = int(os.getenv("AUTH_VERSION_CACHE_SECONDS", "30"))
+    # Bloom filter in front of the token revocation list (revocations before it is rebuilt larger)
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
     
     # CORS
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -31,34 +42,87 @@ class Settings:
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
-
-
-settings = Settings()
-
-
-class Settings:
-    """Application settings loaded from environment variables."""
     
-    # FastAPI
-    APP_TITLE = "Sweet Shop Management System"
-    APP_DESCRIPTION = "API for managing a sweet shop"
-    APP_VERSION = "1.0.0"
+    # Scheduled maintenance jobs
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "10"))
+    LOW_STOCK_SCAN_INTERVAL_SECONDS = int(os.getenv("LOW_STOCK_SCAN_INTERVAL_SECONDS", "300"))
+    DB_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("DB_MAINTENANCE_INTERVAL_SECONDS", "86400"))
+    PURGE_EXPIRED_INTERVAL_SECONDS = int(os.getenv("PURGE_EXPIRED_INTERVAL_SECONDS", "3600"))
     
-    # JWT
-    SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
-    ALGORITHM = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    # Response compression (brotli/zstd are used when their packages are installed)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
     
-    # CORS
-    ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
+    # Idempotency-Key handling
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+    IDEMPOTENCY_WAIT_SECONDS = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
     
-    # ImageKit
-    IMAGEKIT_PRIVATE_KEY = os.getenv("IMAGEKIT_PRIVATE_KEY")
-    IMAGEKIT_PUBLIC_KEY = os.getenv("IMAGEKIT_PUBLIC_KEY")
-    IMAGEKIT_URL_ENDPOINT = os.getenv("IMAGEKIT_URL_ENDPOINT")
+    # Stock event stream
+    STOCK_EVENTS_MAX_PENDING = int(os.getenv("STOCK_EVENTS_MAX_PENDING", "1000"))
+    STOCK_EVENTS_HEARTBEAT_SECONDS = int(os.getenv("STOCK_EVENTS_HEARTBEAT_SECONDS", "15"))
     
-    # Database
-    DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    # Flash-sale group commit: purchases per batch, and how long the writer
+    # waits for more purchases to join a batch
+    FLASH_SALE_BATCH_SIZE = int(os.getenv("FLASH_SALE_BATCH_SIZE", "200"))
+    FLASH_SALE_LINGER_MS = float(os.getenv("FLASH_SALE_LINGER_MS", "2"))
+    
+    # Asynchronous order intake
+    ORDER_CONSUMERS = int(os.getenv("ORDER_CONSUMERS", "2"))
+    ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", "50"))
+    ORDER_POLL_INTERVAL_SECONDS = float(os.getenv("ORDER_POLL_INTERVAL_SECONDS", "1"))
+    ORDER_CLAIM_TIMEOUT_SECONDS = int(os.getenv("ORDER_CLAIM_TIMEOUT_SECONDS", "60"))
+    # Claims after which an order that keeps breaking its processing is failed
+    ORDER_MAX_ATTEMPTS = int(os.getenv("ORDER_MAX_ATTEMPTS", "3"))
+    ORDER_WAIT_MAX_SECONDS = int(os.getenv("ORDER_WAIT_MAX_SECONDS", "30"))
+    
+    # Stock reservations (cart holds)
+    RESERVATION_HOLD_SECONDS = int(os.getenv("RESERVATION_HOLD_SECONDS", "900"))
+    RESERVATION_ATS_CACHE_SECONDS = int(os.getenv("RESERVATION_ATS_CACHE_SECONDS", "5"))
+    RESERVATION_EXPIRY_INTERVAL_SECONDS = int(os.getenv("RESERVATION_EXPIRY_INTERVAL_SECONDS", "60"))
+    
+    # Demand forecasting and restock suggestions
+    FORECAST_METHOD = os.getenv("FORECAST_METHOD", "exponential")  # or "moving_average"
+    FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "28"))
+    FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+    FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "365"))
+    FORECAST_LEAD_TIME_DAYS = int(os.getenv("FORECAST_LEAD_TIME_DAYS", "7"))
+    FORECAST_TARGET_DAYS = int(os.getenv("FORECAST_TARGET_DAYS", "14"))
+    FORECAST_INTERVAL_SECONDS = int(os.getenv("FORECAST_INTERVAL_SECONDS", "86400"))
+    
+    # Delta sync: how long deletions stay visible; older sync tokens must resync
+    CATALOG_TOMBSTONE_RETENTION_DAYS = int(os.getenv("CATALOG_TOMBSTONE_RETENTION_DAYS", "30"))
+    
+    # Transactional outbox: webhook endpoints receiving inventory events, and delivery tuning
+    OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+    OUTBOX_WEBHOOK_URLS = [url.strip() for url in os.getenv("OUTBOX_WEBHOOK_URLS", "").split(",") if url.strip()]
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_ENDPOINT_CONCURRENCY = int(os.getenv("OUTBOX_ENDPOINT_CONCURRENCY", "2"))
+    OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+    OUTBOX_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_TIMEOUT_SECONDS", "10"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "2"))
+    OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "600"))
+    OUTBOX_CLAIM_TIMEOUT_SECONDS = int(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS", "60"))
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+    
+    # Rate limiting: "<count>/<second|minute|hour>" token buckets, empty to disable one limit
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_GLOBAL = os.getenv("RATE_LIMIT_GLOBAL", "6000/minute")  # per client IP, every route
+    RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/minute")  # per client IP
+    RATE_LIMIT_PURCHASE = os.getenv("RATE_LIMIT_PURCHASE", "30/minute")  # per user
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+    
+    # Redis-compatible server shared by workers (optional)
+    REDIS_URL = os.getenv("REDIS_URL")
+    
+    # Caching
+    CATEGORY_CACHE_TTL_SECONDS = int(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "60"))
 
 
 settings = Settings()
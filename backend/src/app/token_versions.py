@@ -0,0 +1,123 @@
+"""
+Token versions: revoking access tokens when a user's credentials or role change.
+
+Every user has a ``token_version`` that is bumped on any change to its
+password, is_admin or is_active (by a flush hook, whichever code path makes the
+change). Access tokens carry the version they were issued for in a ``ver``
+claim. A token is only accepted while its version is current.
+
+In stateless mode (AUTH_STATELESS) authorization trusts the token claims and
+checks only the version, from a small map of user id to version instead of the
+user row. The map is a per-worker TTL cache, loaded from the users table on a
+miss. Other workers see a bump once their entry expires, so revocation takes at
+most AUTH_VERSION_CACHE_SECONDS there. With Redis configured the map is a shared
+hash that writers update on commit, so a bump is seen everywhere at once.
+Readers fill a missing entry only if it is still missing (HSETNX): a version
+they loaded before a concurrent bump cannot overwrite the bump's entry, so
+the hash needs no expiry to stay current.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .redis import get_redis
+from .settings import settings
+from ..modules.V1.AuthManager.dao import AuthDAO
+from ..modules.V1.AuthManager.models import User
+
+# Fields whose change invalidates the user's tokens
+REVOKING_FIELDS = ("password", "is_admin", "is_active")
+# Stored for deleted and inactive users: no token version is valid
+NO_VERSION = -1
+
+_BUMPED = "token_versions_bumped"
+
+
+class TokenVersionMap:
+    """Current token version per user id (None: user missing or inactive)."""
+
+    def __init__(self, ttl_seconds: float = settings.AUTH_VERSION_CACHE_SECONDS, maxsize: int = 100000):
+        self.cache = TTLCache(ttl_seconds=ttl_seconds, maxsize=maxsize)
+        self.redis_key: Optional[str] = None
+
+    def use_redis(self, key: str = "token_versions") -> None:
+        """Share versions between workers in a Redis hash (local caching is then skipped)."""
+        self.redis_key = key
+        self.cache.clear()
+
+    def get(self, db: Session, user_id: int) -> Optional[int]:
+        """
+        Get a user's current token version, loading it from the users table on a miss.
+
+        Returns:
+            The version, or None if the user does not exist or is inactive
+        """
+        if self.redis_key is None:
+            missing = object()
+            version = self.cache.get(user_id, missing)
+            if version is not missing:
+                return version
+        else:
+            stored = get_redis().hget(self.redis_key, user_id)
+            if stored is not None:
+                return None if int(stored) == NO_VERSION else int(stored)
+
+        state = AuthDAO.get_token_state(db, user_id)
+        version = state[0] if state is not None and state[1] else None
+        if self.redis_key is None:
+            self.cache.set(user_id, version)
+        elif not get_redis().hsetnx(self.redis_key, user_id, NO_VERSION if version is None else version):
+            # A writer published while we read the row: its version is newer
+            stored = int(get_redis().hget(self.redis_key, user_id))
+            return None if stored == NO_VERSION else stored
+        return version
+
+    def set(self, user_id: int, version: Optional[int]) -> None:
+        """Record a user's current version (None revokes every token of the user)."""
+        if self.redis_key is None:
+            self.cache.set(user_id, version)
+        else:
+            get_redis().hset(self.redis_key, user_id, NO_VERSION if version is None else version)
+
+    def clear(self) -> None:
+        """Forget every cached version (Redis entries are kept; they are always current)."""
+        self.cache.clear()
+
+
+token_versions = TokenVersionMap()
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_versions(session: Session, flush_context, instances) -> None:
+    """Bump token_version of users whose password, role or active flag change in this flush."""
+    bumped: Dict[int, Optional[int]] = session.info.setdefault(_BUMPED, {})
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in REVOKING_FIELDS):
+            obj.token_version = (obj.token_version or 0) + 1
+            bumped[obj.user_id] = obj.token_version if obj.is_active else None
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            bumped[obj.user_id] = None
+    if not bumped:
+        session.info.pop(_BUMPED, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_token_versions(session: Session) -> None:
+    """Make committed bumps visible to authorization."""
+    for user_id, version in session.info.pop(_BUMPED, {}).items():
+        try:
+            token_versions.set(user_id, version)
+        except Exception as e:
+            print(f"Warning: Failed to publish token version of user {user_id}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_versions(session: Session) -> None:
+    """Rolled-back bumps never happened."""
+    session.info.pop(_BUMPED, None)
@@ -43,7 +43,7 @@ user_login_handler = {
             "**Fields accepted:**\n"
             "- `username` (required) - Username or email\n"
             "- `password` (required) - User password\n\n"
-            "**Returns:** JWT access token and token type.\n"
+            "**Returns:** JWT access token, token type and a refresh token for `/auth/refresh`.\n"
         ),
         "openapi_extra": {
             "requestBody": {
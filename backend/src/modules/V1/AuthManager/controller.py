@@ -9,11 +9,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from ....app.database import get_db
-from ....app.auth import get_current_user, get_current_admin_user
+from ....app.auth import get_current_user, get_current_admin_user, decode_access_token
 from .models import User
 from .schemas import (
     UserCreate, UserUpdate, UserResponse, TokenResponse, LoginRequest,
-    AdminCreate, AdminUpdate, AdminResponse
+    AdminCreate, AdminUpdate, AdminResponse, RefreshRequest, LogoutRequest, RevokeTokenRequest
 )
 from .services import AuthService
 from .dao import AuthDAO
@@ -53,7 +53,7 @@ class AuthController:
             db: Database session
             
         Returns:
-            TokenResponse with access token and user info
+            TokenResponse with access token, refresh token and user info
         """
         access_token, token_type, user = AuthService.login_user(
             db=db,
@@ -64,9 +64,73 @@ class AuthController:
         return TokenResponse(
             access_token=access_token,
             token_type=token_type,
-            user=user
+            user=user,
+            refresh_token=AuthService.start_session(db, user)
         )
     
+    @staticmethod
+    def refresh(refresh_data: RefreshRequest, db: Session = Depends(get_db)) -> TokenResponse:
+        """
+        Handle refresh token exchange request.
+        
+        Args:
+            refresh_data: Refresh token from login or the previous refresh
+            db: Database session
+            
+        Returns:
+            TokenResponse with a new access token and the rotated refresh token
+        """
+        access_token, token_type, user, refresh_token = AuthService.refresh_session(
+            db=db,
+            refresh_token=refresh_data.refresh_token
+        )
+        
+        return TokenResponse(
+            access_token=access_token,
+            token_type=token_type,
+            user=user,
+            refresh_token=refresh_token
+        )
+    
+    @staticmethod
+    def logout(
+        token: str,
+        logout_data: LogoutRequest = None,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> None:
+        """
+        Handle logout request.
+        
+        Args:
+            token: Access token used for the request (already verified)
+            logout_data: Refresh token of the session to end (optional)
+            db: Database session
+            current_user: Current authenticated user
+        """
+        AuthService.logout(
+            db=db,
+            user_id=current_user.user_id,
+            token_claims=decode_access_token(token) or {},
+            refresh_token=logout_data.refresh_token if logout_data else None
+        )
+        return None
+    
+    @staticmethod
+    def revoke_token(
+        revoke_data: RevokeTokenRequest,
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> None:
+        """
+        Revoke an access token by its jti (admin only).
+        
+        Args:
+            revoke_data: jti of the token to revoke
+            current_admin: Current authenticated admin user
+        """
+        AuthService.revoke_access_token(revoke_data.jti)
+        return None
+    
     @staticmethod
     def get_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> dict:
         """
@@ -91,17 +155,26 @@ class AuthController:
         }
     
     @staticmethod
-    def read_current_user(current_user: User = Depends(get_current_user)) -> UserResponse:
+    def read_current_user(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+    ) -> UserResponse:
         """
         Get current authenticated user information.
         
         Args:
             current_user: Current authenticated user
+            db: Database session (loads the row in stateless mode)
             
         Returns:
             UserResponse with current user data
         """
-        return current_user
+        if isinstance(current_user, User):
+            return current_user
+        user = AuthDAO.get_user_by_id(db, current_user.user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
     
     @staticmethod
     def get_all_users(
@@ -182,7 +255,8 @@ class AuthController:
             username=user_update.username,
             email=user_update.email,
             password=user_update.password,
-            is_admin=user_update.is_admin
+            is_admin=user_update.is_admin,
+            is_active=user_update.is_active
         )
         return updated_user
     
@@ -2,9 +2,10 @@
 Authentication manager database access object (DAO) layer.
 Handles all database queries related to users and authentication.
 """
+from datetime import datetime
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from .models import User
+from typing import Optional, List, Tuple
+from .models import User, RefreshToken
 
 
 class AuthDAO:
@@ -25,6 +26,11 @@ class AuthDAO:
         """Get user by ID."""
         return db.query(User).filter(User.user_id == user_id).first()
     
+    @staticmethod
+    def get_token_state(db: Session, user_id: int) -> Optional[Tuple[int, bool]]:
+        """Get a user's (token_version, is_active) without loading the row."""
+        return db.query(User.token_version, User.is_active).filter(User.user_id == user_id).first()
+    
     @staticmethod
     def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Get all users with pagination."""
@@ -66,3 +72,44 @@ class AuthDAO:
         if exclude_user_id:
             query = query.filter(User.user_id != exclude_user_id)
         return query.first() is not None
+    
+    @staticmethod
+    def add_refresh_token(db: Session, refresh_token: RefreshToken) -> RefreshToken:
+        """Add a refresh token without committing."""
+        db.add(refresh_token)
+        return refresh_token
+    
+    @staticmethod
+    def get_refresh_token_by_hash(db: Session, token_hash: str) -> Optional[RefreshToken]:
+        """Get a refresh token by the SHA-256 hash of its value."""
+        return db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+    
+    @staticmethod
+    def rotate_refresh_token(db: Session, refresh_token_id: int, now: datetime) -> bool:
+        """
+        Mark an active refresh token rotated, without committing.
+        
+        A conditional UPDATE, so of two concurrent uses of one token only one rotates it.
+        
+        Returns:
+            Whether this call rotated the token
+        """
+        return db.query(RefreshToken).filter(
+            RefreshToken.refresh_token_id == refresh_token_id,
+            RefreshToken.status == "active"
+        ).update({"status": "rotated", "used_at": now}, synchronize_session=False) == 1
+    
+    @staticmethod
+    def revoke_refresh_family(db: Session, family_id: str) -> int:
+        """Revoke every active token of a session family, without committing."""
+        return db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.status == "active"
+        ).update({"status": "revoked"}, synchronize_session=False)
+    
+    @staticmethod
+    def purge_refresh_tokens(db: Session, before: datetime) -> int:
+        """Delete refresh tokens that expired before the given time."""
+        return db.query(RefreshToken).filter(
+            RefreshToken.expires_at < before
+        ).delete(synchronize_session=False)
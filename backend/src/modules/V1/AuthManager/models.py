@@ -1,7 +1,7 @@
 """
 AuthManager models for user authentication and authorization.
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
 from datetime import datetime
 from ....app.database import Base
 
@@ -18,5 +18,26 @@ class User(Base):
     password = Column(String(255), nullable=False)  # Will store hashed password
     is_admin = Column(Boolean, default=False, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    # Bumped whenever password, is_admin or is_active change; tokens carry the version they were issued for
+    token_version = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class RefreshToken(Base):
+    """
+    A server-side session: an opaque refresh token stored as its SHA-256 hash.
+    Each use rotates it to a new token of the same family; presenting a rotated
+    token again revokes the whole family (the token was stolen or replayed).
+    """
+    __tablename__ = "refresh_tokens"
+    refresh_token_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # User's token_version when the session started; a bump ends the session
+    token_version = Column(Integer, default=0, nullable=False)
+    status = Column(String(20), default="active", nullable=False)  # active, rotated, revoked
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
@@ -8,11 +8,12 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from ....app.database import get_db
-from ....app.auth import get_current_user, get_current_admin_user
+from ....app.auth import get_current_user, get_current_admin_user, oauth2_scheme
+from ....app.ratelimit import rate_limit, login_limit
 from .models import User
 from .schemas import (
     UserCreate, UserUpdate, UserResponse, TokenResponse, LoginRequest,
-    AdminCreate, AdminResponse
+    AdminCreate, AdminResponse, RefreshRequest, LogoutRequest, RevokeTokenRequest
 )
 from .controller import AuthController
 
@@ -27,23 +28,46 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return AuthController.register_user(user, db)
 
 
-@router.post("/login", response_model=TokenResponse)
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit(login_limit))])
 def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    """Authenticate user and return JWT access token."""
+    """Authenticate user and return a JWT access token and a refresh token."""
     return AuthController.login(login_data, db)
     
 
 
-@router.post("/token")
+@router.post("/refresh", response_model=TokenResponse)
+def refresh_token(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token without re-entering the password.
+    The refresh token is rotated: use the one returned; reusing an old one revokes the session.
+    """
+    return AuthController.refresh(refresh_data, db)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    logout_data: LogoutRequest = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Log out: the access token used for this request stops working immediately.
+    Send the refresh token as well to end the session it belongs to.
+    """
+    return AuthController.logout(token, logout_data, db, current_user)
+
+
+@router.post("/token", dependencies=[Depends(rate_limit(login_limit))])
 def get_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """OAuth2 compatible token endpoint for FastAPI docs authorization."""
     return AuthController.get_token(form_data, db)
 
 
 @router.get("/me", response_model=UserResponse)
-async def read_current_user(current_user: User = Depends(get_current_user)):
+def read_current_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get current authenticated user information."""
-    return AuthController.read_current_user(current_user)
+    return AuthController.read_current_user(current_user, db)
 
 
 @router.get("/users", response_model=List[UserResponse])
@@ -90,6 +114,15 @@ def delete_user(
 
 # ==================== ADMIN ENDPOINTS ====================
 
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_token(
+    revoke_data: RevokeTokenRequest,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Revoke an access token by its jti claim. Requires admin authentication."""
+    return AuthController.revoke_token(revoke_data, current_admin)
+
+
 @router.post("/admins/register", response_model=AdminResponse, status_code=status.HTTP_201_CREATED)
 def register_admin(
     admin: AdminCreate,
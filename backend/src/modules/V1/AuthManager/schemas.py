@@ -1,7 +1,7 @@
 """
 Authentication manager schemas for request/response validation.
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 
@@ -19,6 +19,7 @@ class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     password: Optional[str] = None
     is_admin: Optional[bool] = None
+    is_active: Optional[bool] = None
 
 
 class UserResponse(BaseModel):
@@ -37,6 +38,22 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str
     user: Optional[UserResponse] = None
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token for new tokens."""
+    refresh_token: str = Field(..., min_length=1, max_length=255)
+
+
+class LogoutRequest(BaseModel):
+    """Schema for logging out; the refresh token, if given, ends its session too."""
+    refresh_token: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
+class RevokeTokenRequest(BaseModel):
+    """Schema for revoking an access token by its jti claim."""
+    jti: str = Field(..., min_length=1, max_length=64)
 
 
 class LoginRequest(BaseModel):
@@ -2,15 +2,21 @@
 Authentication manager services layer.
 Contains business logic for authentication and user management.
 """
-from datetime import timedelta
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from ....app.auth import (
-    authenticate_user, create_access_token, get_password_hash
+    authenticate_user, create_access_token, get_password_hash,
+    generate_refresh_token, hash_refresh_token
 )
+from ....app.cron import register_purger
+from ....app.revocation import revocation_list
 from ....app.settings import settings
-from .models import User
+from .models import User, RefreshToken
 from .dao import AuthDAO
 
 
@@ -88,20 +94,145 @@ class AuthService:
                 detail="User account is inactive"
             )
         
-        # Create access token
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": str(user.user_id), "username": user.username, "is_admin": user.is_admin},
-            expires_delta=access_token_expires
+        return AuthService.create_user_access_token(user), "bearer", user
+    
+    @staticmethod
+    def create_user_access_token(user: User) -> str:
+        """Create an access token carrying the user's id, name, role and token version."""
+        return create_access_token(
+            data={
+                "sub": str(user.user_id), "username": user.username, "is_admin": user.is_admin,
+                "ver": user.token_version
+            },
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
+    
+    @staticmethod
+    def issue_refresh_token(db: Session, user: User, family_id: Optional[str] = None) -> str:
+        """
+        Add a refresh token for the user, without committing.
         
-        return access_token, "bearer", user
+        Args:
+            db: Database session
+            user: User the session belongs to
+            family_id: Session family when rotating; a new session starts without one
+            
+        Returns:
+            The opaque token (only its hash is stored)
+        """
+        token = generate_refresh_token()
+        AuthDAO.add_refresh_token(db, RefreshToken(
+            user_id=user.user_id,
+            family_id=family_id or uuid.uuid4().hex,
+            token_hash=hash_refresh_token(token),
+            token_version=user.token_version,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        return token
+    
+    @staticmethod
+    def start_session(db: Session, user: User) -> str:
+        """Start a server-side session for a user who just logged in; returns its refresh token."""
+        token = AuthService.issue_refresh_token(db, user)
+        db.commit()
+        return token
+    
+    @staticmethod
+    def refresh_session(db: Session, refresh_token: str) -> tuple:
+        """
+        Exchange a refresh token for a new access token and a new refresh token.
+        
+        No password is verified: the token is looked up by its SHA-256 hash.
+        The presented token is rotated; presenting it again later is treated as
+        theft and revokes its whole session family. Sessions also end when the
+        user's token_version changes (password, role or active flag) or the
+        user is deactivated.
+        
+        Args:
+            db: Database session
+            refresh_token: Opaque refresh token from login or the previous refresh
+            
+        Returns:
+            Tuple of (access_token, token_type, user, refresh_token)
+            
+        Raises:
+            HTTPException: 401 if the token is unknown, expired, revoked or reused
+        """
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        reused = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token was already used; session revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        now = datetime.utcnow()
+        stored = AuthDAO.get_refresh_token_by_hash(db, hash_refresh_token(refresh_token))
+        if stored is None or stored.status == "revoked" or stored.expires_at <= now:
+            raise invalid
+        
+        if stored.status == "rotated":
+            AuthDAO.revoke_refresh_family(db, stored.family_id)
+            db.commit()
+            raise reused
+        
+        user = AuthDAO.get_user_by_id(db, stored.user_id)
+        if user is None or not user.is_active or user.token_version != stored.token_version:
+            AuthDAO.revoke_refresh_family(db, stored.family_id)
+            db.commit()
+            raise invalid
+        
+        if not AuthDAO.rotate_refresh_token(db, stored.refresh_token_id, now):
+            # A concurrent request rotated it first: the same token was used twice
+            AuthDAO.revoke_refresh_family(db, stored.family_id)
+            db.commit()
+            raise reused
+        
+        new_refresh_token = AuthService.issue_refresh_token(db, user, stored.family_id)
+        db.commit()
+        return AuthService.create_user_access_token(user), "bearer", user, new_refresh_token
+    
+    @staticmethod
+    def logout(db: Session, user_id: int, token_claims: dict, refresh_token: Optional[str] = None) -> None:
+        """
+        End a session: revoke the presented access token and, if given, the refresh token's family.
+        
+        The access token is revoked by its jti until its own expiry. A refresh
+        token of another user is ignored.
+        
+        Args:
+            db: Database session
+            user_id: Authenticated user
+            token_claims: Claims of the access token used for the request
+            refresh_token: Refresh token of the session to end (optional)
+        """
+        if token_claims.get("jti"):
+            revocation_list.revoke(token_claims["jti"], token_claims.get("exp", 0))
+        
+        if refresh_token is not None:
+            stored = AuthDAO.get_refresh_token_by_hash(db, hash_refresh_token(refresh_token))
+            if stored is not None and stored.user_id == user_id:
+                AuthDAO.revoke_refresh_family(db, stored.family_id)
+                db.commit()
+    
+    @staticmethod
+    def revoke_access_token(jti: str) -> None:
+        """
+        Revoke an access token by its jti (admin action).
+        
+        The token's exp is not known here, so the jti stays revoked for the
+        longest lifetime an access token can have.
+        """
+        revocation_list.revoke(jti, time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
     
     @staticmethod
     def update_user(db: Session, user: User, username: str = None, email: str = None, 
-                    password: str = None, is_admin: bool = None) -> User:
+                    password: str = None, is_admin: bool = None, is_active: bool = None) -> User:
         """
-        Update user information.
+        Update user information. Changing the password, admin status or active
+        flag revokes the user's existing tokens (token_version is bumped on flush).
         
         Args:
             db: Database session
@@ -110,6 +241,7 @@ class AuthService:
             email: New email (optional)
             password: New password (optional)
             is_admin: New admin status (optional)
+            is_active: New active flag (optional)
             
         Returns:
             Updated User object
@@ -132,9 +264,13 @@ class AuthService:
             user.password = get_password_hash(password)
         
         # Update admin status
-        if is_admin is not None:
+        if is_admin is not None and is_admin != user.is_admin:
             user.is_admin = is_admin
         
+        # Update active flag
+        if is_active is not None and is_active != user.is_active:
+            user.is_active = is_active
+        
         return AuthDAO.update_user(db, user)
     
     @staticmethod
@@ -176,3 +312,9 @@ class AuthService:
         )
         
         return AuthDAO.create_user(db, new_admin)
+
+
+@register_purger("refresh_tokens")
+def purge_expired_refresh_tokens(db: Session, now: datetime) -> int:
+    """Delete refresh tokens past their expiry (rotated and revoked ones included)."""
+    return AuthDAO.purge_refresh_tokens(db, now)
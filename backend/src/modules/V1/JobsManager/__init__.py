@@ -0,0 +1,4 @@
+"""Scheduled jobs manager module."""
+from .routers import router
+
+__all__ = ["router"]
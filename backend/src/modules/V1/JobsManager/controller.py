@@ -0,0 +1,66 @@
+"""
+Scheduled jobs manager controller layer.
+Handles request/response processing for maintenance job endpoints.
+"""
+from typing import List
+from fastapi import HTTPException, status, Depends
+from sqlalchemy.orm import Session
+
+from ....app.database import get_db
+from ....app.auth import get_current_admin_user
+from ....app.cron import scheduler, ScheduledJob, JobAlreadyRunning, JobLeaseHeld
+from ..AuthManager.models import User
+from .schemas import JobStatusResponse, JobRunResponse
+
+
+class JobsController:
+    """Controller for listing and triggering scheduled jobs."""
+    
+    @staticmethod
+    def _job_status(job: ScheduledJob) -> JobStatusResponse:
+        """Build the status response for a job."""
+        metrics = job.metrics
+        return JobStatusResponse(
+            name=job.name,
+            interval_seconds=job.interval_seconds,
+            running=job.running,
+            runs=metrics.runs,
+            failures=metrics.failures,
+            skipped_not_leader=metrics.skipped_not_leader,
+            last_run_at=metrics.last_run_at,
+            last_status=metrics.last_status,
+            last_duration_ms=metrics.last_duration_ms,
+            avg_duration_ms=metrics.avg_duration_ms,
+            max_duration_ms=metrics.max_duration_ms,
+            last_error=metrics.last_error,
+            last_result=metrics.last_result
+        )
+    
+    @staticmethod
+    def get_all_jobs(current_admin: User = Depends(get_current_admin_user)) -> List[JobStatusResponse]:
+        """List all scheduled jobs with their metrics."""
+        return [JobsController._job_status(job) for job in scheduler.jobs.values()]
+    
+    @staticmethod
+    def run_job(
+        job_name: str,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> JobRunResponse:
+        """Run a job immediately in this worker, unless another worker holds its lease."""
+        job = scheduler.get_job(job_name)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        try:
+            return JobRunResponse(**scheduler.run_now(job, db))
+        except JobAlreadyRunning:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Job is already running"
+            )
+        except JobLeaseHeld:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Job is leased by another worker"
+            )
@@ -0,0 +1,31 @@
+"""
+Scheduled jobs manager router.
+Defines admin endpoints for inspecting and triggering maintenance jobs.
+"""
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ....app.database import get_db
+from ....app.auth import get_current_admin_user
+from ..AuthManager.models import User
+from .schemas import JobStatusResponse, JobRunResponse
+from .controller import JobsController
+
+router = APIRouter(prefix="/jobs", tags=["Scheduled Jobs"])
+
+
+@router.get("/", response_model=List[JobStatusResponse])
+def get_all_jobs(current_admin: User = Depends(get_current_admin_user)):
+    """List scheduled jobs with per-job timing metrics. Requires admin authentication."""
+    return JobsController.get_all_jobs(current_admin)
+
+
+@router.post("/{job_name}/run", response_model=JobRunResponse)
+def run_job(
+    job_name: str,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Trigger a scheduled job manually. Requires admin authentication."""
+    return JobsController.run_job(job_name, db, current_admin)
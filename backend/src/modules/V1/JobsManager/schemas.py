@@ -0,0 +1,33 @@
+"""
+Scheduled jobs manager schemas for response validation.
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class JobStatusResponse(BaseModel):
+    """Schema for a scheduled job with its metrics in this worker."""
+    name: str
+    interval_seconds: int
+    running: bool
+    runs: int
+    failures: int
+    skipped_not_leader: int
+    last_run_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_duration_ms: Optional[float] = None
+    avg_duration_ms: Optional[float] = None
+    max_duration_ms: float
+    last_error: Optional[str] = None
+    last_result: Optional[dict] = None
+
+
+class JobRunResponse(BaseModel):
+    """Schema for the outcome of a manually triggered job run."""
+    job_name: str
+    status: str
+    started_at: datetime
+    duration_ms: float
+    result: Optional[dict] = None
+    error: Optional[str] = None
@@ -0,0 +1,4 @@
+"""Runtime metrics manager module."""
+from .routers import router
+
+__all__ = ["router"]
@@ -0,0 +1,74 @@
+"""
+Runtime metrics manager controller layer.
+Handles request/response processing for metrics endpoints.
+"""
+from typing import List
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from ....app.auth import get_current_admin_user
+from ....app.database import get_db
+from ....app.compression import compression_metrics
+from ....app.events import stock_broadcaster
+from ....app.ratelimit import rate_limiter
+from ....app.revocation import revocation_list
+from ..AuthManager.models import User
+from ..OrdersManager.consumer import order_consumers
+from ..OrdersManager.schemas import OrderQueueStatsResponse
+from ..OutboxManager import outbox_dispatcher
+from ..OutboxManager.schemas import OutboxStatsResponse
+from .schemas import (
+    CompressionStatsResponse, StockStreamStatsResponse, RateLimitStatsResponse,
+    RevocationStatsResponse
+)
+
+
+class MetricsController:
+    """Controller for in-process runtime metrics."""
+    
+    @staticmethod
+    def get_compression_stats(
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> List[CompressionStatsResponse]:
+        """Get bytes saved and compression CPU time per endpoint."""
+        return [
+            CompressionStatsResponse(endpoint=endpoint, **stats)
+            for endpoint, stats in compression_metrics.snapshot().items()
+        ]
+    
+    @staticmethod
+    def get_stock_stream_stats(
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> StockStreamStatsResponse:
+        """Get stock event stream connection counts and delivery counters."""
+        return StockStreamStatsResponse(**stock_broadcaster.metrics.as_dict())
+    
+    @staticmethod
+    def get_order_queue_stats(
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> OrderQueueStatsResponse:
+        """Get the order queue backlog and this worker's consumer counters."""
+        return OrderQueueStatsResponse(**order_consumers.stats(db))
+    
+    @staticmethod
+    def get_outbox_stats(
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> OutboxStatsResponse:
+        """Get the outbox delivery backlog, lag and this worker's dispatcher counters."""
+        return OutboxStatsResponse(**outbox_dispatcher.stats(db))
+    
+    @staticmethod
+    def get_rate_limit_stats(
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> RateLimitStatsResponse:
+        """Get the rate limit store in use and this worker's allowed/rejected counters."""
+        return RateLimitStatsResponse(**rate_limiter.stats())
+    
+    @staticmethod
+    def get_revocation_stats(
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> RevocationStatsResponse:
+        """Get the revoked token count, Bloom filter size and this worker's check counters."""
+        return RevocationStatsResponse(**revocation_list.stats())
@@ -0,0 +1,62 @@
+"""
+Runtime metrics manager router.
+Defines admin endpoints exposing this worker's in-memory metrics.
+"""
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ....app.auth import get_current_admin_user
+from ....app.database import get_db
+from ..AuthManager.models import User
+from ..OrdersManager.schemas import OrderQueueStatsResponse
+from ..OutboxManager.schemas import OutboxStatsResponse
+from .schemas import (
+    CompressionStatsResponse, StockStreamStatsResponse, RateLimitStatsResponse,
+    RevocationStatsResponse
+)
+from .controller import MetricsController
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/compression", response_model=List[CompressionStatsResponse])
+def get_compression_stats(current_admin: User = Depends(get_current_admin_user)):
+    """Bytes saved and CPU cost of response compression per endpoint. Requires admin authentication."""
+    return MetricsController.get_compression_stats(current_admin)
+
+
+@router.get("/stock-stream", response_model=StockStreamStatsResponse)
+def get_stock_stream_stats(current_admin: User = Depends(get_current_admin_user)):
+    """Stock event stream connection counts and backpressure counters. Requires admin authentication."""
+    return MetricsController.get_stock_stream_stats(current_admin)
+
+
+@router.get("/orders", response_model=OrderQueueStatsResponse)
+def get_order_queue_stats(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Asynchronous order backlog, queue lag and consumer batch counters. Requires admin authentication."""
+    return MetricsController.get_order_queue_stats(db, current_admin)
+
+
+@router.get("/outbox", response_model=OutboxStatsResponse)
+def get_outbox_stats(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Webhook delivery backlog, lag and batch counters per endpoint. Requires admin authentication."""
+    return MetricsController.get_outbox_stats(db, current_admin)
+
+
+@router.get("/rate-limits", response_model=RateLimitStatsResponse)
+def get_rate_limit_stats(current_admin: User = Depends(get_current_admin_user)):
+    """Requests allowed and rejected per rate limit in this worker. Requires admin authentication."""
+    return MetricsController.get_rate_limit_stats(current_admin)
+
+
+@router.get("/revocations", response_model=RevocationStatsResponse)
+def get_revocation_stats(current_admin: User = Depends(get_current_admin_user)):
+    """Revoked tokens and how many checks the Bloom filter answered alone. Requires admin authentication."""
+    return MetricsController.get_revocation_stats(current_admin)
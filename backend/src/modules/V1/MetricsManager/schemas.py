@@ -0,0 +1,60 @@
+"""
+Runtime metrics manager schemas for response validation.
+"""
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class CompressionStatsResponse(BaseModel):
+    """Schema for response compression counters of one endpoint in this worker."""
+    endpoint: str
+    responses: int
+    compressed: int
+    bytes_in: int
+    bytes_out: int
+    bytes_saved: int
+    ratio: Optional[float] = None
+    cpu_ms: float
+    cpu_us_per_kb_saved: Optional[float] = None
+    encodings: Dict[str, int]
+
+
+class StockStreamStatsResponse(BaseModel):
+    """Schema for stock event stream connections and delivery counters in this worker."""
+    active_connections: int
+    active_by_transport: Dict[str, int]
+    total_connections: int
+    events_published: int
+    events_received: int
+    events_queued: int
+    events_coalesced: int
+    events_filtered: int
+    slow_consumers_dropped: int
+
+
+class RateLimitCounters(BaseModel):
+    """Requests allowed and rejected by one rate limit in this worker."""
+    name: str
+    allowed: int
+    rejected: int
+
+
+class RateLimitStatsResponse(BaseModel):
+    """Schema for rate limiter state and counters."""
+    enabled: bool
+    store: str
+    blocked_keys: int
+    limits: List[RateLimitCounters]
+
+
+class RevocationStatsResponse(BaseModel):
+    """Schema for the token revocation list and its Bloom filter in this worker."""
+    shared: bool
+    revoked: int
+    bloom_bits: int
+    bloom_hashes: int
+    bloom_items: int
+    checks: int
+    bloom_negatives: int
+    remote_lookups: int
+    revoked_hits: int
@@ -0,0 +1,4 @@
+"""Asynchronous order intake module."""
+from .routers import router
+
+__all__ = ["router"]
@@ -0,0 +1,195 @@
+"""
+Consumer pool draining the order queue.
+
+Each consumer thread claims a batch of the oldest pending orders, processes
+it in one transaction and notifies clients waiting on those orders. Placing
+an order wakes the consumers of this worker immediately; orders placed in
+other workers are picked up on the next poll. A consumer that dies leaves its
+claim behind, and the claim is taken over after ORDER_CLAIM_TIMEOUT_SECONDS.
+
+A batch whose transaction fails is retried one order at a time, so an order
+that breaks processing holds back only itself: it goes back to the queue, and
+is failed once it has been claimed ORDER_MAX_ATTEMPTS times.
+"""
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from ....app.database import SessionLocal
+from ....app.settings import settings
+from .dao import OrdersDAO
+from .models import Order
+from .services import OrdersService
+
+
+class OrderNotifier:
+    """Wakes clients waiting (on their event loop) for orders to be processed by this worker."""
+
+    def __init__(self):
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+
+    def notify(self) -> None:
+        """Signal that a batch of orders was processed (called from consumer threads)."""
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # The waiter's loop is closed
+                pass
+
+    async def wait(self, timeout: float) -> None:
+        """Wait until the next processed batch or the timeout, without holding a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+class OrderConsumerPool:
+    """Threads claiming and processing batches of pending orders."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 consumers: int = settings.ORDER_CONSUMERS,
+                 batch_size: int = settings.ORDER_BATCH_SIZE,
+                 poll_interval: float = settings.ORDER_POLL_INTERVAL_SECONDS,
+                 claim_timeout: int = settings.ORDER_CLAIM_TIMEOUT_SECONDS,
+                 max_attempts: int = settings.ORDER_MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.consumers = consumers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max_attempts
+        self.notifier = OrderNotifier()
+        self.metrics = {"batches": 0, "completed": 0, "failed": 0, "errors": 0, "max_batch": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the consumer threads are running."""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        """Start the consumer threads (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"order-consumer-{i}", daemon=True)
+            for i in range(self.consumers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the consumer threads after their current batch."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        """Tell idle consumers that new orders were queued."""
+        self._wake.set()
+
+    def process_batch(self, db: Session) -> int:
+        """
+        Claim and process one batch of orders.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of orders completed or failed (0 when the queue is empty)
+        """
+        claim_token = uuid.uuid4().hex
+        stale_before = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        orders = OrdersDAO.claim_orders(db, claim_token, self.batch_size, stale_before)
+        if not orders:
+            return 0
+
+        completed, failed = self._process(db, orders, claim_token)
+        with self._lock:
+            self.metrics["batches"] += 1
+            self.metrics["completed"] += completed
+            self.metrics["failed"] += failed
+            self.metrics["max_batch"] = max(self.metrics["max_batch"], len(orders))
+        if completed or failed:
+            self.notifier.notify()
+        return completed + failed
+
+    def _process(self, db: Session, orders: List[Order], claim_token: str) -> Tuple[int, int]:
+        """
+        Process claimed orders in one transaction, or else one at a time.
+
+        An order that fails on its own is released back to the queue (or failed
+        after max_attempts claims).
+
+        Returns:
+            Numbers of completed and failed orders
+        """
+        try:
+            return OrdersService.process_orders(db, orders, claim_token)
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Failed to process a batch of {len(orders)} order(s): {e}")
+            with self._lock:
+                self.metrics["errors"] += 1
+
+        if len(orders) > 1:
+            # Skip orders a partly successful attempt already processed, or another consumer took over
+            outcomes = [
+                self._process(db, [order], claim_token) for order in orders
+                if order.status == "processing" and order.claim_token == claim_token
+            ]
+            return sum(completed for completed, _ in outcomes), sum(failed for _, failed in outcomes)
+        return 0, OrdersDAO.release_orders(db, [orders[0].order_id], self.max_attempts, claim_token)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            processed = 0
+            db = self.session_factory()
+            try:
+                processed = self.process_batch(db)
+            except Exception as e:
+                print(f"Warning: Order consumer error: {e}")
+            finally:
+                db.close()
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stats(self, db: Session) -> dict:
+        """Queue backlog plus this worker's consumer counters."""
+        pending, oldest = OrdersDAO.get_backlog(db)
+        with self._lock:
+            metrics = dict(self.metrics)
+        return {
+            "consumers": self.consumers,
+            "running": self.running,
+            "pending": pending,
+            "oldest_pending_age_seconds": (
+                (datetime.utcnow() - oldest).total_seconds() if oldest else None
+            ),
+            **metrics,
+        }
+
+
+order_consumers = OrderConsumerPool()
@@ -0,0 +1,97 @@
+"""
+Orders manager controller layer.
+Handles request/response processing for asynchronous order endpoints.
+"""
+import time
+from typing import Optional, Union
+from fastapi import HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ....app.database import get_db
+from ....app.responses import FastJSONResponse
+from ....app.idempotency import run_idempotent
+from ....app.auth import get_current_user
+from ..AuthManager.models import User
+from ..SweetsManager.dao import SweetsDAO
+from .models import Order
+from .schemas import OrderCreate, OrderResponse, OrderStatus
+from .services import OrdersService
+from .dao import OrdersDAO
+from .consumer import order_consumers
+
+TERMINAL_STATUSES = {OrderStatus.COMPLETED.value, OrderStatus.FAILED.value}
+
+
+class OrdersController:
+    """Controller for handling asynchronous order requests and responses."""
+    
+    @staticmethod
+    def place_order(
+        order_data: OrderCreate,
+        idempotency_key: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Union[OrderResponse, FastJSONResponse]:
+        """Validate and queue a purchase, at most once per Idempotency-Key."""
+        def place() -> OrderResponse:
+            sweet = SweetsDAO.get_sweet_by_id(db, order_data.sweet_id)
+            if not sweet:
+                raise HTTPException(status_code=404, detail="Sweet not found")
+            
+            order = OrdersService.place_order(db, sweet, order_data.quantity, current_user)
+            return OrderResponse.model_validate(order)
+        
+        response = run_idempotent(
+            db, idempotency_key, current_user.user_id, "POST /orders",
+            order_data, place, status.HTTP_202_ACCEPTED
+        )
+        order_consumers.wake()
+        return response
+    
+    @staticmethod
+    def _get_own_order(db: Session, order_id: int, current_user: User) -> Order:
+        """Get an order of the current user (any order for admins)."""
+        order = OrdersDAO.get_order(db, order_id)
+        if not order or (order.user_id != current_user.user_id and not current_user.is_admin):
+            raise HTTPException(status_code=404, detail="Order not found")
+        return order
+    
+    @staticmethod
+    def get_order(
+        order_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Order:
+        """Get an order's current status."""
+        return OrdersController._get_own_order(db, order_id, current_user)
+    
+    @staticmethod
+    async def wait_for_order(
+        order_id: int,
+        timeout: float = 10.0,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Order:
+        """
+        Wait up to timeout seconds for an order to complete or fail, then return it.
+        
+        Waiting holds neither a threadpool thread nor a database connection: each
+        read runs in the threadpool and closes the session (returning its
+        connection to the pool) before the next wait on the event loop.
+        """
+        def read() -> Order:
+            try:
+                return OrdersController._get_own_order(db, order_id, current_user)
+            finally:
+                db.close()
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            order = await run_in_threadpool(read)
+            remaining = deadline - time.monotonic()
+            if order.status in TERMINAL_STATUSES or remaining <= 0:
+                return order
+            # Woken by this worker's consumers; re-read at least every second for
+            # orders processed by other workers
+            await order_consumers.notifier.wait(min(remaining, 1.0))
@@ -0,0 +1,108 @@
+"""
+OrdersManager data access layer.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from .models import Order
+
+
+class OrdersDAO:
+    """Data access object for order queue operations."""
+    
+    @staticmethod
+    def create_order(db: Session, order: Order) -> Order:
+        """Add an order and flush it to get its ID, without committing."""
+        db.add(order)
+        db.flush()
+        return order
+    
+    @staticmethod
+    def get_order(db: Session, order_id: int) -> Optional[Order]:
+        """Get order by ID."""
+        return db.query(Order).filter(Order.order_id == order_id).first()
+    
+    @staticmethod
+    def claim_orders(db: Session, claim_token: str, limit: int, stale_before: datetime) -> List[Order]:
+        """
+        Claim up to limit of the oldest pending orders (and abandoned claims) and commit.
+        
+        The claim is one conditional UPDATE, so two consumers never both claim an order.
+        Each claim counts as an attempt.
+        
+        Args:
+            db: Database session
+            claim_token: Unique token of this claim
+            limit: Maximum number of orders to claim
+            stale_before: Processing claims older than this are taken over
+            
+        Returns:
+            Claimed orders, oldest first
+        """
+        claimable = or_(
+            Order.status == "pending",
+            and_(Order.status == "processing", Order.claimed_at < stale_before),
+        )
+        oldest = db.query(Order.order_id).filter(claimable).order_by(Order.order_id).limit(limit)
+        claimed = db.query(Order).filter(Order.order_id.in_(oldest.scalar_subquery()), claimable).update(
+            {"status": "processing", "claim_token": claim_token, "claimed_at": datetime.utcnow(),
+             "attempts": Order.attempts + 1},
+            synchronize_session=False
+        )
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(Order).filter(Order.claim_token == claim_token).order_by(Order.order_id).all()
+    
+    @staticmethod
+    def get_claimed_orders_for_update(db: Session, order_ids: List[int], claim_token: str) -> List[Order]:
+        """
+        Lock the given orders that are still under this claim, oldest first.
+        Orders another consumer took over after the claim timed out are left out.
+        """
+        # populate_existing: the claim must be the one read under the lock
+        return db.query(Order).filter(
+            Order.order_id.in_(order_ids), Order.status == "processing", Order.claim_token == claim_token
+        ).order_by(Order.order_id).with_for_update().populate_existing().all()
+    
+    @staticmethod
+    def release_orders(db: Session, order_ids: List[int], max_attempts: int, claim_token: str) -> int:
+        """
+        Return claimed orders that could not be processed to the queue and commit.
+        Orders already claimed max_attempts times are marked failed instead; orders
+        no longer under this claim are left to the consumer that took them over.
+        
+        Args:
+            db: Database session
+            order_ids: Orders to release
+            max_attempts: Attempts after which an order is given up
+            claim_token: Token of the claim the orders were processed under
+            
+        Returns:
+            Number of orders marked failed
+        """
+        failed = 0
+        now = datetime.utcnow()
+        for order in db.query(Order).filter(
+            Order.order_id.in_(order_ids), Order.status == "processing", Order.claim_token == claim_token
+        ):
+            order.claim_token = None
+            order.claimed_at = None
+            if order.attempts >= max_attempts:
+                order.status = "failed"
+                order.error = "Order could not be processed"
+                order.processed_at = now
+                failed += 1
+            else:
+                order.status = "pending"
+        db.commit()
+        return failed
+    
+    @staticmethod
+    def get_backlog(db: Session) -> Tuple[int, Optional[datetime]]:
+        """Get the number of unprocessed orders and the creation time of the oldest."""
+        count, oldest = db.query(func.count(Order.order_id), func.min(Order.created_at)).filter(
+            Order.status.in_(["pending", "processing"])
+        ).one()
+        return count, oldest
@@ -0,0 +1,33 @@
+"""
+OrdersManager models for asynchronously processed purchases.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+from ....app.database import Base
+
+
+class Order(Base):
+    """
+    A purchase accepted with 202 and processed later by the order consumers.
+    The table is the durable queue: pending rows are claimed in batches, and a
+    claim whose consumer died is taken over once claimed_at is old enough. attempts counts
+    claims, so an order that keeps breaking its batch is eventually failed.
+    """
+    __tablename__ = "orders"
+    order_id = Column(Integer, primary_key=True, index=True)
+    sweet_id = Column(Integer, ForeignKey('sweets.sweet_id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, completed, failed
+    transaction_id = Column(Integer, ForeignKey('transactions.transaction_id'), nullable=True)
+    error = Column(Text, nullable=True)
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Consumers scan for the oldest claimable orders
+        Index('ix_orders_status_order_id', 'status', 'order_id'),
+    )
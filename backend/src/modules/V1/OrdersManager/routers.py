@@ -0,0 +1,62 @@
+"""
+Orders manager router.
+Defines asynchronous purchase endpoints.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, status, Query, Header
+from sqlalchemy.orm import Session
+
+from ....app.database import get_db
+from ....app.auth import get_current_user
+from ....app.ratelimit import rate_limit, purchase_limit
+from ....app.settings import settings
+from ..AuthManager.models import User
+from .schemas import OrderCreate, OrderResponse
+from .controller import OrdersController
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+# PLACE - Queue a purchase for asynchronous processing
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_202_ACCEPTED,
+             dependencies=[Depends(rate_limit(purchase_limit))])
+def place_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(
+        None, max_length=255,
+        description="Client-generated unique key; retries with the same key return the original order"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a purchase and return 202 with the pending order. Poll GET /orders/{order_id}
+    or wait on GET /orders/{order_id}/wait for the outcome. Requires authentication.
+    """
+    return OrdersController.place_order(order_data, idempotency_key, db, current_user)
+
+
+# READ - Poll an order's status
+@router.get("/{order_id}", response_model=OrderResponse)
+def get_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get an order's status; completed orders carry their transaction_id, failed ones an error. Requires authentication."""
+    return OrdersController.get_order(order_id, db, current_user)
+
+
+# WAIT - Long-poll until an order is processed
+@router.get("/{order_id}/wait", response_model=OrderResponse)
+async def wait_for_order(
+    order_id: int,
+    timeout: float = Query(10.0, ge=0, le=settings.ORDER_WAIT_MAX_SECONDS, description="Seconds to wait"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Return the order as soon as it completes or fails, or its current status once
+    timeout seconds pass. Requires authentication.
+    """
+    return await OrdersController.wait_for_order(order_id, timeout, db, current_user)
@@ -0,0 +1,50 @@
+"""
+OrdersManager schemas for request/response validation.
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class OrderStatus(str, Enum):
+    """Lifecycle of an asynchronous order."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class OrderCreate(BaseModel):
+    """Schema for placing an asynchronous purchase order."""
+    sweet_id: int
+    quantity: int = Field(..., gt=0, description="Quantity to purchase (must be greater than 0)")
+
+
+class OrderResponse(BaseModel):
+    """Schema for an order and, once processed, its outcome."""
+    order_id: int
+    sweet_id: int
+    user_id: int
+    quantity: int
+    status: OrderStatus
+    transaction_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class OrderQueueStatsResponse(BaseModel):
+    """Schema for the order queue backlog and this worker's consumer counters."""
+    consumers: int
+    running: bool
+    pending: int
+    oldest_pending_age_seconds: Optional[float] = None
+    batches: int
+    completed: int
+    failed: int
+    errors: int
+    max_batch: int
@@ -0,0 +1,110 @@
+"""
+OrdersManager business logic layer.
+"""
+from datetime import datetime
+from typing import List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from ..AuthManager.models import User
+from ..SweetsManager.models import Sweet
+from ..SweetsManager.dao import SweetsDAO
+from ..SweetsManager.services import SweetsService
+from .models import Order
+from .dao import OrdersDAO
+
+
+class OrdersService:
+    """Service class for asynchronous order intake and processing."""
+    
+    @staticmethod
+    def place_order(db: Session, sweet: Sweet, quantity: int, current_user: User) -> Order:
+        """
+        Validate a purchase and queue it as a pending order.
+        Changes are flushed, not committed; the caller commits.
+        
+        Args:
+            db: Database session
+            sweet: Sweet to purchase
+            quantity: Quantity to purchase
+            current_user: User placing the order
+            
+        Returns:
+            Created pending Order
+            
+        Raises:
+            HTTPException: If the stock is already insufficient
+        """
+        # Cheap early rejection on the same available-to-sell figure as a
+        # purchase (stock minus active holds); the consumer re-checks under the row lock
+        available = sweet.quantity_in_stock - SweetsDAO.get_held_quantity(db, sweet.sweet_id, datetime.utcnow())
+        if available < quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock. Available: {max(available, 0)}, Requested: {quantity}"
+            )
+        
+        order = Order(
+            sweet_id=sweet.sweet_id,
+            user_id=current_user.user_id,
+            quantity=quantity,
+            status="pending"
+        )
+        return OrdersDAO.create_order(db, order)
+    
+    @staticmethod
+    def process_orders(db: Session, orders: List[Order], claim_token: str) -> Tuple[int, int]:
+        """
+        Process a claimed batch of orders in one transaction.
+        
+        Each sweet row is locked once for the batch; orders are applied oldest
+        first, and an order the stock cannot cover fails without affecting the
+        rest of the batch. Orders whose claim another consumer took over (this
+        one ran past the claim timeout) are skipped.
+        
+        Args:
+            db: Database session
+            orders: Claimed orders
+            claim_token: Token of this batch's claim
+            
+        Returns:
+            Numbers of completed and failed orders
+        """
+        sweets = {
+            sweet.sweet_id: sweet
+            for sweet in SweetsDAO.get_sweets_for_update(db, list({order.sweet_id for order in orders}))
+        }
+        users = {
+            user.user_id: user
+            for user in db.query(User).filter(User.user_id.in_({order.user_id for order in orders}))
+        }
+        # Locked until commit, so the claim cannot be taken over mid-batch
+        claimed = OrdersDAO.get_claimed_orders_for_update(db, [order.order_id for order in orders], claim_token)
+        
+        completed = failed = 0
+        now = datetime.utcnow()
+        for order in claimed:
+            sweet = sweets.get(order.sweet_id)
+            user = users.get(order.user_id)
+            if sweet is None or user is None:
+                order.status = "failed"
+                order.error = "Sweet not found" if sweet is None else "User not found"
+                failed += 1
+            else:
+                try:
+                    transaction = SweetsService.purchase_sweet(db, sweet, order.quantity, user)
+                    order.status = "completed"
+                    order.transaction_id = transaction.transaction_id
+                    completed += 1
+                except HTTPException as e:
+                    order.status = "failed"
+                    order.error = e.detail
+                    failed += 1
+            order.processed_at = now
+            order.claim_token = None
+        
+        db.commit()
+        for sweet in sweets.values():
+            SweetsService.sync_flash_sale(sweet)
+        return completed, failed
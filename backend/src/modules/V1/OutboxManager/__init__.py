@@ -0,0 +1,5 @@
+"""Transactional outbox and webhook delivery of inventory events."""
+from .services import OutboxService
+from .dispatcher import outbox_dispatcher
+
+__all__ = ["OutboxService", "outbox_dispatcher"]
@@ -0,0 +1,137 @@
+"""
+OutboxManager data access layer.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from .models import OutboxEvent, OutboxDelivery
+
+
+class OutboxDAO:
+    """Data access object for the outbox and its delivery queue."""
+    
+    @staticmethod
+    def add_event(db: Session, event: OutboxEvent, endpoints: List[str]) -> OutboxEvent:
+        """Add an event with a pending delivery per endpoint, without flushing or committing."""
+        db.add(event)
+        db.add_all([OutboxDelivery(event=event, endpoint=endpoint) for endpoint in endpoints])
+        return event
+    
+    @staticmethod
+    def claim_deliveries(db: Session, endpoint: str, claim_token: str, limit: int,
+                         now: datetime, stale_before: datetime) -> List[Tuple[OutboxDelivery, OutboxEvent]]:
+        """
+        Claim up to limit of an endpoint's oldest due deliveries (and abandoned claims) and commit.
+        
+        The claim is one conditional UPDATE, so two dispatchers never both claim a delivery.
+        
+        Args:
+            db: Database session
+            endpoint: Webhook endpoint URL
+            claim_token: Unique token of this claim
+            limit: Maximum number of deliveries to claim
+            now: Deliveries scheduled up to this time are due
+            stale_before: Delivering claims older than this are taken over
+            
+        Returns:
+            Claimed deliveries with their events, oldest first
+        """
+        claimable = and_(
+            OutboxDelivery.endpoint == endpoint,
+            or_(
+                and_(OutboxDelivery.status == "pending", OutboxDelivery.next_attempt_at <= now),
+                and_(OutboxDelivery.status == "delivering", OutboxDelivery.claimed_at < stale_before),
+            ),
+        )
+        oldest = db.query(OutboxDelivery.delivery_id).filter(claimable).order_by(
+            OutboxDelivery.delivery_id
+        ).limit(limit)
+        claimed = db.query(OutboxDelivery).filter(
+            OutboxDelivery.delivery_id.in_(oldest.scalar_subquery()), claimable
+        ).update(
+            {"status": "delivering", "claim_token": claim_token, "claimed_at": now},
+            synchronize_session=False
+        )
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(OutboxDelivery, OutboxEvent).join(OutboxEvent).filter(
+            OutboxDelivery.claim_token == claim_token
+        ).order_by(OutboxDelivery.delivery_id).all()
+    
+    @staticmethod
+    def complete_claim(db: Session, claim_token: str, now: datetime) -> int:
+        """Mark the deliveries of a claim delivered and commit."""
+        delivered = db.query(OutboxDelivery).filter(
+            OutboxDelivery.claim_token == claim_token, OutboxDelivery.status == "delivering"
+        ).update(
+            {"status": "delivered", "delivered_at": now, "attempts": OutboxDelivery.attempts + 1,
+             "claim_token": None, "last_error": None},
+            synchronize_session=False
+        )
+        db.commit()
+        return delivered
+    
+    @staticmethod
+    def reschedule_claim(db: Session, claim_token: str, error: str, now: datetime, max_attempts: int,
+                         retry_delay: Callable[[int], float]) -> int:
+        """
+        Return the deliveries of a failed claim to the queue with backoff and commit.
+        Deliveries that reached max_attempts are marked dead instead.
+        
+        Args:
+            db: Database session
+            claim_token: Token of the failed claim
+            error: Failure description
+            now: Current time
+            max_attempts: Attempts after which a delivery is given up
+            retry_delay: Seconds to wait before the next attempt, given the attempts so far
+            
+        Returns:
+            Number of deliveries marked dead
+        """
+        dead = 0
+        for delivery in db.query(OutboxDelivery).filter(
+            OutboxDelivery.claim_token == claim_token, OutboxDelivery.status == "delivering"
+        ):
+            delivery.attempts += 1
+            delivery.last_error = error[:1000]
+            delivery.claim_token = None
+            if delivery.attempts >= max_attempts:
+                delivery.status = "dead"
+                dead += 1
+            else:
+                delivery.status = "pending"
+                delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+        db.commit()
+        return dead
+    
+    @staticmethod
+    def get_backlog(db: Session) -> List[Tuple[str, str, int, Optional[datetime]]]:
+        """Get (endpoint, status, deliveries, oldest event time) for every undelivered status."""
+        return db.query(
+            OutboxDelivery.endpoint, OutboxDelivery.status,
+            func.count(OutboxDelivery.delivery_id), func.min(OutboxEvent.created_at)
+        ).join(OutboxEvent).filter(
+            OutboxDelivery.status != "delivered"
+        ).group_by(OutboxDelivery.endpoint, OutboxDelivery.status).all()
+    
+    @staticmethod
+    def purge(db: Session, before: datetime) -> int:
+        """
+        Delete deliveries delivered before the given time, then events older than
+        it with no deliveries left. Does not commit.
+        
+        Returns:
+            Number of events deleted
+        """
+        db.query(OutboxDelivery).filter(
+            OutboxDelivery.status == "delivered", OutboxDelivery.delivered_at < before
+        ).delete(synchronize_session=False)
+        remaining = db.query(OutboxDelivery.delivery_id).filter(
+            OutboxDelivery.event_id == OutboxEvent.event_id
+        ).exists()
+        return db.query(OutboxEvent).filter(
+            OutboxEvent.created_at < before, ~remaining
+        ).delete(synchronize_session=False)
@@ -0,0 +1,270 @@
+"""
+Background delivery of outbox events to webhook endpoints.
+
+A dispatcher thread claims batches of due deliveries per endpoint and hands
+them to a thread pool, keeping at most OUTBOX_ENDPOINT_CONCURRENCY batches in
+flight per endpoint so a slow endpoint neither falls further behind nor
+starves the others. Each batch is one POST of {"events": [...]}; any 2xx
+acknowledges the whole batch, anything else reschedules it with exponential
+backoff until OUTBOX_MAX_ATTEMPTS, after which its deliveries are marked dead.
+
+Delivery is at least once: receivers deduplicate by event_id. Committing an
+outbox event wakes this worker's dispatcher immediately; events committed by
+other workers are picked up on the next poll.
+"""
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from ....app.database import SessionLocal
+from ....app.responses import dumps
+from ....app.settings import settings
+from .dao import OutboxDAO
+
+# Sends a JSON body to an endpoint and returns the HTTP status code
+Transport = Callable[[str, bytes], int]
+
+
+class OutboxDispatcher:
+    """Batched, retried webhook delivery with a concurrency limit per endpoint."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 endpoints: Optional[List[str]] = None,
+                 batch_size: int = settings.OUTBOX_BATCH_SIZE,
+                 concurrency: int = settings.OUTBOX_ENDPOINT_CONCURRENCY,
+                 poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+                 timeout: float = settings.OUTBOX_TIMEOUT_SECONDS,
+                 max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+                 retry_base: float = settings.OUTBOX_RETRY_BASE_SECONDS,
+                 retry_max: float = settings.OUTBOX_RETRY_MAX_SECONDS,
+                 claim_timeout: int = settings.OUTBOX_CLAIM_TIMEOUT_SECONDS,
+                 transport: Optional[Transport] = None):
+        self.session_factory = session_factory
+        self.endpoints = list(settings.OUTBOX_WEBHOOK_URLS if endpoints is None else endpoints)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.claim_timeout = claim_timeout
+        self.transport = transport or self._post
+        self._client: Optional[httpx.Client] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._metrics: Dict[str, dict] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the dispatcher thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start delivering in the background (no-op if running or no endpoint is configured)."""
+        if self.running or not self.endpoints:
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency * len(self.endpoints), thread_name_prefix="outbox-delivery"
+        )
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop claiming batches and wait for the batches in flight."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def wake(self) -> None:
+        """Tell the dispatcher that new events were committed."""
+        self._wake.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds before the next attempt after the given number of failed attempts."""
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    def dispatch_once(self, db: Session) -> int:
+        """
+        Claim due batches for every endpoint with free capacity and start delivering them.
+        Without a running thread pool (not started), batches are delivered inline.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of batches started
+        """
+        started = 0
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.claim_timeout)
+        for endpoint in self.endpoints:
+            while True:
+                with self._lock:
+                    if self._in_flight.get(endpoint, 0) >= self.concurrency:
+                        break
+                    self._in_flight[endpoint] = self._in_flight.get(endpoint, 0) + 1
+                claim_token = uuid.uuid4().hex
+                try:
+                    claimed = OutboxDAO.claim_deliveries(
+                        db, endpoint, claim_token, self.batch_size, now, stale_before
+                    )
+                    # Plain values: the next claim's commit expires these rows in db
+                    events = [
+                        {
+                            "event_id": event.event_id,
+                            "event_type": event.event_type,
+                            "sweet_id": event.sweet_id,
+                            "created_at": event.created_at,
+                            "data": json.loads(event.payload),
+                        }
+                        for _, event in claimed
+                    ]
+                except Exception:
+                    # Free the slot reserved above, or the endpoint loses it for good;
+                    # no wake-up, so the loop retries after its poll interval
+                    self._finished(endpoint, wake=False)
+                    raise
+                if not claimed:
+                    self._finished(endpoint)
+                    break
+                started += 1
+                if self._executor is not None:
+                    self._executor.submit(self._deliver, endpoint, claim_token, events)
+                else:
+                    self._deliver(endpoint, claim_token, events)
+        return started
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block until no batch is in flight; returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not any(self._in_flight.values()), timeout)
+
+    def _post(self, endpoint: str, body: bytes) -> int:
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout)
+        response = self._client.post(endpoint, content=body, headers={"Content-Type": "application/json"})
+        return response.status_code
+
+    def _deliver(self, endpoint: str, claim_token: str, events: List[dict]) -> None:
+        """POST one batch and record the outcome."""
+        try:
+            body = dumps({"events": events})
+            start = time.perf_counter()
+            try:
+                status_code = self.transport(endpoint, body)
+                error = None if 200 <= status_code < 300 else f"HTTP {status_code}"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            now = datetime.utcnow()
+            db = self.session_factory()
+            try:
+                if error is None:
+                    OutboxDAO.complete_claim(db, claim_token, now)
+                else:
+                    OutboxDAO.reschedule_claim(db, claim_token, error, now, self.max_attempts, self.retry_delay)
+            finally:
+                db.close()
+
+            with self._lock:
+                metrics = self._endpoint_metrics(endpoint)
+                metrics["batches"] += 1
+                metrics["last_latency_ms"] = round(latency_ms, 2)
+                if error is None:
+                    metrics["delivered"] += len(events)
+                    oldest = min(event["created_at"] for event in events)
+                    metrics["last_lag_ms"] = round((now - oldest).total_seconds() * 1000, 2)
+                else:
+                    metrics["failed_batches"] += 1
+                    metrics["last_error"] = error
+        except Exception as e:
+            # The claim is taken over after OUTBOX_CLAIM_TIMEOUT_SECONDS
+            print(f"Warning: Outbox delivery to {endpoint} failed: {e}")
+        finally:
+            self._finished(endpoint)
+
+    def _finished(self, endpoint: str, wake: bool = True) -> None:
+        with self._idle:
+            self._in_flight[endpoint] -= 1
+            self._idle.notify_all()
+        if wake:
+            self._wake.set()
+
+    def _endpoint_metrics(self, endpoint: str) -> dict:
+        return self._metrics.setdefault(endpoint, {
+            "batches": 0, "delivered": 0, "failed_batches": 0,
+            "last_lag_ms": None, "last_latency_ms": None, "last_error": None,
+        })
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = 0
+            db = self.session_factory()
+            try:
+                started = self.dispatch_once(db)
+            except Exception as e:
+                print(f"Warning: Outbox dispatcher error: {e}")
+            finally:
+                db.close()
+            if not started:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stats(self, db: Session) -> dict:
+        """Delivery backlog and lag per endpoint plus this worker's counters."""
+        backlog: Dict[str, dict] = {}
+        for endpoint, status, count, oldest in OutboxDAO.get_backlog(db):
+            entry = backlog.setdefault(endpoint, {"pending": 0, "dead": 0, "oldest": None})
+            if status == "dead":
+                entry["dead"] += count
+            else:
+                entry["pending"] += count
+                entry["oldest"] = min(filter(None, [entry["oldest"], oldest]), default=None)
+
+        now = datetime.utcnow()
+        endpoints = []
+        with self._lock:
+            for endpoint in dict.fromkeys(self.endpoints + sorted(backlog)):
+                entry = backlog.get(endpoint, {"pending": 0, "dead": 0, "oldest": None})
+                endpoints.append({
+                    "endpoint": endpoint,
+                    "pending": entry["pending"],
+                    "dead": entry["dead"],
+                    "oldest_pending_age_seconds": (
+                        (now - entry["oldest"]).total_seconds() if entry["oldest"] else None
+                    ),
+                    "in_flight": self._in_flight.get(endpoint, 0),
+                    **self._endpoint_metrics(endpoint),
+                })
+        return {
+            "running": self.running,
+            "concurrency_per_endpoint": self.concurrency,
+            "batch_size": self.batch_size,
+            "endpoints": endpoints,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
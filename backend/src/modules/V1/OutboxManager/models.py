@@ -0,0 +1,48 @@
+"""
+OutboxManager models for inventory events awaiting webhook delivery.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ....app.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    An inventory event (purchase, restock, sweet change) recorded in the same
+    transaction as the change itself, so it exists if and only if the change
+    committed.
+    """
+    __tablename__ = "outbox_events"
+    event_id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)
+    sweet_id = Column(Integer, nullable=True, index=True)  # No foreign key: deletion events outlive the sweet
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class OutboxDelivery(Base):
+    """
+    Delivery of one event to one webhook endpoint. The table is the durable
+    delivery queue: due pending rows are claimed in batches per endpoint,
+    failed batches are rescheduled with backoff and give up after
+    OUTBOX_MAX_ATTEMPTS, and a claim whose dispatcher died is taken over.
+    """
+    __tablename__ = "outbox_deliveries"
+    delivery_id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey('outbox_events.event_id'), nullable=False, index=True)
+    endpoint = Column(String(500), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, delivering, delivered, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    delivered_at = Column(DateTime, nullable=True)
+
+    event = relationship(OutboxEvent)
+
+    __table_args__ = (
+        # The dispatcher scans each endpoint's oldest claimable deliveries
+        Index('ix_outbox_deliveries_endpoint_status_id', 'endpoint', 'status', 'delivery_id'),
+    )
@@ -0,0 +1,28 @@
+"""
+OutboxManager schemas for response validation.
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class OutboxEndpointStats(BaseModel):
+    """Schema for one webhook endpoint's delivery backlog and this worker's counters."""
+    endpoint: str
+    pending: int
+    dead: int
+    oldest_pending_age_seconds: Optional[float] = None
+    in_flight: int
+    batches: int
+    delivered: int
+    failed_batches: int
+    last_lag_ms: Optional[float] = None
+    last_latency_ms: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class OutboxStatsResponse(BaseModel):
+    """Schema for outbox delivery statistics."""
+    running: bool
+    concurrency_per_endpoint: int
+    batch_size: int
+    endpoints: List[OutboxEndpointStats]
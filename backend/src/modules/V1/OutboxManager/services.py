@@ -0,0 +1,88 @@
+"""
+OutboxManager services layer.
+Records inventory events in the writer's transaction for later delivery.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ....app.cron import register_purger
+from ....app.responses import dumps
+from ....app.settings import settings
+from .dao import OutboxDAO
+from .dispatcher import outbox_dispatcher
+from .models import OutboxEvent
+
+_RECORDED = "outbox_recorded"
+
+
+class OutboxService:
+    """Service layer for recording outbox events."""
+    
+    @staticmethod
+    def record(db: Session, event_type: str, data: Dict[str, Any],
+               sweet_id: Optional[int] = None) -> Optional[OutboxEvent]:
+        """
+        Record an event, with a delivery per configured endpoint, in the session's
+        current transaction. Nothing is flushed or committed; the event is
+        delivered only if the caller's transaction commits. Without configured
+        endpoints nothing is recorded.
+        
+        Args:
+            db: Database session
+            event_type: Event name, e.g. "sweet.purchased"
+            data: JSON-serializable event body
+            sweet_id: Sweet the event is about
+            
+        Returns:
+            The pending OutboxEvent, or None if no endpoint is configured
+        """
+        if not outbox_dispatcher.endpoints:
+            return None
+        outbox_event = OutboxEvent(event_type=event_type, sweet_id=sweet_id, payload=dumps(data).decode("utf-8"))
+        OutboxDAO.add_event(db, outbox_event, outbox_dispatcher.endpoints)
+        db.info[_RECORDED] = True
+        return outbox_event
+    
+    @staticmethod
+    def record_transaction(db: Session, transaction: Any, new_stock: int) -> Optional[OutboxEvent]:
+        """
+        Record a flushed purchase or restock transaction as a "sweet.purchased"
+        or "sweet.restocked" event.
+        
+        Args:
+            db: Database session
+            transaction: Flushed Transaction (its id is part of the event)
+            new_stock: Sweet's stock after the transaction
+        """
+        event_type = "sweet.purchased" if transaction.transaction_type == "purchase" else "sweet.restocked"
+        return OutboxService.record(db, event_type, {
+            "transaction_id": transaction.transaction_id,
+            "sweet_id": transaction.sweet_id,
+            "user_id": transaction.user_id,
+            "quantity": transaction.quantity,
+            "price_at_time": transaction.price_at_time,
+            "created_at": transaction.created_at,
+            "new_stock": new_stock,
+        }, sweet_id=transaction.sweet_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session) -> None:
+    """Start delivering as soon as recorded events are committed."""
+    if session.info.pop(_RECORDED, False):
+        outbox_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_recorded(session: Session) -> None:
+    """Rolled-back events were never written."""
+    session.info.pop(_RECORDED, None)
+
+
+@register_purger("outbox")
+def purge_delivered_events(db: Session, now: datetime) -> int:
+    """Delete delivered events older than OUTBOX_RETENTION_DAYS (dead deliveries are kept)."""
+    return OutboxDAO.purge(db, now - timedelta(days=settings.OUTBOX_RETENTION_DAYS))
@@ -1,4 +1,4 @@
 """Sweets manager module."""
-from .routers import router
+from .routers import router, categories_router, reservations_router
 
-__all__ = ["router"]
+__all__ = ["router", "categories_router", "reservations_router"]
@@ -0,0 +1,60 @@
+"""
+Catalog change tracking for delta sync.
+
+Every flush that creates sweets or changes their catalog fields (name,
+category, price, description, image) stamps them with the next number from the
+catalog change sequence; set-based UPDATEs in SweetsDAO stamp their rows the
+same way, and deletions leave a tombstone carrying a sequence number. Clients
+sync by asking for rows whose (change_seq, sweet_id) follows the position in
+their sync token. Stock and rating changes are not catalog changes and are not
+stamped: synced rows carry their current stock, but a sale alone does not put
+a sweet back in the feed.
+
+Sequence numbers come from a single counter row that stays locked until the
+writing transaction ends, so a number only becomes visible after every
+smaller number has committed or rolled back, and a token never skips a change.
+Only catalog writers take that lock, and always before any sweet row: they
+never lock sweets FOR UPDATE first, while stock writers (purchases, restocks,
+flash sales, orders), which do, never touch the counter. Writers therefore
+cannot deadlock on the two, and stock writes do not queue behind the counter.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ....app.cron import register_purger
+from ....app.settings import settings
+from .dao import SweetsDAO
+from .models import Sweet
+
+
+# Sweet columns whose change is a catalog change for delta sync
+CATALOG_FIELDS = ("name", "category", "category_id", "price", "description", "image_url")
+
+
+def _catalog_changed(sweet: Sweet) -> bool:
+    state = inspect(sweet)
+    return any(state.attrs[field].history.has_changes() for field in CATALOG_FIELDS)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changed_sweets(session: Session, flush_context, instances) -> None:
+    """
+    Give sweets created or with catalog fields modified by this flush the next
+    change sequence number. The counter UPDATE runs before the flush writes any
+    sweet row.
+    """
+    changed = [obj for obj in session.new if isinstance(obj, Sweet)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Sweet) and _catalog_changed(obj)]
+    if not changed:
+        return
+    change_seq = SweetsDAO.next_change_seq(session)
+    for sweet in changed:
+        sweet.change_seq = change_seq
+
+
+@register_purger("sweet_tombstones")
+def purge_expired_tombstones(db: Session, now: datetime) -> int:
+    """Delete tombstones past the retention window; older sync tokens then require a full resync."""
+    return SweetsDAO.purge_tombstones(db, now - timedelta(days=settings.CATALOG_TOMBSTONE_RETENTION_DAYS))
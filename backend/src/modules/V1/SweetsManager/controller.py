@@ -2,20 +2,40 @@
 Sweets manager controller layer.
 Handles request/response processing for sweets endpoints.
 """
-from typing import List, Optional
-from fastapi import HTTPException, status, Depends, UploadFile, File, Form, Query
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set, Union
+from fastapi import HTTPException, status, Depends, UploadFile, File, Form, Query, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
 from sqlalchemy.orm import Session
 
 from ....app.database import get_db
+from ....app.responses import FastJSONResponse
+from ....app.idempotency import run_idempotent, current_claim, complete_claim
+from ....app.events import stock_broadcaster, SlowConsumer
+from ....app.settings import settings
 from ....app.auth import get_current_user, get_current_admin_user
 from ..AuthManager.models import User
-from .models import Sweet
+from .models import Sweet, Transaction, Reservation
 from .schemas import (
     SweetCreate, SweetUpdate, SweetResponse, PurchaseRequest,
-    RestockRequest, TransactionResponse
+    RestockRequest, TransactionResponse, RatingRequest, RatingResponse, SweetSort,
+    SuggestionResponse, SearchMode, CategoryResponse, FlashSaleStatus, FlashSaleStatsResponse,
+    ReservationRequest, AvailabilityResponse, ForecastMethod, RestockSuggestionsResponse,
+    BulkRestockRequest, BulkRestockResponse, BulkPriceUpdateRequest, BulkPriceUpdateResponse,
+    CatalogChangesResponse
 )
 from .services import SweetsService
 from .dao import SweetsDAO
+from .search_index import suggest_index, fuzzy_index
+from .flash_sale import flash_sales
+from .holds import hold_index
+
+
+# Upper bound on ids per multi-get, keeping the IN list and the payload bounded
+MAX_BATCH_IDS = 100
 
 
 class SweetsController:
@@ -44,9 +64,38 @@ class SweetsController:
         )
     
     @staticmethod
-    def get_all_sweets(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> List[Sweet]:
-        """Get all sweets with pagination."""
-        return SweetsDAO.get_all_sweets(db, skip=skip, limit=limit)
+    def _list_response(rows: List, limit: Optional[int], sort: Optional[SweetSort],
+                       fields: Optional[List[str]] = None,
+                       extra: Optional[dict] = None) -> FastJSONResponse:
+        """
+        Serialize a page of row tuples without re-validating it.
+        When limit is given and the page is full, the next-page cursor is exposed in X-Next-Cursor.
+        """
+        items = SweetsService.sweet_rows_to_dicts(rows, fields)
+        headers = {}
+        if limit is not None and rows and len(rows) == limit:
+            position = SweetsDAO.sort_key(rows[-1], sort)
+            headers["X-Next-Cursor"] = SweetsService.encode_cursor(sort, position)
+        content = items if extra is None else {"items": items, **extra}
+        return FastJSONResponse(content, headers=headers)
+    
+    @staticmethod
+    def get_all_sweets(
+        skip: int = 0,
+        limit: int = 100,
+        sort: Optional[SweetSort] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        db: Session = Depends(get_db)
+    ) -> FastJSONResponse:
+        """Get all sweets with sorting, offset or cursor pagination and sparse fieldsets."""
+        selected = SweetsService.parse_fields(fields)
+        after = SweetsService.decode_cursor(cursor, sort) if cursor else None
+        rows = SweetsDAO.get_all_sweets(
+            db, skip=skip, limit=limit, sort=sort, after=after,
+            columns=SweetsDAO.select_columns(selected, sort)
+        )
+        return SweetsController._list_response(rows, limit, sort, selected)
     
     @staticmethod
     def search_sweets(
@@ -56,18 +105,90 @@ class SweetsController:
         max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
-        db: Session = Depends(get_db)
-    ) -> List[Sweet]:
-        """Search for sweets with optional filters."""
-        return SweetsDAO.search_sweets(
+        sort: Optional[SweetSort] = None,
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db),
+        facets: bool = False,
+        price_bucket_size: float = 1.0,
+        mode: SearchMode = SearchMode.SUBSTRING,
+        fields: Optional[str] = None
+    ) -> FastJSONResponse:
+        """Search for sweets with optional filters, sorting, cursor pagination, facets and sparse fieldsets."""
+        selected = SweetsService.parse_fields(fields)
+        columns = SweetsDAO.select_columns(selected, sort)
+        # Fuzzy mode resolves the query to matching ids in memory first
+        sweet_ids = None
+        if mode == SearchMode.FUZZY and query:
+            sweet_ids = [sweet_id for sweet_id, _ in fuzzy_index.search(query, fuzzy_index.max_candidates)]
+        
+        if sweet_ids is not None and sort is None:
+            # Relevance order comes from the index, so there is no keyset to resume from
+            if cursor:
+                raise HTTPException(status_code=400, detail="Cursor pagination in fuzzy mode requires a sort order")
+            rows = SweetsService.order_by_relevance(
+                SweetsDAO.search_sweets(
+                    db=db,
+                    category=category,
+                    min_price=min_price,
+                    max_price=max_price,
+                    limit=len(sweet_ids),
+                    sweet_ids=sweet_ids,
+                    columns=columns
+                ),
+                sweet_ids
+            )[skip:skip + limit]
+            page_limit = None
+        else:
+            after = SweetsService.decode_cursor(cursor, sort) if cursor else None
+            rows = SweetsDAO.search_sweets(
+                db=db,
+                query=query,
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                skip=skip,
+                limit=limit,
+                sort=sort,
+                after=after,
+                sweet_ids=sweet_ids,
+                columns=columns
+            )
+            page_limit = limit
+        if not facets:
+            return SweetsController._list_response(rows, page_limit, sort, selected)
+        
+        categories, histogram = SweetsDAO.get_search_facets(
             db=db,
             query=query,
             category=category,
             min_price=min_price,
             max_price=max_price,
-            skip=skip,
-            limit=limit
+            price_bucket_size=price_bucket_size,
+            sweet_ids=sweet_ids
         )
+        return SweetsController._list_response(rows, page_limit, sort, selected, extra={
+            "facets": {
+                "categories": [{"category": name, "count": count} for name, count in categories],
+                "price_histogram": [
+                    {
+                        "min_price": index * price_bucket_size,
+                        "max_price": (index + 1) * price_bucket_size,
+                        "count": count
+                    }
+                    for index, count in histogram
+                ]
+            }
+        })
+    
+    @staticmethod
+    def suggest_sweets(q: str, limit: int = 10) -> List[SuggestionResponse]:
+        """Get typeahead suggestions from the in-memory prefix index."""
+        return [SuggestionResponse(**suggestion) for suggestion in suggest_index.suggest(q, limit)]
+    
+    @staticmethod
+    def get_categories(db: Session = Depends(get_db)) -> List[CategoryResponse]:
+        """Get all categories with sweet counts."""
+        return [CategoryResponse(**category) for category in SweetsService.get_categories(db)]
     
     @staticmethod
     def get_sweets_by_category(category: str, db: Session = Depends(get_db)) -> List[Sweet]:
@@ -78,12 +199,101 @@ class SweetsController:
         return sweets
     
     @staticmethod
-    def get_sweet(sweet_id: int, db: Session = Depends(get_db)) -> Sweet:
-        """Get a specific sweet by ID."""
-        sweet = SweetsDAO.get_sweet_by_id(db, sweet_id)
-        if not sweet:
+    def get_sweets_batch(ids: str, fields: Optional[str] = None,
+                         db: Session = Depends(get_db)) -> FastJSONResponse:
+        """Get several sweets in one query, in the requested order, reporting missing ids."""
+        sweet_ids = SweetsService.parse_ids(ids, MAX_BATCH_IDS)
+        selected = SweetsService.parse_fields(fields)
+        rows = SweetsDAO.get_sweet_rows(db, sweet_ids, SweetsDAO.select_columns(selected))
+        by_id = {row.sweet_id: row for row in rows}
+        found = [by_id[sweet_id] for sweet_id in sweet_ids if sweet_id in by_id]
+        return FastJSONResponse({
+            "items": SweetsService.sweet_rows_to_dicts(found, selected),
+            "missing": [sweet_id for sweet_id in sweet_ids if sweet_id not in by_id],
+        })
+    
+    @staticmethod
+    def get_changes(since: Optional[str] = None, limit: int = 500,
+                    db: Session = Depends(get_db)) -> CatalogChangesResponse:
+        """Get sweets created, updated or deleted since a sync token."""
+        return CatalogChangesResponse(**SweetsService.get_changes(db, since, limit))
+    
+    @staticmethod
+    def _stream_filter(sweet_ids: Optional[str]) -> Optional[Set[int]]:
+        """Parse the optional sweet id filter of a stock stream."""
+        return set(SweetsService.parse_ids(sweet_ids, MAX_BATCH_IDS)) if sweet_ids else None
+    
+    @staticmethod
+    def stream_stock_events(request: Request, sweet_ids: Optional[str] = None) -> StreamingResponse:
+        """Stream stock changes as server-sent events."""
+        return StreamingResponse(
+            SweetsController._sse_events(request, SweetsController._stream_filter(sweet_ids)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    @staticmethod
+    async def _sse_events(request: Request, sweet_ids: Optional[Set[int]]) -> AsyncIterator[str]:
+        """Yield SSE frames until the client disconnects or falls too far behind."""
+        with stock_broadcaster.subscribe(sweet_ids, "sse") as subscription:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await subscription.next_batch(settings.STOCK_EVENTS_HEARTBEAT_SECONDS)
+                except SlowConsumer:
+                    yield "event: overflow\ndata: {}\n\n"
+                    return
+                if not batch:
+                    yield ": heartbeat\n\n"
+                for message in batch:
+                    yield f"event: stock\ndata: {json.dumps(message)}\n\n"
+    
+    @staticmethod
+    async def stream_stock_websocket(websocket: WebSocket, sweet_ids: Optional[str] = None) -> None:
+        """Stream stock changes over a WebSocket until either side closes it."""
+        try:
+            sweet_filter = SweetsController._stream_filter(sweet_ids)
+        except HTTPException as e:
+            await websocket.close(code=1008, reason=e.detail)
+            return
+        await websocket.accept()
+        
+        with stock_broadcaster.subscribe(sweet_filter, "websocket") as subscription:
+            async def send_events():
+                while True:
+                    try:
+                        batch = await subscription.next_batch(settings.STOCK_EVENTS_HEARTBEAT_SECONDS)
+                    except SlowConsumer:
+                        await websocket.close(code=1013, reason="Too far behind, reconnect")
+                        return
+                    for message in batch or [None]:
+                        await websocket.send_json(
+                            {"type": "stock", **message} if message else {"type": "heartbeat"}
+                        )
+            
+            async def wait_for_disconnect():
+                while (await websocket.receive())["type"] != "websocket.disconnect":
+                    pass
+            
+            tasks = [asyncio.ensure_future(send_events()), asyncio.ensure_future(wait_for_disconnect())]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                # The client going away mid-send is a normal end of stream
+                error = None if task.cancelled() else task.exception()
+                if error is not None and not isinstance(error, WebSocketDisconnect):
+                    print(f"Warning: Stock stream closed with error: {error}")
+    
+    @staticmethod
+    def get_sweet(sweet_id: int, fields: Optional[str] = None,
+                  db: Session = Depends(get_db)) -> FastJSONResponse:
+        """Get a specific sweet by ID, optionally only the requested fields."""
+        selected = SweetsService.parse_fields(fields)
+        row = SweetsDAO.get_sweet_row(db, sweet_id, SweetsDAO.select_columns(selected))
+        if not row:
             raise HTTPException(status_code=404, detail="Sweet not found")
-        return sweet
+        return FastJSONResponse(SweetsService.sweet_rows_to_dicts([row], selected)[0])
     
     @staticmethod
     def update_sweet(
@@ -126,7 +336,7 @@ class SweetsController:
             except Exception as e:
                 print(f"Warning: Failed to delete image from ImageKit: {str(e)}")
         
-        SweetsDAO.delete_sweet(db, sweet)
+        SweetsService.delete_sweet(db, sweet)
         return None
     
     @staticmethod
@@ -158,19 +368,8 @@ class SweetsController:
         return None
     
     @staticmethod
-    def purchase_sweet(
-        sweet_id: int,
-        purchase_data: PurchaseRequest,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-    ) -> TransactionResponse:
-        """Purchase a sweet (decrease quantity)."""
-        sweet = SweetsDAO.get_sweet_by_id(db, sweet_id)
-        if not sweet:
-            raise HTTPException(status_code=404, detail="Sweet not found")
-        
-        transaction = SweetsService.purchase_sweet(db, sweet, purchase_data.quantity, current_user)
-        
+    def _transaction_response(transaction: Transaction, sweet: Sweet, message: str) -> TransactionResponse:
+        """Build the response for a purchase or restock transaction."""
         return TransactionResponse(
             transaction_id=transaction.transaction_id,
             sweet_id=transaction.sweet_id,
@@ -179,32 +378,274 @@ class SweetsController:
             quantity=transaction.quantity,
             price_at_time=transaction.price_at_time,
             created_at=transaction.created_at,
-            message=f"Successfully purchased {purchase_data.quantity} unit(s) of {sweet.name}",
+            message=message,
             new_stock=sweet.quantity_in_stock
         )
     
+    @staticmethod
+    def purchase_sweet(
+        sweet_id: int,
+        purchase_data: PurchaseRequest,
+        idempotency_key: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Union[TransactionResponse, FastJSONResponse]:
+        """Purchase a sweet (decrease quantity), at most once per Idempotency-Key."""
+        def flash_sale_response(result: dict) -> TransactionResponse:
+            return TransactionResponse(
+                **{field: result[field] for field in TransactionResponse.model_fields if field in result},
+                message=f"Successfully purchased {purchase_data.quantity} unit(s) of {result['name']}"
+            )
+        
+        def purchase() -> TransactionResponse:
+            if flash_sales.is_active(sweet_id):
+                # The group commit writes the purchase, so it also stores the response for the key
+                claim = current_claim(db)
+                on_commit = (
+                    (lambda batch_db, result: complete_claim(batch_db, claim, flash_sale_response(result)))
+                    if claim is not None else None
+                )
+                result = SweetsService.purchase_flash_sale(
+                    sweet_id, purchase_data.quantity, current_user, on_commit
+                )
+                return flash_sale_response(result)
+            
+            sweet = SweetsDAO.get_sweet_for_update(db, sweet_id)
+            if not sweet:
+                raise HTTPException(status_code=404, detail="Sweet not found")
+            
+            transaction = SweetsService.purchase_sweet(db, sweet, purchase_data.quantity, current_user)
+            return SweetsController._transaction_response(
+                transaction, sweet, f"Successfully purchased {purchase_data.quantity} unit(s) of {sweet.name}"
+            )
+        
+        return run_idempotent(
+            db, idempotency_key, current_user.user_id, f"POST /sweets/{sweet_id}/purchase",
+            purchase_data, purchase, status.HTTP_201_CREATED
+        )
+    
     @staticmethod
     def restock_sweet(
         sweet_id: int,
         restock_data: RestockRequest,
+        idempotency_key: Optional[str] = None,
         db: Session = Depends(get_db),
         current_admin: User = Depends(get_current_admin_user)
-    ) -> TransactionResponse:
-        """Restock a sweet (increase quantity)."""
+    ) -> Union[TransactionResponse, FastJSONResponse]:
+        """Restock a sweet (increase quantity), at most once per Idempotency-Key."""
+        def restock() -> TransactionResponse:
+            sweet = SweetsDAO.get_sweet_for_update(db, sweet_id)
+            if not sweet:
+                raise HTTPException(status_code=404, detail="Sweet not found")
+            
+            transaction = SweetsService.restock_sweet(db, sweet, restock_data.quantity, current_admin)
+            return SweetsController._transaction_response(
+                transaction, sweet, f"Successfully restocked {restock_data.quantity} unit(s) of {sweet.name}"
+            )
+        
+        response = run_idempotent(
+            db, idempotency_key, current_admin.user_id, f"POST /sweets/{sweet_id}/restock",
+            restock_data, restock, status.HTTP_201_CREATED
+        )
+        if flash_sales.is_active(sweet_id):
+            SweetsService.sync_flash_sale(SweetsDAO.get_sweet_by_id(db, sweet_id))
+        return response
+    
+    @staticmethod
+    def bulk_restock(
+        restock_data: BulkRestockRequest,
+        idempotency_key: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> Union[BulkRestockResponse, FastJSONResponse]:
+        """Restock many sweets in one transaction, at most once per Idempotency-Key."""
+        def restock() -> BulkRestockResponse:
+            return BulkRestockResponse(**SweetsService.bulk_restock(db, restock_data.items, current_admin))
+        
+        response = run_idempotent(
+            db, idempotency_key, current_admin.user_id, "POST /sweets/bulk/restock",
+            restock_data, restock, status.HTTP_201_CREATED
+        )
+        SweetsService.resync_flash_sales(db)
+        return response
+    
+    @staticmethod
+    def bulk_update_prices(
+        price_data: BulkPriceUpdateRequest,
+        idempotency_key: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> Union[BulkPriceUpdateResponse, FastJSONResponse]:
+        """Change the price of every matching sweet, at most once per Idempotency-Key."""
+        def update_prices() -> BulkPriceUpdateResponse:
+            return BulkPriceUpdateResponse(**SweetsService.bulk_update_prices(
+                db,
+                category=price_data.category,
+                sweet_ids=price_data.sweet_ids,
+                min_price=price_data.min_price,
+                max_price=price_data.max_price,
+                percent=price_data.percent,
+                amount=price_data.amount
+            ))
+        
+        response = run_idempotent(
+            db, idempotency_key, current_admin.user_id, "POST /sweets/bulk/price",
+            price_data, update_prices
+        )
+        SweetsService.resync_flash_sales(db)
+        return response
+    
+    @staticmethod
+    def get_availability(sweet_id: int, db: Session = Depends(get_db)) -> AvailabilityResponse:
+        """Get a sweet's stock, units held by carts and units available to sell."""
+        availability = hold_index.available_to_sell(db, sweet_id)
+        if availability is None:
+            raise HTTPException(status_code=404, detail="Sweet not found")
+        return AvailabilityResponse(**availability)
+    
+    @staticmethod
+    def reserve_sweet(
+        reservation_data: ReservationRequest,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Reservation:
+        """Hold stock for the current user's cart."""
+        sweet = SweetsDAO.get_sweet_for_update(db, reservation_data.sweet_id)
+        if not sweet:
+            raise HTTPException(status_code=404, detail="Sweet not found")
+        
+        return SweetsService.reserve_sweet(db, sweet, reservation_data.quantity, current_user)
+    
+    @staticmethod
+    def get_my_reservations(
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> List[Reservation]:
+        """Get the current user's active holds."""
+        return SweetsDAO.get_user_reservations(db, current_user.user_id, datetime.utcnow())
+    
+    @staticmethod
+    def _get_active_reservation(db: Session, reservation_id: int, current_user: User) -> Reservation:
+        """Lock one of the current user's reservations and check it can still be used."""
+        reservation = SweetsDAO.get_reservation_for_update(db, reservation_id)
+        if not reservation or reservation.user_id != current_user.user_id:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        if reservation.status != "active":
+            raise HTTPException(status_code=409, detail=f"Reservation is already {reservation.status}")
+        if reservation.expires_at <= datetime.utcnow():
+            raise HTTPException(status_code=409, detail="Reservation has expired")
+        return reservation
+    
+    @staticmethod
+    def release_reservation(
+        reservation_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> None:
+        """Release one of the current user's holds."""
+        reservation = SweetsController._get_active_reservation(db, reservation_id, current_user)
+        SweetsService.release_reservation(db, reservation)
+        return None
+    
+    @staticmethod
+    def checkout_reservation(
+        reservation_id: int,
+        idempotency_key: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> Union[TransactionResponse, FastJSONResponse]:
+        """Purchase the held stock in one transaction, at most once per Idempotency-Key."""
+        def checkout() -> TransactionResponse:
+            reservation = SweetsController._get_active_reservation(db, reservation_id, current_user)
+            sweet = SweetsDAO.get_sweet_for_update(db, reservation.sweet_id)
+            transaction = SweetsService.checkout_reservation(db, reservation, sweet, current_user)
+            return SweetsController._transaction_response(
+                transaction, sweet, f"Successfully purchased {reservation.quantity} unit(s) of {sweet.name}"
+            )
+        
+        response = run_idempotent(
+            db, idempotency_key, current_user.user_id, f"POST /reservations/{reservation_id}/checkout",
+            None, checkout, status.HTTP_201_CREATED
+        )
+        hold_index.remove(reservation_id)
+        return response
+    
+    @staticmethod
+    def get_restock_suggestions(
+        method: ForecastMethod = ForecastMethod(settings.FORECAST_METHOD),
+        window: int = settings.FORECAST_WINDOW_DAYS,
+        alpha: float = settings.FORECAST_ALPHA,
+        history_days: int = settings.FORECAST_HISTORY_DAYS,
+        lead_time_days: int = settings.FORECAST_LEAD_TIME_DAYS,
+        target_days: int = settings.FORECAST_TARGET_DAYS,
+        needs_restock_only: bool = True,
+        limit: int = 100,
+        refresh: bool = False,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> RestockSuggestionsResponse:
+        """Get demand forecasts and restock suggestions, most urgent first."""
+        return RestockSuggestionsResponse(**SweetsService.get_restock_suggestions(
+            db, method, window, alpha, history_days, lead_time_days, target_days,
+            needs_restock_only, limit, refresh
+        ))
+    
+    @staticmethod
+    def get_flash_sale_stats(
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> FlashSaleStatsResponse:
+        """Get this worker's flash-sale counters and group-commit statistics."""
+        return FlashSaleStatsResponse(**flash_sales.stats())
+    
+    @staticmethod
+    def enable_flash_sale(
+        sweet_id: int,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> FlashSaleStatus:
+        """Put a sweet in flash-sale mode."""
         sweet = SweetsDAO.get_sweet_by_id(db, sweet_id)
         if not sweet:
             raise HTTPException(status_code=404, detail="Sweet not found")
         
-        transaction = SweetsService.restock_sweet(db, sweet, restock_data.quantity, current_admin)
+        SweetsService.set_flash_sale(db, sweet, True)
+        return FlashSaleStatus(**flash_sales.status(sweet_id)[0])
+    
+    @staticmethod
+    def disable_flash_sale(
+        sweet_id: int,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin_user)
+    ) -> None:
+        """Take a sweet out of flash-sale mode."""
+        sweet = SweetsDAO.get_sweet_by_id(db, sweet_id)
+        if not sweet:
+            raise HTTPException(status_code=404, detail="Sweet not found")
         
-        return TransactionResponse(
-            transaction_id=transaction.transaction_id,
-            sweet_id=transaction.sweet_id,
-            user_id=transaction.user_id,
-            transaction_type=transaction.transaction_type,
-            quantity=transaction.quantity,
-            price_at_time=transaction.price_at_time,
-            created_at=transaction.created_at,
-            message=f"Successfully restocked {restock_data.quantity} unit(s) of {sweet.name}",
-            new_stock=sweet.quantity_in_stock
+        SweetsService.set_flash_sale(db, sweet, False)
+        return None
+    
+    @staticmethod
+    def rate_sweet(
+        sweet_id: int,
+        rating_data: RatingRequest,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> RatingResponse:
+        """Rate a sweet (one rating per user, re-rating updates it)."""
+        sweet = SweetsDAO.get_sweet_by_id(db, sweet_id)
+        if not sweet:
+            raise HTTPException(status_code=404, detail="Sweet not found")
+        
+        rating = SweetsService.rate_sweet(db, sweet, rating_data.rating, current_user)
+        
+        return RatingResponse(
+            rating_id=rating.rating_id,
+            sweet_id=rating.sweet_id,
+            user_id=rating.user_id,
+            rating=rating.rating,
+            average_rating=sweet.average_rating,
+            rating_count=sweet.rating_count,
+            created_at=rating.created_at,
+            updated_at=rating.updated_at
         )
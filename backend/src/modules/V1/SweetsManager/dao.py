@@ -2,10 +2,51 @@
 Sweets manager database access object (DAO) layer.
 Handles all database queries related to sweets and transactions.
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Optional, List
-from .models import Sweet, Transaction
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import (
+    and_, text, tuple_, cast, Float, Integer, String, select, update, literal, func, true, union_all
+)
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple, Any
+from .models import (
+    Sweet, Transaction, Rating, Category, Reservation, SweetTombstone, CatalogSequence, LOW_STOCK_CONDITION
+)
+from .schemas import SweetSort
+
+# Sort key column and direction per sort option; sweet_id breaks ties so that
+# (key, sweet_id) is unique and matches the composite indexes on Sweet.
+SORT_COLUMNS = {
+    None: (Sweet.sweet_id, "asc"),
+    SweetSort.PRICE_ASC: (Sweet.price, "asc"),
+    SweetSort.PRICE_DESC: (Sweet.price, "desc"),
+    SweetSort.NEWEST: (Sweet.created_at, "desc"),
+    SweetSort.POPULAR: (Sweet.units_sold, "desc"),
+    SweetSort.RATING: (Sweet.rating_avg, "desc"),
+}
+
+# Columns each SweetResponse field is computed from. The list, search and
+# detail endpoints select only the columns behind the requested fields and
+# read them as plain row tuples instead of loading Sweet entities.
+FIELD_COLUMNS = {
+    "sweet_id": (Sweet.sweet_id,),
+    "name": (Sweet.name,),
+    "category": (Sweet.category,),
+    "category_id": (Sweet.category_id,),
+    "price": (Sweet.price,),
+    "quantity_in_stock": (Sweet.quantity_in_stock,),
+    "description": (Sweet.description,),
+    "image_url": (Sweet.image_url,),
+    "image_id": (Sweet.image_id,),
+    "average_rating": (Sweet.rating_sum, Sweet.rating_count),
+    "rating_count": (Sweet.rating_count,),
+    "rating_histogram": (
+        Sweet.rating_hist_1, Sweet.rating_hist_2, Sweet.rating_hist_3,
+        Sweet.rating_hist_4, Sweet.rating_hist_5,
+    ),
+    "units_sold": (Sweet.units_sold,),
+    "created_at": (Sweet.created_at,),
+    "updated_at": (Sweet.updated_at,),
+}
 
 
 class SweetsDAO:
@@ -16,46 +57,284 @@ class SweetsDAO:
         """Get sweet by ID."""
         return db.query(Sweet).filter(Sweet.sweet_id == sweet_id).first()
     
+    @staticmethod
+    def get_sweet_for_update(db: Session, sweet_id: int) -> Optional[Sweet]:
+        """Get sweet by ID, locking its row until the transaction ends (SELECT ... FOR UPDATE)."""
+        return db.query(Sweet).filter(Sweet.sweet_id == sweet_id).with_for_update().first()
+    
+    @staticmethod
+    def get_sweets_for_update(db: Session, sweet_ids: List[int]) -> List[Sweet]:
+        """Get sweets by ID, locking their rows until the transaction ends."""
+        # Locked in id order, so concurrent multi-row writers cannot deadlock
+        return db.query(Sweet).filter(Sweet.sweet_id.in_(sweet_ids)).order_by(Sweet.sweet_id).with_for_update().all()
+    
+    @staticmethod
+    def get_flash_sale_sweets(db: Session) -> List[Sweet]:
+        """Get sweets flagged for flash-sale mode."""
+        return db.query(Sweet).filter(Sweet.flash_sale.is_(True)).all()
+    
+    @staticmethod
+    def get_stock(db: Session, sweet_id: int) -> Optional[int]:
+        """Get a sweet's quantity in stock (None if it does not exist)."""
+        return db.query(Sweet.quantity_in_stock).filter(Sweet.sweet_id == sweet_id).scalar()
+    
     @staticmethod
     def get_sweet_by_name(db: Session, name: str) -> Optional[Sweet]:
         """Get sweet by name."""
         return db.query(Sweet).filter(Sweet.name == name).first()
     
     @staticmethod
-    def get_all_sweets(db: Session, skip: int = 0, limit: int = 100) -> List[Sweet]:
-        """Get all sweets with pagination."""
-        return db.query(Sweet).offset(skip).limit(limit).all()
+    def select_columns(fields: Optional[List[str]] = None,
+                       sort: Optional[SweetSort] = None) -> tuple:
+        """
+        Get the columns to select for a set of response fields.
+        
+        Args:
+            fields: SweetResponse field names (None selects every field)
+            sort: Sort order whose key column must be present to build the next cursor
+            
+        Returns:
+            De-duplicated columns, always starting with sweet_id
+        """
+        columns = {Sweet.sweet_id: None}
+        for field in fields if fields is not None else FIELD_COLUMNS:
+            columns.update(dict.fromkeys(FIELD_COLUMNS[field]))
+        columns[SORT_COLUMNS[sort][0]] = None
+        return tuple(columns)
     
     @staticmethod
-    def search_sweets(db: Session, query: Optional[str] = None, category: Optional[str] = None,
-                     min_price: Optional[float] = None, max_price: Optional[float] = None,
-                     skip: int = 0, limit: int = 100) -> List[Sweet]:
-        """Search sweets with optional filters."""
-        db_query = db.query(Sweet)
+    def get_sweet_row(db: Session, sweet_id: int, columns: tuple) -> Optional[Any]:
+        """Get the given columns of a sweet as a row tuple."""
+        return db.query(*columns).filter(Sweet.sweet_id == sweet_id).first()
+    
+    @staticmethod
+    def get_sweet_rows(db: Session, sweet_ids: List[int], columns: tuple) -> List[Any]:
+        """Get the given columns of several sweets in one WHERE sweet_id IN (...) query (unordered)."""
+        return db.query(*columns).filter(Sweet.sweet_id.in_(sweet_ids)).all()
+    
+    @staticmethod
+    def sort_key(sweet: Sweet, sort: Optional[SweetSort]) -> Tuple[Any, int]:
+        """Get the (sort key, sweet_id) position of a sweet under a sort order."""
+        column, _ = SORT_COLUMNS[sort]
+        return getattr(sweet, column.key), sweet.sweet_id
+    
+    @staticmethod
+    def apply_sort(db_query: Query, sort: Optional[SweetSort] = None,
+                   after: Optional[Tuple[Any, int]] = None) -> Query:
+        """
+        Order a sweets query and, for keyset pagination, start after a position.
         
-        filters = []
+        Args:
+            db_query: Query over Sweet
+            sort: Sort order (None orders by sweet_id)
+            after: (sort key, sweet_id) of the last row on the previous page
+            
+        Returns:
+            Ordered query that the matching composite index can serve without a sort
+        """
+        column, direction = SORT_COLUMNS[sort]
+        key = tuple_(column, Sweet.sweet_id) if column is not Sweet.sweet_id else Sweet.sweet_id
         
-        if query:
-            filters.append(Sweet.name.ilike(f"%{query}%"))
+        if after is not None:
+            position = tuple_(*after) if column is not Sweet.sweet_id else after[1]
+            db_query = db_query.filter(key > position if direction == "asc" else key < position)
+        
+        if direction == "asc":
+            return db_query.order_by(column.asc(), Sweet.sweet_id.asc())
+        return db_query.order_by(column.desc(), Sweet.sweet_id.desc())
+    
+    @staticmethod
+    def get_all_sweets(db: Session, skip: int = 0, limit: int = 100,
+                       sort: Optional[SweetSort] = None,
+                       after: Optional[Tuple[Any, int]] = None,
+                       columns: Optional[tuple] = None) -> List[Any]:
+        """
+        Get all sweets with offset or keyset pagination.
+        When columns is given, returns row tuples of just those columns instead of Sweet entities.
+        """
+        db_query = SweetsDAO.apply_sort(db.query(*(columns or (Sweet,))), sort, after)
+        return db_query.offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def search_filters(query: Optional[str] = None, category: Optional[str] = None,
+                       min_price: Optional[float] = None, max_price: Optional[float] = None,
+                       sweet_ids: Optional[List[int]] = None) -> Dict[str, list]:
+        """
+        Build search filter conditions grouped by the facet they restrict.
+        When sweet_ids is given (fuzzy matches) it replaces the name substring filter.
+        """
+        filters = {"query": [], "category": [], "price": []}
+        
+        if sweet_ids is not None:
+            filters["query"].append(Sweet.sweet_id.in_(sweet_ids))
+        elif query:
+            filters["query"].append(Sweet.name.ilike(f"%{query}%"))
         
         if category:
-            filters.append(Sweet.category.ilike(f"%{category}%"))
+            filters["category"].append(SweetsDAO.category_filter(category))
         
         if min_price is not None:
-            filters.append(Sweet.price >= min_price)
+            filters["price"].append(Sweet.price >= min_price)
         
         if max_price is not None:
-            filters.append(Sweet.price <= max_price)
+            filters["price"].append(Sweet.price <= max_price)
         
-        if filters:
-            db_query = db_query.filter(and_(*filters))
+        return filters
+    
+    @staticmethod
+    def search_sweets(db: Session, query: Optional[str] = None, category: Optional[str] = None,
+                     min_price: Optional[float] = None, max_price: Optional[float] = None,
+                     skip: int = 0, limit: int = 100, sort: Optional[SweetSort] = None,
+                     after: Optional[Tuple[Any, int]] = None,
+                     sweet_ids: Optional[List[int]] = None,
+                     columns: Optional[tuple] = None) -> List[Any]:
+        """
+        Search sweets with optional filters, sorting and keyset pagination.
+        When columns is given, returns row tuples of just those columns instead of Sweet entities.
+        """
+        db_query = db.query(*(columns or (Sweet,)))
+        
+        filters = SweetsDAO.search_filters(query, category, min_price, max_price, sweet_ids)
+        conditions = [condition for group in filters.values() for condition in group]
+        if conditions:
+            db_query = db_query.filter(and_(*conditions))
         
+        db_query = SweetsDAO.apply_sort(db_query, sort, after)
         return db_query.offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_search_facets(db: Session, query: Optional[str] = None, category: Optional[str] = None,
+                          min_price: Optional[float] = None, max_price: Optional[float] = None,
+                          price_bucket_size: float = 1.0,
+                          sweet_ids: Optional[List[int]] = None) -> Tuple[List[tuple], List[tuple]]:
+        """
+        Count sweets per category and per price bucket in a single round trip.
+        
+        Each facet applies every filter except its own, so the category counts
+        still list the other categories while a category is selected (and the
+        price histogram likewise ignores the price range).
+        
+        Returns:
+            Tuple of ([(category, count)], [(bucket_index, count)])
+        """
+        filters = SweetsDAO.search_filters(query, category, min_price, max_price, sweet_ids)
+        category_conditions = filters["query"] + filters["price"]
+        price_conditions = filters["query"] + filters["category"]
+        
+        # floor, not a bare cast: casting truncates on SQLite but rounds on PostgreSQL
+        bucket = cast(func.floor(Sweet.price / price_bucket_size), Integer)
+        category_counts = (
+            select(literal("category").label("facet"), Sweet.category.label("category"),
+                   literal(None, Integer).label("bucket"), func.count().label("count"))
+            .where(and_(true(), *category_conditions))
+            .group_by(Sweet.category)
+        )
+        price_counts = (
+            select(literal("price").label("facet"), literal(None, String).label("category"),
+                   bucket.label("bucket"), func.count().label("count"))
+            .where(and_(true(), *price_conditions))
+            .group_by(bucket)
+        )
+        
+        categories, histogram = [], []
+        for row in db.execute(union_all(category_counts, price_counts)):
+            if row.facet == "category":
+                categories.append((row.category, row.count))
+            else:
+                histogram.append((row.bucket, row.count))
+        
+        categories.sort(key=lambda item: (-item[1], item[0]))
+        histogram.sort()
+        return categories, histogram
+    
+    @staticmethod
+    def category_filter(category: str):
+        """
+        Condition matching sweets in a category given by name or slug, case-insensitively.
+        The slug is resolved by a scalar subquery, so the filter is an equality on the
+        indexed category_id column.
+        """
+        category_id = (
+            select(Category.category_id)
+            .where(Category.slug == Category.slugify(category))
+            .scalar_subquery()
+        )
+        return Sweet.category_id == category_id
+    
     @staticmethod
     def get_sweets_by_category(db: Session, category: str) -> List[Sweet]:
         """Get all sweets in a specific category."""
-        return db.query(Sweet).filter(Sweet.category == category).all()
+        return db.query(Sweet).filter(SweetsDAO.category_filter(category)).all()
+    
+    @staticmethod
+    def get_category_by_slug(db: Session, slug: str) -> Optional[Category]:
+        """Get category by slug."""
+        return db.query(Category).filter(Category.slug == slug).first()
+    
+    @staticmethod
+    def get_or_create_category(db: Session, name: str) -> Category:
+        """
+        Get the category matching a name, creating it if needed.
+        Does not commit; the new row is flushed into the caller's transaction.
+        """
+        name = " ".join(name.split())
+        category = SweetsDAO.get_category_by_slug(db, Category.slugify(name))
+        if category is None:
+            category = Category(slug=Category.slugify(name), name=name)
+            db.add(category)
+            db.flush()
+        return category
+    
+    @staticmethod
+    def get_categories_with_counts(db: Session) -> List[tuple]:
+        """Get (category_id, slug, name, sweet_count) for every category."""
+        return (
+            db.query(Category.category_id, Category.slug, Category.name, func.count(Sweet.sweet_id))
+            .outerjoin(Sweet, Sweet.category_id == Category.category_id)
+            .group_by(Category.category_id, Category.slug, Category.name)
+            .order_by(Category.name)
+            .all()
+        )
+    
+    @staticmethod
+    def backfill_categories(db: Session) -> int:
+        """
+        Link sweets that only have a free-text category to a Category row.
+        
+        Returns:
+            Number of sweets migrated
+        """
+        names = [name for (name,) in db.query(Sweet.category).filter(
+            Sweet.category_id.is_(None)
+        ).distinct()]
+        migrated = 0
+        for name in names:
+            category = SweetsDAO.get_or_create_category(db, name)
+            migrated += db.query(Sweet).filter(
+                Sweet.category_id.is_(None), Sweet.category == name
+            ).update(
+                {Sweet.category_id: category.category_id, Sweet.category: category.name,
+                 Sweet.change_seq: SweetsDAO.next_change_seq(db)},
+                synchronize_session=False
+            )
+        db.commit()
+        return migrated
+    
+    @staticmethod
+    def get_low_stock_sweets(db: Session) -> List[tuple]:
+        """Get (sweet_id, name, quantity_in_stock) rows below the low-stock threshold."""
+        return (
+            db.query(Sweet.sweet_id, Sweet.name, Sweet.quantity_in_stock)
+            .filter(text(LOW_STOCK_CONDITION))
+            .all()
+        )
+    
+    @staticmethod
+    def add_sweet(db: Session, sweet: Sweet) -> Sweet:
+        """Add a new sweet and flush it to get its ID, without committing."""
+        db.add(sweet)
+        db.flush()
+        return sweet
     
     @staticmethod
     def create_sweet(db: Session, sweet: Sweet) -> Sweet:
@@ -74,7 +353,10 @@ class SweetsDAO:
     
     @staticmethod
     def delete_sweet(db: Session, sweet: Sweet) -> None:
-        """Delete a sweet."""
+        """Delete a sweet with its ratings and reservations, leaving a tombstone for delta sync."""
+        db.query(Rating).filter(Rating.sweet_id == sweet.sweet_id).delete(synchronize_session=False)
+        db.query(Reservation).filter(Reservation.sweet_id == sweet.sweet_id).delete(synchronize_session=False)
+        db.add(SweetTombstone(sweet_id=sweet.sweet_id, change_seq=SweetsDAO.next_change_seq(db)))
         db.delete(sweet)
         db.commit()
     
@@ -93,3 +375,203 @@ class SweetsDAO:
         db.commit()
         db.refresh(transaction)
         return transaction
+    
+    @staticmethod
+    def add_transaction(db: Session, transaction: Transaction) -> Transaction:
+        """Add a transaction record and flush pending changes without committing."""
+        db.add(transaction)
+        db.flush()
+        return transaction
+    
+    @staticmethod
+    def add_transactions(db: Session, transactions: List[Transaction]) -> List[Transaction]:
+        """
+        Add many transaction records and flush them without committing.
+        The flush batches them into multi-row INSERT ... RETURNING statements.
+        """
+        db.add_all(transactions)
+        db.flush()
+        return transactions
+    
+    @staticmethod
+    def count_sweets(db: Session, conditions: list) -> int:
+        """Count sweets matching all conditions."""
+        return db.query(func.count(Sweet.sweet_id)).filter(*conditions).scalar()
+    
+    @staticmethod
+    def changed_price(percent: Optional[float] = None, amount: Optional[float] = None):
+        """SQL expression of a sweet's price after a relative or absolute change, rounded to cents."""
+        if percent is not None:
+            return func.round(Sweet.price * (1 + percent / 100), 2)
+        return func.round(Sweet.price + amount, 2)
+    
+    @staticmethod
+    def update_prices(db: Session, conditions: list, new_price, change_seq: int) -> int:
+        """
+        Set the price of every sweet matching the conditions in one UPDATE, without committing.
+        Sweets already loaded in the session are not refreshed.
+        
+        Returns:
+            Number of sweets updated
+        """
+        return db.query(Sweet).filter(*conditions).update(
+            {Sweet.price: new_price, Sweet.change_seq: change_seq},
+            synchronize_session=False
+        )
+    
+    @staticmethod
+    def get_prices_by_change_seq(db: Session, change_seq: int) -> List[Tuple[int, float]]:
+        """Get (sweet_id, price) of the sweets written with a change sequence number."""
+        return db.query(Sweet.sweet_id, Sweet.price).filter(Sweet.change_seq == change_seq).all()
+    
+    @staticmethod
+    def get_user_rating_for_update(db: Session, sweet_id: int, user_id: int) -> Optional[Rating]:
+        """Get a user's rating of a sweet, locking its row until the transaction ends."""
+        # populate_existing: the previous rating must be the value read under the lock
+        return db.query(Rating).filter(
+            Rating.sweet_id == sweet_id, Rating.user_id == user_id
+        ).with_for_update().populate_existing().first()
+    
+    @staticmethod
+    def increment_rating_aggregates(db: Session, sweet_id: int, deltas: Dict[str, int]) -> None:
+        """
+        Add deltas to a sweet's rating aggregate columns in one UPDATE.
+        Uses column arithmetic so concurrent raters never overwrite each other.
+        Does not commit; the caller commits together with the rating row.
+        """
+        values = {getattr(Sweet, column): getattr(Sweet, column) + delta
+                  for column, delta in deltas.items() if delta}
+        if values:
+            # SET expressions read the pre-update row, so recompute the average from it
+            values[Sweet.rating_avg] = (
+                cast(Sweet.rating_sum + deltas.get("rating_sum", 0), Float)
+                / (Sweet.rating_count + deltas.get("rating_count", 0))
+            )
+            db.query(Sweet).filter(Sweet.sweet_id == sweet_id).update(values, synchronize_session=False)
+    
+    # ==================== CHANGE TRACKING ====================
+    
+    @staticmethod
+    def next_change_seq(db: Session) -> int:
+        """
+        Issue the next catalog change sequence number.
+        The counter row stays locked until the transaction ends, so numbers are
+        visible to readers in the order they were issued. Call it before
+        locking or writing any sweet row in the transaction (see changes.py).
+        """
+        connection = db.connection()
+        connection.execute(
+            update(CatalogSequence).where(CatalogSequence.sequence_id == 1)
+            .values(value=CatalogSequence.value + 1)
+        )
+        return connection.execute(
+            select(CatalogSequence.value).where(CatalogSequence.sequence_id == 1)
+        ).scalar_one()
+    
+    @staticmethod
+    def get_catalog_sequence(db: Session) -> Any:
+        """Get the committed change sequence (value) and purge horizon (purged_through)."""
+        return db.query(CatalogSequence.value, CatalogSequence.purged_through).filter(
+            CatalogSequence.sequence_id == 1
+        ).one()
+    
+    @staticmethod
+    def get_sweets_changed_after(db: Session, after: Tuple[int, int], limit: int) -> List[Sweet]:
+        """Get sweets whose (change_seq, sweet_id) follows the given position, in that order."""
+        return db.query(Sweet).filter(
+            tuple_(Sweet.change_seq, Sweet.sweet_id) > tuple_(*after)
+        ).order_by(Sweet.change_seq, Sweet.sweet_id).limit(limit).all()
+    
+    @staticmethod
+    def get_tombstones_after(db: Session, after: Tuple[int, int], limit: int) -> List[SweetTombstone]:
+        """Get tombstones whose (change_seq, sweet_id) follows the given position, in that order."""
+        return db.query(SweetTombstone).filter(
+            tuple_(SweetTombstone.change_seq, SweetTombstone.sweet_id) > tuple_(*after)
+        ).order_by(SweetTombstone.change_seq, SweetTombstone.sweet_id).limit(limit).all()
+    
+    @staticmethod
+    def purge_tombstones(db: Session, before: datetime) -> int:
+        """
+        Delete tombstones older than the given time and raise the purge horizon to cover them.
+        Does not commit.
+        
+        Returns:
+            Number of tombstones deleted
+        """
+        expired = SweetTombstone.deleted_at < before
+        horizon = db.query(func.max(SweetTombstone.change_seq)).filter(expired).scalar()
+        if horizon is None:
+            return 0
+        db.query(CatalogSequence).filter(
+            CatalogSequence.sequence_id == 1, CatalogSequence.purged_through < horizon
+        ).update({CatalogSequence.purged_through: horizon}, synchronize_session=False)
+        return db.query(SweetTombstone).filter(expired).delete(synchronize_session=False)
+    
+    # ==================== RESERVATIONS ====================
+    
+    @staticmethod
+    def add_reservation(db: Session, reservation: Reservation) -> Reservation:
+        """Add a reservation and flush it to get its ID, without committing."""
+        db.add(reservation)
+        db.flush()
+        return reservation
+    
+    @staticmethod
+    def get_reservation_for_update(db: Session, reservation_id: int) -> Optional[Reservation]:
+        """Get reservation by ID, locking its row until the transaction ends."""
+        return db.query(Reservation).filter(
+            Reservation.reservation_id == reservation_id
+        ).with_for_update().first()
+    
+    @staticmethod
+    def get_held_quantity(db: Session, sweet_id: int, now: datetime,
+                          exclude_reservation_id: Optional[int] = None) -> int:
+        """Units of a sweet held by unexpired active reservations, optionally leaving one out."""
+        query = db.query(func.coalesce(func.sum(Reservation.quantity), 0)).filter(
+            Reservation.sweet_id == sweet_id,
+            Reservation.status == "active",
+            Reservation.expires_at > now
+        )
+        if exclude_reservation_id is not None:
+            query = query.filter(Reservation.reservation_id != exclude_reservation_id)
+        return query.scalar()
+    
+    @staticmethod
+    def get_user_reservations(db: Session, user_id: int, now: datetime) -> List[Reservation]:
+        """Get a user's unexpired active reservations, soonest expiry first."""
+        return db.query(Reservation).filter(
+            Reservation.user_id == user_id,
+            Reservation.status == "active",
+            Reservation.expires_at > now
+        ).order_by(Reservation.expires_at).all()
+    
+    @staticmethod
+    def get_active_reservations(db: Session, now: datetime) -> List[Reservation]:
+        """Get every unexpired active reservation."""
+        return db.query(Reservation).filter(
+            Reservation.status == "active", Reservation.expires_at > now
+        ).all()
+    
+    @staticmethod
+    def expire_reservations(db: Session, now: datetime) -> int:
+        """Mark active reservations past their expiry as expired (caller commits)."""
+        return db.query(Reservation).filter(
+            Reservation.status == "active", Reservation.expires_at <= now
+        ).update({"status": "expired"}, synchronize_session=False)
+    
+    # ==================== FORECASTING ====================
+    
+    @staticmethod
+    def get_stock_levels(db: Session) -> List[Tuple[int, str, int]]:
+        """Get (sweet_id, name, quantity_in_stock) for the whole catalog, by sweet_id."""
+        return db.query(Sweet.sweet_id, Sweet.name, Sweet.quantity_in_stock).order_by(Sweet.sweet_id).all()
+    
+    @staticmethod
+    def get_daily_sales(db: Session, since: datetime, until: datetime) -> List[Tuple[int, Any, int]]:
+        """Get (sweet_id, day, units purchased) for every sweet and day with sales in [since, until)."""
+        day = func.date(Transaction.created_at)
+        return db.query(Transaction.sweet_id, day, func.sum(Transaction.quantity)).filter(
+            Transaction.transaction_type == "purchase",
+            Transaction.created_at >= since,
+            Transaction.created_at < until
+        ).group_by(Transaction.sweet_id, day).all()
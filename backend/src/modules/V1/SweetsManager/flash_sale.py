@@ -0,0 +1,338 @@
+"""
+Flash-sale mode for sweets under heavy purchase contention.
+
+For a sweet in flash-sale mode, purchases are admitted against an in-memory
+stock counter instead of each locking the sweet's row. Admitted purchases go
+to a queue that a single writer thread drains in batches: one transaction
+inserts every Transaction row of the batch and applies the summed decrement
+to each sweet row once (a group commit). Buyers wait only for their batch's
+commit, so an acknowledged purchase is always durable.
+
+Units held by cart reservations (see holds.py) are not for sale: admission
+subtracts this worker's in-memory figure as an optimistic pre-check, and the
+batch subtracts the reservations table's sum under the row lock, so holds
+made on any worker count.
+
+The database stays the source of truth: the batch re-checks stock under the
+row lock and rejects purchases that no longer fit (e.g. stock sold by another
+worker), then resynchronizes the counter. After a crash nothing needs
+replaying, since unacknowledged purchases were never committed; on startup
+``reconcile`` reloads the counters of every sweet flagged for flash sale.
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ....app.database import SessionLocal
+from ....app.events import track_stock_change
+from ....app.settings import settings
+from ..OutboxManager import OutboxService
+from .dao import SweetsDAO
+from .holds import hold_index
+from .models import Sweet, Transaction
+
+
+class InsufficientStock(Exception):
+    """Raised when a flash-sale purchase asks for more than is available."""
+
+    def __init__(self, available: int):
+        super().__init__(available)
+        self.available = available
+
+
+class PurchaseFailed(Exception):
+    """Raised when the batch holding a purchase could not be committed."""
+
+
+class PendingPurchase:
+    """An admitted purchase waiting for its group commit."""
+
+    def __init__(self, sweet_id: int, quantity: int, user_id: int, price: float,
+                 on_commit: Optional[Callable[[Session, dict], None]] = None):
+        self.sweet_id = sweet_id
+        self.quantity = quantity
+        self.user_id = user_id
+        self.price = price
+        self.on_commit = on_commit
+        self.result: Optional[dict] = None
+        self.error: Optional[Exception] = None
+        self._done = threading.Event()
+
+    def resolve(self, result: Optional[dict] = None, error: Optional[Exception] = None) -> None:
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def wait(self) -> dict:
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class FlashSaleEngine:
+    """In-memory admission counters plus the group-commit writer for flash-sale sweets."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 batch_size: int = settings.FLASH_SALE_BATCH_SIZE,
+                 linger_ms: float = settings.FLASH_SALE_LINGER_MS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.linger_ms = linger_ms
+        # sweet_id -> {"available", "in_flight", "name", "price"}; in_flight counts
+        # admitted units whose batch has not committed yet
+        self._sweets: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[PendingPurchase]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.metrics = {"purchases": 0, "rejected": 0, "batches": 0, "batched": 0,
+                        "max_batch": 0, "failed_batches": 0}
+
+    # ---------- counters ----------
+
+    def is_active(self, sweet_id: int) -> bool:
+        """Whether purchases of this sweet go through the flash-sale path in this worker."""
+        return sweet_id in self._sweets
+
+    def load(self, sweet: Sweet) -> None:
+        """
+        Start (or resynchronize) the counter of a sweet from its committed row.
+        Units admitted but not yet committed stay reserved.
+        """
+        with self._lock:
+            in_flight = self._sweets.get(sweet.sweet_id, {}).get("in_flight", 0)
+            self._sweets[sweet.sweet_id] = {
+                "available": max(sweet.quantity_in_stock - in_flight, 0),
+                "in_flight": in_flight,
+                "name": sweet.name,
+                "price": sweet.price,
+            }
+
+    def unload(self, sweet_id: int) -> None:
+        """Stop handling a sweet in flash-sale mode."""
+        with self._lock:
+            self._sweets.pop(sweet_id, None)
+
+    def status(self, sweet_id: Optional[int] = None) -> List[dict]:
+        """Counter state of every flash-sale sweet in this worker (or just one)."""
+        with self._lock:
+            return [
+                {
+                    "sweet_id": item_id,
+                    "name": state["name"],
+                    "available": state["available"],
+                    "in_flight": state["in_flight"],
+                }
+                for item_id, state in sorted(self._sweets.items())
+                if sweet_id is None or item_id == sweet_id
+            ]
+
+    def stats(self) -> dict:
+        """Group-commit counters plus the state of every counter."""
+        with self._lock:
+            metrics = dict(self.metrics)
+        batches = metrics["batches"]
+        return {
+            **metrics,
+            "avg_batch_size": round(metrics["batched"] / batches, 2) if batches else 0.0,
+            "sweets": self.status(),
+        }
+
+    def reconcile(self, db: Session) -> int:
+        """Reload the counters of every sweet flagged for flash sale (run at startup)."""
+        sweets = SweetsDAO.get_flash_sale_sweets(db)
+        with self._lock:
+            self._sweets.clear()
+        for sweet in sweets:
+            self.load(sweet)
+        return len(sweets)
+
+    # ---------- purchases ----------
+
+    def purchase(self, sweet_id: int, quantity: int, user_id: int,
+                 on_commit: Optional[Callable[[Session, dict], None]] = None) -> dict:
+        """
+        Buy from a flash-sale sweet and wait for the purchase to be committed.
+
+        Args:
+            sweet_id: ID of a sweet in flash-sale mode
+            quantity: Quantity to purchase
+            user_id: Buyer
+            on_commit: Called with the batch's session and the purchase result
+                before the batch commits, to write related rows in the same
+                transaction (e.g. the idempotency record)
+
+        Returns:
+            Transaction fields plus ``name`` and ``new_stock``
+
+        Raises:
+            InsufficientStock: If the counter (or the row, at commit) has too little stock not held by carts
+            PurchaseFailed: If the batch could not be committed
+        """
+        held = hold_index.held(sweet_id)
+        with self._lock:
+            state = self._sweets.get(sweet_id)
+            if state is None:
+                raise KeyError(sweet_id)
+            if state["available"] - held < quantity:
+                self.metrics["rejected"] += 1
+                raise InsufficientStock(max(state["available"] - held, 0))
+            state["available"] -= quantity
+            state["in_flight"] += quantity
+            pending = PendingPurchase(sweet_id, quantity, user_id, state["price"], on_commit)
+
+        self._queue.put(pending)
+        self._ensure_writer()
+        return pending.wait()
+
+    def drain(self) -> None:
+        """Block until every queued purchase has been committed or rejected."""
+        self._queue.join()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="flash-sale-writer", daemon=True)
+                self._writer.start()
+
+    def _run(self) -> None:
+        """Writer loop: take everything queued (up to batch_size) and commit it together."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger_ms / 1000
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _commit(self, batch: List[PendingPurchase]) -> None:
+        """Insert a batch of purchases and apply their stock changes in one transaction."""
+        db = self.session_factory()
+        try:
+            wanted: Dict[int, List[PendingPurchase]] = defaultdict(list)
+            for pending in batch:
+                wanted[pending.sweet_id].append(pending)
+
+            sweets = {
+                sweet.sweet_id: sweet
+                for sweet in SweetsDAO.get_sweets_for_update(db, list(wanted))
+            }
+            accepted: List[PendingPurchase] = []
+            rejected: List[PendingPurchase] = []
+            held: Dict[int, int] = {}
+            now = datetime.utcnow()
+            for sweet_id, purchases in wanted.items():
+                sweet = sweets.get(sweet_id)
+                # Stock held by carts' reservations is not for sale; the table
+                # (read under the row lock) sees holds from every worker
+                held[sweet_id] = SweetsDAO.get_held_quantity(db, sweet_id, now)
+                for_sale = max(sweet.quantity_in_stock - held[sweet_id], 0) if sweet else 0
+                sold = 0
+                for pending in purchases:
+                    if sold + pending.quantity <= for_sale:
+                        sold += pending.quantity
+                        accepted.append(pending)
+                    else:
+                        rejected.append(pending)
+                if sweet is not None:
+                    sweet.quantity_in_stock -= sold
+                    sweet.units_sold = (sweet.units_sold or 0) + sold
+                    track_stock_change(db, sweet)
+
+            transactions = [
+                Transaction(
+                    sweet_id=pending.sweet_id,
+                    user_id=pending.user_id,
+                    transaction_type="purchase",
+                    quantity=pending.quantity,
+                    price_at_time=pending.price,
+                )
+                for pending in accepted
+            ]
+            SweetsDAO.add_transactions(db, transactions)
+            for transaction in transactions:
+                OutboxService.record_transaction(db, transaction, sweets[transaction.sweet_id].quantity_in_stock)
+            results = [
+                {
+                    "transaction_id": transaction.transaction_id,
+                    "sweet_id": transaction.sweet_id,
+                    "user_id": transaction.user_id,
+                    "transaction_type": transaction.transaction_type,
+                    "quantity": transaction.quantity,
+                    "price_at_time": transaction.price_at_time,
+                    "created_at": transaction.created_at,
+                    "new_stock": sweets[transaction.sweet_id].quantity_in_stock,
+                    "name": sweets[transaction.sweet_id].name,
+                }
+                for transaction in transactions
+            ]
+            for pending, result in zip(accepted, results):
+                if pending.on_commit is not None:
+                    pending.on_commit(db, result)
+            stock_after = {sweet_id: sweet.quantity_in_stock for sweet_id, sweet in sweets.items()}
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Flash-sale batch of {len(batch)} purchase(s) failed: {e}")
+            with self._lock:
+                self.metrics["failed_batches"] += 1
+                for pending in batch:
+                    state = self._sweets.get(pending.sweet_id)
+                    if state is not None:
+                        state["available"] += pending.quantity
+                        state["in_flight"] -= pending.quantity
+            for pending in batch:
+                pending.resolve(error=PurchaseFailed(str(e)))
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self.metrics["batches"] += 1
+            self.metrics["batched"] += len(batch)
+            self.metrics["purchases"] += len(accepted)
+            self.metrics["rejected"] += len(rejected)
+            self.metrics["max_batch"] = max(self.metrics["max_batch"], len(batch))
+            for pending in batch:
+                state = self._sweets.get(pending.sweet_id)
+                if state is not None:
+                    state["in_flight"] -= pending.quantity
+            # The row had less than the counter thought (e.g. another worker sold
+            # it): trust the row
+            for sweet_id in {pending.sweet_id for pending in rejected}:
+                state = self._sweets.get(sweet_id)
+                if state is not None:
+                    state["available"] = max(stock_after.get(sweet_id, 0) - state["in_flight"], 0)
+
+        for pending, result in zip(accepted, results):
+            pending.resolve(result)
+        for pending in rejected:
+            for_sale = stock_after.get(pending.sweet_id, 0) - held.get(pending.sweet_id, 0)
+            pending.resolve(error=InsufficientStock(max(for_sale, 0)))
+
+
+flash_sales = FlashSaleEngine()
+
+
+def reconcile_flash_sales() -> None:
+    """Reload flash-sale counters from the database (run at startup)."""
+    db = SessionLocal()
+    try:
+        count = flash_sales.reconcile(db)
+        if count:
+            print(f"Flash-sale mode restored for {count} sweet(s)")
+    finally:
+        db.close()
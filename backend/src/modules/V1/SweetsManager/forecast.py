@@ -0,0 +1,170 @@
+"""
+Demand forecasting and restock suggestions.
+
+Daily purchase quantities for the whole catalog are loaded into one
+(sweets x days) NumPy matrix, and every figure is computed for all sweets at
+once. Both forecasting methods are a weighting of past days, so the forecast
+is a single matrix-vector product; days of cover and suggested restock are
+element-wise array operations.
+
+The ``demand_forecast`` job precomputes the default forecast; the admin
+endpoint serves it from cache or computes other parameters on demand.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ....app.cache import TTLCache
+from ....app.cron import scheduler
+from ....app.settings import settings
+from .dao import SweetsDAO
+from .schemas import ForecastMethod
+
+
+def forecast_weights(days: int, method: ForecastMethod, window: int, alpha: float) -> np.ndarray:
+    """
+    Weight of each past day (oldest first) in the forecast of daily demand.
+
+    Moving average: 1/window on the last ``window`` days. Exponential smoothing
+    (level s_t = alpha * x_t + (1 - alpha) * s_{t-1}, s_0 = x_0) unrolled:
+    alpha * (1 - alpha)^age per day, with the remaining weight on the oldest day.
+    """
+    weights = np.zeros(days, dtype=np.float64)
+    if days == 0:
+        return weights
+    if method == ForecastMethod.MOVING_AVERAGE:
+        window = min(window, days)
+        weights[-window:] = 1.0 / window
+    else:
+        age = np.arange(days - 1, -1, -1)
+        weights[:] = alpha * (1.0 - alpha) ** age
+        weights[0] = (1.0 - alpha) ** (days - 1)
+    return weights
+
+
+def build_sales_matrix(sweet_ids: np.ndarray, sales_sweet_ids: np.ndarray, sales_days: np.ndarray,
+                       sales_units: np.ndarray, days: int) -> np.ndarray:
+    """
+    Scatter (sweet, day, units) sales into a (sweets x days) float32 matrix.
+
+    Args:
+        sweet_ids: Sorted catalog sweet ids (row order)
+        sales_sweet_ids: Sweet id of each sale aggregate
+        sales_days: Day index (0 = oldest) of each sale aggregate
+        sales_units: Units sold
+        days: Number of days (columns)
+    """
+    sales = np.zeros((len(sweet_ids), days), dtype=np.float32)
+    if len(sales_units):
+        rows = np.searchsorted(sweet_ids, sales_sweet_ids)
+        # Sales of sweets deleted since are dropped
+        known = (rows < len(sweet_ids)) & (sweet_ids[np.minimum(rows, len(sweet_ids) - 1)] == sales_sweet_ids)
+        sales[rows[known], sales_days[known]] = sales_units[known]
+    return sales
+
+
+def restock_plan(stock: np.ndarray, daily_forecast: np.ndarray, lead_time_days: int,
+                 target_days: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Days of cover and suggested restock for every sweet.
+
+    A sweet should hold enough for the restock lead time plus the target cover;
+    the suggestion is whatever the current stock is short of that.
+
+    Returns:
+        (days_of_cover, with inf where no demand is forecast; suggested restock units)
+    """
+    with np.errstate(divide="ignore"):
+        days_of_cover = np.where(daily_forecast > 0, stock / daily_forecast, np.inf)
+    needed = np.ceil(daily_forecast * (lead_time_days + target_days) - 1e-9)
+    suggested = np.maximum(needed - stock, 0).astype(np.int64)
+    return days_of_cover, suggested
+
+
+def compute_forecast(db: Session, method: ForecastMethod, window: int, alpha: float,
+                     history_days: int, lead_time_days: int, target_days: int) -> Dict:
+    """
+    Forecast daily demand and suggest restocks for the whole catalog.
+
+    The history covers the ``history_days`` complete days before today.
+
+    Returns:
+        Catalog arrays (sweet_ids, names, stock, daily_forecast, days_of_cover,
+        suggested_restock) plus generated_at, method and load/compute timings
+    """
+    start = time.perf_counter()
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - timedelta(days=history_days)
+
+    catalog = SweetsDAO.get_stock_levels(db)
+    sales_rows = SweetsDAO.get_daily_sales(db, since, today)
+    sweet_ids = np.fromiter((row[0] for row in catalog), dtype=np.int64, count=len(catalog))
+    stock = np.fromiter((row[2] for row in catalog), dtype=np.float64, count=len(catalog))
+    if sales_rows:
+        sales_sweet_ids, sales_dates, sales_units = (np.asarray(column) for column in zip(*sales_rows))
+        sales_days = (sales_dates.astype("datetime64[D]") - np.datetime64(since.date(), "D")).astype(np.int64)
+    else:
+        sales_sweet_ids = sales_days = sales_units = np.zeros(0, dtype=np.int64)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    sales = build_sales_matrix(sweet_ids, sales_sweet_ids.astype(np.int64), sales_days,
+                               sales_units.astype(np.float32), history_days)
+    daily_forecast = sales @ forecast_weights(history_days, method, window, alpha).astype(np.float32)
+    days_of_cover, suggested = restock_plan(stock, daily_forecast.astype(np.float64), lead_time_days, target_days)
+    compute_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "generated_at": datetime.utcnow(),
+        "method": method,
+        "load_ms": load_ms,
+        "compute_ms": compute_ms,
+        "sweet_ids": sweet_ids,
+        "names": [row[1] for row in catalog],
+        "stock": stock,
+        "daily_forecast": daily_forecast,
+        "days_of_cover": days_of_cover,
+        "suggested_restock": suggested,
+    }
+
+
+# Forecasts by parameters, refreshed by the demand_forecast job
+forecast_cache = TTLCache(ttl_seconds=settings.FORECAST_INTERVAL_SECONDS, maxsize=16)
+
+
+def get_forecast(db: Session, method: ForecastMethod, window: int, alpha: float, history_days: int,
+                 lead_time_days: int, target_days: int, refresh: bool = False) -> Dict:
+    """Get a cached forecast for these parameters, computing it on a miss or when refresh is set."""
+    key = (method, window, alpha, history_days, lead_time_days, target_days)
+    if refresh:
+        forecast_cache.invalidate(key)
+    return forecast_cache.get_or_set(key, lambda: compute_forecast(db, *key))
+
+
+def urgent_first(forecast: Dict, needs_restock_only: bool, limit: int) -> List[int]:
+    """Catalog positions ordered by days of cover (shortest first), optionally only those short of stock."""
+    order = np.argsort(forecast["days_of_cover"], kind="stable")
+    if needs_restock_only:
+        order = order[forecast["suggested_restock"][order] > 0]
+    return order[:limit].tolist()
+
+
+@scheduler.job("demand_forecast", interval_seconds=settings.FORECAST_INTERVAL_SECONDS)
+def demand_forecast(db: Session) -> dict:
+    """Recompute the default catalog forecast and summarize the restock it suggests."""
+    forecast = get_forecast(
+        db, ForecastMethod(settings.FORECAST_METHOD), settings.FORECAST_WINDOW_DAYS, settings.FORECAST_ALPHA,
+        settings.FORECAST_HISTORY_DAYS, settings.FORECAST_LEAD_TIME_DAYS, settings.FORECAST_TARGET_DAYS,
+        refresh=True
+    )
+    suggested = forecast["suggested_restock"]
+    return {
+        "sweets_analyzed": len(suggested),
+        "needing_restock": int(np.count_nonzero(suggested)),
+        "suggested_units": int(suggested.sum()),
+        "load_ms": round(forecast["load_ms"], 1),
+        "compute_ms": round(forecast["compute_ms"], 1),
+    }
@@ -0,0 +1,167 @@
+"""
+In-memory index of active stock reservations (cart holds).
+
+The reservations table is the durable record and decides every write:
+purchases and new holds sum the sweet's active rows under its row lock, so
+holds made on any worker count. This index mirrors the active rows as a read
+cache for availability reads. It keeps the total held per sweet and a
+min-heap of expiry times, so expiring holds costs O(log n) per expired hold
+instead of a table scan. Available to sell (stock minus active holds) is
+cached per sweet and dropped whenever the sweet's holds or stock change.
+
+Each worker keeps its own index, loaded from the table at startup.
+"""
+import heapq
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ....app.cache import TTLCache
+from ....app.cron import scheduler
+from ....app.database import SessionLocal
+from ....app.events import stock_broadcaster
+from ....app.settings import settings
+from .dao import SweetsDAO
+from .models import Reservation
+
+
+class HoldIndex:
+    """Active holds per sweet with heap-based expiry and a cached available-to-sell figure."""
+
+    def __init__(self, ats_ttl_seconds: float = settings.RESERVATION_ATS_CACHE_SECONDS):
+        # reservation_id -> (sweet_id, quantity, expires_at)
+        self._holds: Dict[int, Tuple[int, int, datetime]] = {}
+        self._held: Dict[int, int] = {}
+        self._heap: List[Tuple[datetime, int]] = []
+        self._lock = threading.Lock()
+        self.ats_cache = TTLCache(ttl_seconds=ats_ttl_seconds, maxsize=10000)
+
+    def add(self, reservation: Reservation) -> None:
+        """Track a hold committed to the reservations table."""
+        self.sweep()
+        with self._lock:
+            self._add(reservation.reservation_id, reservation.sweet_id,
+                      reservation.quantity, reservation.expires_at)
+        self.ats_cache.invalidate(reservation.sweet_id)
+
+    def _add(self, reservation_id: int, sweet_id: int, quantity: int, expires_at: datetime) -> None:
+        self._holds[reservation_id] = (sweet_id, quantity, expires_at)
+        self._held[sweet_id] = self._held.get(sweet_id, 0) + quantity
+        heapq.heappush(self._heap, (expires_at, reservation_id))
+
+    def _drop(self, reservation_id: int) -> Optional[int]:
+        """Untrack a hold (heap entries are skipped lazily); returns its sweet id."""
+        hold = self._holds.pop(reservation_id, None)
+        if hold is None:
+            return None
+        sweet_id, quantity, _ = hold
+        remaining = self._held[sweet_id] - quantity
+        if remaining:
+            self._held[sweet_id] = remaining
+        else:
+            del self._held[sweet_id]
+        return sweet_id
+
+    def remove(self, reservation_id: int) -> None:
+        """Stop tracking a hold that was converted or released."""
+        with self._lock:
+            sweet_id = self._drop(reservation_id)
+        if sweet_id is not None:
+            self.ats_cache.invalidate(sweet_id)
+
+    def drop_sweet(self, sweet_id: int) -> None:
+        """Stop tracking every hold on a deleted sweet."""
+        with self._lock:
+            for reservation_id in [rid for rid, hold in self._holds.items() if hold[0] == sweet_id]:
+                self._drop(reservation_id)
+        self.ats_cache.invalidate(sweet_id)
+
+    def sweep(self, now: Optional[datetime] = None) -> List[int]:
+        """
+        Expire holds whose time is up, popping only the due heap entries.
+
+        Returns:
+            IDs of the holds that expired
+        """
+        now = now or datetime.utcnow()
+        expired = []
+        sweet_ids = set()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, reservation_id = heapq.heappop(self._heap)
+                hold = self._holds.get(reservation_id)
+                # Skip entries of holds already removed
+                if hold is not None and hold[2] == expires_at:
+                    sweet_ids.add(self._drop(reservation_id))
+                    expired.append(reservation_id)
+        for sweet_id in sweet_ids:
+            self.ats_cache.invalidate(sweet_id)
+        return expired
+
+    def held(self, sweet_id: int) -> int:
+        """Units of a sweet held by unexpired reservations."""
+        self.sweep()
+        return self._held.get(sweet_id, 0)
+
+    def available_to_sell(self, db: Session, sweet_id: int) -> Optional[dict]:
+        """
+        Stock, held units and available to sell for a sweet, cached per sweet.
+
+        Returns:
+            {sweet_id, quantity_in_stock, held, available_to_sell}, or None if the sweet does not exist
+        """
+        self.sweep()
+
+        def compute() -> Optional[dict]:
+            stock = SweetsDAO.get_stock(db, sweet_id)
+            if stock is None:
+                return None
+            held = self._held.get(sweet_id, 0)
+            return {
+                "sweet_id": sweet_id,
+                "quantity_in_stock": stock,
+                "held": held,
+                "available_to_sell": max(stock - held, 0),
+            }
+
+        return self.ats_cache.get_or_set(sweet_id, compute)
+
+    def load(self, reservations: Iterable[Reservation]) -> int:
+        """Replace the index with the given active reservations."""
+        with self._lock:
+            self._holds.clear()
+            self._held.clear()
+            self._heap.clear()
+            for reservation in reservations:
+                self._add(reservation.reservation_id, reservation.sweet_id,
+                          reservation.quantity, reservation.expires_at)
+            count = len(self._holds)
+        self.ats_cache.clear()
+        return count
+
+
+hold_index = HoldIndex()
+
+# Stock changes from any writer (and any worker, with Redis) drop the cached figure
+stock_broadcaster.add_listener(lambda event: hold_index.ats_cache.invalidate(event["sweet_id"]))
+
+
+def load_hold_index(session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """Load unexpired active reservations into the index (run at startup)."""
+    db = session_factory()
+    try:
+        hold_index.load(SweetsDAO.get_active_reservations(db, datetime.utcnow()))
+    finally:
+        db.close()
+
+
+@scheduler.job("expire_reservations", interval_seconds=settings.RESERVATION_EXPIRY_INTERVAL_SECONDS)
+def expire_reservations(db: Session) -> dict:
+    """Sweep expired holds from the index and mark their rows expired through the expiry index."""
+    now = datetime.utcnow()
+    hold_index.sweep(now)
+    expired = SweetsDAO.expire_reservations(db, now)
+    db.commit()
+    return {"expired": expired}
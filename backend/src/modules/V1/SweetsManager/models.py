@@ -1,9 +1,39 @@
 """
-SweetsManager models for products and transactions.
+SweetsManager models for products, transactions and ratings.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, CheckConstraint, Text, ForeignKey
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Float, DateTime, Boolean, CheckConstraint, Text, ForeignKey, Index,
+    UniqueConstraint, DDL, event, text
+)
+import re
+import unicodedata
 from datetime import datetime
+from typing import Dict, Optional
 from ....app.database import Base
+from ....app.settings import settings
+
+# Literal predicate shared by the partial index and the low-stock query, so the
+# planner can prove the query implies the index condition.
+LOW_STOCK_CONDITION = f"quantity_in_stock < {int(settings.LOW_STOCK_THRESHOLD)}"
+
+
+class Category(Base):
+    """
+    Product category. Sweets reference it by id; the slug is the
+    case-insensitive lookup key used by category filters.
+    """
+    __tablename__ = "categories"
+    category_id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String(60), unique=True, nullable=False, index=True)
+    name = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    @staticmethod
+    def slugify(name: str) -> str:
+        """Lowercase, accent-free, hyphen-separated form of a category name."""
+        value = unicodedata.normalize("NFKD", name)
+        value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+        return "-".join(re.sub(r"[^\w\s-]", " ", value).replace("_", " ").split())
 
 
 class Sweet(Base):
@@ -14,7 +44,8 @@ class Sweet(Base):
     __tablename__ = "sweets"
     sweet_id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
-    category = Column(String(50), nullable=False, index=True)
+    category = Column(String(50), nullable=False, index=True)  # Display name of the category
+    category_id = Column(Integer, ForeignKey('categories.category_id'), nullable=True, index=True)
     description = Column(Text, nullable=True)  # Optional description for better UX
     price = Column(Float, nullable=False)
     quantity_in_stock = Column(Integer, nullable=False, default=0)
@@ -22,12 +53,57 @@ class Sweet(Base):
     image_id = Column(String(255), nullable=True)  # ImageKit file ID for deletion
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Denormalized rating aggregates, maintained with every rating write
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_hist_1 = Column(Integer, nullable=False, default=0)
+    rating_hist_2 = Column(Integer, nullable=False, default=0)
+    rating_hist_3 = Column(Integer, nullable=False, default=0)
+    rating_hist_4 = Column(Integer, nullable=False, default=0)
+    rating_hist_5 = Column(Integer, nullable=False, default=0)
+    rating_avg = Column(Float, nullable=False, default=0)  # Sort key; 0 when unrated
+    
+    # Denormalized popularity counter, incremented by every purchase
+    units_sold = Column(Integer, nullable=False, default=0)
+    
+    # Purchases go through the in-memory counter and group commit (see flash_sale.py)
+    flash_sale = Column(Boolean, nullable=False, default=False)
+    
+    # Catalog change sequence of the last write (see changes.py); 0 = unchanged since before tracking
+    change_seq = Column(BigInteger, nullable=False, default=0)
 
     # Add constraints for data integrity
     __table_args__ = (
         CheckConstraint('price >= 0', name='check_price_positive'),
         CheckConstraint('quantity_in_stock >= 0', name='check_quantity_non_negative'),
+        # Partial index: only low-stock rows are indexed, so the scan stays small
+        Index(
+            'ix_sweets_low_stock', 'quantity_in_stock',
+            sqlite_where=text(LOW_STOCK_CONDITION),
+            postgresql_where=text(LOW_STOCK_CONDITION),
+        ),
+        # Composite (sort key, id) indexes back keyset pagination for each sort order
+        Index('ix_sweets_price_id', 'price', 'sweet_id'),
+        Index('ix_sweets_category_price_id', 'category_id', 'price', 'sweet_id'),
+        Index('ix_sweets_created_at_id', 'created_at', 'sweet_id'),
+        Index('ix_sweets_units_sold_id', 'units_sold', 'sweet_id'),
+        Index('ix_sweets_rating_avg_id', 'rating_avg', 'sweet_id'),
+        # Delta sync reads changes in (change_seq, sweet_id) order
+        Index('ix_sweets_change_seq_id', 'change_seq', 'sweet_id'),
     )
+    
+    @property
+    def average_rating(self) -> Optional[float]:
+        """Average rating from the running aggregates (None if unrated)."""
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+    
+    @property
+    def rating_histogram(self) -> Dict[int, int]:
+        """Number of ratings per star value (1-5)."""
+        return {star: getattr(self, f"rating_hist_{star}") or 0 for star in range(1, 6)}
 
 
 class Transaction(Base):
@@ -42,3 +118,80 @@ class Transaction(Base):
     quantity = Column(Integer, nullable=False)
     price_at_time = Column(Float, nullable=False)  # Price when purchased
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Rating(Base):
+    """
+    A user's 1-5 star rating of a sweet. Each user rates a sweet at most once;
+    re-rating updates the existing row.
+    """
+    __tablename__ = "ratings"
+    rating_id = Column(Integer, primary_key=True, index=True)
+    sweet_id = Column(Integer, ForeignKey('sweets.sweet_id'), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    rating = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('sweet_id', 'user_id', name='uq_rating_sweet_user'),
+        CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
+    )
+
+
+class Reservation(Base):
+    """
+    A time-limited hold on stock (a cart hold). Active holds reduce the
+    available-to-sell figure without touching quantity_in_stock until checkout
+    converts them into a purchase.
+    """
+    __tablename__ = "reservations"
+    reservation_id = Column(Integer, primary_key=True, index=True)
+    sweet_id = Column(Integer, ForeignKey('sweets.sweet_id'), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="active")  # active, converted, released, expired
+    transaction_id = Column(Integer, ForeignKey('transactions.transaction_id'), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('quantity > 0', name='check_reservation_quantity_positive'),
+        # Expiry sweeps and startup loading read only active holds, by expiry
+        Index('ix_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+
+
+class SweetTombstone(Base):
+    """
+    Marker of a deleted sweet, so delta sync can tell clients to drop it.
+    Kept for CATALOG_TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = "sweet_tombstones"
+    tombstone_id = Column(Integer, primary_key=True, index=True)
+    sweet_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index('ix_sweet_tombstones_change_seq_id', 'change_seq', 'sweet_id'),
+    )
+
+
+class CatalogSequence(Base):
+    """
+    Single-row counter issuing catalog change sequence numbers.
+    purged_through is the highest sequence of a purged tombstone: sync tokens
+    older than it may have missed deletions.
+    """
+    __tablename__ = "catalog_sequence"
+    sequence_id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    purged_through = Column(BigInteger, nullable=False, default=0)
+
+
+# The counter row exists from the moment the table does
+event.listen(
+    CatalogSequence.__table__, "after_create",
+    DDL("INSERT INTO catalog_sequence (sequence_id, value, purged_through) VALUES (1, 0, 0)")
+)
@@ -2,20 +2,37 @@
 Sweets manager router.
 Defines API endpoints for sweets inventory management.
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, status, Query, UploadFile, File, Form
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, status, Query, UploadFile, File, Form, Header, Request, WebSocket
 from sqlalchemy.orm import Session
 
 from ....app.database import get_db
 from ....app.auth import get_current_user, get_current_admin_user
+from ....app.ratelimit import rate_limit, purchase_limit
+from ....app.settings import settings
 from ..AuthManager.models import User
 from .schemas import (
     SweetCreate, SweetUpdate, SweetResponse, PurchaseRequest,
-    RestockRequest, TransactionResponse
+    RestockRequest, TransactionResponse, RatingRequest, RatingResponse, SweetSort,
+    SweetSearchResponse, SweetBatchResponse, SuggestionResponse, SearchMode, CategoryResponse,
+    FlashSaleStatus, FlashSaleStatsResponse, ReservationRequest, ReservationResponse, AvailabilityResponse,
+    ForecastMethod, RestockSuggestionsResponse, BulkRestockRequest, BulkRestockResponse,
+    BulkPriceUpdateRequest, BulkPriceUpdateResponse, CatalogChangesResponse
 )
 from .controller import SweetsController
 
 router = APIRouter(prefix="/sweets", tags=["Sweets"])
+categories_router = APIRouter(prefix="/categories", tags=["Categories"])
+reservations_router = APIRouter(prefix="/reservations", tags=["Reservations"])
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated SweetResponse fields to return, e.g. name,price,quantity_in_stock,image_url "
+    "(sweet_id is always included; omitted fields are not read from the database)"
+)
+IDEMPOTENCY_KEY_DESCRIPTION = (
+    "Client-generated unique key; retries with the same key replay the first response "
+    "(Idempotent-Replayed: true) instead of running again"
+)
 
 
 # CREATE - Add a new sweet (Admin only)
@@ -38,13 +55,20 @@ async def create_sweet(
 
 # READ - Get all sweets
 @router.get("/", response_model=List[SweetResponse])
-def get_all_sweets(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all sweets with pagination."""
-    return SweetsController.get_all_sweets(skip, limit, db)
+def get_all_sweets(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    sort: Optional[SweetSort] = Query(None, description="Sort order"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
+    """Get all sweets with sorting and pagination. Full pages return an X-Next-Cursor header."""
+    return SweetsController.get_all_sweets(skip, limit, sort, cursor, fields, db)
 
 
 # READ - Search sweets (must be before /{sweet_id} to avoid route collision)
-@router.get("/search", response_model=List[SweetResponse])
+@router.get("/search", response_model=Union[List[SweetResponse], SweetSearchResponse])
 def search_sweets(
     query: Optional[str] = Query(None, description="Search by sweet name (partial match)"),
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -52,24 +76,160 @@ def search_sweets(
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    sort: Optional[SweetSort] = Query(None, description="Sort order"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    facets: bool = Query(False, description="Return {items, facets} with category and price counts"),
+    price_bucket_size: float = Query(1.0, gt=0, description="Width of each price histogram bucket"),
+    mode: SearchMode = Query(SearchMode.SUBSTRING, description="substring, or fuzzy for typo-tolerant name matching"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
+    """
+    Search for sweets with optional filters and sorting. Full pages return an X-Next-Cursor header.
+    With facets=true the page is wrapped together with category counts and a price histogram.
+    """
+    return SweetsController.search_sweets(
+        query, category, min_price, max_price, skip, limit, sort, cursor, db,
+        facets, price_bucket_size, mode, fields
+    )
+
+
+# READ - Typeahead suggestions (must be before /{sweet_id} to avoid route collision)
+@router.get("/suggest", response_model=List[SuggestionResponse])
+def suggest_sweets(
+    q: str = Query(..., min_length=1, description="Prefix typed so far"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Suggest sweet names and categories starting with the typed prefix. Served from memory."""
+    return SweetsController.suggest_sweets(q, limit)
+
+
+# READ - Multi-get by ids (must be before /{sweet_id} to avoid route collision)
+@router.get("/batch", response_model=SweetBatchResponse)
+def get_sweets_batch(
+    ids: str = Query(..., description="Comma-separated sweet ids (at most 100), e.g. 3,1,2"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
-    """Search for sweets with optional filters."""
-    return SweetsController.search_sweets(query, category, min_price, max_price, skip, limit, db)
+    """Get several sweets in one round trip. Items keep the requested order; unknown ids are listed in missing."""
+    return SweetsController.get_sweets_batch(ids, fields, db)
+
+
+# SYNC - Catalog changes since a sync token (must be before /{sweet_id})
+@router.get("/changes", response_model=CatalogChangesResponse)
+def get_catalog_changes(
+    since: Optional[str] = Query(None, description="next_token of the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changes per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get sweets created or updated and ids of sweets deleted since the sync token,
+    oldest change first. Apply the page, keep next_token, and repeat while has_more.
+    A 410 response means the token is too old: sync again without one.
+    """
+    return SweetsController.get_changes(since, limit, db)
+
+
+# STREAM - Stock changes as server-sent events (must be before /{sweet_id})
+@router.get("/stream")
+def stream_stock_events(
+    request: Request,
+    sweet_ids: Optional[str] = Query(None, description="Comma-separated sweet ids to watch (default: all)")
+):
+    """
+    Stream {sweet_id, new_stock, updated_at} as `stock` events whenever a sweet is
+    purchased, restocked or updated. Replaces polling the sweets list.
+    """
+    return SweetsController.stream_stock_events(request, sweet_ids)
+
+
+# STREAM - Stock changes over a WebSocket
+@router.websocket("/stream/ws")
+async def stream_stock_websocket(websocket: WebSocket, sweet_ids: Optional[str] = None):
+    """Same events as /sweets/stream as JSON messages ({"type": "stock", ...} or heartbeats)."""
+    await SweetsController.stream_stock_websocket(websocket, sweet_ids)
+
+
+# FORECAST - Restock suggestions (Admin only, must be before /{sweet_id})
+@router.get("/restock-suggestions", response_model=RestockSuggestionsResponse)
+def get_restock_suggestions(
+    method: ForecastMethod = Query(ForecastMethod(settings.FORECAST_METHOD), description="Forecasting method"),
+    window: int = Query(settings.FORECAST_WINDOW_DAYS, ge=1, le=365, description="Moving-average window in days"),
+    alpha: float = Query(settings.FORECAST_ALPHA, gt=0, le=1, description="Exponential smoothing factor"),
+    history_days: int = Query(settings.FORECAST_HISTORY_DAYS, ge=1, le=730, description="Days of sales history"),
+    lead_time_days: int = Query(settings.FORECAST_LEAD_TIME_DAYS, ge=0, description="Days until a restock arrives"),
+    target_days: int = Query(settings.FORECAST_TARGET_DAYS, ge=0, description="Days of demand to cover after arrival"),
+    needs_restock_only: bool = Query(True, description="Only list sweets with a suggested restock"),
+    limit: int = Query(100, ge=1, le=1000),
+    refresh: bool = Query(False, description="Recompute instead of serving the cached forecast"),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Forecast daily demand for every sweet from its purchase history and suggest restock
+    quantities covering the lead time plus the target days. Sweets with the least days
+    of cover come first. Requires admin authentication.
+    """
+    return SweetsController.get_restock_suggestions(
+        method, window, alpha, history_days, lead_time_days, target_days,
+        needs_restock_only, limit, refresh, db, current_admin
+    )
+
+
+# BULK - Restock many sweets (Admin only, must be before /{sweet_id})
+@router.post("/bulk/restock", response_model=BulkRestockResponse, status_code=status.HTTP_201_CREATED)
+def bulk_restock(
+    restock_data: BulkRestockRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Restock up to 1000 sweets in one transaction: all succeed or none do.
+    Requires admin authentication.
+    """
+    return SweetsController.bulk_restock(restock_data, idempotency_key, db, current_admin)
+
+
+# BULK - Change prices of a filtered set (Admin only)
+@router.post("/bulk/price", response_model=BulkPriceUpdateResponse)
+def bulk_update_prices(
+    price_data: BulkPriceUpdateRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Apply a percentage or absolute price change to every sweet matching the
+    filters (category, sweet_ids, price range) with one UPDATE statement.
+    Requires admin authentication.
+    """
+    return SweetsController.bulk_update_prices(price_data, idempotency_key, db, current_admin)
+
+
+# FLASH SALE - Counters and group-commit statistics (Admin only, must be before /{sweet_id})
+@router.get("/flash-sales", response_model=FlashSaleStatsResponse)
+def get_flash_sale_stats(current_admin: User = Depends(get_current_admin_user)):
+    """Get this worker's flash-sale counters and group-commit batch statistics. Requires admin authentication."""
+    return SweetsController.get_flash_sale_stats(current_admin)
 
 
 # READ - Get sweets by category (must be before /{sweet_id} to avoid route collision)
 @router.get("/category/{category}", response_model=List[SweetResponse])
 def get_sweets_by_category(category: str, db: Session = Depends(get_db)):
-    """Get all sweets in a specific category."""
+    """Get all sweets in a specific category (by name or slug, case-insensitive)."""
     return SweetsController.get_sweets_by_category(category, db)
 
 
 # READ - Get a specific sweet by ID
 @router.get("/{sweet_id}", response_model=SweetResponse)
-def get_sweet(sweet_id: int, db: Session = Depends(get_db)):
+def get_sweet(
+    sweet_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
     """Get a specific sweet by ID."""
-    return SweetsController.get_sweet(sweet_id, db)
+    return SweetsController.get_sweet(sweet_id, fields, db)
 
 
 # UPDATE - Update a sweet (Admin only)
@@ -119,15 +279,19 @@ def delete_sweet_image_endpoint(
 
 
 # PURCHASE - Purchase a sweet (decrease quantity)
-@router.post("/{sweet_id}/purchase", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/{sweet_id}/purchase", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit(purchase_limit))]
+)
 def purchase_sweet(
     sweet_id: int,
     purchase_data: PurchaseRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Purchase a sweet, decreasing its quantity in stock. Requires authentication."""
-    return SweetsController.purchase_sweet(sweet_id, purchase_data, db, current_user)
+    return SweetsController.purchase_sweet(sweet_id, purchase_data, idempotency_key, db, current_user)
 
 
 # RESTOCK - Restock a sweet (increase quantity) - Admin only
@@ -135,8 +299,109 @@ def purchase_sweet(
 def restock_sweet(
     sweet_id: int,
     restock_data: RestockRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user)
 ):
     """Restock a sweet, increasing its quantity in stock. Requires admin authentication."""
-    return SweetsController.restock_sweet(sweet_id, restock_data, db, current_admin)
+    return SweetsController.restock_sweet(sweet_id, restock_data, idempotency_key, db, current_admin)
+
+
+# AVAILABILITY - Stock minus units held by carts
+@router.get("/{sweet_id}/availability", response_model=AvailabilityResponse)
+def get_availability(sweet_id: int, db: Session = Depends(get_db)):
+    """Get a sweet's stock, the units held by active cart reservations, and the units available to sell."""
+    return SweetsController.get_availability(sweet_id, db)
+
+
+# FLASH SALE - Put a sweet in flash-sale mode (Admin only)
+@router.put("/{sweet_id}/flash-sale", response_model=FlashSaleStatus)
+def enable_flash_sale(
+    sweet_id: int,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Serve purchases of this sweet from an in-memory stock counter, committing
+    them in batches. Meant for short, heavily contended sales. Requires admin authentication.
+    """
+    return SweetsController.enable_flash_sale(sweet_id, db, current_admin)
+
+
+# FLASH SALE - Return a sweet to regular purchases (Admin only)
+@router.delete("/{sweet_id}/flash-sale", status_code=status.HTTP_204_NO_CONTENT)
+def disable_flash_sale(
+    sweet_id: int,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """Take a sweet out of flash-sale mode once its queued purchases commit. Requires admin authentication."""
+    return SweetsController.disable_flash_sale(sweet_id, db, current_admin)
+
+
+# RATE - Rate a sweet (1-5 stars, one rating per user)
+@router.post("/{sweet_id}/rate", response_model=RatingResponse, status_code=status.HTTP_201_CREATED)
+def rate_sweet(
+    sweet_id: int,
+    rating_data: RatingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Rate a sweet from 1 to 5. Rating again replaces the previous rating. Requires authentication."""
+    return SweetsController.rate_sweet(sweet_id, rating_data, db, current_user)
+
+
+# CATEGORIES - List categories with sweet counts
+@categories_router.get("/", response_model=List[CategoryResponse])
+def get_categories(db: Session = Depends(get_db)):
+    """Get all categories with the number of sweets in each. Served from cache."""
+    return SweetsController.get_categories(db)
+
+
+# RESERVE - Hold stock for a cart
+@reservations_router.post("/", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+def reserve_sweet(
+    reservation_data: ReservationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Hold stock for a limited time without decreasing quantity_in_stock. Held units
+    cannot be bought by others until the hold is checked out, released or expires.
+    Requires authentication.
+    """
+    return SweetsController.reserve_sweet(reservation_data, db, current_user)
+
+
+# READ - The current user's active holds
+@reservations_router.get("/", response_model=List[ReservationResponse])
+def get_my_reservations(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the current user's active holds, soonest expiry first. Requires authentication."""
+    return SweetsController.get_my_reservations(db, current_user)
+
+
+# RELEASE - Give a hold back
+@reservations_router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Release a hold, returning its units to sale. Requires authentication."""
+    return SweetsController.release_reservation(reservation_id, db, current_user)
+
+
+# CHECKOUT - Convert a hold into a purchase
+@reservations_router.post("/{reservation_id}/checkout", response_model=TransactionResponse,
+                          status_code=status.HTTP_201_CREATED)
+def checkout_reservation(
+    reservation_id: int,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Purchase the held units; the stock decrement and the hold's conversion commit together. Requires authentication."""
+    return SweetsController.checkout_reservation(reservation_id, idempotency_key, db, current_user)
@@ -2,8 +2,30 @@
 Sweets manager schemas for request/response validation.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Dict, List
 from datetime import datetime
+from enum import Enum
+
+
+class SweetSort(str, Enum):
+    """Sort orders supported by the sweets list and search endpoints."""
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+    NEWEST = "newest"
+    POPULAR = "popular"
+    RATING = "rating"
+
+
+class SearchMode(str, Enum):
+    """How the search query is matched against sweet names."""
+    SUBSTRING = "substring"
+    FUZZY = "fuzzy"
+
+
+class ForecastMethod(str, Enum):
+    """How daily demand is forecast from the sales history."""
+    MOVING_AVERAGE = "moving_average"
+    EXPONENTIAL = "exponential"
 
 
 class SweetCreate(BaseModel):
@@ -29,11 +51,16 @@ class SweetResponse(BaseModel):
     sweet_id: int
     name: str
     category: str
+    category_id: Optional[int] = None
     price: float
     quantity_in_stock: int
     description: Optional[str] = None
     image_url: Optional[str] = None
     image_id: Optional[str] = None
+    average_rating: Optional[float] = None
+    rating_count: int = 0
+    rating_histogram: Dict[int, int] = {}
+    units_sold: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -41,16 +68,189 @@ class SweetResponse(BaseModel):
         from_attributes = True
 
 
+class CategoryResponse(BaseModel):
+    """Schema for a category with the number of sweets in it."""
+    category_id: int
+    slug: str
+    name: str
+    sweet_count: int
+
+
+class CategoryFacet(BaseModel):
+    """Number of matching sweets in a category."""
+    category: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    """Number of matching sweets in a price range [min_price, max_price)."""
+    min_price: float
+    max_price: float
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """Facet counts for the current search filters."""
+    categories: List[CategoryFacet]
+    price_histogram: List[PriceBucket]
+
+
+class SweetSearchResponse(BaseModel):
+    """Schema for a page of search results together with its facets."""
+    items: List[SweetResponse]
+    facets: SearchFacets
+
+
+class SweetBatchResponse(BaseModel):
+    """Schema for a multi-get: sweets in the requested order plus the ids that do not exist."""
+    items: List[SweetResponse]
+    missing: List[int]
+
+
+class CatalogChangesResponse(BaseModel):
+    """
+    Schema for a page of catalog changes: sweets created or updated and ids of
+    sweets deleted since the sync token, oldest change first.
+    """
+    items: List[SweetResponse]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+
+
+class FlashSaleStatus(BaseModel):
+    """Schema for a flash-sale sweet's in-memory counter in this worker."""
+    sweet_id: int
+    name: str
+    available: int
+    in_flight: int
+
+
+class FlashSaleStatsResponse(BaseModel):
+    """Schema for flash-sale group-commit statistics in this worker."""
+    purchases: int
+    rejected: int
+    batches: int
+    batched: int
+    max_batch: int
+    failed_batches: int
+    avg_batch_size: float
+    sweets: List[FlashSaleStatus]
+
+
+class RestockSuggestion(BaseModel):
+    """Schema for one sweet's demand forecast and suggested restock."""
+    sweet_id: int
+    name: str
+    quantity_in_stock: int
+    daily_forecast: float
+    days_of_cover: Optional[float] = None  # None when no demand is forecast
+    suggested_restock: int
+
+
+class RestockSuggestionsResponse(BaseModel):
+    """Schema for catalog-wide restock suggestions, most urgent first."""
+    generated_at: datetime
+    method: ForecastMethod
+    sweets_analyzed: int
+    needing_restock: int
+    load_ms: float
+    compute_ms: float
+    items: List[RestockSuggestion]
+
+
+class SuggestionResponse(BaseModel):
+    """Schema for a typeahead suggestion (a sweet name or a category)."""
+    text: str
+    kind: str
+    sweet_id: Optional[int] = None
+
+
 class PurchaseRequest(BaseModel):
     """Schema for purchase request."""
     quantity: int = Field(..., gt=0, description="Quantity to purchase (must be greater than 0)")
 
 
+class ReservationRequest(BaseModel):
+    """Schema for holding stock in a cart."""
+    sweet_id: int
+    quantity: int = Field(..., gt=0, description="Quantity to hold (must be greater than 0)")
+
+
+class ReservationResponse(BaseModel):
+    """Schema for a stock reservation (cart hold)."""
+    reservation_id: int
+    sweet_id: int
+    user_id: int
+    quantity: int
+    status: str
+    transaction_id: Optional[int] = None
+    created_at: datetime
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AvailabilityResponse(BaseModel):
+    """Schema for a sweet's stock, units held by carts and units available to sell."""
+    sweet_id: int
+    quantity_in_stock: int
+    held: int
+    available_to_sell: int
+
+
 class RestockRequest(BaseModel):
     """Schema for restock request."""
     quantity: int = Field(..., gt=0, description="Quantity to restock (must be greater than 0)")
 
 
+class BulkRestockItem(BaseModel):
+    """Schema for one sweet of a bulk restock."""
+    sweet_id: int
+    quantity: int = Field(..., gt=0, description="Quantity to restock (must be greater than 0)")
+
+
+class BulkRestockRequest(BaseModel):
+    """Schema for restocking many sweets in one transaction."""
+    items: List[BulkRestockItem] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkRestockResult(BaseModel):
+    """Schema for a restocked sweet's new stock."""
+    sweet_id: int
+    name: str
+    quantity: int
+    new_stock: int
+
+
+class BulkRestockResponse(BaseModel):
+    """Schema for bulk restock results."""
+    sweets_restocked: int
+    units_restocked: int
+    elapsed_ms: float
+    items: List[BulkRestockResult]
+
+
+class BulkPriceUpdateRequest(BaseModel):
+    """
+    Schema for changing the price of every sweet matching the filters.
+    Give exactly one of percent (e.g. -10 for 10% off) or amount (e.g. 0.5 to add 0.50).
+    """
+    category: Optional[str] = None
+    sweet_ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    percent: Optional[float] = Field(None, gt=-100)
+    amount: Optional[float] = None
+
+
+class BulkPriceUpdateResponse(BaseModel):
+    """Schema for bulk price update results."""
+    updated: int
+    elapsed_ms: float
+
+
 class TransactionResponse(BaseModel):
     """Schema for transaction response."""
     transaction_id: int
@@ -65,3 +265,23 @@ class TransactionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class RatingRequest(BaseModel):
+    """Schema for rating request."""
+    rating: int = Field(..., ge=1, le=5, description="Rating from 1 to 5 stars")
+
+
+class RatingResponse(BaseModel):
+    """Schema for rating response."""
+    rating_id: int
+    sweet_id: int
+    user_id: int
+    rating: int
+    average_rating: Optional[float]
+    rating_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,308 @@
+"""
+In-memory search indexes over the sweets catalog.
+
+Indexes are built once at startup and kept current by SweetsService on every
+create, update and delete, so lookups never touch the database. Each worker
+process holds its own copy.
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from ....app.database import SessionLocal
+from .models import Sweet
+
+# Code point just above any character produced by normalize(); closes prefix ranges
+_PREFIX_END = "\uffff"
+
+
+def normalize(value: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^\w\s]", " ", value).split())
+
+
+class SuggestIndex:
+    """
+    Sorted prefix index of sweet names and categories for typeahead.
+
+    Every word position of a name is indexed ("dark chocolate" and "chocolate"),
+    so a prefix matches the start of any word. Entries live in one sorted list
+    and a prefix lookup is a binary search followed by a short range scan.
+    """
+
+    def __init__(self):
+        # (key, rank, kind, display text, sweet_id); rank 0 = key is the whole text
+        self._entries: List[Tuple[str, int, str, str, Optional[int]]] = []
+        self._sweets: Dict[int, Tuple[str, str]] = {}
+        self._categories: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(text: str) -> List[Tuple[str, int]]:
+        """Index keys for a text with their rank (0 = whole text, 1 = later word)."""
+        words = normalize(text).split()
+        return [(" ".join(words[i:]), 0 if i == 0 else 1) for i in range(len(words))]
+
+    def _insert(self, text: str, kind: str, sweet_id: Optional[int]) -> None:
+        for key, rank in self._keys(text):
+            insort(self._entries, (key, rank, kind, text, sweet_id))
+
+    def _delete(self, text: str, kind: str, sweet_id: Optional[int]) -> None:
+        for key, rank in self._keys(text):
+            entry = (key, rank, kind, text, sweet_id)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def _add_category(self, category: str) -> None:
+        if self._categories[category] == 0:
+            self._insert(category, "category", None)
+        self._categories[category] += 1
+
+    def _remove_category(self, category: str) -> None:
+        self._categories[category] -= 1
+        if self._categories[category] <= 0:
+            del self._categories[category]
+            self._delete(category, "category", None)
+
+    def rebuild(self, rows: List[Tuple[int, str, str]]) -> None:
+        """Rebuild the whole index from (sweet_id, name, category) rows."""
+        with self._lock:
+            self._entries = []
+            self._sweets = {}
+            self._categories = Counter()
+            for sweet_id, name, category in rows:
+                self._sweets[sweet_id] = (name, category)
+                self._insert(name, "sweet", sweet_id)
+                self._add_category(category)
+
+    def upsert(self, sweet_id: int, name: str, category: str) -> None:
+        """Add a sweet, or replace its entries if it is already indexed."""
+        with self._lock:
+            self._remove_unlocked(sweet_id)
+            self._sweets[sweet_id] = (name, category)
+            self._insert(name, "sweet", sweet_id)
+            self._add_category(category)
+
+    def remove(self, sweet_id: int) -> None:
+        """Remove a sweet's entries."""
+        with self._lock:
+            self._remove_unlocked(sweet_id)
+
+    def _remove_unlocked(self, sweet_id: int) -> None:
+        previous = self._sweets.pop(sweet_id, None)
+        if previous:
+            name, category = previous
+            self._delete(name, "sweet", sweet_id)
+            self._remove_category(category)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """
+        Get up to ``limit`` suggestions whose name or category has a word starting with prefix.
+        Whole-text prefix matches rank before later-word matches, then alphabetically.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results: Dict[tuple, Tuple[int, str, str, Optional[int]]] = {}
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            end = bisect_left(self._entries, (prefix + _PREFIX_END,))
+            # Scan a bounded window; plenty to fill ``limit`` after de-duplication
+            for _, rank, kind, text, sweet_id in self._entries[position:min(end, position + limit * 8)]:
+                identity = (kind, sweet_id if kind == "sweet" else text)
+                if identity not in results or rank < results[identity][0]:
+                    results[identity] = (rank, text, kind, sweet_id)
+
+        ranked = sorted(results.values(), key=lambda item: (item[0], item[1].lower()))
+        return [
+            {"text": text, "kind": kind, "sweet_id": sweet_id}
+            for _, text, kind, sweet_id in ranked[:limit]
+        ]
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance between a and b (insertions, deletions,
+    substitutions and adjacent transpositions), giving up early once every
+    alignment exceeds max_distance. Returns max_distance + 1 in that case.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def max_edits(length: int) -> int:
+    """Typos tolerated for a query of the given length."""
+    if length <= 4:
+        return 1
+    if length <= 8:
+        return 2
+    return 3
+
+
+class TrigramIndex:
+    """
+    Character trigram index over sweet names for typo-tolerant search.
+
+    A query collects candidates from the posting lists of its trigrams, keeps
+    the ones sharing the most trigrams, and reranks only those by
+    Damerau-Levenshtein distance. Posting lists longer than max_postings carry
+    little signal and are skipped, which bounds the work per query regardless
+    of catalog size.
+    """
+
+    def __init__(self, max_postings: int = 20_000, max_candidates: int = 200):
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self._postings: Dict[str, Set[int]] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """Padded trigrams of every word in a normalized text."""
+        grams = set()
+        for word in text.split():
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def rebuild(self, rows: List[Tuple[int, str]]) -> None:
+        """Rebuild the index from (sweet_id, name) rows."""
+        postings: Dict[str, Set[int]] = {}
+        names: Dict[int, str] = {}
+        for sweet_id, name in rows:
+            normalized = normalize(name)
+            names[sweet_id] = normalized
+            for gram in self.trigrams(normalized):
+                postings.setdefault(gram, set()).add(sweet_id)
+        with self._lock:
+            self._postings = postings
+            self._names = names
+
+    def upsert(self, sweet_id: int, name: str) -> None:
+        """Add a sweet, or re-index it under its new name."""
+        with self._lock:
+            self._remove_unlocked(sweet_id)
+            normalized = normalize(name)
+            self._names[sweet_id] = normalized
+            for gram in self.trigrams(normalized):
+                self._postings.setdefault(gram, set()).add(sweet_id)
+
+    def remove(self, sweet_id: int) -> None:
+        """Remove a sweet from the index."""
+        with self._lock:
+            self._remove_unlocked(sweet_id)
+
+    def _remove_unlocked(self, sweet_id: int) -> None:
+        previous = self._names.pop(sweet_id, None)
+        if previous is None:
+            return
+        for gram in self.trigrams(previous):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(sweet_id)
+                if not ids:
+                    del self._postings[gram]
+
+    @staticmethod
+    def _distance(query: str, name: str, limit: int) -> int:
+        """Smallest distance between the query and any run of as many words in the name."""
+        if query in name:
+            return 0
+        words = name.split()
+        width = len(query.split())
+        best = damerau_levenshtein(query, name, limit)
+        for i in range(max(len(words) - width + 1, 1)):
+            best = min(best, damerau_levenshtein(query, " ".join(words[i:i + width]), limit))
+        return best
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[int, int]]:
+        """
+        Find sweets whose name matches the query within a few typos.
+
+        Returns:
+            (sweet_id, distance) pairs, closest first
+        """
+        query = normalize(query)
+        grams = self.trigrams(query)
+        if not grams:
+            return []
+
+        with self._lock:
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            # Always keep the most selective lists, skip the very common ones
+            selected = [ids for ids in postings if len(ids) <= self.max_postings] or postings[:3]
+            overlap: Counter = Counter()
+            for ids in selected:
+                overlap.update(ids)
+            candidates = heapq.nlargest(self.max_candidates, overlap.items(), key=lambda item: item[1])
+            names = {sweet_id: self._names[sweet_id] for sweet_id, _ in candidates}
+
+        allowed = max_edits(len(query))
+        matches = []
+        for sweet_id, name in names.items():
+            distance = self._distance(query, name, allowed)
+            if distance <= allowed:
+                matches.append((distance, name, sweet_id))
+
+        matches.sort()
+        return [(sweet_id, distance) for distance, _, sweet_id in matches[:limit]]
+
+
+suggest_index = SuggestIndex()
+fuzzy_index = TrigramIndex()
+
+
+def index_sweet(sweet: Sweet) -> None:
+    """Add or refresh a sweet in every in-memory search index."""
+    suggest_index.upsert(sweet.sweet_id, sweet.name, sweet.category)
+    fuzzy_index.upsert(sweet.sweet_id, sweet.name)
+
+
+def unindex_sweet(sweet_id: int) -> None:
+    """Remove a sweet from every in-memory search index."""
+    suggest_index.remove(sweet_id)
+    fuzzy_index.remove(sweet_id)
+
+
+def build_search_indexes() -> None:
+    """Build the in-memory search indexes from the database (run at startup)."""
+    db = SessionLocal()
+    try:
+        rebuild_search_indexes(db)
+    finally:
+        db.close()
+
+
+def rebuild_search_indexes(db: Session) -> None:
+    """Rebuild every in-memory search index from the given session."""
+    rows = db.query(Sweet.sweet_id, Sweet.name, Sweet.category).all()
+    suggest_index.rebuild(rows)
+    fuzzy_index.rebuild([(sweet_id, name) for sweet_id, name, _ in rows])
@@ -2,18 +2,272 @@
 Sweets manager services layer.
 Contains business logic for sweets management and inventory operations.
 """
+import base64
+import json
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Optional, Tuple, Any, List, Dict, Callable
+
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..AuthManager.models import User
-from .models import Sweet, Transaction
+from .models import Sweet, Transaction, Rating, Category, Reservation
+from .schemas import SweetSort, SweetResponse, ForecastMethod, BulkRestockItem
 from ....app.utility import upload_sweet_image, delete_sweet_image
 from .dao import SweetsDAO
+from .search_index import index_sweet, unindex_sweet
+from .flash_sale import flash_sales, InsufficientStock, PurchaseFailed
+from .holds import hold_index
+from .forecast import forecast_cache, get_forecast, urgent_first
+from ..OutboxManager import OutboxService
+from . import changes  # noqa: F401 (registers change tracking)
+from ....app.events import track_stock_change
+from ....app.cache import TTLCache
+from ....app.settings import settings
+
+# Sweet id above any real one: a sync position after every change with a given sequence number
+SYNC_END_OF_SEQUENCE = 2 ** 31 - 1
+
+# Category list with sweet counts, dropped on every catalog write
+category_cache = TTLCache(ttl_seconds=settings.CATEGORY_CACHE_TTL_SECONDS, maxsize=1)
+
+
+def _average_rating(values: dict) -> Optional[float]:
+    count = values["rating_count"]
+    return round(values["rating_sum"] / count, 2) if count else None
+
+
+def _rating_histogram(values: dict) -> Dict[int, int]:
+    return {star: values[f"rating_hist_{star}"] or 0 for star in range(1, 6)}
+
+
+def _is_number(value: Any, integer: bool = False) -> bool:
+    """Whether a decoded JSON value is a number (an integer if asked); booleans are not."""
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) if integer else isinstance(value, (int, float))
+
+
+# How each SweetResponse field is computed from a row's {column: value} dict,
+# in response field order
+FIELD_VALUES: Dict[str, Callable[[dict], Any]] = {
+    name: itemgetter(name) for name in SweetResponse.model_fields
+}
+FIELD_VALUES.update({
+    "average_rating": _average_rating,
+    "rating_count": lambda values: values["rating_count"] or 0,
+    "rating_histogram": _rating_histogram,
+    "units_sold": lambda values: values["units_sold"] or 0,
+})
 
 
 class SweetsService:
     """Service layer for sweets operations."""
     
+    @staticmethod
+    def encode_cursor(sort: Optional[SweetSort], position: Tuple[Any, int]) -> str:
+        """Encode the (sort key, sweet_id) of a page's last row as an opaque cursor."""
+        key, sweet_id = position
+        if isinstance(key, datetime):
+            key = key.isoformat()
+        payload = json.dumps([sort.value if sort else None, key, sweet_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str, sort: Optional[SweetSort]) -> Tuple[Any, int]:
+        """
+        Decode a cursor produced by encode_cursor.
+        
+        Raises:
+            HTTPException: If the cursor is malformed or was issued for another sort order
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, key, sweet_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        if cursor_sort != (sort.value if sort else None):
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        try:
+            if not _is_number(sweet_id, integer=True):
+                raise TypeError(sweet_id)
+            if sort == SweetSort.NEWEST:
+                key = datetime.fromisoformat(key)
+            elif not _is_number(key, integer=sort is None):
+                raise TypeError(key)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return key, sweet_id
+    
+    @staticmethod
+    def sweet_event_data(sweet: Sweet) -> dict:
+        """Catalog fields of a sweet as sent in outbox events."""
+        return {
+            "sweet_id": sweet.sweet_id,
+            "name": sweet.name,
+            "category": sweet.category,
+            "price": sweet.price,
+            "quantity_in_stock": sweet.quantity_in_stock,
+            "description": sweet.description,
+            "image_url": sweet.image_url,
+        }
+    
+    @staticmethod
+    def encode_sync_token(position: Tuple[int, int]) -> str:
+        """Encode a (change_seq, sweet_id) sync position as an opaque token."""
+        payload = json.dumps(["sync", *position], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_sync_token(token: str) -> Tuple[int, int]:
+        """
+        Decode a token produced by encode_sync_token.
+        
+        Raises:
+            HTTPException: If the token is malformed
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            kind, change_seq, sweet_id = json.loads(base64.urlsafe_b64decode(padded))
+            if kind != "sync":
+                raise ValueError(kind)
+            return int(change_seq), int(sweet_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+    
+    @staticmethod
+    def get_changes(db: Session, since: Optional[str], limit: int) -> dict:
+        """
+        Get a page of catalog changes after a sync token.
+        
+        Created/updated sweets and tombstones are merged in (change_seq, sweet_id)
+        order, so applying pages in order replays the catalog's history.
+        
+        Args:
+            db: Database session
+            since: Token from a previous page (None for a full sync)
+            limit: Maximum number of changes in the page
+            
+        Returns:
+            {items, deleted, next_token, has_more}; keep next_token for the next sync
+            
+        Raises:
+            HTTPException: 400 for a malformed token, 410 if deletions after the
+            token were already purged and the client has to resync from scratch
+        """
+        # Read before the rows: every change numbered up to sequence.value is committed
+        sequence = SweetsDAO.get_catalog_sequence(db)
+        position = (-1, 0)
+        if since is not None:
+            position = SweetsService.decode_sync_token(since)
+            if position[0] < sequence.purged_through:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE, detail="Sync token expired; resync without a token"
+                )
+        
+        upserts = [((sweet.change_seq, sweet.sweet_id), sweet)
+                   for sweet in SweetsDAO.get_sweets_changed_after(db, position, limit + 1)]
+        deletes = [((tombstone.change_seq, tombstone.sweet_id), None)
+                   for tombstone in SweetsDAO.get_tombstones_after(db, position, limit + 1)]
+        page = sorted(upserts + deletes, key=itemgetter(0))
+        has_more = len(page) > limit
+        page = page[:limit]
+        if page:
+            position = page[-1][0]
+        if not has_more:
+            # Caught up: move past every committed change so the token stays ahead of purges
+            position = max(position, (sequence.value, SYNC_END_OF_SEQUENCE))
+        
+        return {
+            "items": [sweet for _, sweet in page if sweet is not None],
+            "deleted": [sweet_id for (_, sweet_id), sweet in page if sweet is None],
+            "next_token": SweetsService.encode_sync_token(position),
+            "has_more": has_more,
+        }
+    
+    @staticmethod
+    def order_by_relevance(sweets: List[Sweet], ranked_ids: List[int]) -> List[Sweet]:
+        """Order sweets by their position in a ranked id list (e.g. fuzzy match results)."""
+        rank = {sweet_id: position for position, sweet_id in enumerate(ranked_ids)}
+        return sorted(sweets, key=lambda sweet: rank[sweet.sweet_id])
+    
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+        """
+        Parse a comma-separated ``fields`` parameter into SweetResponse field names.
+        sweet_id is always included; None or an empty value means every field.
+        
+        Raises:
+            HTTPException: If a field is not part of SweetResponse
+        """
+        requested = {name.strip() for name in (fields or "").split(",") if name.strip()}
+        if not requested:
+            return None
+        unknown = requested - set(FIELD_VALUES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return [name for name in FIELD_VALUES if name in requested or name == "sweet_id"]
+    
+    @staticmethod
+    def parse_ids(ids: str, max_ids: int) -> List[int]:
+        """
+        Parse a comma-separated id list, dropping duplicates but keeping the first-seen order.
+        
+        Raises:
+            HTTPException: If an id is not an integer, or there are none or more than max_ids
+        """
+        try:
+            parsed = [int(value) for value in ids.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+        unique = list(dict.fromkeys(parsed))
+        if not unique:
+            raise HTTPException(status_code=400, detail="At least one id is required")
+        if len(unique) > max_ids:
+            raise HTTPException(status_code=400, detail=f"At most {max_ids} ids per request")
+        return unique
+    
+    @staticmethod
+    def sweet_rows_to_dicts(rows: List[Any], fields: Optional[List[str]] = None) -> List[dict]:
+        """
+        Build SweetResponse payloads (or the requested subset of them) for rows
+        selected with SweetsDAO.select_columns. Computed fields mirror the Sweet
+        properties so the output matches the ORM path exactly.
+        """
+        if not rows:
+            return []
+        keys = rows[0]._fields
+        getters = [(name, FIELD_VALUES[name]) for name in (fields or FIELD_VALUES)]
+        # Named attribute access on Row is slow; zip each tuple into a dict once
+        return [
+            {name: getter(values) for name, getter in getters}
+            for values in (dict(zip(keys, row)) for row in rows)
+        ]
+    
+    @staticmethod
+    def resolve_category(db: Session, name: str) -> Category:
+        """
+        Get or create the category for a free-text name (matched case-insensitively).
+        
+        Raises:
+            HTTPException: If the name has no usable characters
+        """
+        if not Category.slugify(name):
+            raise HTTPException(status_code=400, detail="Category name is required")
+        return SweetsDAO.get_or_create_category(db, name)
+    
+    @staticmethod
+    def get_categories(db: Session) -> List[dict]:
+        """Get every category with its sweet count, served from cache when fresh."""
+        return category_cache.get_or_set("all", lambda: [
+            {"category_id": category_id, "slug": slug, "name": name, "sweet_count": count}
+            for category_id, slug, name, count in SweetsDAO.get_categories_with_counts(db)
+        ])
+    
     @staticmethod
     async def create_sweet(db: Session, name: str, category: str, price: float, 
                           quantity_in_stock: int, description: str = None, 
@@ -53,10 +307,12 @@ class SweetsService:
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
         
-        # Create new sweet
+        # Create new sweet in its normalized category
+        sweet_category = SweetsService.resolve_category(db, category)
         new_sweet = Sweet(
             name=name,
-            category=category,
+            category=sweet_category.name,
+            category_id=sweet_category.category_id,
             price=price,
             quantity_in_stock=quantity_in_stock,
             description=description,
@@ -64,7 +320,13 @@ class SweetsService:
             image_id=image_id
         )
         
-        return SweetsDAO.create_sweet(db, new_sweet)
+        sweet = SweetsDAO.add_sweet(db, new_sweet)
+        OutboxService.record(db, "sweet.created", SweetsService.sweet_event_data(sweet), sweet_id=sweet.sweet_id)
+        # Commit the sweet together with its event
+        sweet = SweetsDAO.update_sweet(db, sweet)
+        index_sweet(sweet)
+        category_cache.clear()
+        return sweet
     
     @staticmethod
     def update_sweet(db: Session, sweet: Sweet, name: str = None, category: str = None,
@@ -95,18 +357,54 @@ class SweetsService:
             sweet.name = name
         
         if category is not None:
-            sweet.category = category
+            sweet_category = SweetsService.resolve_category(db, category)
+            sweet.category = sweet_category.name
+            sweet.category_id = sweet_category.category_id
         
         if price is not None:
             sweet.price = price
         
         if quantity_in_stock is not None:
+            if flash_sales.is_active(sweet.sweet_id):
+                # Apply purchases admitted before the new absolute stock
+                flash_sales.drain()
             sweet.quantity_in_stock = quantity_in_stock
         
         if description is not None:
             sweet.description = description
         
-        return SweetsDAO.update_sweet(db, sweet)
+        changed_fields = {
+            field: getattr(sweet, field)
+            for field, value in (("name", name), ("category", category), ("price", price),
+                                 ("quantity_in_stock", quantity_in_stock), ("description", description))
+            if value is not None
+        }
+        if changed_fields:
+            OutboxService.record(db, "sweet.updated", {"sweet_id": sweet.sweet_id, "changes": changed_fields},
+                                 sweet_id=sweet.sweet_id)
+        track_stock_change(db, sweet)
+        sweet = SweetsDAO.update_sweet(db, sweet)
+        SweetsService.sync_flash_sale(sweet)
+        index_sweet(sweet)
+        category_cache.clear()
+        return sweet
+    
+    @staticmethod
+    def delete_sweet(db: Session, sweet: Sweet) -> None:
+        """
+        Delete a sweet and drop it from the in-memory search indexes.
+        
+        Args:
+            db: Database session
+            sweet: Sweet object to delete
+        """
+        sweet_id = sweet.sweet_id
+        OutboxService.record(db, "sweet.deleted", {"sweet_id": sweet_id, "name": sweet.name}, sweet_id=sweet_id)
+        SweetsDAO.delete_sweet(db, sweet)
+        flash_sales.unload(sweet_id)
+        hold_index.drop_sweet(sweet_id)
+        unindex_sweet(sweet_id)
+        category_cache.clear()
     
     @staticmethod
     async def update_sweet_image(db: Session, sweet: Sweet, image) -> Sweet:
@@ -136,6 +434,9 @@ class SweetsService:
             upload_result = await upload_sweet_image(image, sweet.name)
             sweet.image_url = upload_result["url"]
             sweet.image_id = upload_result["file_id"]
+            OutboxService.record(db, "sweet.updated", {
+                "sweet_id": sweet.sweet_id, "changes": {"image_url": sweet.image_url}
+            }, sweet_id=sweet.sweet_id)
             
             return SweetsDAO.update_sweet(db, sweet)
         except HTTPException as e:
@@ -167,18 +468,25 @@ class SweetsService:
         # Remove image references from database
         sweet.image_url = None
         sweet.image_id = None
+        OutboxService.record(db, "sweet.updated", {
+            "sweet_id": sweet.sweet_id, "changes": {"image_url": None}
+        }, sweet_id=sweet.sweet_id)
         SweetsDAO.update_sweet(db, sweet)
     
     @staticmethod
-    def purchase_sweet(db: Session, sweet: Sweet, quantity: int, current_user: User) -> Transaction:
+    def purchase_sweet(db: Session, sweet: Sweet, quantity: int, current_user: User,
+                       converting: Optional[Reservation] = None) -> Transaction:
         """
         Process a sweet purchase (decrease quantity).
+        Changes are flushed, not committed, so the caller can commit them
+        together with related writes (e.g. the idempotency record).
         
         Args:
             db: Database session
             sweet: Sweet object
             quantity: Quantity to purchase
             current_user: User making the purchase
+            converting: The buyer's own reservation being checked out (its units are for sale to them)
             
         Returns:
             Created Transaction object
@@ -186,15 +494,23 @@ class SweetsService:
         Raises:
             HTTPException: If insufficient stock
         """
-        # Check if enough quantity in stock
-        if sweet.quantity_in_stock < quantity:
+        # Stock held by other carts' reservations is not for sale. The caller
+        # holds the sweet row lock, so the sum sees holds from every worker.
+        held = SweetsDAO.get_held_quantity(
+            db, sweet.sweet_id, datetime.utcnow(),
+            exclude_reservation_id=converting.reservation_id if converting else None
+        )
+        available = sweet.quantity_in_stock - held
+        if available < quantity:
             raise HTTPException(
                 status_code=400,
-                detail=f"Insufficient stock. Available: {sweet.quantity_in_stock}, Requested: {quantity}"
+                detail=f"Insufficient stock. Available: {max(available, 0)}, Requested: {quantity}"
             )
         
-        # Decrease quantity
+        # Decrease quantity and count the sale towards popularity
         sweet.quantity_in_stock -= quantity
+        sweet.units_sold = (sweet.units_sold or 0) + quantity
+        track_stock_change(db, sweet)
         
         # Create transaction record
         transaction = Transaction(
@@ -205,13 +521,204 @@ class SweetsService:
             price_at_time=sweet.price
         )
         
-        SweetsDAO.update_sweet(db, sweet)
-        return SweetsDAO.create_transaction(db, transaction)
+        transaction = SweetsDAO.add_transaction(db, transaction)
+        OutboxService.record_transaction(db, transaction, sweet.quantity_in_stock)
+        return transaction
+    
+    @staticmethod
+    def purchase_flash_sale(sweet_id: int, quantity: int, current_user: User,
+                            on_commit: Optional[Callable[[Session, dict], None]] = None) -> dict:
+        """
+        Purchase a flash-sale sweet through its in-memory counter.
+        
+        Admission is decided in memory; the purchase is then committed in the
+        writer's next group commit, and this call returns once it is durable.
+        
+        Args:
+            sweet_id: ID of a sweet in flash-sale mode
+            quantity: Quantity to purchase
+            current_user: User making the purchase
+            on_commit: Writes related rows in the group commit's transaction (optional)
+            
+        Returns:
+            Committed transaction fields plus ``name`` and ``new_stock``
+            
+        Raises:
+            HTTPException: 400 if insufficient stock, 503 if the batch failed to commit
+        """
+        try:
+            return flash_sales.purchase(sweet_id, quantity, current_user.user_id, on_commit)
+        except InsufficientStock as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock. Available: {e.available}, Requested: {quantity}"
+            )
+        except PurchaseFailed:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Purchase could not be recorded, please retry"
+            )
+    
+    @staticmethod
+    def set_flash_sale(db: Session, sweet: Sweet, enabled: bool) -> None:
+        """
+        Switch a sweet in or out of flash-sale mode.
+        
+        Enabling loads the in-memory counter from the committed stock. Disabling
+        first waits for queued flash-sale purchases to commit, so regular
+        purchases see every admitted sale.
+        
+        Args:
+            db: Database session
+            sweet: Sweet object
+            enabled: Whether purchases should go through the flash-sale path
+        """
+        sweet.flash_sale = enabled
+        sweet = SweetsDAO.update_sweet(db, sweet)
+        if enabled:
+            flash_sales.load(sweet)
+        else:
+            flash_sales.drain()
+            flash_sales.unload(sweet.sweet_id)
+    
+    @staticmethod
+    def sync_flash_sale(sweet: Sweet) -> None:
+        """Resynchronize a flash-sale counter after a committed stock change (restock, update)."""
+        if flash_sales.is_active(sweet.sweet_id):
+            flash_sales.load(sweet)
+    
+    @staticmethod
+    def reserve_sweet(db: Session, sweet: Sweet, quantity: int, current_user: User) -> Reservation:
+        """
+        Hold stock for a cart without decreasing quantity_in_stock.
+        
+        Args:
+            db: Database session
+            sweet: Sweet object
+            quantity: Quantity to hold
+            current_user: User holding the stock
+            
+        Returns:
+            Created active Reservation, expiring after RESERVATION_HOLD_SECONDS
+            
+        Raises:
+            HTTPException: If the stock not held by other carts is insufficient
+        """
+        # The caller holds the sweet row lock, so the sum sees holds from every worker
+        held = SweetsDAO.get_held_quantity(db, sweet.sweet_id, datetime.utcnow())
+        available = sweet.quantity_in_stock - held
+        if available < quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock. Available: {max(available, 0)}, Requested: {quantity}"
+            )
+        
+        reservation = SweetsDAO.add_reservation(db, Reservation(
+            sweet_id=sweet.sweet_id,
+            user_id=current_user.user_id,
+            quantity=quantity,
+            status="active",
+            expires_at=datetime.utcnow() + timedelta(seconds=settings.RESERVATION_HOLD_SECONDS)
+        ))
+        db.commit()
+        db.refresh(reservation)
+        hold_index.add(reservation)
+        return reservation
+    
+    @staticmethod
+    def release_reservation(db: Session, reservation: Reservation) -> None:
+        """
+        Give up a hold, returning its stock to sale.
+        
+        Args:
+            db: Database session
+            reservation: Active reservation
+        """
+        reservation.status = "released"
+        db.commit()
+        hold_index.remove(reservation.reservation_id)
+    
+    @staticmethod
+    def checkout_reservation(db: Session, reservation: Reservation, sweet: Sweet,
+                             current_user: User) -> Transaction:
+        """
+        Convert a hold into a purchase.
+        The stock decrement, the transaction and the reservation's status change
+        are flushed together, not committed; the caller commits them as one
+        transaction and then drops the hold from the index.
+        
+        Args:
+            db: Database session
+            reservation: Active, unexpired reservation of current_user
+            sweet: Reserved sweet
+            current_user: User checking out
+            
+        Returns:
+            Created purchase Transaction
+            
+        Raises:
+            HTTPException: 400 if the stock no longer covers it
+        """
+        # The locked row is the hold: its units are left out of the held sum
+        transaction = SweetsService.purchase_sweet(
+            db, sweet, reservation.quantity, current_user, converting=reservation
+        )
+        reservation.status = "converted"
+        reservation.transaction_id = transaction.transaction_id
+        db.flush()
+        return transaction
+    
+    @staticmethod
+    def get_restock_suggestions(db: Session, method: ForecastMethod, window: int, alpha: float,
+                                history_days: int, lead_time_days: int, target_days: int,
+                                needs_restock_only: bool, limit: int, refresh: bool = False) -> dict:
+        """
+        Forecast daily demand for the whole catalog and suggest restock quantities.
+        
+        Args:
+            db: Database session
+            method: Moving average or exponential smoothing
+            window: Moving-average window in days
+            alpha: Exponential smoothing factor (weight of the latest day)
+            history_days: Days of sales history to use
+            lead_time_days: Days until a restock arrives
+            target_days: Days of demand a restock should cover after it arrives
+            needs_restock_only: Only list sweets with a suggested restock
+            limit: Maximum number of sweets listed
+            refresh: Recompute instead of serving a cached forecast
+            
+        Returns:
+            Forecast summary with the most urgent sweets (least days of cover) first
+        """
+        forecast = get_forecast(db, method, window, alpha, history_days, lead_time_days, target_days, refresh)
+        suggested = forecast["suggested_restock"]
+        items = []
+        for i in urgent_first(forecast, needs_restock_only, limit):
+            days_of_cover = float(forecast["days_of_cover"][i])
+            items.append({
+                "sweet_id": int(forecast["sweet_ids"][i]),
+                "name": forecast["names"][i],
+                "quantity_in_stock": int(forecast["stock"][i]),
+                "daily_forecast": round(float(forecast["daily_forecast"][i]), 3),
+                "days_of_cover": round(days_of_cover, 1) if days_of_cover != float("inf") else None,
+                "suggested_restock": int(suggested[i]),
+            })
+        
+        return {
+            "generated_at": forecast["generated_at"],
+            "method": method,
+            "sweets_analyzed": len(suggested),
+            "needing_restock": int((suggested > 0).sum()),
+            "load_ms": round(forecast["load_ms"], 2),
+            "compute_ms": round(forecast["compute_ms"], 2),
+            "items": items,
+        }
     
     @staticmethod
     def restock_sweet(db: Session, sweet: Sweet, quantity: int, current_admin: User) -> Transaction:
         """
         Process a sweet restock (increase quantity).
+        Changes are flushed, not committed; the caller commits.
         
         Args:
             db: Database session
@@ -224,6 +731,7 @@ class SweetsService:
         """
         # Increase quantity
         sweet.quantity_in_stock += quantity
+        track_stock_change(db, sweet)
         
         # Create transaction record
         transaction = Transaction(
@@ -234,5 +742,177 @@ class SweetsService:
             price_at_time=sweet.price
         )
         
-        SweetsDAO.update_sweet(db, sweet)
-        return SweetsDAO.create_transaction(db, transaction)
+        transaction = SweetsDAO.add_transaction(db, transaction)
+        OutboxService.record_transaction(db, transaction, sweet.quantity_in_stock)
+        return transaction
+    
+    @staticmethod
+    def bulk_restock(db: Session, items: List[BulkRestockItem], current_admin: User) -> dict:
+        """
+        Restock many sweets in one transaction.
+        Rows are locked in id order, stock updates are flushed together and the
+        restock transactions are written with one bulk INSERT. Changes are
+        flushed, not committed; the caller commits.
+        
+        Args:
+            db: Database session
+            items: Sweets and quantities to restock (repeated sweets are summed)
+            current_admin: Admin performing restock
+            
+        Returns:
+            Restock summary with each sweet's new stock and the time taken
+            
+        Raises:
+            HTTPException: If any sweet does not exist (nothing is restocked)
+        """
+        start = time.perf_counter()
+        quantities: Dict[int, int] = {}
+        for item in items:
+            quantities[item.sweet_id] = quantities.get(item.sweet_id, 0) + item.quantity
+        
+        sweets = SweetsDAO.get_sweets_for_update(db, list(quantities))
+        missing = sorted(set(quantities) - {sweet.sweet_id for sweet in sweets})
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"Sweets not found: {', '.join(map(str, missing))}"
+            )
+        
+        transactions = []
+        for sweet in sweets:
+            quantity = quantities[sweet.sweet_id]
+            sweet.quantity_in_stock += quantity
+            track_stock_change(db, sweet)
+            transactions.append(Transaction(
+                sweet_id=sweet.sweet_id,
+                user_id=current_admin.user_id,
+                transaction_type="restock",
+                quantity=quantity,
+                price_at_time=sweet.price
+            ))
+        for transaction, sweet in zip(SweetsDAO.add_transactions(db, transactions), sweets):
+            OutboxService.record_transaction(db, transaction, sweet.quantity_in_stock)
+        
+        # Restock suggestions were computed from the old stock
+        forecast_cache.clear()
+        return {
+            "sweets_restocked": len(sweets),
+            "units_restocked": sum(quantities.values()),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "items": [
+                {"sweet_id": sweet.sweet_id, "name": sweet.name,
+                 "quantity": quantities[sweet.sweet_id], "new_stock": sweet.quantity_in_stock}
+                for sweet in sweets
+            ],
+        }
+    
+    @staticmethod
+    def bulk_update_prices(db: Session, category: Optional[str] = None, sweet_ids: Optional[List[int]] = None,
+                           min_price: Optional[float] = None, max_price: Optional[float] = None,
+                           percent: Optional[float] = None, amount: Optional[float] = None) -> dict:
+        """
+        Change the price of every sweet matching the filters with one set-based UPDATE.
+        New prices are rounded to cents. Changes are not committed; the caller commits.
+        
+        Args:
+            db: Database session
+            category: Only sweets in this category (name or slug)
+            sweet_ids: Only these sweets
+            min_price: Only sweets priced at least this much
+            max_price: Only sweets priced at most this much
+            percent: Relative change, e.g. -10 for 10% off
+            amount: Absolute change added to the price
+            
+        Returns:
+            Number of sweets updated and the time taken
+            
+        Raises:
+            HTTPException: If the change or filters are missing, or a price would drop to zero or below
+        """
+        if (percent is None) == (amount is None):
+            raise HTTPException(status_code=400, detail="Give exactly one of percent or amount")
+        if category is None and sweet_ids is None and min_price is None and max_price is None:
+            raise HTTPException(
+                status_code=400, detail="Give at least one filter (category, sweet_ids, min_price, max_price)"
+            )
+        
+        start = time.perf_counter()
+        filters = SweetsDAO.search_filters(
+            category=category, min_price=min_price, max_price=max_price, sweet_ids=sweet_ids
+        )
+        conditions = [condition for group in filters.values() for condition in group]
+        new_price = SweetsDAO.changed_price(percent, amount)
+        
+        free = SweetsDAO.count_sweets(db, conditions + [new_price <= 0])
+        if free:
+            raise HTTPException(
+                status_code=400, detail=f"Price change would drop {free} sweet(s) to zero or below"
+            )
+        
+        change_seq = SweetsDAO.next_change_seq(db)
+        updated = SweetsDAO.update_prices(db, conditions, new_price, change_seq)
+        for sweet_id, price in SweetsDAO.get_prices_by_change_seq(db, change_seq):
+            OutboxService.record(db, "sweet.updated", {"sweet_id": sweet_id, "changes": {"price": price}},
+                                 sweet_id=sweet_id)
+        return {"updated": updated, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+    
+    @staticmethod
+    def resync_flash_sales(db: Session) -> None:
+        """Reload every flash-sale counter (stock and price) after a committed bulk change."""
+        for item in flash_sales.status():
+            sweet = SweetsDAO.get_sweet_by_id(db, item["sweet_id"])
+            if sweet is not None:
+                SweetsService.sync_flash_sale(sweet)
+    
+    @staticmethod
+    def rate_sweet(db: Session, sweet: Sweet, rating: int, current_user: User) -> Rating:
+        """
+        Create or update the current user's rating of a sweet.
+        
+        The rating row and the sweet's denormalized aggregates (sum, count and
+        per-star histogram) are written in the same transaction, so reads never
+        need to aggregate the ratings table.
+        
+        Args:
+            db: Database session
+            sweet: Sweet object being rated
+            rating: Star rating (1-5)
+            current_user: User submitting the rating
+            
+        Returns:
+            The created or updated Rating object
+        """
+        # The existing rating is locked, so concurrent re-rates by the same user
+        # apply their deltas one after the other. A concurrent first rating may
+        # win the insert race; in that case retry once as an update of its row.
+        for attempt in range(2):
+            existing = SweetsDAO.get_user_rating_for_update(db, sweet.sweet_id, current_user.user_id)
+            if existing:
+                previous = existing.rating
+                existing.rating = rating
+                user_rating = existing
+                deltas = {"rating_sum": rating - previous}
+                if previous != rating:
+                    deltas[f"rating_hist_{previous}"] = -1
+                    deltas[f"rating_hist_{rating}"] = 1
+            else:
+                user_rating = Rating(
+                    sweet_id=sweet.sweet_id,
+                    user_id=current_user.user_id,
+                    rating=rating
+                )
+                db.add(user_rating)
+                deltas = {"rating_sum": rating, "rating_count": 1, f"rating_hist_{rating}": 1}
+            
+            try:
+                db.flush()
+                SweetsDAO.increment_rating_aggregates(db, sweet.sweet_id, deltas)
+                db.commit()
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt:
+                    raise HTTPException(status_code=409, detail="Rating conflict, please retry")
+        
+        db.refresh(user_rating)
+        db.refresh(sweet)
+        return user_rating
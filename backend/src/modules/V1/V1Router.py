@@ -6,7 +6,10 @@ from fastapi import APIRouter
 
 # Import module routers
 from .AuthManager import router as auth_router
-from .SweetsManager import router as sweets_router
+from .SweetsManager import router as sweets_router, categories_router, reservations_router
+from .JobsManager import router as jobs_router
+from .MetricsManager import router as metrics_router
+from .OrdersManager import router as orders_router
 
 # Create the V1 router
 v1_router = APIRouter(tags=["V1"])
@@ -14,5 +17,10 @@ v1_router = APIRouter(tags=["V1"])
 # Include all module routers
 v1_router.include_router(auth_router)
 v1_router.include_router(sweets_router)
+v1_router.include_router(categories_router)
+v1_router.include_router(reservations_router)
+v1_router.include_router(jobs_router)
+v1_router.include_router(metrics_router)
+v1_router.include_router(orders_router)
 
 __all__ = ["v1_router"]
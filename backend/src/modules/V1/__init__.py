@@ -1,5 +1,11 @@
 """API V1 modules."""
 from .AuthManager import router as auth_router
-from .SweetsManager import router as sweets_router
+from .SweetsManager import router as sweets_router, categories_router, reservations_router
+from .JobsManager import router as jobs_router
+from .MetricsManager import router as metrics_router
+from .OrdersManager import router as orders_router
 
-__all__ = ["auth_router", "sweets_router"]
+__all__ = [
+    "auth_router", "sweets_router", "categories_router", "reservations_router", "jobs_router",
+    "metrics_router", "orders_router"
+]
@@ -8,6 +8,14 @@ This module provides shared fixtures for:
 - Test sweets data
 """
 
+import os
+
+# Background workers would poll the application database (./test.db), not
+# the test database; tests that need them start them on the test session
+os.environ["ORDER_CONSUMERS"] = "0"
+os.environ["OUTBOX_DISPATCHER_ENABLED"] = "false"
+os.environ["SCHEDULER_ENABLED"] = "false"
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -15,6 +23,9 @@ from sqlalchemy.orm import sessionmaker
 from src.app.database import Base, get_db, init_models
 from src.app.auth import get_password_hash
 from src.app.main import app
+from src.app.ratelimit import rate_limiter
+from src.app.revocation import revocation_list
+from src.app.token_versions import token_versions
 
 # Initialize models for testing
 User, Sweet, Transaction = init_models()
@@ -53,6 +64,10 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    # Every test starts with full rate limit buckets and no cached token versions
+    rate_limiter.reset()
+    token_versions.clear()
+    revocation_list.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -0,0 +1,188 @@
+"""
+Test suite for bulk admin operations.
+
+Tests cover:
+- Restocking many sweets in one transaction
+- All-or-nothing behaviour when a sweet is missing
+- Percentage and absolute price changes by filter
+- Rejecting price changes that would make sweets free
+- Flash-sale counters picking up bulk changes
+- Benchmark of bulk restock vs one request per sweet
+"""
+
+import time
+
+import pytest
+from fastapi import status
+
+from src.modules.V1.SweetsManager.flash_sale import flash_sales
+from src.modules.V1.SweetsManager.models import Sweet, Transaction
+from test.conftest import TestingSessionLocal
+
+
+def _bulk_restock(client, headers, items, **extra):
+    return client.post("/api/sweets/bulk/restock", json={"items": items}, headers={**headers, **extra})
+
+
+def _prices(client, create_sweets):
+    return [client.get(f"/api/sweets/{sweet['sweet_id']}").json()["price"] for sweet in create_sweets]
+
+
+class TestBulkRestock:
+    """Test POST /api/sweets/bulk/restock."""
+
+    def test_restocks_all_sweets(self, client, test_admin, create_sweets, db):
+        """Test every sweet is restocked and a restock transaction is recorded for each."""
+        items = [
+            {"sweet_id": create_sweets[0]["sweet_id"], "quantity": 10},
+            {"sweet_id": create_sweets[4]["sweet_id"], "quantity": 25},
+            {"sweet_id": create_sweets[0]["sweet_id"], "quantity": 5},
+        ]
+
+        response = _bulk_restock(client, test_admin["headers"], items)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["sweets_restocked"] == 2
+        assert data["units_restocked"] == 40
+        assert data["elapsed_ms"] >= 0
+        assert {item["sweet_id"]: item["new_stock"] for item in data["items"]} == {
+            create_sweets[0]["sweet_id"]: 115, create_sweets[4]["sweet_id"]: 25
+        }
+        restocks = db.query(Transaction).filter(Transaction.transaction_type == "restock").all()
+        assert sorted(t.quantity for t in restocks) == [15, 25]
+
+    def test_missing_sweet_restocks_nothing(self, client, test_admin, create_sweets):
+        """Test an unknown sweet fails the whole request and leaves stock untouched."""
+        items = [{"sweet_id": create_sweets[1]["sweet_id"], "quantity": 10}, {"sweet_id": 99999, "quantity": 1}]
+
+        response = _bulk_restock(client, test_admin["headers"], items)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert "99999" in response.json()["detail"]
+        assert client.get(f"/api/sweets/{create_sweets[1]['sweet_id']}").json()["quantity_in_stock"] == 50
+
+    def test_validation_and_admin_only(self, client, test_admin, test_user_token, create_sweets):
+        """Test empty or non-positive restocks are rejected and regular users are forbidden."""
+        item = {"sweet_id": create_sweets[0]["sweet_id"], "quantity": 1}
+
+        assert _bulk_restock(client, test_admin["headers"], []).status_code == \
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert _bulk_restock(client, test_admin["headers"], [{**item, "quantity": 0}]).status_code == \
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert _bulk_restock(client, test_user_token["headers"], [item]).status_code == \
+            status.HTTP_403_FORBIDDEN
+
+    def test_idempotency_key_restocks_once(self, client, test_admin, create_sweets):
+        """Test retrying a bulk restock with the same Idempotency-Key does not restock twice."""
+        items = [{"sweet_id": create_sweets[1]["sweet_id"], "quantity": 10}]
+        _bulk_restock(client, test_admin["headers"], items, **{"Idempotency-Key": "bulk-1"})
+
+        retry = _bulk_restock(client, test_admin["headers"], items, **{"Idempotency-Key": "bulk-1"})
+
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert client.get(f"/api/sweets/{create_sweets[1]['sweet_id']}").json()["quantity_in_stock"] == 60
+
+
+class TestBulkPriceUpdate:
+    """Test POST /api/sweets/bulk/price."""
+
+    def test_percentage_by_category(self, client, test_admin, create_sweets):
+        """Test a percentage change applies to the category only, rounded to cents."""
+        before = _prices(client, create_sweets)
+        category = create_sweets[0]["category"]
+
+        response = client.post("/api/sweets/bulk/price", json={"category": category, "percent": -10},
+                               headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        in_category = [sweet["category"] == category for sweet in create_sweets]
+        assert response.json()["updated"] == sum(in_category)
+        expected = [round(price * 0.9, 2) if matched else price for price, matched in zip(before, in_category)]
+        assert _prices(client, create_sweets) == pytest.approx(expected)
+
+    def test_absolute_by_ids(self, client, test_admin, create_sweets):
+        """Test an absolute change applies to the listed sweets."""
+        before = _prices(client, create_sweets)
+        ids = [create_sweets[1]["sweet_id"], create_sweets[2]["sweet_id"]]
+
+        response = client.post("/api/sweets/bulk/price", json={"sweet_ids": ids, "amount": 0.5},
+                               headers=test_admin["headers"])
+
+        assert response.json()["updated"] == 2
+        after = _prices(client, create_sweets)
+        assert after[1:3] == pytest.approx([before[1] + 0.5, before[2] + 0.5])
+        assert after[0] == before[0]
+
+    def test_rejects_free_sweets(self, client, test_admin, create_sweets):
+        """Test a change that would drop a price to zero or below updates nothing."""
+        before = _prices(client, create_sweets)
+
+        response = client.post("/api/sweets/bulk/price", json={"min_price": 0, "amount": -1000},
+                               headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert _prices(client, create_sweets) == before
+
+    @pytest.mark.parametrize("body", [
+        {"category": "Chocolate"},
+        {"category": "Chocolate", "percent": 5, "amount": 1},
+        {"percent": 5},
+    ])
+    def test_requires_one_change_and_a_filter(self, client, test_admin, body):
+        """Test requests without exactly one change or without filters are rejected."""
+        response = client.post("/api/sweets/bulk/price", json=body, headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestBulkFlashSaleSync:
+    """Test flash-sale counters after bulk changes."""
+
+    def test_counter_and_price_resynced(self, client, test_admin, create_sweets):
+        """Test a flash-sale sweet's counter sees a bulk restock and its new price."""
+        flash_sales.session_factory = TestingSessionLocal
+        sweet_id = create_sweets[1]["sweet_id"]
+        client.put(f"/api/sweets/{sweet_id}/flash-sale", headers=test_admin["headers"])
+        try:
+            _bulk_restock(client, test_admin["headers"], [{"sweet_id": sweet_id, "quantity": 5}])
+            client.post("/api/sweets/bulk/price", json={"sweet_ids": [sweet_id], "amount": 1},
+                        headers=test_admin["headers"])
+
+            assert flash_sales.status(sweet_id)[0]["available"] == 55
+            assert flash_sales._sweets[sweet_id]["price"] == pytest.approx(create_sweets[1]["price"] + 1)
+        finally:
+            flash_sales.unload(sweet_id)
+
+
+class TestBulkRestockBenchmark:
+    """Bulk restock vs one restock request per sweet."""
+
+    SWEETS = 200
+
+    def test_benchmark_bulk_vs_single(self, client, test_admin, db):
+        """Test a bulk restock of 200 sweets matches per-sweet restocks; print the time of each."""
+        db.add_all([
+            Sweet(name=f"Bench Sweet {i}", category="Bench", price=1.0, quantity_in_stock=0)
+            for i in range(self.SWEETS * 2)
+        ])
+        db.commit()
+        ids = [sweet_id for (sweet_id,) in db.query(Sweet.sweet_id).filter(Sweet.category == "Bench")]
+        single_ids, bulk_ids = ids[:self.SWEETS], ids[self.SWEETS:]
+
+        start = time.perf_counter()
+        for sweet_id in single_ids:
+            client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 3}, headers=test_admin["headers"])
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = _bulk_restock(client, test_admin["headers"],
+                                 [{"sweet_id": sweet_id, "quantity": 3} for sweet_id in bulk_ids])
+        bulk_seconds = time.perf_counter() - start
+
+        print(f"\n{self.SWEETS} restocks: one request each {single_seconds * 1000:.0f} ms, "
+              f"bulk {bulk_seconds * 1000:.0f} ms ({response.json()['elapsed_ms']:.0f} ms in the database)")
+        db.expire_all()
+        stocks = dict(db.query(Sweet.sweet_id, Sweet.quantity_in_stock).filter(Sweet.category == "Bench"))
+        assert set(stocks.values()) == {3}
+        assert bulk_seconds < single_seconds
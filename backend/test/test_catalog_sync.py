@@ -0,0 +1,136 @@
+"""
+Test suite for incremental catalog sync.
+
+Tests cover:
+- Full sync without a token
+- Only sweets with catalog changes after a token (updates, bulk price changes)
+- Stock and rating writes leaving the feed and the sequence counter alone
+- Tombstones for deleted sweets
+- Paging through changes
+- Invalid and expired sync tokens
+"""
+
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from src.modules.V1.SweetsManager.changes import purge_expired_tombstones
+from src.modules.V1.SweetsManager.models import CatalogSequence, SweetTombstone
+
+
+def _sync(client, since=None, limit=None):
+    params = {}
+    if since is not None:
+        params["since"] = since
+    if limit is not None:
+        params["limit"] = limit
+    response = client.get("/api/sweets/changes", params=params)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()
+
+
+class TestCatalogSync:
+    """Test GET /api/sweets/changes."""
+
+    def test_full_sync_without_token(self, client, create_sweets):
+        """Test omitting the token returns the whole catalog and a token to continue from."""
+        data = _sync(client)
+
+        assert sorted(item["sweet_id"] for item in data["items"]) == \
+            sorted(sweet["sweet_id"] for sweet in create_sweets)
+        assert data["deleted"] == []
+        assert data["has_more"] is False
+        assert data["next_token"]
+
+    def test_caught_up_token_returns_nothing(self, client, create_sweets):
+        """Test syncing again with the returned token yields no changes."""
+        token = _sync(client)["next_token"]
+
+        data = _sync(client, token)
+
+        assert data["items"] == [] and data["deleted"] == []
+
+    def test_only_changed_sweets_returned(self, client, test_admin, test_user_token, create_sweets):
+        """Test updates and bulk price changes after the token are returned once, newest state."""
+        token = _sync(client)["next_token"]
+        ids = [sweet["sweet_id"] for sweet in create_sweets]
+        client.put(f"/api/sweets/{ids[0]}", json={"description": "New recipe"}, headers=test_admin["headers"])
+        client.post(f"/api/sweets/{ids[0]}/purchase", json={"quantity": 2}, headers=test_user_token["headers"])
+        client.post("/api/sweets/bulk/price", json={"sweet_ids": [ids[0], ids[2]], "amount": 1},
+                    headers=test_admin["headers"])
+
+        data = _sync(client, token)
+
+        by_id = {item["sweet_id"]: item for item in data["items"]}
+        assert sorted(by_id) == [ids[0], ids[2]]
+        assert by_id[ids[0]]["description"] == "New recipe"
+        assert by_id[ids[0]]["price"] == create_sweets[0]["price"] + 1
+        assert by_id[ids[0]]["quantity_in_stock"] == create_sweets[0]["quantity_in_stock"] - 2
+
+    def test_stock_and_rating_writes_are_not_catalog_changes(self, client, test_admin, test_user_token,
+                                                              create_sweets, db):
+        """Test purchases, restocks and ratings neither appear in the feed nor take the change sequence."""
+        token = _sync(client)["next_token"]
+        sequence = db.query(CatalogSequence.value).scalar()
+        sweet_id = create_sweets[1]["sweet_id"]
+        headers = test_user_token["headers"]
+
+        client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 2}, headers=headers)
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 5}, headers=test_admin["headers"])
+        client.post(f"/api/sweets/{sweet_id}/rate", json={"rating": 4}, headers=headers)
+
+        assert _sync(client, token)["items"] == []
+        db.expire_all()
+        assert db.query(CatalogSequence.value).scalar() == sequence
+
+    def test_deleted_sweet_reported_once(self, client, test_admin, create_sweets, db):
+        """Test a deletion after the token is reported through its tombstone."""
+        token = _sync(client)["next_token"]
+        sweet_id = create_sweets[3]["sweet_id"]
+        client.delete(f"/api/sweets/{sweet_id}", headers=test_admin["headers"])
+
+        data = _sync(client, token)
+
+        assert data["items"] == []
+        assert data["deleted"] == [sweet_id]
+        assert db.query(SweetTombstone).filter(SweetTombstone.sweet_id == sweet_id).count() == 1
+        assert _sync(client, data["next_token"])["deleted"] == []
+
+    def test_pages_cover_every_change(self, client, test_admin, create_sweets):
+        """Test following next_token page by page returns each change exactly once."""
+        client.delete(f"/api/sweets/{create_sweets[4]['sweet_id']}", headers=test_admin["headers"])
+        seen, deleted, token, pages = [], [], None, 0
+        while True:
+            data = _sync(client, token, limit=2)
+            seen += [item["sweet_id"] for item in data["items"]]
+            deleted += data["deleted"]
+            token, pages = data["next_token"], pages + 1
+            if not data["has_more"]:
+                break
+
+        assert pages == 3
+        assert sorted(seen) == sorted(sweet["sweet_id"] for sweet in create_sweets[:4])
+        assert deleted == [create_sweets[4]["sweet_id"]]
+
+
+class TestSyncTokens:
+    """Test token validation and expiry."""
+
+    def test_invalid_token(self, client):
+        """Test a malformed token returns 400."""
+        response = client.get("/api/sweets/changes", params={"since": "not-a-token"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_token_older_than_purged_tombstones(self, client, test_admin, create_sweets, db):
+        """Test a token issued before purged deletions must resync, while a fresh one keeps working."""
+        old_token = _sync(client)["next_token"]
+        client.delete(f"/api/sweets/{create_sweets[0]['sweet_id']}", headers=test_admin["headers"])
+
+        assert purge_expired_tombstones(db, datetime.utcnow() + timedelta(days=365)) == 1
+        db.commit()
+
+        response = client.get("/api/sweets/changes", params={"since": old_token})
+        assert response.status_code == status.HTTP_410_GONE
+        fresh_token = _sync(client)["next_token"]
+        assert _sync(client, fresh_token)["items"] == []
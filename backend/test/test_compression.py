@@ -0,0 +1,169 @@
+"""
+Test suite for response compression.
+
+Tests cover:
+- Accept-Encoding negotiation
+- Minimum size threshold, already-compressed and streaming responses
+- Per-endpoint bytes saved / CPU metrics
+- Measurement of bytes saved and CPU cost per compression level
+"""
+
+import gzip
+import json
+import time
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.app.compression import (
+    CompressionMetrics, CompressionMiddleware, available_encoders, compression_metrics, negotiate
+)
+
+
+@pytest.fixture
+def stub_client():
+    """A bare app behind the middleware exercising the exclusion rules."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, metrics=CompressionMetrics())
+
+    @app.get("/large")
+    def large():
+        return {"items": ["sweet"] * 200}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\x00" * 1000, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 1000 for _ in range(3)), media_type="text/plain")
+
+    return TestClient(app)
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation."""
+
+    def test_server_preference_breaks_ties(self):
+        """Test equal q-values pick the server's preferred coding."""
+        assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+
+    def test_highest_q_value_wins(self):
+        """Test the client's q-values take precedence."""
+        assert negotiate("br;q=0.5, gzip;q=0.9", ["br", "gzip"]) == "gzip"
+
+    def test_q_zero_and_identity(self):
+        """Test q=0 refuses a coding and identity means no compression."""
+        assert negotiate("gzip;q=0", ["gzip"]) is None
+        assert negotiate("identity", ["gzip"]) is None
+        assert negotiate("", ["gzip"]) is None
+
+    def test_wildcard(self):
+        """Test * accepts any coding not listed explicitly."""
+        assert negotiate("*;q=0.1, br;q=0", ["br", "gzip"]) == "gzip"
+
+
+class TestCompressionMiddleware:
+    """Test which responses get compressed."""
+
+    def test_large_json_is_gzipped(self, stub_client):
+        """Test a large JSON body is compressed and marked Vary."""
+        response = stub_client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json() == {"items": ["sweet"] * 200}
+
+    def test_identity_is_not_compressed(self, stub_client):
+        """Test clients that do not accept a coding get the plain body."""
+        response = stub_client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    def test_small_response_not_compressed(self, stub_client):
+        """Test bodies under the minimum size are sent as-is."""
+        response = stub_client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_already_compressed_type_skipped(self, stub_client):
+        """Test image payloads are not recompressed."""
+        response = stub_client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert len(response.content) == 1004
+
+    def test_streaming_response_passed_through(self, stub_client):
+        """Test streaming responses are not buffered or compressed."""
+        response = stub_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.content == b"x" * 3000
+
+
+class TestCompressionMetrics:
+    """Test per-endpoint compression metrics on the real app."""
+
+    def test_catalog_page_is_compressed_and_measured(self, client, test_admin, create_sweets):
+        """Test GET /api/sweets/ is gzipped and shows up in /api/metrics/compression."""
+        compression_metrics.clear()
+        response = client.get("/api/sweets/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+
+        metrics = client.get("/api/metrics/compression", headers=test_admin["headers"])
+
+        assert metrics.status_code == status.HTTP_200_OK
+        stats = {item["endpoint"]: item for item in metrics.json()}
+        catalog = stats["GET /api/sweets/"]
+        assert catalog["compressed"] == 1
+        assert catalog["bytes_saved"] > 0
+        assert catalog["encodings"] == {"gzip": 1}
+
+    def test_metrics_require_admin(self, client, test_user_token):
+        """Test regular users cannot read compression metrics."""
+        response = client.get("/api/metrics/compression", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestCompressionMeasurement:
+    """Measure bytes saved and CPU cost on a 100-sweet catalog page."""
+
+    def test_measure_levels(self):
+        """Test every available coding shrinks a catalog page; print size and CPU per level."""
+        page = json.dumps([
+            {
+                "sweet_id": i,
+                "name": f"Sweet {i}",
+                "category": "Chocolate",
+                "price": 2.5,
+                "quantity_in_stock": 100,
+                "description": "Rich milk chocolate with hazelnuts and a hint of sea salt. " * 3,
+                "image_url": f"https://ik.imagekit.io/sweetshop/sweets/sweet_{i}.jpg",
+                "image_id": f"file_{i:08d}",
+                "created_at": "2025-01-01T00:00:00",
+                "updated_at": "2025-01-01T00:00:00",
+            }
+            for i in range(100)
+        ]).encode()
+
+        print(f"\nraw page: {len(page)} bytes")
+        for level in (1, 6, 9):
+            for name, encode in available_encoders(gzip_level=level, brotli_quality=level,
+                                                   zstd_level=level).items():
+                start = time.thread_time()
+                for _ in range(20):
+                    body = encode(page)
+                cpu_ms = (time.thread_time() - start) * 1000 / 20
+                print(f"{name} level {level}: {len(body)} bytes "
+                      f"({100 * (1 - len(body) / len(page)):.1f}% saved), {cpu_ms:.3f} ms CPU")
+                assert len(body) < len(page) / 3
+
+        assert gzip.decompress(available_encoders()["gzip"](page)) == page
@@ -0,0 +1,304 @@
+"""
+Test suite for flash-sale mode.
+
+Tests cover:
+- Enabling and disabling flash-sale mode
+- Purchases admitted by the in-memory counter and group-committed
+- Sold-out handling and counter resynchronization
+- Units held by cart reservations staying out of flash sales
+- Idempotency-Key responses committed in the purchase's group commit
+- Restock and stock updates keeping the counter in sync
+- Reconciliation of counters from committed stock
+- Benchmark of concurrent purchases: row-lock path vs flash-sale path
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import status
+
+from src.app.idempotency import IdempotencyRecord
+from src.modules.V1.SweetsManager.flash_sale import FlashSaleEngine, InsufficientStock, flash_sales
+from src.modules.V1.SweetsManager.holds import hold_index
+from src.modules.V1.SweetsManager.models import Reservation, Sweet, Transaction
+from src.modules.V1.SweetsManager.services import SweetsService
+from src.modules.V1.SweetsManager.dao import SweetsDAO
+from test.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def flash_engine(client):
+    """The flash-sale engine writing to the test database, emptied afterwards."""
+    flash_sales.session_factory = TestingSessionLocal
+    yield flash_sales
+    flash_sales.drain()
+    for item in flash_sales.status():
+        flash_sales.unload(item["sweet_id"])
+
+
+def _enable(client, headers, sweet_id):
+    return client.put(f"/api/sweets/{sweet_id}/flash-sale", headers=headers)
+
+
+class TestFlashSaleMode:
+    """Test switching sweets in and out of flash-sale mode."""
+
+    def test_enable_loads_counter(self, client, test_admin, create_sweets, flash_engine):
+        """Test PUT /api/sweets/{id}/flash-sale starts the counter at the stock."""
+        sweet = create_sweets[1]
+        response = _enable(client, test_admin["headers"], sweet["sweet_id"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["sweet_id"] == sweet["sweet_id"]
+        assert data["available"] == 50
+        assert data["in_flight"] == 0
+        assert flash_engine.is_active(sweet["sweet_id"])
+
+    def test_disable(self, client, test_admin, create_sweets, flash_engine):
+        """Test DELETE /api/sweets/{id}/flash-sale returns to regular purchases."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+
+        response = client.delete(f"/api/sweets/{sweet_id}/flash-sale", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not flash_engine.is_active(sweet_id)
+
+    def test_requires_admin(self, client, test_user_token, create_sweets, flash_engine):
+        """Test regular users cannot enable flash-sale mode."""
+        response = _enable(client, test_user_token["headers"], create_sweets[0]["sweet_id"])
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_unknown_sweet(self, client, test_admin, flash_engine):
+        """Test enabling flash-sale mode for a missing sweet returns 404."""
+        response = _enable(client, test_admin["headers"], 99999)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestFlashSalePurchase:
+    """Test purchases of flash-sale sweets."""
+
+    def test_purchase_is_committed(self, client, test_admin, test_user_token, create_sweets, flash_engine, db):
+        """Test a flash-sale purchase returns the committed transaction and updates stock."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+
+        response = client.post(
+            f"/api/sweets/{sweet_id}/purchase", json={"quantity": 3}, headers=test_user_token["headers"]
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["transaction_type"] == "purchase"
+        assert data["new_stock"] == 47
+        assert "Gummy Bears" in data["message"]
+        assert client.get(f"/api/sweets/{sweet_id}").json()["quantity_in_stock"] == 47
+        assert db.query(Transaction).filter(Transaction.transaction_id == data["transaction_id"]).count() == 1
+
+    def test_sold_out_rejected_in_memory(self, client, test_admin, test_user_token, create_sweets, flash_engine):
+        """Test purchases beyond the counter are rejected with the usual 400."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+
+        response = client.post(
+            f"/api/sweets/{sweet_id}/purchase", json={"quantity": 51}, headers=test_user_token["headers"]
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Insufficient stock" in response.json()["detail"]
+
+    def test_held_units_are_not_for_flash_sale(self, client, test_admin, test_user_token, create_sweets,
+                                               flash_engine):
+        """Test flash buyers cannot take units held by a cart, so its checkout still succeeds."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        headers = test_user_token["headers"]
+        _enable(client, test_admin["headers"], sweet_id)
+        reservation = client.post("/api/reservations/", json={"sweet_id": sweet_id, "quantity": 20},
+                                  headers=headers).json()
+
+        too_many = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 31}, headers=headers)
+        rest = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 30}, headers=headers)
+        checkout = client.post(f"/api/reservations/{reservation['reservation_id']}/checkout", headers=headers)
+
+        assert too_many.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Available: 30" in too_many.json()["detail"]
+        assert rest.status_code == status.HTTP_201_CREATED
+        assert checkout.status_code == status.HTTP_201_CREATED
+        assert checkout.json()["new_stock"] == 0
+
+    def test_batch_leaves_units_held_on_other_workers(self, create_sweets, flash_engine, test_user):
+        """Test the group commit subtracts holds in the reservations table that this worker's index lacks."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        session = TestingSessionLocal()
+        flash_engine.load(session.query(Sweet).get(sweet_id))
+        # A cart on another worker holds 48 units: in the table, not in hold_index
+        session.add(Reservation(sweet_id=sweet_id, user_id=test_user["user_id"], quantity=48, status="active",
+                                expires_at=datetime.utcnow() + timedelta(minutes=10)))
+        session.commit()
+        session.close()
+        assert hold_index.held(sweet_id) == 0
+
+        with pytest.raises(InsufficientStock) as error:
+            flash_engine.purchase(sweet_id, 5, test_user["user_id"])
+
+        assert error.value.available == 2
+        session = TestingSessionLocal()
+        assert session.query(Sweet).get(sweet_id).quantity_in_stock == 50
+        session.close()
+
+    def test_idempotency_record_committed_with_batch(self, client, test_admin, test_user_token, create_sweets,
+                                                     flash_engine, monkeypatch):
+        """Test the response for an Idempotency-Key is durable once the group commit is, and replays."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        headers = {**test_user_token["headers"], "Idempotency-Key": "flash-1"}
+        _enable(client, test_admin["headers"], sweet_id)
+        stored = []
+        original = SweetsService.purchase_flash_sale
+
+        def purchase_then_inspect(*args, **kwargs):
+            result = original(*args, **kwargs)
+            # The group commit is done; the request has not committed anything since its claim
+            session = TestingSessionLocal()
+            stored.append(session.query(IdempotencyRecord).filter(
+                IdempotencyRecord.idempotency_key == "flash-1"
+            ).one().status)
+            session.close()
+            return result
+        monkeypatch.setattr(SweetsService, "purchase_flash_sale", staticmethod(purchase_then_inspect))
+
+        first = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 3}, headers=headers)
+        retry = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 3}, headers=headers)
+
+        assert stored == ["completed"]
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.json() == first.json()
+        assert client.get(f"/api/sweets/{sweet_id}").json()["quantity_in_stock"] == 47
+
+    def test_restock_and_update_resync_counter(self, client, test_admin, create_sweets, flash_engine):
+        """Test restocks and stock updates of a flash-sale sweet reach its counter."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 25}, headers=test_admin["headers"])
+        assert flash_engine.status(sweet_id)[0]["available"] == 75
+
+        client.put(f"/api/sweets/{sweet_id}", json={"quantity_in_stock": 5}, headers=test_admin["headers"])
+        assert flash_engine.status(sweet_id)[0]["available"] == 5
+
+    def test_counter_trusts_database(self, create_sweets, flash_engine, test_user):
+        """Test a batch rejects purchases the row cannot cover and resyncs the counter."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        session = TestingSessionLocal()
+        sweet = session.query(Sweet).get(sweet_id)
+        flash_engine.load(sweet)
+        # Stock sold elsewhere (e.g. by another worker) after the counter was loaded
+        sweet.quantity_in_stock = 2
+        session.commit()
+        session.close()
+
+        with pytest.raises(InsufficientStock):
+            flash_engine.purchase(sweet_id, 5, test_user["user_id"])
+        assert flash_engine.status(sweet_id)[0]["available"] == 2
+
+    def test_reconcile_restores_flagged_sweets(self, client, test_admin, create_sweets, flash_engine, db):
+        """Test startup reconciliation reloads counters of flagged sweets from stock."""
+        sweet_id = create_sweets[2]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+
+        restarted = FlashSaleEngine(session_factory=TestingSessionLocal)
+        assert restarted.reconcile(db) == 1
+        assert restarted.status() == [
+            {"sweet_id": sweet_id, "name": "Lollipop", "available": 200, "in_flight": 0}
+        ]
+
+    def test_stats(self, client, test_admin, test_user_token, create_sweets, flash_engine):
+        """Test GET /api/sweets/flash-sales reports batches and counters."""
+        sweet_id = create_sweets[2]["sweet_id"]
+        _enable(client, test_admin["headers"], sweet_id)
+        client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 1}, headers=test_user_token["headers"])
+
+        response = client.get("/api/sweets/flash-sales", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["batches"] >= 1
+        assert [item["sweet_id"] for item in data["sweets"]] == [sweet_id]
+
+
+class TestFlashSaleConcurrency:
+    """Concurrent buyers of one sweet: no overselling, and throughput vs the row-lock path."""
+
+    BUYERS = 8
+    PURCHASES_PER_BUYER = 25
+
+    def _run(self, buy):
+        """Run BUYERS threads each calling buy PURCHASES_PER_BUYER times; return (sold, seconds)."""
+        sold = []
+        lock = threading.Lock()
+
+        def buyer():
+            for _ in range(self.PURCHASES_PER_BUYER):
+                if buy():
+                    with lock:
+                        sold.append(1)
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.BUYERS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(sold), time.perf_counter() - start
+
+    def test_benchmark_row_lock_vs_flash_sale(self, create_sweets, flash_engine, test_user, db):
+        """Test the flash-sale path sells exactly a 150-unit sweet; print purchases/second for each path."""
+        user = SimpleNamespace(user_id=test_user["user_id"])
+        attempts = self.BUYERS * self.PURCHASES_PER_BUYER
+        row_lock_id, flash_id = create_sweets[0]["sweet_id"], create_sweets[2]["sweet_id"]
+        for sweet_id in (row_lock_id, flash_id):
+            sweet = db.query(Sweet).get(sweet_id)
+            sweet.quantity_in_stock = 150
+        db.commit()
+
+        def buy_row_lock():
+            session = TestingSessionLocal()
+            try:
+                sweet = SweetsDAO.get_sweet_for_update(session, row_lock_id)
+                SweetsService.purchase_sweet(session, sweet, 1, user)
+                session.commit()
+                return True
+            except Exception:
+                session.rollback()
+                return False
+            finally:
+                session.close()
+
+        def buy_flash():
+            try:
+                flash_engine.purchase(flash_id, 1, user.user_id)
+                return True
+            except InsufficientStock:
+                return False
+
+        flash_engine.load(db.query(Sweet).get(flash_id))
+        row_sold, row_seconds = self._run(buy_row_lock)
+        flash_sold, flash_seconds = self._run(buy_flash)
+
+        print(f"\nrow lock: {row_sold}/{attempts} sold in {row_seconds * 1000:.0f} ms "
+              f"({row_sold / row_seconds:.0f}/s)")
+        print(f"flash sale: {flash_sold}/{attempts} sold in {flash_seconds * 1000:.0f} ms "
+              f"({flash_sold / flash_seconds:.0f}/s), {flash_engine.stats()['avg_batch_size']} per batch")
+
+        db.expire_all()
+        assert flash_sold == 150
+        assert db.query(Sweet).get(flash_id).quantity_in_stock == 0
+        assert db.query(Transaction).filter(Transaction.sweet_id == flash_id).count() == 150
+        # SQLite ignores FOR UPDATE, so only the flash-sale path's stock accounting
+        # is checked here; the row lock itself is enforced on PostgreSQL/MySQL
+        assert row_sold > 0
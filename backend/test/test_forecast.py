@@ -0,0 +1,163 @@
+"""
+Test suite for demand forecasting and restock suggestions.
+
+Tests cover:
+- Moving-average and exponential-smoothing weights
+- Days of cover and suggested restock arithmetic
+- Restock suggestions endpoint from purchase history
+- Admin-only access
+- Benchmark of the vectorized forecast on a large synthetic catalog (opt-in with RUN_BENCHMARKS=1)
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from src.modules.V1.SweetsManager.forecast import (
+    demand_forecast, forecast_cache, forecast_weights, restock_plan
+)
+from src.modules.V1.SweetsManager.models import Transaction
+from src.modules.V1.SweetsManager.schemas import ForecastMethod
+
+
+@pytest.fixture(autouse=True)
+def clear_forecasts():
+    """Forecasts are cached per parameters; start each test without them."""
+    forecast_cache.clear()
+    yield
+    forecast_cache.clear()
+
+
+def _record_sales(db, sweet_id, user_id, units_per_day, days):
+    """Record one purchase per day over the last complete days (yesterday backwards)."""
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    db.add_all([
+        Transaction(sweet_id=sweet_id, user_id=user_id, transaction_type="purchase",
+                    quantity=units_per_day, price_at_time=1.0, created_at=today - timedelta(days=day))
+        for day in range(1, days + 1)
+    ])
+    db.commit()
+
+
+class TestForecastMath:
+    """Test the forecasting weights and restock arithmetic."""
+
+    def test_moving_average_weights(self):
+        """Test the moving average weighs the last window days equally."""
+        weights = forecast_weights(10, ForecastMethod.MOVING_AVERAGE, window=4, alpha=0.3)
+
+        assert np.allclose(weights, [0] * 6 + [0.25] * 4)
+
+    def test_exponential_weights_match_recursion(self):
+        """Test the unrolled weights equal the exponential smoothing recursion."""
+        history = np.array([3.0, 0.0, 7.0, 2.0, 5.0, 1.0])
+        level = history[0]
+        for value in history[1:]:
+            level = 0.4 * value + 0.6 * level
+
+        weights = forecast_weights(len(history), ForecastMethod.EXPONENTIAL, window=7, alpha=0.4)
+
+        assert weights.sum() == pytest.approx(1.0)
+        assert history @ weights == pytest.approx(level)
+
+    def test_restock_plan(self):
+        """Test days of cover and the shortfall against lead time plus target cover."""
+        stock = np.array([10.0, 100.0, 5.0])
+        daily = np.array([2.0, 1.0, 0.0])
+
+        days_of_cover, suggested = restock_plan(stock, daily, lead_time_days=5, target_days=10)
+
+        assert days_of_cover.tolist() == [5.0, 100.0, float("inf")]
+        assert suggested.tolist() == [20, 0, 0]
+
+
+class TestRestockSuggestions:
+    """Test GET /api/sweets/restock-suggestions."""
+
+    def test_suggests_restock_for_selling_sweets(self, client, test_admin, test_user, create_sweets, db):
+        """Test sweets selling faster than their stock covers are listed most urgent first."""
+        gummies, lollipops = create_sweets[1]["sweet_id"], create_sweets[2]["sweet_id"]
+        _record_sales(db, gummies, test_user["user_id"], units_per_day=10, days=30)
+        _record_sales(db, lollipops, test_user["user_id"], units_per_day=20, days=30)
+
+        response = client.get(
+            "/api/sweets/restock-suggestions?method=moving_average&window=7&lead_time_days=7&target_days=14",
+            headers=test_admin["headers"]
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["method"] == "moving_average"
+        assert data["sweets_analyzed"] == 5
+        assert data["needing_restock"] == 2
+        gummy_item, lollipop_item = data["items"]
+        # 50 in stock at 10/day: 5 days of cover, 21 days needed -> 160 more
+        assert gummy_item == {
+            "sweet_id": gummies, "name": "Gummy Bears", "quantity_in_stock": 50,
+            "daily_forecast": 10.0, "days_of_cover": 5.0, "suggested_restock": 160
+        }
+        assert lollipop_item["sweet_id"] == lollipops
+        assert lollipop_item["suggested_restock"] == 20 * 21 - 200
+
+    def test_all_sweets_listed_on_request(self, client, test_admin, create_sweets):
+        """Test needs_restock_only=false lists sweets without demand with no days of cover."""
+        response = client.get(
+            "/api/sweets/restock-suggestions?needs_restock_only=false", headers=test_admin["headers"]
+        )
+
+        items = response.json()["items"]
+        assert len(items) == 5
+        assert all(item["days_of_cover"] is None and item["suggested_restock"] == 0 for item in items)
+
+    def test_requires_admin(self, client, test_user_token):
+        """Test regular users cannot read restock suggestions."""
+        response = client.get("/api/sweets/restock-suggestions", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_scheduled_job_summarizes(self, test_user, create_sweets, db):
+        """Test the demand_forecast job reports the restock it suggests."""
+        _record_sales(db, create_sweets[1]["sweet_id"], test_user["user_id"], units_per_day=10, days=60)
+
+        summary = demand_forecast(db)
+
+        assert summary["sweets_analyzed"] == 5
+        assert summary["needing_restock"] == 1
+
+
+@pytest.mark.benchmark
+class TestForecastBenchmark:
+    """The vectorized computation on a catalog far larger than the test database."""
+
+    # The default run checks the vectorized result on a smaller catalog; opt in
+    # with RUN_BENCHMARKS=1 for the full-size catalog and its time budget
+    BENCHMARK = bool(os.getenv("RUN_BENCHMARKS"))
+    SWEETS = 100_000 if BENCHMARK else 5_000
+    DAYS = 365
+
+    def test_benchmark_large_catalog(self):
+        """Test forecasting a sweets x 365 days catalog; when opted in, 100k sweets stay within a job's budget."""
+        rng = np.random.default_rng(42)
+        sales = rng.poisson(3.0, size=(self.SWEETS, self.DAYS)).astype(np.float32)
+        stock = rng.integers(0, 200, size=self.SWEETS).astype(np.float64)
+
+        start = time.perf_counter()
+        weights = forecast_weights(self.DAYS, ForecastMethod.EXPONENTIAL, window=28, alpha=0.3)
+        daily = sales @ weights.astype(np.float32)
+        days_of_cover, suggested = restock_plan(stock, daily.astype(np.float64), 7, 14)
+        order = np.argsort(days_of_cover, kind="stable")
+        elapsed = time.perf_counter() - start
+
+        print(f"\nforecast of {self.SWEETS} sweets x {self.DAYS} days: {elapsed * 1000:.0f} ms, "
+              f"{np.count_nonzero(suggested)} need restock")
+        assert daily.mean() == pytest.approx(3.0, rel=0.05)
+        assert days_of_cover[order[0]] <= days_of_cover[order[-1]]
+        # The matrix product agrees with forecasting sweets one at a time
+        for row in (0, self.SWEETS // 2, self.SWEETS - 1):
+            assert daily[row] == pytest.approx(float(sales[row] @ weights), rel=1e-4)
+        if self.BENCHMARK:
+            assert elapsed < 5
@@ -7,10 +7,17 @@ Tests cover:
 - Inventory tracking
 - Stock validation
 - Transaction recording
+- Idempotency-Key replays
 """
 
+import threading
+import time
+
 import pytest
 from fastapi import status
+from pydantic import BaseModel
+
+from src.app.idempotency import IdempotencyRecord, run_idempotent
 
 
 class TestPurchase:
@@ -336,3 +343,90 @@ class TestInventoryWorkflow:
         assert "transaction_id" in data
         assert "created_at" in data
         assert "price_at_time" in data
+
+
+class TestIdempotency:
+    """Test Idempotency-Key handling on purchase and restock."""
+    
+    def test_retry_replays_without_buying_again(self, client, test_user_token, create_sweets):
+        """Test a retried purchase returns the first response and leaves stock alone."""
+        sweet = create_sweets[0]
+        headers = {**test_user_token["headers"], "Idempotency-Key": "order-123"}
+        url = f"/api/sweets/{sweet['sweet_id']}/purchase"
+        
+        first = client.post(url, json={"quantity": 5}, headers=headers)
+        retry = client.post(url, json={"quantity": 5}, headers=headers)
+        
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        stock = client.get(f"/api/sweets/{sweet['sweet_id']}").json()["quantity_in_stock"]
+        assert stock == sweet["quantity_in_stock"] - 5
+    
+    def test_key_stored_with_transaction(self, client, db, test_admin, create_sweets):
+        """Test the key row links to the restock transaction it produced."""
+        response = client.post(
+            f"/api/sweets/{create_sweets[0]['sweet_id']}/restock",
+            json={"quantity": 10},
+            headers={**test_admin["headers"], "Idempotency-Key": "restock-1"}
+        )
+        
+        record = db.query(IdempotencyRecord).filter_by(idempotency_key="restock-1").one()
+        assert record.status == "completed"
+        assert record.transaction_id == response.json()["transaction_id"]
+    
+    def test_key_reused_for_different_request(self, client, test_user_token, create_sweets):
+        """Test the same key with a different body returns 422."""
+        headers = {**test_user_token["headers"], "Idempotency-Key": "order-456"}
+        url = f"/api/sweets/{create_sweets[0]['sweet_id']}/purchase"
+        
+        client.post(url, json={"quantity": 1}, headers=headers)
+        response = client.post(url, json={"quantity": 2}, headers=headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_failed_request_releases_key(self, client, test_user_token, create_sweets):
+        """Test a key whose request failed can be retried."""
+        out_of_stock = next(s for s in create_sweets if s["quantity_in_stock"] == 0)
+        headers = {**test_user_token["headers"], "Idempotency-Key": "order-789"}
+        url = f"/api/sweets/{out_of_stock['sweet_id']}/purchase"
+        
+        assert client.post(url, json={"quantity": 1}, headers=headers).status_code == 400
+        
+        assert client.post(url, json={"quantity": 1}, headers=headers).status_code == 400
+    
+    def test_concurrent_duplicate_waits_for_first(self, db, test_user):
+        """Test a duplicate arriving mid-flight waits and replays instead of running."""
+        from test.conftest import TestingSessionLocal
+        
+        class Result(BaseModel):
+            value: int
+        
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            time.sleep(0.3)
+            return Result(value=len(calls))
+        
+        responses = []
+        
+        def request():
+            session = TestingSessionLocal()
+            try:
+                responses.append(run_idempotent(
+                    session, "same-key", test_user["user_id"], "POST /test", {}, operation
+                ))
+            finally:
+                session.close()
+        
+        threads = [threading.Thread(target=request) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        replayed = [r for r in responses if not isinstance(r, Result)]
+        assert len(replayed) == 1
+        assert replayed[0].headers["Idempotent-Replayed"] == "true"
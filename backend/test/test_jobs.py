@@ -0,0 +1,136 @@
+"""
+Test suite for scheduled maintenance jobs.
+
+Tests cover:
+- Leader-election leases
+- Low-stock scan
+- Job metrics
+- Admin manual trigger endpoint
+"""
+
+from fastapi import status
+
+from src.app.cron import acquire_lease, get_job_state, release_lease, scheduler, set_job_state
+
+
+class TestJobLease:
+    """Test leader election through job leases."""
+
+    def test_only_one_owner_holds_lease(self, db):
+        """Test a second worker cannot take a valid lease."""
+        assert acquire_lease(db, "test_job", "worker-a", ttl_seconds=60) is True
+        assert acquire_lease(db, "test_job", "worker-b", ttl_seconds=60) is False
+
+    def test_owner_can_renew_lease(self, db):
+        """Test the current owner can renew its own lease."""
+        acquire_lease(db, "test_job", "worker-a", ttl_seconds=60)
+        assert acquire_lease(db, "test_job", "worker-a", ttl_seconds=60) is True
+
+    def test_expired_lease_can_be_taken_over(self, db):
+        """Test another worker takes over an expired lease."""
+        acquire_lease(db, "test_job", "worker-a", ttl_seconds=-1)
+        assert acquire_lease(db, "test_job", "worker-b", ttl_seconds=60) is True
+
+    def test_released_lease_is_free(self, db):
+        """Test a released lease can be acquired by another worker."""
+        acquire_lease(db, "test_job", "worker-a", ttl_seconds=60)
+        release_lease(db, "test_job", "worker-a")
+        assert acquire_lease(db, "test_job", "worker-b", ttl_seconds=60) is True
+
+
+class TestScheduledJobs:
+    """Test the built-in maintenance jobs."""
+
+    def test_low_stock_scan_reports_low_stock_sweets(self, db, create_sweets):
+        """Test low-stock scan finds the out-of-stock sweet."""
+        job = scheduler.get_job("low_stock_scan")
+        run = scheduler.run_job(job, db)
+
+        assert run["status"] == "succeeded"
+        out_of_stock = [s for s in create_sweets if s["quantity_in_stock"] == 0]
+        assert run["result"]["low_stock_count"] == len(out_of_stock)
+
+    def test_low_stock_diff_survives_leader_change(self, db, create_sweets):
+        """Test the scan diffs against the previous run's ids even when another worker made that run."""
+        out_of_stock = sorted(s["sweet_id"] for s in create_sweets if s["quantity_in_stock"] == 0)
+        restocked = max(s["sweet_id"] for s in create_sweets) + 1
+        # Another worker's scan left its ids on the lease row, then its lease expired
+        acquire_lease(db, "low_stock_scan", "another-worker", ttl_seconds=-1)
+        set_job_state(db, "low_stock_scan", {"low_stock_ids": out_of_stock + [restocked]})
+        db.commit()
+
+        run = scheduler.run_now(scheduler.get_job("low_stock_scan"), db)
+
+        assert run["result"]["newly_low"] == []
+        assert run["result"]["recovered"] == [restocked]
+        assert get_job_state(db, "low_stock_scan") == {"low_stock_ids": out_of_stock}
+
+    def test_run_records_metrics(self, db):
+        """Test a run updates the job's timing metrics."""
+        job = scheduler.get_job("db_maintenance")
+        runs_before = job.metrics.runs
+
+        run = scheduler.run_job(job, db)
+
+        assert run["status"] == "succeeded"
+        assert job.metrics.runs == runs_before + 1
+        assert job.metrics.last_duration_ms is not None
+        assert job.metrics.max_duration_ms >= job.metrics.last_duration_ms
+
+    def test_scheduled_run_skips_when_not_leader(self, db):
+        """Test a worker that does not hold the lease skips the run."""
+        job = scheduler.get_job("purge_expired")
+        acquire_lease(db, job.name, "another-worker", ttl_seconds=60)
+        original_factory = scheduler.session_factory
+        scheduler.session_factory = lambda: db
+        skipped_before = job.metrics.skipped_not_leader
+        try:
+            assert scheduler.run_scheduled(job) is None
+        finally:
+            scheduler.session_factory = original_factory
+
+        assert job.metrics.skipped_not_leader == skipped_before + 1
+
+
+class TestJobEndpoints:
+    """Test admin endpoints for scheduled jobs."""
+
+    def test_list_jobs_as_admin(self, client, test_admin):
+        """Test admin can list jobs with metrics."""
+        response = client.get("/api/jobs/", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        names = {job["name"] for job in response.json()}
+        assert {"low_stock_scan", "db_maintenance", "purge_expired"} <= names
+
+    def test_trigger_job_as_admin(self, client, test_admin):
+        """Test admin can trigger a job manually."""
+        response = client.post("/api/jobs/purge_expired/run", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["status"] == "succeeded"
+        assert "job_leases" in data["result"]["purged"]
+        assert data["duration_ms"] >= 0
+
+    def test_trigger_job_leased_by_another_worker(self, client, test_admin, db):
+        """Test a manual trigger does not run a job while another worker holds its lease."""
+        acquire_lease(db, "db_maintenance", "another-worker", ttl_seconds=60)
+        runs_before = scheduler.get_job("db_maintenance").metrics.runs
+
+        response = client.post("/api/jobs/db_maintenance/run", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert scheduler.get_job("db_maintenance").metrics.runs == runs_before
+
+    def test_trigger_unknown_job(self, client, test_admin):
+        """Test triggering an unknown job returns 404."""
+        response = client.post("/api/jobs/nope/run", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_trigger_job_as_regular_user_fails(self, client, test_user_token):
+        """Test regular user cannot trigger jobs."""
+        response = client.post("/api/jobs/purge_expired/run", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
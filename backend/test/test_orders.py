@@ -0,0 +1,254 @@
+"""
+Test suite for asynchronous order intake.
+
+Tests cover:
+- 202 Accepted with a pending order
+- Validation before queueing
+- Batch processing by the consumers (completion and failure)
+- Orders that break their batch retried alone and failed after ORDER_MAX_ATTEMPTS
+- Polling and long-polling for the outcome (without holding a connection)
+- Order visibility and Idempotency-Key replays
+- Queue metrics
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import status
+
+from src.app.database import SessionLocal
+from src.app.settings import settings
+from src.modules.V1.OrdersManager.consumer import OrderConsumerPool, order_consumers
+from src.modules.V1.OrdersManager.dao import OrdersDAO
+from src.modules.V1.OrdersManager.models import Order
+from src.modules.V1.OrdersManager.services import OrdersService
+from src.modules.V1.SweetsManager.models import Transaction
+from src.modules.V1.SweetsManager.services import SweetsService
+from test.conftest import TestingSessionLocal, engine
+
+
+@pytest.fixture
+def consumers(client):
+    """The consumer pool running on the test database (tests start without consumers)."""
+    order_consumers.session_factory = TestingSessionLocal
+    order_consumers.consumers = 2
+    order_consumers.start()
+    yield order_consumers
+    order_consumers.stop()
+    order_consumers.consumers = settings.ORDER_CONSUMERS
+    order_consumers.session_factory = SessionLocal
+
+
+@pytest.fixture
+def paused_pool(client):
+    """A pool that only processes when the test asks it to."""
+    return OrderConsumerPool(session_factory=TestingSessionLocal, consumers=0, batch_size=10)
+
+
+def _place(client, headers, sweet_id, quantity, **extra):
+    return client.post("/api/orders/", json={"sweet_id": sweet_id, "quantity": quantity},
+                       headers={**headers, **extra})
+
+
+class TestPlaceOrder:
+    """Test queueing purchases."""
+
+    def test_returns_202_pending(self, client, test_user_token, create_sweets, paused_pool):
+        """Test POST /api/orders/ answers 202 with a pending order and leaves stock untouched."""
+        sweet = create_sweets[0]
+        response = _place(client, test_user_token["headers"], sweet["sweet_id"], 5)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["order_id"] > 0
+        assert data["transaction_id"] is None
+        assert client.get(f"/api/sweets/{sweet['sweet_id']}").json()["quantity_in_stock"] == 100
+
+    def test_validation_before_queueing(self, client, test_user_token, create_sweets, paused_pool):
+        """Test unknown sweets, bad quantities and obvious overselling are rejected up front."""
+        headers = test_user_token["headers"]
+
+        assert _place(client, headers, 99999, 1).status_code == status.HTTP_404_NOT_FOUND
+        assert _place(client, headers, create_sweets[0]["sweet_id"], 0).status_code == \
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert _place(client, headers, create_sweets[4]["sweet_id"], 1).status_code == \
+            status.HTTP_400_BAD_REQUEST
+
+    def test_held_stock_rejected_up_front(self, client, test_user_token, create_sweets, paused_pool):
+        """Test stock held by a cart counts against an order, as it does for a purchase."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        client.post("/api/reservations/", json={"sweet_id": sweet_id, "quantity": 45},
+                    headers=test_user_token["headers"])
+
+        response = _place(client, test_user_token["headers"], sweet_id, 6)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Available: 5" in response.json()["detail"]
+
+    def test_requires_authentication(self, client, create_sweets):
+        """Test anonymous clients cannot place orders."""
+        response = client.post("/api/orders/", json={"sweet_id": create_sweets[0]["sweet_id"], "quantity": 1})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_idempotency_key_replays_order(self, client, test_user_token, create_sweets, paused_pool, db):
+        """Test retrying with the same Idempotency-Key returns the original order."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        first = _place(client, test_user_token["headers"], sweet_id, 2, **{"Idempotency-Key": "order-1"})
+        retry = _place(client, test_user_token["headers"], sweet_id, 2, **{"Idempotency-Key": "order-1"})
+
+        assert retry.status_code == status.HTTP_202_ACCEPTED
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.json()["order_id"] == first.json()["order_id"]
+        assert db.query(Order).count() == 1
+
+
+class TestOrderProcessing:
+    """Test consumers processing queued orders in batches."""
+
+    def test_batch_completes_and_fails_orders(self, client, test_user_token, create_sweets, paused_pool, db):
+        """Test one batch applies orders oldest first and fails those the stock cannot cover."""
+        sweet_id = create_sweets[1]["sweet_id"]  # 50 in stock
+        headers = test_user_token["headers"]
+        ids = [_place(client, headers, sweet_id, quantity).json()["order_id"] for quantity in (30, 15, 10)]
+
+        assert paused_pool.process_batch(TestingSessionLocal()) == 3
+
+        db.expire_all()
+        first, second, third = (client.get(f"/api/orders/{order_id}", headers=headers).json() for order_id in ids)
+        assert first["status"] == "completed" and first["transaction_id"] is not None
+        assert second["status"] == "completed"
+        assert third["status"] == "failed"
+        assert "Insufficient stock" in third["error"]
+        assert client.get(f"/api/sweets/{sweet_id}").json()["quantity_in_stock"] == 5
+        assert paused_pool.metrics["max_batch"] == 3
+        assert paused_pool.process_batch(TestingSessionLocal()) == 0
+
+    def test_abandoned_claim_is_taken_over(self, client, test_user_token, create_sweets, paused_pool, db):
+        """Test orders claimed by a consumer that died are processed after the claim timeout."""
+        order_id = _place(client, test_user_token["headers"], create_sweets[0]["sweet_id"], 1).json()["order_id"]
+        order = db.query(Order).get(order_id)
+        order.status = "processing"
+        order.claim_token = "dead-consumer"
+        order.claimed_at = datetime.utcnow()
+        db.commit()
+
+        assert paused_pool.process_batch(TestingSessionLocal()) == 0
+        paused_pool.claim_timeout = -1
+        assert paused_pool.process_batch(TestingSessionLocal()) == 1
+
+        db.expire_all()
+        assert db.query(Order).get(order_id).status == "completed"
+
+    def test_slow_consumer_skips_orders_taken_over(self, client, test_user_token, create_sweets, paused_pool, db):
+        """Test a consumer that ran past the claim timeout does not process orders another consumer re-claimed."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        order_id = _place(client, test_user_token["headers"], sweet_id, 1).json()["order_id"]
+        slow_db = TestingSessionLocal()
+        orders = OrdersDAO.claim_orders(slow_db, "slow-consumer", 10, datetime.utcnow())
+        # The claim times out and another consumer takes the order over and completes it
+        paused_pool.claim_timeout = -1
+        assert paused_pool.process_batch(TestingSessionLocal()) == 1
+
+        assert OrdersService.process_orders(slow_db, orders, "slow-consumer") == (0, 0)
+        slow_db.close()
+
+        db.expire_all()
+        assert db.query(Order).get(order_id).status == "completed"
+        assert db.query(Transaction).filter(Transaction.sweet_id == sweet_id).count() == 1
+        assert client.get(f"/api/sweets/{sweet_id}").json()["quantity_in_stock"] == 99
+
+    def test_order_breaking_its_batch_holds_back_only_itself(self, client, test_user_token, create_sweets,
+                                                              paused_pool, db, monkeypatch):
+        """Test a batch that raises is retried order by order, and the bad order fails after max attempts."""
+        headers = test_user_token["headers"]
+        good_id, bad_id = create_sweets[0]["sweet_id"], create_sweets[1]["sweet_id"]
+        ids = [_place(client, headers, sweet_id, 1).json()["order_id"] for sweet_id in (good_id, bad_id, good_id)]
+        purchase = SweetsService.purchase_sweet
+
+        def purchase_or_break(db, sweet, quantity, user):
+            if sweet.sweet_id == bad_id:
+                raise RuntimeError("boom")
+            return purchase(db, sweet, quantity, user)
+
+        monkeypatch.setattr(SweetsService, "purchase_sweet", staticmethod(purchase_or_break))
+        paused_pool.max_attempts = 2
+
+        assert paused_pool.process_batch(TestingSessionLocal()) == 2
+        db.expire_all()
+        assert [db.query(Order).get(order_id).status for order_id in ids] == ["completed", "pending", "completed"]
+
+        assert paused_pool.process_batch(TestingSessionLocal()) == 1
+        db.expire_all()
+        bad = db.query(Order).get(ids[1])
+        assert bad.status == "failed" and bad.attempts == 2
+        assert bad.error == "Order could not be processed"
+        assert paused_pool.metrics["completed"] == 2 and paused_pool.metrics["failed"] == 1
+        assert paused_pool.process_batch(TestingSessionLocal()) == 0
+
+    def test_wait_returns_processed_order(self, client, test_user_token, create_sweets, consumers):
+        """Test GET /api/orders/{id}/wait returns once the running consumers processed the order."""
+        headers = test_user_token["headers"]
+        order_id = _place(client, headers, create_sweets[2]["sweet_id"], 4).json()["order_id"]
+
+        response = client.get(f"/api/orders/{order_id}/wait?timeout=10", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "completed"
+        assert client.get(f"/api/sweets/{create_sweets[2]['sweet_id']}").json()["quantity_in_stock"] == 196
+
+    def test_wait_times_out_with_current_status(self, client, test_user_token, create_sweets, paused_pool):
+        """Test the long-poll returns the pending order when nothing processes it in time."""
+        headers = test_user_token["headers"]
+        order_id = _place(client, headers, create_sweets[0]["sweet_id"], 1).json()["order_id"]
+
+        response = client.get(f"/api/orders/{order_id}/wait?timeout=0.2", headers=headers)
+
+        assert response.json()["status"] == "pending"
+
+    def test_wait_releases_connection(self, client, test_user_token, create_sweets, paused_pool):
+        """Test a long-poll does not keep a database connection checked out while it waits."""
+        headers = test_user_token["headers"]
+        order_id = _place(client, headers, create_sweets[0]["sweet_id"], 1).json()["order_id"]
+        checked_out = engine.pool.checkedout()
+        waiter = threading.Thread(
+            target=client.get, args=(f"/api/orders/{order_id}/wait?timeout=1",), kwargs={"headers": headers}
+        )
+
+        waiter.start()
+        time.sleep(0.5)
+        during_wait = engine.pool.checkedout()
+        waiter.join()
+
+        assert during_wait == checked_out
+
+
+class TestOrderVisibility:
+    """Test who can read an order."""
+
+    def test_other_users_cannot_read_order(self, client, test_user_token, test_admin, create_sweets, paused_pool):
+        """Test orders are visible to their owner and admins only."""
+        order_id = _place(client, test_user_token["headers"], create_sweets[0]["sweet_id"], 1).json()["order_id"]
+        client.post("/api/auth/register", json={
+            "username": "otheruser", "email": "other@example.com", "password": "otherpass123"
+        })
+        login = client.post("/api/auth/login", json={"username": "otheruser", "password": "otherpass123"})
+        other = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        assert client.get(f"/api/orders/{order_id}", headers=other).status_code == status.HTTP_404_NOT_FOUND
+        assert client.get(f"/api/orders/{order_id}", headers=test_admin["headers"]).status_code == \
+            status.HTTP_200_OK
+
+    def test_queue_metrics(self, client, test_user_token, test_admin, create_sweets, paused_pool):
+        """Test GET /api/metrics/orders reports the backlog and its age."""
+        _place(client, test_user_token["headers"], create_sweets[0]["sweet_id"], 1)
+
+        response = client.get("/api/metrics/orders", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["pending"] == 1
+        assert data["oldest_pending_age_seconds"] >= 0
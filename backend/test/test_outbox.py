@@ -0,0 +1,236 @@
+"""
+Test suite for the transactional outbox and webhook delivery.
+
+Tests cover:
+- Events recorded in the same transaction as purchases, restocks and sweet changes
+- Batched delivery to a local HTTP stub
+- Retries with backoff and dead deliveries
+- Per-endpoint concurrency limit
+- Lag metrics
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import status
+from sqlalchemy.exc import OperationalError
+
+from src.modules.V1.OutboxManager.dispatcher import OutboxDispatcher, outbox_dispatcher
+from src.modules.V1.OutboxManager.models import OutboxDelivery, OutboxEvent
+from test.conftest import TestingSessionLocal
+
+
+class WebhookStub(ThreadingHTTPServer):
+    """Local HTTP server recording webhook batches, answering with scripted status codes."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.batches = []
+        self.statuses = []  # status codes for the next requests, then 200
+        self.delay = 0.0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/hooks/inventory"
+
+    @property
+    def events(self) -> list:
+        return [event for batch in self.batches for event in batch]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server
+        with stub.lock:
+            stub.concurrent += 1
+            stub.max_concurrent = max(stub.max_concurrent, stub.concurrent)
+            code = stub.statuses.pop(0) if stub.statuses else 200
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(stub.delay)
+        with stub.lock:
+            stub.concurrent -= 1
+            if code == 200:
+                stub.batches.append(body["events"])
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def webhook(client):
+    """A running webhook stub registered as the outbox endpoint."""
+    stub = WebhookStub()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    outbox_dispatcher.endpoints = [stub.url]
+    yield stub
+    outbox_dispatcher.endpoints = []
+    stub.shutdown()
+    stub.server_close()
+
+
+def _dispatcher(webhook, **options):
+    return OutboxDispatcher(session_factory=TestingSessionLocal, endpoints=[webhook.url], **options)
+
+
+def _drain(dispatcher):
+    """Deliver until nothing is due."""
+    while dispatcher.dispatch_once(TestingSessionLocal()):
+        pass
+
+
+def _purchase(client, headers, sweet_id, quantity=1):
+    return client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": quantity}, headers=headers)
+
+
+class TestOutboxRecording:
+    """Test events are written with the changes they describe."""
+
+    def test_purchase_records_event_and_delivery(self, client, test_user_token, create_sweets, webhook, db):
+        """Test a purchase commits a sweet.purchased event with a pending delivery per endpoint."""
+        transaction = _purchase(client, test_user_token["headers"], create_sweets[0]["sweet_id"], 3).json()
+
+        event = db.query(OutboxEvent).one()
+        assert event.event_type == "sweet.purchased"
+        data = json.loads(event.payload)
+        assert data["transaction_id"] == transaction["transaction_id"]
+        assert data["new_stock"] == 97
+        delivery = db.query(OutboxDelivery).one()
+        assert (delivery.endpoint, delivery.status) == (webhook.url, "pending")
+
+    def test_failed_purchase_records_nothing(self, client, test_user_token, create_sweets, webhook, db):
+        """Test a rejected purchase leaves no event behind."""
+        response = _purchase(client, test_user_token["headers"], create_sweets[4]["sweet_id"])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert db.query(OutboxEvent).count() == 0
+
+    def test_catalog_changes_record_events(self, client, test_admin, create_sweets, webhook, db):
+        """Test restocks, updates, bulk price changes and deletions each record their event."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        headers = test_admin["headers"]
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 5}, headers=headers)
+        client.put(f"/api/sweets/{sweet_id}", json={"description": "Chewy"}, headers=headers)
+        client.post("/api/sweets/bulk/price", json={"sweet_ids": [sweet_id], "amount": 1}, headers=headers)
+        client.delete(f"/api/sweets/{sweet_id}", headers=headers)
+
+        events = db.query(OutboxEvent).order_by(OutboxEvent.event_id).all()
+        assert [event.event_type for event in events] == [
+            "sweet.restocked", "sweet.updated", "sweet.updated", "sweet.deleted"
+        ]
+        assert json.loads(events[1].payload)["changes"] == {"description": "Chewy"}
+        assert all(event.sweet_id == sweet_id for event in events)
+
+
+class TestWebhookDelivery:
+    """Test the dispatcher against the local HTTP stub."""
+
+    def test_batches_delivered(self, client, test_user_token, create_sweets, webhook, db):
+        """Test five events go out in batches of two and are marked delivered."""
+        for _ in range(5):
+            _purchase(client, test_user_token["headers"], create_sweets[2]["sweet_id"])
+        dispatcher = _dispatcher(webhook, batch_size=2)
+
+        _drain(dispatcher)
+
+        assert [len(batch) for batch in webhook.batches] == [2, 2, 1]
+        assert [event["event_type"] for event in webhook.events] == ["sweet.purchased"] * 5
+        assert db.query(OutboxDelivery).filter(OutboxDelivery.status == "delivered").count() == 5
+        stats = dispatcher.stats(db)["endpoints"][0]
+        assert stats["pending"] == 0
+        assert stats["delivered"] == 5
+        assert stats["last_lag_ms"] >= 0
+
+    def test_failed_batch_retried_with_backoff(self, client, test_user_token, create_sweets, webhook, db):
+        """Test a 500 reschedules the batch after a backoff, and the retry delivers it."""
+        _purchase(client, test_user_token["headers"], create_sweets[0]["sweet_id"])
+        webhook.statuses = [500]
+        dispatcher = _dispatcher(webhook, retry_base=60)
+
+        _drain(dispatcher)
+
+        delivery = db.query(OutboxDelivery).one()
+        assert (delivery.status, delivery.attempts, delivery.last_error) == ("pending", 1, "HTTP 500")
+        assert delivery.next_attempt_at > datetime.utcnow()
+        assert dispatcher.stats(db)["endpoints"][0]["pending"] == 1
+
+        delivery.next_attempt_at = datetime.utcnow()
+        db.commit()
+        _drain(dispatcher)
+
+        db.refresh(delivery)
+        assert delivery.status == "delivered"
+        assert len(webhook.events) == 1
+
+    def test_gives_up_after_max_attempts(self, client, test_user_token, create_sweets, webhook, db):
+        """Test deliveries are marked dead once they used up their attempts."""
+        _purchase(client, test_user_token["headers"], create_sweets[0]["sweet_id"])
+        webhook.statuses = [503, 503]
+        dispatcher = _dispatcher(webhook, max_attempts=2, retry_base=0)
+
+        _drain(dispatcher)
+
+        assert db.query(OutboxDelivery).one().status == "dead"
+        assert dispatcher.stats(db)["endpoints"][0]["dead"] == 1
+        assert webhook.batches == []
+
+    def test_concurrency_limit_per_endpoint(self, client, test_user_token, create_sweets, webhook, db):
+        """Test a running dispatcher never has more than the limit of batches in flight to an endpoint."""
+        for _ in range(6):
+            _purchase(client, test_user_token["headers"], create_sweets[2]["sweet_id"])
+        webhook.delay = 0.1
+        dispatcher = _dispatcher(webhook, batch_size=1, concurrency=2, poll_interval=0.05)
+
+        dispatcher.start()
+        try:
+            deadline = time.time() + 10
+            while len(webhook.events) < 6 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            dispatcher.stop()
+
+        assert len(webhook.events) == 6
+        assert webhook.max_concurrent == 2
+
+    def test_failed_claim_frees_its_slot(self, client, test_user_token, create_sweets, webhook, db):
+        """Test a claim that raises (e.g. a transient DB error) does not use up the endpoint's concurrency."""
+        _purchase(client, test_user_token["headers"], create_sweets[0]["sweet_id"])
+        dispatcher = _dispatcher(webhook, concurrency=2)
+
+        def fail(*args, **kwargs):
+            raise OperationalError("SELECT", {}, Exception("database is locked"))
+
+        # More failures than the endpoint has slots
+        for _ in range(3):
+            broken = TestingSessionLocal()
+            broken.query = fail
+            with pytest.raises(OperationalError):
+                dispatcher.dispatch_once(broken)
+            broken.close()
+
+        _drain(dispatcher)
+
+        assert len(webhook.events) == 1
+        assert dispatcher.wait_idle(timeout=1)
+
+    def test_outbox_metrics_endpoint(self, client, test_user_token, test_admin, create_sweets, webhook):
+        """Test GET /api/metrics/outbox reports the backlog and its age per endpoint."""
+        _purchase(client, test_user_token["headers"], create_sweets[0]["sweet_id"])
+
+        response = client.get("/api/metrics/outbox", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        endpoint = response.json()["endpoints"][0]
+        assert endpoint["endpoint"] == webhook.url
+        assert endpoint["pending"] == 1
+        assert endpoint["oldest_pending_age_seconds"] >= 0
@@ -0,0 +1,174 @@
+"""
+Test suite for rate limiting.
+
+Tests cover:
+- Token buckets: bursts, refill and Retry-After
+- Login limited per client IP
+- Purchases limited per user
+- Global per-IP limit applied by the middleware
+- Rate limit metrics and the cost of rejecting a request
+"""
+
+import time
+
+import pytest
+from fastapi import status
+
+from src.app import ratelimit
+from src.app.ratelimit import InProcessBucketStore, Limit, RateLimiter
+
+
+@pytest.fixture
+def tight_limit(monkeypatch):
+    """Shrink a configured limit to a burst of `burst` requests refilled at `rate` per second."""
+    def tighten(limit: Limit, burst: int, rate: float = 0.01) -> Limit:
+        monkeypatch.setattr(limit, "burst", burst)
+        monkeypatch.setattr(limit, "rate", rate)
+        return limit
+    return tighten
+
+
+def _login(client, username="testuser", password="TestPassword123"):
+    return client.post("/api/auth/login", json={"username": username, "password": password})
+
+
+def _purchase(client, headers, sweet_id):
+    return client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 1}, headers=headers)
+
+
+class TestTokenBucket:
+    """Test the in-process bucket store and limit parsing."""
+
+    def test_burst_then_refill(self):
+        """Test a bucket allows its burst, then one request per refilled token."""
+        store = InProcessBucketStore()
+
+        assert [store.take("k", 1.0, 3, 100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert store.take("k", 1.0, 3, 100.0) == pytest.approx(1.0)
+        assert store.take("k", 1.0, 3, 100.5) == pytest.approx(0.5)
+        assert store.take("k", 1.0, 3, 101.0) == 0.0
+
+    def test_eviction_keeps_store_bounded(self):
+        """Test the store drops refilled buckets (then the oldest) to stay within max_keys."""
+        store = InProcessBucketStore(max_keys=2)
+        store.take("a", 1.0, 1, 0.0)
+        store.take("b", 1.0, 1, 0.0)
+        store.take("c", 1.0, 1, 0.5)
+
+        assert len(store._buckets) == 2
+        assert store.take("c", 1.0, 1, 0.5) > 0
+
+    def test_parse(self):
+        """Test limit specs are parsed into burst and per-second rate."""
+        limit = Limit.parse("login", "10/minute")
+
+        assert (limit.burst, limit.rate) == (10, pytest.approx(10 / 60))
+        assert Limit.parse("off", "") is None
+        with pytest.raises(ValueError):
+            Limit.parse("bad", "10 per minute")
+
+
+class TestLoginRateLimit:
+    """Test /api/auth/login is limited per client IP."""
+
+    def test_login_rejected_with_retry_after(self, client, test_user, tight_limit):
+        """Test logins beyond the burst get 429 with Retry-After before checking the password."""
+        tight_limit(ratelimit.login_limit, burst=2)
+        assert _login(client).status_code == status.HTTP_200_OK
+        assert _login(client, password="wrong").status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = _login(client)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "Too many requests" in response.json()["detail"]
+
+    def test_login_allowed_again_after_refill(self, client, test_user, tight_limit):
+        """Test a rejected client may log in once a token has refilled."""
+        tight_limit(ratelimit.login_limit, burst=1, rate=2)
+        _login(client)
+        assert _login(client).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        time.sleep(0.6)
+
+        assert _login(client).status_code == status.HTTP_200_OK
+
+
+class TestPurchaseRateLimit:
+    """Test purchases are limited per user."""
+
+    def test_purchases_limited_per_user(self, client, test_user_token, test_admin, create_sweets, tight_limit):
+        """Test one user's empty bucket does not affect another user's purchases."""
+        tight_limit(ratelimit.purchase_limit, burst=2)
+        sweet_id = create_sweets[0]["sweet_id"]
+        for _ in range(2):
+            assert _purchase(client, test_user_token["headers"], sweet_id).status_code == status.HTTP_201_CREATED
+
+        rejected = _purchase(client, test_user_token["headers"], sweet_id)
+        other_user = _purchase(client, test_admin["headers"], sweet_id)
+
+        assert rejected.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "Retry-After" in rejected.headers
+        assert other_user.status_code == status.HTTP_201_CREATED
+        assert client.get(f"/api/sweets/{sweet_id}").json()["quantity_in_stock"] == 97
+
+    def test_async_orders_share_the_purchase_bucket(self, client, test_user_token, create_sweets, tight_limit):
+        """Test POST /api/orders/ draws from the same per-user purchase bucket."""
+        tight_limit(ratelimit.purchase_limit, burst=1)
+        sweet_id = create_sweets[0]["sweet_id"]
+        _purchase(client, test_user_token["headers"], sweet_id)
+
+        response = client.post("/api/orders/", json={"sweet_id": sweet_id, "quantity": 1},
+                               headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+class TestGlobalRateLimit:
+    """Test the middleware's per-IP limit on every route."""
+
+    def test_middleware_rejects_before_routing(self, client, create_sweets, tight_limit):
+        """Test requests over the global limit get 429 without reaching the app; /health is exempt."""
+        tight_limit(ratelimit.global_limit, burst=3)
+        for _ in range(3):
+            assert client.get("/api/sweets/").status_code == status.HTTP_200_OK
+
+        response = client.get("/api/sweets/99999")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/health").status_code == status.HTTP_200_OK
+
+    def test_rate_limit_metrics(self, client, test_admin, test_user, tight_limit):
+        """Test GET /api/metrics/rate-limits reports allowed and rejected counts per limit."""
+        tight_limit(ratelimit.login_limit, burst=1)
+        _login(client)
+        _login(client)
+
+        response = client.get("/api/metrics/rate-limits", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["store"] == "memory"
+        login = next(item for item in data["limits"] if item["name"] == "login")
+        assert login["rejected"] == 1
+
+
+class TestRejectionCost:
+    """Benchmark the cost of rejecting a request from an empty bucket."""
+
+    def test_rejection_is_a_dict_lookup(self):
+        """Test rejections of a blocked bucket stay well under 2 µs each; print the per-call cost."""
+        limiter = RateLimiter(store=InProcessBucketStore(), enabled=True)
+        limit = Limit("bench", 1, 3600)
+        limiter.check(limit, "10.0.0.1")
+        assert limiter.check(limit, "10.0.0.1") > 0
+
+        calls = 100_000
+        start = time.perf_counter()
+        for _ in range(calls):
+            limiter.check(limit, "10.0.0.1")
+        per_call_us = (time.perf_counter() - start) / calls * 1e6
+
+        print(f"\nrejection: {per_call_us:.3f} µs per check")
+        assert per_call_us < 2
@@ -20,7 +20,7 @@ class TestSweetRating:
         assert data["rating"] == 4
         assert data["sweet_id"] == sweet_id
 
-    '''def test_rating_must_be_between_1_and_5(self, client, test_user_token, create_sweets):
+    def test_rating_must_be_between_1_and_5(self, client, test_user_token, create_sweets):
         """Test that rating must be valid (1-5)."""
         sweet_id = create_sweets[0]["sweet_id"]
         
@@ -52,4 +52,68 @@ class TestSweetRating:
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert "average_rating" in data'''
\ No newline at end of file
+        assert "average_rating" in data
+
+    def test_rating_again_updates_existing_rating(self, client, test_user_token, create_sweets):
+        """Test that re-rating replaces the user's previous rating."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        
+        first = client.post(
+            f"/api/sweets/{sweet_id}/rate",
+            json={"rating": 2},
+            headers=test_user_token["headers"]
+        )
+        second = client.post(
+            f"/api/sweets/{sweet_id}/rate",
+            json={"rating": 5},
+            headers=test_user_token["headers"]
+        )
+        
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.json()["rating_id"] == first.json()["rating_id"]
+        assert second.json()["rating_count"] == 1
+        assert second.json()["average_rating"] == 5
+        
+        data = client.get(f"/api/sweets/{sweet_id}").json()
+        assert data["rating_count"] == 1
+        assert data["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 0, "5": 1}
+
+    def test_average_rating_across_users(self, client, test_user_token, test_admin, create_sweets):
+        """Test that aggregates combine ratings from different users."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        
+        client.post(
+            f"/api/sweets/{sweet_id}/rate",
+            json={"rating": 4},
+            headers=test_user_token["headers"]
+        )
+        client.post(
+            f"/api/sweets/{sweet_id}/rate",
+            json={"rating": 1},
+            headers=test_admin["headers"]
+        )
+        
+        data = client.get(f"/api/sweets/{sweet_id}").json()
+        assert data["rating_count"] == 2
+        assert data["average_rating"] == 2.5
+        
+        listed = {s["sweet_id"]: s for s in client.get("/api/sweets/").json()}
+        assert listed[sweet_id]["average_rating"] == 2.5
+
+    def test_unrated_sweet_has_no_average(self, client, create_sweets):
+        """Test that a sweet without ratings reports no average."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        
+        data = client.get(f"/api/sweets/{sweet_id}").json()
+        assert data["average_rating"] is None
+        assert data["rating_count"] == 0
+
+    def test_rate_nonexistent_sweet(self, client, test_user_token):
+        """Test rating a sweet that does not exist."""
+        response = client.post(
+            "/api/sweets/99999/rate",
+            json={"rating": 3},
+            headers=test_user_token["headers"]
+        )
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,151 @@
+"""
+Test suite for refresh tokens.
+
+Tests cover:
+- Login starting a server-side session with a hashed refresh token
+- Refreshing without password verification, rotating the token
+- Reuse detection revoking the session
+- Sessions ending on expiry and on password changes
+- Purging expired refresh tokens
+"""
+
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from src.app import auth
+from src.modules.V1.AuthManager.models import RefreshToken
+from src.modules.V1.AuthManager.services import purge_expired_refresh_tokens
+
+
+@pytest.fixture
+def session_tokens(client, test_user):
+    """Tokens of a fresh login of the test user."""
+    response = client.post("/api/auth/login", json={"username": "testuser", "password": "TestPassword123"})
+    return response.json()
+
+
+def _refresh(client, refresh_token):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+class TestRefresh:
+    """Test exchanging refresh tokens for access tokens."""
+
+    def test_login_returns_hashed_refresh_token(self, client, session_tokens, db):
+        """Test the login response carries a refresh token stored only as its SHA-256 hash."""
+        token = session_tokens["refresh_token"]
+        stored = db.query(RefreshToken).one()
+
+        assert stored.token_hash == hashlib.sha256(token.encode()).hexdigest()
+        assert stored.token_hash != token
+        assert stored.status == "active"
+        assert stored.expires_at > datetime.utcnow() + timedelta(days=13)
+
+    def test_refresh_issues_tokens_without_password(self, client, session_tokens, monkeypatch):
+        """Test POST /api/auth/refresh returns a working access token and never runs bcrypt."""
+        def no_bcrypt(*args, **kwargs):
+            raise AssertionError("bcrypt must not run on refresh")
+        monkeypatch.setattr(auth.pwd_context, "verify", no_bcrypt)
+
+        response = _refresh(client, session_tokens["refresh_token"])
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["user"]["username"] == "testuser"
+        assert data["refresh_token"] != session_tokens["refresh_token"]
+        me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+        assert me.status_code == status.HTTP_200_OK
+
+    def test_rotated_token_chain(self, client, session_tokens, db):
+        """Test each refresh rotates the token within one session family."""
+        second = _refresh(client, session_tokens["refresh_token"]).json()["refresh_token"]
+        third = _refresh(client, second).json()["refresh_token"]
+
+        tokens = db.query(RefreshToken).order_by(RefreshToken.refresh_token_id).all()
+        assert [token.status for token in tokens] == ["rotated", "rotated", "active"]
+        assert len({token.family_id for token in tokens}) == 1
+        assert _refresh(client, third).status_code == status.HTTP_200_OK
+
+    def test_unknown_token_rejected(self, client, session_tokens):
+        """Test made-up refresh tokens get 401."""
+        assert _refresh(client, "not-a-token").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestReuseDetection:
+    """Test replayed refresh tokens revoke their session."""
+
+    def test_reused_token_revokes_family(self, client, session_tokens, db):
+        """Test presenting a rotated token again revokes the token that replaced it."""
+        stolen = session_tokens["refresh_token"]
+        legitimate = _refresh(client, stolen).json()["refresh_token"]
+
+        replay = _refresh(client, stolen)
+
+        assert replay.status_code == status.HTTP_401_UNAUTHORIZED
+        assert "already used" in replay.json()["detail"]
+        assert _refresh(client, legitimate).status_code == status.HTTP_401_UNAUTHORIZED
+        db.expire_all()
+        assert {token.status for token in db.query(RefreshToken)} == {"rotated", "revoked"}
+
+    def test_other_sessions_unaffected(self, client, session_tokens):
+        """Test revoking one session family leaves the user's other logins alone."""
+        other = client.post("/api/auth/login", json={"username": "testuser", "password": "TestPassword123"})
+        _refresh(client, session_tokens["refresh_token"])
+        _refresh(client, session_tokens["refresh_token"])
+
+        assert _refresh(client, other.json()["refresh_token"]).status_code == status.HTTP_200_OK
+
+
+class TestSessionEnd:
+    """Test sessions ending."""
+
+    def test_expired_token_rejected(self, client, session_tokens, db):
+        """Test refresh tokens past their expiry get 401."""
+        stored = db.query(RefreshToken).one()
+        stored.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        assert _refresh(client, session_tokens["refresh_token"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_ends_sessions(self, client, session_tokens, test_admin):
+        """Test a password change (token_version bump) invalidates existing refresh tokens."""
+        user_id = session_tokens["user"]["user_id"]
+        client.put(f"/api/auth/users/{user_id}", json={"password": "NewPassword456"}, headers=test_admin["headers"])
+
+        assert _refresh(client, session_tokens["refresh_token"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_purge_expired(self, client, session_tokens, db):
+        """Test the purger deletes only expired refresh tokens."""
+        _refresh(client, session_tokens["refresh_token"])
+        oldest = db.query(RefreshToken).order_by(RefreshToken.refresh_token_id).first()
+        oldest.expires_at = datetime.utcnow() - timedelta(days=1)
+        db.commit()
+
+        assert purge_expired_refresh_tokens(db, datetime.utcnow()) == 1
+        db.commit()
+        assert db.query(RefreshToken).count() == 1
+
+
+class TestRefreshCost:
+    """Benchmark refresh against a password login."""
+
+    def test_refresh_is_cheaper_than_login(self, client, session_tokens):
+        """Test a refresh costs a fraction of a bcrypt login; print both latencies."""
+        rounds = 5
+        start = time.perf_counter()
+        for _ in range(rounds):
+            client.post("/api/auth/login", json={"username": "testuser", "password": "TestPassword123"})
+        login_ms = (time.perf_counter() - start) / rounds * 1000
+
+        token = session_tokens["refresh_token"]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            token = _refresh(client, token).json()["refresh_token"]
+        refresh_ms = (time.perf_counter() - start) / rounds * 1000
+
+        print(f"\nlogin: {login_ms:.1f} ms, refresh: {refresh_ms:.1f} ms")
+        assert refresh_ms < login_ms
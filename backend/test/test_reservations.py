@@ -0,0 +1,208 @@
+"""
+Test suite for stock reservations (cart holds).
+
+Tests cover:
+- Holding stock without decreasing quantity_in_stock
+- Available-to-sell figure and its cache invalidation
+- Holds blocking other buyers
+- Checkout converting a hold into a purchase
+- Releasing and expiring holds
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from src.modules.V1.SweetsManager.holds import HoldIndex, expire_reservations, hold_index
+from src.modules.V1.SweetsManager.models import Reservation
+
+
+@pytest.fixture
+def second_user_headers(client):
+    """Auth headers of another regular user."""
+    client.post("/api/auth/register", json={
+        "username": "seconduser", "email": "second@example.com", "password": "SecondPass123"
+    })
+    login = client.post("/api/auth/login", json={"username": "seconduser", "password": "SecondPass123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _reserve(client, headers, sweet_id, quantity):
+    return client.post("/api/reservations/", json={"sweet_id": sweet_id, "quantity": quantity}, headers=headers)
+
+
+class TestReserve:
+    """Test holding stock."""
+
+    def test_hold_keeps_stock_and_reduces_availability(self, client, test_user_token, create_sweets):
+        """Test a hold leaves quantity_in_stock alone but lowers available_to_sell."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        response = _reserve(client, test_user_token["headers"], sweet_id, 20)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["status"] == "active"
+        assert datetime.fromisoformat(data["expires_at"]) > datetime.utcnow()
+
+        availability = client.get(f"/api/sweets/{sweet_id}/availability").json()
+        assert availability == {"sweet_id": sweet_id, "quantity_in_stock": 50, "held": 20, "available_to_sell": 30}
+
+    def test_cannot_hold_more_than_available(self, client, test_user_token, second_user_headers, create_sweets):
+        """Test holds are limited to stock not already held by other carts."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _reserve(client, test_user_token["headers"], sweet_id, 40)
+
+        response = _reserve(client, second_user_headers, sweet_id, 11)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Available: 10" in response.json()["detail"]
+
+    def test_holds_from_other_workers_block_sales(self, client, test_user_token, create_sweets, db):
+        """Test a hold missing from this worker's index still limits purchases and new holds."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        db.add(Reservation(sweet_id=sweet_id, user_id=test_user_token["user_id"], quantity=40, status="active",
+                           expires_at=datetime.utcnow() + timedelta(minutes=10)))
+        db.commit()
+
+        purchase = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 11},
+                               headers=test_user_token["headers"])
+        hold = _reserve(client, test_user_token["headers"], sweet_id, 11)
+
+        assert purchase.status_code == status.HTTP_400_BAD_REQUEST
+        assert hold.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Available: 10" in hold.json()["detail"]
+
+    def test_hold_blocks_other_buyers(self, client, test_user_token, second_user_headers, create_sweets):
+        """Test regular purchases cannot take units held by a cart."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _reserve(client, test_user_token["headers"], sweet_id, 45)
+
+        blocked = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 6}, headers=second_user_headers)
+        allowed = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 5}, headers=second_user_headers)
+
+        assert blocked.status_code == status.HTTP_400_BAD_REQUEST
+        assert allowed.status_code == status.HTTP_201_CREATED
+
+    def test_list_my_reservations(self, client, test_user_token, second_user_headers, create_sweets):
+        """Test GET /api/reservations/ lists only the caller's active holds."""
+        _reserve(client, test_user_token["headers"], create_sweets[0]["sweet_id"], 1)
+        _reserve(client, second_user_headers, create_sweets[1]["sweet_id"], 1)
+
+        response = client.get("/api/reservations/", headers=test_user_token["headers"])
+
+        assert [item["sweet_id"] for item in response.json()] == [create_sweets[0]["sweet_id"]]
+
+
+class TestCheckout:
+    """Test converting holds into purchases."""
+
+    def test_checkout_purchases_held_units(self, client, test_user_token, create_sweets, db):
+        """Test checkout decrements stock, records the transaction and converts the hold."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        # Hold everything: only the holder may buy it
+        reservation_id = _reserve(client, test_user_token["headers"], sweet_id, 50).json()["reservation_id"]
+
+        response = client.post(f"/api/reservations/{reservation_id}/checkout", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["quantity"] == 50
+        assert data["new_stock"] == 0
+        reservation = db.query(Reservation).get(reservation_id)
+        db.refresh(reservation)
+        assert reservation.status == "converted"
+        assert reservation.transaction_id == data["transaction_id"]
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["held"] == 0
+
+    def test_checkout_without_index_entry(self, client, test_user_token, create_sweets):
+        """Test a valid hold missing from this worker's index (other worker, restart) still checks out."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        reservation_id = _reserve(client, test_user_token["headers"], sweet_id, 50).json()["reservation_id"]
+        hold_index.remove(reservation_id)
+
+        response = client.post(f"/api/reservations/{reservation_id}/checkout", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["new_stock"] == 0
+
+    def test_checkout_twice_conflicts(self, client, test_user_token, create_sweets):
+        """Test a converted hold cannot be checked out again."""
+        reservation_id = _reserve(
+            client, test_user_token["headers"], create_sweets[0]["sweet_id"], 2
+        ).json()["reservation_id"]
+        client.post(f"/api/reservations/{reservation_id}/checkout", headers=test_user_token["headers"])
+
+        response = client.post(f"/api/reservations/{reservation_id}/checkout", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_other_users_cannot_checkout(self, client, test_user_token, second_user_headers, create_sweets):
+        """Test holds belong to the user who made them."""
+        reservation_id = _reserve(
+            client, test_user_token["headers"], create_sweets[0]["sweet_id"], 2
+        ).json()["reservation_id"]
+
+        response = client.post(f"/api/reservations/{reservation_id}/checkout", headers=second_user_headers)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestReleaseAndExpiry:
+    """Test holds returning stock to sale."""
+
+    def test_release_returns_stock(self, client, test_user_token, create_sweets):
+        """Test DELETE /api/reservations/{id} frees the held units."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        reservation_id = _reserve(client, test_user_token["headers"], sweet_id, 30).json()["reservation_id"]
+
+        response = client.delete(f"/api/reservations/{reservation_id}", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["available_to_sell"] == 50
+
+    def test_expired_hold_frees_stock(self, client, test_user_token, create_sweets, db):
+        """Test an expired hold stops counting, cannot be checked out and is marked by the expiry job."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        reservation_id = _reserve(client, test_user_token["headers"], sweet_id, 30).json()["reservation_id"]
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["held"] == 30
+
+        # Let the hold run out: in the index and in its row
+        hold_index.sweep(datetime.utcnow() + timedelta(days=1))
+        reservation = db.query(Reservation).get(reservation_id)
+        reservation.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["held"] == 0
+        response = client.post(f"/api/reservations/{reservation_id}/checkout", headers=test_user_token["headers"])
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert expire_reservations(db) == {"expired": 1}
+
+    def test_stock_change_invalidates_cached_availability(self, client, test_user_token, test_admin, create_sweets):
+        """Test a restock is reflected in the cached available-to-sell figure."""
+        sweet_id = create_sweets[1]["sweet_id"]
+        _reserve(client, test_user_token["headers"], sweet_id, 10)
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["available_to_sell"] == 40
+
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 5}, headers=test_admin["headers"])
+
+        assert client.get(f"/api/sweets/{sweet_id}/availability").json()["available_to_sell"] == 45
+
+
+class TestHoldIndex:
+    """Test the in-memory hold index directly."""
+
+    def test_heap_expiry_pops_only_due_holds(self):
+        """Test sweeping expires due holds oldest first and skips removed ones."""
+        index = HoldIndex()
+        now = datetime.utcnow()
+        holds = [
+            Reservation(reservation_id=i, sweet_id=1, quantity=1, expires_at=now + timedelta(minutes=i))
+            for i in range(1, 6)
+        ]
+        for reservation in holds:
+            index.add(reservation)
+        index.remove(2)
+
+        assert index.sweep(now + timedelta(minutes=3, seconds=30)) == [1, 3]
+        assert index.held(1) == 2
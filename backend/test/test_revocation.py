@@ -0,0 +1,263 @@
+"""
+Test suite for the access token revocation list.
+
+Tests cover:
+- jti claims on access tokens
+- Logout and admin revocation through the API
+- The Bloom filter: no false negatives, false positives near the target rate
+- Not-revoked checks never reaching the shared store
+- Revocations shared between workers through the store
+"""
+
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi import status
+from jose import jwt
+
+from src.app import revocation
+from src.app.revocation import BloomFilter, RevocationList
+from src.app.settings import settings
+
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the revocation list uses, counting calls."""
+
+    def __init__(self):
+        self.keys = {}
+        self.calls = 0
+
+    def set(self, key, value, exat):
+        self.calls += 1
+        self.keys[key] = exat
+
+    def exists(self, key):
+        self.calls += 1
+        return int(self.keys.get(key, 0) > time.time())
+
+    def scan_iter(self, match):
+        self.calls += 1
+        return [key for key in self.keys if key.startswith(match.rstrip("*"))]
+
+    def ttl(self, key):
+        self.calls += 1
+        return int(self.keys[key] - time.time())
+
+
+class FakeChannel:
+    """Pub/sub channel delivering every message to all started workers synchronously."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def worker(self):
+        channel = self
+
+        class Worker:
+            def start(self, deliver):
+                channel.subscribers.append(deliver)
+
+            def publish(self, message):
+                for deliver in channel.subscribers:
+                    deliver(message)
+
+            def stop(self):
+                pass
+
+        return Worker()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """A fake shared store used by revocation lists created in the test."""
+    client = FakeRedis()
+    monkeypatch.setattr(revocation, "get_redis", lambda: client)
+    return client
+
+
+def _login(client, username, password):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()
+
+
+def _claims(token):
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+class TestRevocationEndpoints:
+    """Test logout and admin revocation."""
+
+    def test_access_tokens_have_unique_jti(self, client, test_user):
+        """Test every login issues a token with its own jti."""
+        first = _claims(_login(client, "testuser", "TestPassword123")["access_token"])
+        second = _claims(_login(client, "testuser", "TestPassword123")["access_token"])
+
+        assert first["jti"] and second["jti"]
+        assert first["jti"] != second["jti"]
+
+    def test_logout_revokes_only_the_presented_token(self, client, test_user):
+        """Test POST /api/auth/logout makes that token fail while other sessions keep working."""
+        tokens = _login(client, "testuser", "TestPassword123")
+        other = _login(client, "testuser", "TestPassword123")
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get("/api/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+        response = client.post("/api/auth/logout", headers=headers)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert client.get("/api/auth/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+        other_headers = {"Authorization": f"Bearer {other['access_token']}"}
+        assert client.get("/api/auth/me", headers=other_headers).status_code == status.HTTP_200_OK
+
+    def test_logout_with_refresh_token_ends_the_session(self, client, test_user):
+        """Test a refresh token sent to /api/auth/logout can no longer be exchanged."""
+        tokens = _login(client, "testuser", "TestPassword123")
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+
+        response = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_admin_revokes_token_by_jti(self, client, test_user_token, test_admin):
+        """Test POST /api/auth/revoke revokes another user's token; non-admins are refused."""
+        jti = _claims(test_user_token["token"])["jti"]
+
+        refused = client.post("/api/auth/revoke", json={"jti": jti}, headers=test_user_token["headers"])
+        response = client.post("/api/auth/revoke", json={"jti": jti}, headers=test_admin["headers"])
+
+        assert refused.status_code == status.HTTP_403_FORBIDDEN
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        me = client.get("/api/auth/me", headers=test_user_token["headers"])
+        assert me.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revocation_metrics(self, client, test_user_token, test_admin):
+        """Test GET /api/metrics/revocations reports checks answered by the Bloom filter."""
+        client.get("/api/auth/me", headers=test_user_token["headers"])
+
+        response = client.get("/api/metrics/revocations", headers=test_admin["headers"])
+
+        data = response.json()
+        assert data["shared"] is False
+        assert data["checks"] >= 2
+        assert data["bloom_negatives"] == data["checks"]
+
+
+class TestBloomFilter:
+    """Test the Bloom filter in front of the revocation list."""
+
+    def test_no_false_negatives_and_low_false_positive_rate(self):
+        """Test added items are always found and unknown items rarely are."""
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        added = [uuid.uuid4().hex for _ in range(10000)]
+        for item in added:
+            bloom.add(item)
+
+        assert all(item in bloom for item in added)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20000))
+        assert false_positives / 20000 < 0.02
+
+    def test_filter_grows_past_capacity(self):
+        """Test revocations beyond the filter capacity are still found."""
+        revoked = RevocationList(capacity=100, error_rate=0.01)
+        jtis = [uuid.uuid4().hex for _ in range(500)]
+        for jti in jtis:
+            revoked.revoke(jti, time.time() + 60)
+
+        assert all(revoked.is_revoked(jti) for jti in jtis)
+        assert revoked.bloom.capacity >= 500
+
+    def test_checks_during_rebuild_find_revoked_tokens(self):
+        """Test a revoked jti is found by checks running while the filter is rebuilt."""
+        revoked = RevocationList(capacity=50, error_rate=0.01)
+        revoked.revoke("revoked-jti", time.time() + 60)
+        misses = []
+        done = threading.Event()
+
+        def check():
+            while not done.is_set():
+                if not revoked.is_revoked("revoked-jti"):
+                    misses.append(1)
+
+        reader = threading.Thread(target=check)
+        reader.start()
+        for _ in range(5000):
+            revoked.revoke(uuid.uuid4().hex, time.time() + 60)
+        done.set()
+        reader.join()
+
+        assert misses == []
+
+    def test_expired_revocations_are_dropped(self):
+        """Test a revocation ends with the token's expiry and past tokens are not recorded."""
+        revoked = RevocationList(capacity=100, error_rate=0.01)
+        revoked.revoke("expiring", time.time() + 0.05)
+        revoked.revoke("already-expired", time.time() - 1)
+        assert revoked.is_revoked("expiring")
+
+        time.sleep(0.1)
+
+        assert not revoked.is_revoked("expiring")
+        assert revoked.stats()["revoked"] == 1
+
+
+class TestSharedRevocations:
+    """Test revocations shared through a Redis-compatible store."""
+
+    def test_not_revoked_checks_skip_the_store(self, fake_redis):
+        """Test checks of tokens never revoked make no store calls."""
+        revoked = RevocationList(capacity=1000, error_rate=0.001)
+        revoked.use_redis(pubsub=FakeChannel().worker())
+        revoked.revoke("revoked-jti", time.time() + 60)
+        calls = fake_redis.calls
+
+        for _ in range(1000):
+            assert not revoked.is_revoked(uuid.uuid4().hex)
+
+        assert fake_redis.calls - calls == revoked.stats()["remote_lookups"] < 10
+        assert revoked.is_revoked("revoked-jti")
+
+    def test_revocation_reaches_other_workers(self, fake_redis):
+        """Test a revocation in one worker is seen by running and newly started workers."""
+        channel = FakeChannel()
+        first, second = RevocationList(1000, 0.001), RevocationList(1000, 0.001)
+        first.use_redis(pubsub=channel.worker())
+        second.use_redis(pubsub=channel.worker())
+
+        first.revoke("shared-jti", time.time() + 60)
+        started_later = RevocationList(1000, 0.001)
+        loaded = started_later.use_redis(pubsub=channel.worker())
+
+        assert second.is_revoked("shared-jti")
+        assert loaded == 1 and started_later.is_revoked("shared-jti")
+
+    def test_missed_announcement_falls_back_to_store(self, fake_redis):
+        """Test a filter hit without a local entry is answered by the store."""
+        revoked = RevocationList(capacity=1000, error_rate=0.001)
+        revoked.use_redis(pubsub=FakeChannel().worker())
+        fake_redis.set("revoked:late-jti", 1, exat=time.time() + 60)
+        revoked.bloom.add("late-jti")
+
+        assert revoked.is_revoked("late-jti")
+        assert revoked.stats()["remote_lookups"] == 1
+
+
+class TestRevocationCheckCost:
+    """Benchmark the per-request revocation check."""
+
+    def test_not_revoked_check_is_cheap(self):
+        """Test the common not-revoked check costs microseconds, with many tokens revoked."""
+        revoked = RevocationList(capacity=100000, error_rate=0.001)
+        for _ in range(50000):
+            revoked.revoke(uuid.uuid4().hex, time.time() + 60)
+        jtis = [uuid.uuid4().hex for _ in range(10000)]
+
+        start = time.perf_counter()
+        for jti in jtis:
+            revoked.is_revoked(jti)
+        per_check_us = (time.perf_counter() - start) / len(jtis) * 1e6
+
+        print(f"\nNot-revoked check: {per_check_us:.1f} us")
+        assert per_check_us < 200
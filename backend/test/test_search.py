@@ -0,0 +1,219 @@
+"""
+Test suite for in-memory sweets search indexes.
+
+Tests cover:
+- Typeahead suggestions
+- Typo-tolerant fuzzy search
+- Incremental index updates on create, update and delete
+- Lookup latency benchmarks
+"""
+
+import os
+import random
+import time
+
+import pytest
+from fastapi import status
+
+from src.modules.V1.SweetsManager.search_index import (
+    SuggestIndex, TrigramIndex, damerau_levenshtein, rebuild_search_indexes
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(db):
+    """Rebuild the in-memory indexes from the (empty) test database."""
+    rebuild_search_indexes(db)
+    yield
+
+
+class TestSuggest:
+    """Test the typeahead suggestion endpoint."""
+    
+    def test_suggest_by_name_prefix(self, client, create_sweets):
+        """Test suggestions match the start of a sweet name."""
+        response = client.get("/api/sweets/suggest?q=gum")
+        
+        assert response.status_code == status.HTTP_200_OK
+        texts = [s["text"] for s in response.json()]
+        assert texts == ["Gummy", "Gummy Bears", "Sour Gummy Worms"]
+    
+    def test_suggest_matches_later_words(self, client, create_sweets):
+        """Test suggestions match the start of any word, whole-name matches first."""
+        texts = [s["text"] for s in client.get("/api/sweets/suggest?q=choc").json()]
+        
+        assert texts == ["Chocolate", "Chocolate Bar", "Dark Chocolate"]
+    
+    def test_suggest_is_case_and_accent_insensitive(self, client, test_admin):
+        """Test normalization of names and prefixes."""
+        client.post(
+            "/api/sweets/",
+            data={"name": "Crème Brûlée", "category": "Dessert", "price": 4.0},
+            headers=test_admin["headers"]
+        )
+        
+        texts = [s["text"] for s in client.get("/api/sweets/suggest?q=CREME").json()]
+        assert texts == ["Crème Brûlée"]
+    
+    def test_suggest_respects_limit(self, client, create_sweets):
+        """Test the number of suggestions is capped by limit."""
+        response = client.get("/api/sweets/suggest?q=c&limit=1")
+        
+        assert len(response.json()) == 1
+    
+    def test_index_follows_update_and_delete(self, client, test_admin, create_sweets):
+        """Test the index is updated incrementally on catalog writes."""
+        lollipop = next(s for s in create_sweets if s["name"] == "Lollipop")
+        client.put(
+            f"/api/sweets/{lollipop['sweet_id']}",
+            json={"name": "Rainbow Pop"},
+            headers=test_admin["headers"]
+        )
+        assert client.get("/api/sweets/suggest?q=lolli").json() == []
+        assert client.get("/api/sweets/suggest?q=rainbow").json()[0]["sweet_id"] == lollipop["sweet_id"]
+        
+        client.delete(f"/api/sweets/{lollipop['sweet_id']}", headers=test_admin["headers"])
+        assert client.get("/api/sweets/suggest?q=rainbow").json() == []
+        # Last sweet in "Hard Candy" is gone, so the category is no longer suggested
+        assert client.get("/api/sweets/suggest?q=hard").json() == []
+
+
+@pytest.mark.benchmark
+class TestSuggestIndexPerformance:
+    """Benchmark lookup latency of the prefix index."""
+    
+    def test_lookup_is_sub_millisecond(self):
+        """Test lookups on a 10,000-name index; when opted in, the average stays below 1 ms."""
+        index = SuggestIndex()
+        for i in range(10_000):
+            index.upsert(i, f"Sweet {i:05d} Delight", f"Category {i % 50}")
+        
+        start = time.perf_counter()
+        for i in range(1_000):
+            index.suggest(f"sweet {i % 100:02d}", limit=10)
+        average_ms = (time.perf_counter() - start) / 1_000 * 1000
+        print(f"\nsuggest over 10000 names: average {average_ms:.3f} ms")
+        # Wall-clock bounds are asserted only in opted-in benchmark runs (SEARCH_BENCHMARK_SIZE)
+        if os.getenv("SEARCH_BENCHMARK_SIZE"):
+            assert average_ms < 1.0
+
+
+@pytest.fixture
+def indian_sweets(client, test_admin):
+    """Create sweets with names customers tend to misspell."""
+    sweets = [
+        {"name": "Gulab Jamun", "category": "Syrup", "price": 3.0, "quantity_in_stock": 10},
+        {"name": "Kaju Burfi", "category": "Burfi", "price": 5.0, "quantity_in_stock": 10},
+        {"name": "Rasgulla", "category": "Syrup", "price": 2.5, "quantity_in_stock": 10},
+        {"name": "Motichoor Ladoo", "category": "Ladoo", "price": 4.0, "quantity_in_stock": 10},
+    ]
+    created = []
+    for sweet in sweets:
+        response = client.post("/api/sweets/", data=sweet, headers=test_admin["headers"])
+        assert response.status_code == 201
+        created.append(response.json())
+    return created
+
+
+class TestFuzzySearch:
+    """Test typo-tolerant search mode."""
+    
+    def test_damerau_levenshtein_counts_transposition_as_one_edit(self):
+        """Test adjacent transpositions cost a single edit."""
+        assert damerau_levenshtein("burfi", "bufri", 3) == 1
+        assert damerau_levenshtein("jamon", "jamun", 3) == 1
+        assert damerau_levenshtein("ladoo", "laddu", 3) == 2
+    
+    def test_misspelled_name_is_found(self, client, indian_sweets):
+        """Test a misspelled full name finds the sweet."""
+        response = client.get("/api/sweets/search?query=gulab jamon&mode=fuzzy")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [s["name"] for s in response.json()] == ["Gulab Jamun"]
+    
+    def test_misspelled_word_is_found(self, client, indian_sweets):
+        """Test a misspelled single word matches a word inside the name."""
+        names = [s["name"] for s in client.get("/api/sweets/search?query=barfi&mode=fuzzy").json()]
+        
+        assert names == ["Kaju Burfi"]
+    
+    def test_substring_mode_is_unchanged(self, client, indian_sweets):
+        """Test the default mode still requires a substring match."""
+        response = client.get("/api/sweets/search?query=barfi")
+        
+        assert response.json() == []
+    
+    def test_fuzzy_results_are_ranked_by_distance(self, client, test_admin, indian_sweets):
+        """Test closer matches come first."""
+        client.post(
+            "/api/sweets/",
+            data={"name": "Rasmalai", "category": "Syrup", "price": 3.5},
+            headers=test_admin["headers"]
+        )
+        
+        names = [s["name"] for s in client.get("/api/sweets/search?query=rasgula&mode=fuzzy").json()]
+        assert names[0] == "Rasgulla"
+    
+    def test_fuzzy_search_with_filters(self, client, indian_sweets):
+        """Test fuzzy matches are combined with category filters."""
+        response = client.get("/api/sweets/search?query=gulab jamon&mode=fuzzy&category=Ladoo")
+        
+        assert response.json() == []
+    
+    def test_fuzzy_index_follows_renames(self, client, test_admin, indian_sweets):
+        """Test the trigram index is updated incrementally on catalog writes."""
+        burfi = next(s for s in indian_sweets if s["name"] == "Kaju Burfi")
+        client.put(
+            f"/api/sweets/{burfi['sweet_id']}",
+            json={"name": "Kaju Katli"},
+            headers=test_admin["headers"]
+        )
+        
+        assert client.get("/api/sweets/search?query=barfi&mode=fuzzy").json() == []
+        names = [s["name"] for s in client.get("/api/sweets/search?query=katly&mode=fuzzy").json()]
+        assert names == ["Kaju Katli"]
+    
+    def test_fuzzy_mode_cursor_requires_sort(self, client, indian_sweets):
+        """Test relevance-ordered fuzzy results cannot be paged by cursor."""
+        response = client.get("/api/sweets/search?query=jamun&mode=fuzzy&cursor=abc")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.benchmark
+class TestFuzzyIndexPerformance:
+    """Benchmark fuzzy search latency on a synthetic catalog."""
+    
+    # Opt in with e.g. SEARCH_BENCHMARK_SIZE=1000000: the default run only
+    # smoke-tests a small catalog and does not assert on wall-clock time
+    BENCHMARK_SIZE = os.getenv("SEARCH_BENCHMARK_SIZE")
+    CATALOG_SIZE = int(BENCHMARK_SIZE or "2000")
+    
+    def test_fuzzy_query_latency_is_bounded(self):
+        """Test fuzzy queries over a synthetic catalog; when opted in, p95 latency stays under 100 ms."""
+        rng = random.Random(42)
+        syllables = ["ka", "ju", "bur", "fi", "gu", "lab", "ja", "mun", "ras", "mo",
+                     "ti", "choor", "la", "doo", "pe", "da", "son", "pap", "di", "jal"]
+        
+        def make_word():
+            return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        
+        names = [f"{make_word()} {make_word()} {i}" for i in range(self.CATALOG_SIZE)]
+        index = TrigramIndex()
+        index.rebuild(list(enumerate(names)))
+        
+        timings = []
+        for _ in range(200):
+            target = rng.choice(names).split()[0]
+            position = rng.randrange(len(target) - 1)
+            typo = target[:position] + target[position + 1] + target[position] + target[position + 2:]
+            start = time.perf_counter()
+            index.search(typo)
+            timings.append((time.perf_counter() - start) * 1000)
+        
+        timings.sort()
+        p95_ms = timings[int(len(timings) * 0.95)]
+        print(f"\nfuzzy search over {self.CATALOG_SIZE} names: "
+              f"median {timings[len(timings) // 2]:.2f} ms, p95 {p95_ms:.2f} ms")
+        if self.BENCHMARK_SIZE:
+            assert p95_ms < 100
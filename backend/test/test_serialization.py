@@ -0,0 +1,185 @@
+"""
+Test suite for the fast JSON path of the sweets list endpoints.
+
+Tests cover:
+- Row-tuple payloads match the validated SweetResponse output
+- Cursor header and facets on the fast path
+- Sparse fieldsets (?fields=) on list, search and detail endpoints
+- Benchmark against ORM entities + response_model validation (100 and 1,000 items,
+  opt-in with RUN_BENCHMARKS=1)
+"""
+
+import json
+import os
+import time
+from typing import List
+
+import pytest
+from fastapi import status
+from pydantic import TypeAdapter
+
+from src.app.responses import dumps
+from src.modules.V1.SweetsManager.dao import SweetsDAO
+from src.modules.V1.SweetsManager.models import Sweet
+from src.modules.V1.SweetsManager.schemas import SweetResponse
+from src.modules.V1.SweetsManager.services import SweetsService
+
+
+def bulk_create_sweets(db, count):
+    """Insert count sweets directly, bypassing the API."""
+    db.add_all([
+        Sweet(
+            name=f"Bulk Sweet {i}",
+            category="Bulk",
+            price=1 + (i % 50) / 10,
+            quantity_in_stock=i % 100,
+            description=f"Bulk sweet number {i}",
+            rating_sum=i % 5 * 3,
+            rating_count=i % 5,
+            rating_hist_3=i % 5,
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+class TestFastListSerialization:
+    """Test the row-tuple serialization path."""
+
+    def test_row_payload_matches_response_model(self, db, create_sweets):
+        """Test row dicts serialize exactly like SweetResponse over ORM entities."""
+        bulk_create_sweets(db, 10)
+        entities = SweetsDAO.get_all_sweets(db, limit=100)
+        rows = SweetsDAO.get_all_sweets(db, limit=100, columns=SweetsDAO.select_columns())
+
+        expected = TypeAdapter(List[SweetResponse]).dump_python(
+            [SweetResponse.model_validate(sweet) for sweet in entities], mode="json"
+        )
+        actual = json.loads(dumps(SweetsService.sweet_rows_to_dicts(rows)))
+
+        assert actual == expected
+
+    def test_list_endpoint_keeps_cursor_header(self, client, create_sweets):
+        """Test GET /api/sweets/ still exposes X-Next-Cursor on a full page."""
+        response = client.get("/api/sweets/?limit=2&sort=price_asc")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 2
+        assert "X-Next-Cursor" in response.headers
+        assert response.headers["content-type"] == "application/json"
+
+    def test_search_with_facets_on_fast_path(self, client, create_sweets):
+        """Test GET /api/sweets/search?facets=true keeps the {items, facets} shape."""
+        response = client.get("/api/sweets/search?category=Chocolate&facets=true")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert {item["name"] for item in data["items"]} == {"Chocolate Bar", "Dark Chocolate"}
+        assert data["items"][0]["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+        assert {"category": "Gummy", "count": 2} in data["facets"]["categories"]
+
+
+class TestSparseFieldsets:
+    """Test the fields query parameter."""
+
+    def test_list_returns_only_requested_fields(self, client, create_sweets):
+        """Test GET /api/sweets/?fields= returns the requested fields plus sweet_id."""
+        response = client.get("/api/sweets/?fields=name,price,quantity_in_stock,image_url")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data) == len(create_sweets)
+        assert set(data[0]) == {"sweet_id", "name", "price", "quantity_in_stock", "image_url"}
+
+    def test_search_with_fields_and_cursor(self, client, create_sweets):
+        """Test GET /api/sweets/search?fields= still pages by a sort key it does not return."""
+        first = client.get("/api/sweets/search?fields=name&sort=rating&limit=2")
+        assert set(first.json()[0]) == {"sweet_id", "name"}
+
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(f"/api/sweets/search?fields=name&sort=rating&limit=2&cursor={cursor}")
+        assert second.status_code == status.HTTP_200_OK
+        first_ids = {item["sweet_id"] for item in first.json()}
+        assert first_ids.isdisjoint(item["sweet_id"] for item in second.json())
+
+    def test_detail_with_computed_fields(self, client, create_sweets):
+        """Test GET /api/sweets/{id}?fields= supports computed fields."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        response = client.get(f"/api/sweets/{sweet_id}?fields=average_rating,rating_histogram")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "sweet_id": sweet_id,
+            "average_rating": None,
+            "rating_histogram": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+        }
+
+    def test_unknown_field_rejected(self, client, create_sweets):
+        """Test an unknown field name returns 400."""
+        response = client.get("/api/sweets/?fields=name,password")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.json()["detail"]
+
+    def test_select_only_needed_columns(self):
+        """Test the SELECT list shrinks with the fieldset."""
+        columns = SweetsDAO.select_columns(["sweet_id", "name", "price"])
+
+        assert [column.key for column in columns] == ["sweet_id", "name", "price"]
+
+
+def _serialization_paths(db, page_size):
+    """The ORM + validation path and the rows + orjson path for one page."""
+    adapter = TypeAdapter(List[SweetResponse])
+
+    def orm_path():
+        db.expunge_all()
+        sweets = SweetsDAO.get_all_sweets(db, limit=page_size)
+        validated = [SweetResponse.model_validate(sweet) for sweet in sweets]
+        return adapter.dump_json(validated)
+
+    def fast_path():
+        rows = SweetsDAO.get_all_sweets(db, limit=page_size, columns=SweetsDAO.select_columns())
+        return dumps(SweetsService.sweet_rows_to_dicts(rows))
+
+    return orm_path, fast_path
+
+
+class TestFastListSerializationOutput:
+    """Test the fast path and the ORM path serialize a full page identically."""
+
+    @pytest.mark.parametrize("page_size", [100, 1000])
+    def test_fast_path_matches_orm_path(self, db, page_size):
+        """Test rows + orjson produce the same JSON as entities + validation."""
+        bulk_create_sweets(db, page_size)
+        orm_path, fast_path = _serialization_paths(db, page_size)
+
+        assert json.loads(orm_path()) == json.loads(fast_path())
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1 to run")
+class TestFastListSerializationPerformance:
+    """Benchmark the fast path against ORM entities + response_model validation."""
+
+    @staticmethod
+    def _median_ms(func, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2]
+
+    @pytest.mark.parametrize("page_size", [100, 1000])
+    def test_fast_path_is_faster(self, db, page_size):
+        """Test rows + orjson beat entities + validation + json for a full page."""
+        bulk_create_sweets(db, page_size)
+        orm_path, fast_path = _serialization_paths(db, page_size)
+
+        orm_ms = self._median_ms(orm_path)
+        fast_ms = self._median_ms(fast_path)
+
+        print(f"\n{page_size} items: orm+validate {orm_ms:.2f} ms, rows+orjson {fast_ms:.2f} ms "
+              f"({orm_ms / fast_ms:.1f}x)")
+        assert fast_ms < orm_ms
@@ -0,0 +1,149 @@
+"""
+Test suite for the stock event stream.
+
+Tests cover:
+- Publishing on purchase, restock and update (only after commit)
+- WebSocket subscription with sweet id filter
+- Server-sent events framing
+- Backpressure (coalescing and slow consumer disconnect)
+- Connection metrics
+"""
+
+import asyncio
+
+import pytest
+from fastapi import status
+
+from src.app.events import SlowConsumer, StockBroadcaster, stock_broadcaster
+
+
+@pytest.fixture
+def published():
+    """Capture events published through the shared broadcaster."""
+    events = []
+    original = stock_broadcaster.publish
+    stock_broadcaster.publish = lambda message: (events.append(message), original(message))
+    yield events
+    stock_broadcaster.publish = original
+
+
+class TestStockEventPublishing:
+    """Test which writes publish stock events."""
+
+    def test_purchase_publishes_new_stock(self, client, test_user_token, create_sweets, published):
+        """Test a purchase publishes the sweet's new stock."""
+        sweet = create_sweets[0]
+        client.post(
+            f"/api/sweets/{sweet['sweet_id']}/purchase",
+            json={"quantity": 3},
+            headers=test_user_token["headers"]
+        )
+
+        assert published[-1]["sweet_id"] == sweet["sweet_id"]
+        assert published[-1]["new_stock"] == sweet["quantity_in_stock"] - 3
+        assert published[-1]["updated_at"]
+
+    def test_restock_and_update_publish(self, client, test_admin, create_sweets, published):
+        """Test restock and admin updates publish events."""
+        sweet_id = create_sweets[4]["sweet_id"]
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 7}, headers=test_admin["headers"])
+        client.put(f"/api/sweets/{sweet_id}", json={"quantity_in_stock": 42}, headers=test_admin["headers"])
+
+        assert [event["new_stock"] for event in published[-2:]] == [7, 42]
+
+    def test_failed_purchase_publishes_nothing(self, client, test_user_token, create_sweets, published):
+        """Test a rejected purchase does not publish."""
+        out_of_stock = create_sweets[4]
+        client.post(
+            f"/api/sweets/{out_of_stock['sweet_id']}/purchase",
+            json={"quantity": 1},
+            headers=test_user_token["headers"]
+        )
+
+        assert published == []
+
+
+class TestStockStreamEndpoints:
+    """Test the WebSocket and SSE endpoints."""
+
+    def test_websocket_receives_filtered_events(self, client, test_admin, create_sweets):
+        """Test /api/sweets/stream/ws only delivers the watched sweets."""
+        watched = create_sweets[0]["sweet_id"]
+        other = create_sweets[1]["sweet_id"]
+
+        with client.websocket_connect(f"/api/sweets/stream/ws?sweet_ids={watched}") as websocket:
+            client.post(f"/api/sweets/{other}/restock", json={"quantity": 1}, headers=test_admin["headers"])
+            client.post(f"/api/sweets/{watched}/restock", json={"quantity": 5}, headers=test_admin["headers"])
+
+            message = websocket.receive_json()
+
+        assert message["type"] == "stock"
+        assert message["sweet_id"] == watched
+        assert message["new_stock"] == create_sweets[0]["quantity_in_stock"] + 5
+
+    def test_connection_metrics(self, client, test_admin):
+        """Test /api/metrics/stock-stream counts open connections."""
+        with client.websocket_connect("/api/sweets/stream/ws"):
+            response = client.get("/api/metrics/stock-stream", headers=test_admin["headers"])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["active_by_transport"]["websocket"] >= 1
+
+    def test_sse_frames(self):
+        """Test the SSE generator frames stock events."""
+        from src.modules.V1.SweetsManager.controller import SweetsController
+
+        class ConnectedRequest:
+            async def is_disconnected(self):
+                return False
+
+        async def read_frames():
+            frames = SweetsController._sse_events(ConnectedRequest(), {1})
+            first = await frames.__anext__()
+            pending = asyncio.ensure_future(frames.__anext__())
+            await asyncio.sleep(0)
+            stock_broadcaster.publish({"sweet_id": 1, "new_stock": 9, "updated_at": None})
+            second = await pending
+            await frames.aclose()
+            return first, second
+
+        first, second = asyncio.run(read_frames())
+
+        assert first.startswith("retry:")
+        assert second == 'event: stock\ndata: {"sweet_id": 1, "new_stock": 9, "updated_at": null}\n\n'
+
+
+class TestBackpressure:
+    """Test per-subscriber coalescing and slow consumer handling."""
+
+    def test_pending_events_coalesce_per_sweet(self):
+        """Test a slow subscriber only gets the latest stock per sweet."""
+        broadcaster = StockBroadcaster(max_pending=10)
+
+        async def scenario():
+            with broadcaster.subscribe(None, "test") as subscription:
+                for stock in (5, 4, 3):
+                    broadcaster.publish({"sweet_id": 1, "new_stock": stock, "updated_at": None})
+                broadcaster.publish({"sweet_id": 2, "new_stock": 8, "updated_at": None})
+                return await subscription.next_batch(1)
+
+        batch = asyncio.run(scenario())
+
+        assert [(e["sweet_id"], e["new_stock"]) for e in batch] == [(1, 3), (2, 8)]
+        assert broadcaster.metrics.coalesced == 2
+
+    def test_slow_consumer_is_dropped(self):
+        """Test a subscriber behind on too many sweets is disconnected."""
+        broadcaster = StockBroadcaster(max_pending=2)
+
+        async def scenario():
+            with broadcaster.subscribe(None, "test") as subscription:
+                for sweet_id in range(3):
+                    broadcaster.publish({"sweet_id": sweet_id, "new_stock": 1, "updated_at": None})
+                with pytest.raises(SlowConsumer):
+                    await subscription.next_batch(1)
+
+        asyncio.run(scenario())
+
+        assert broadcaster.metrics.slow_consumers_dropped == 1
+        assert broadcaster.metrics.active["test"] == 0
@@ -9,6 +9,9 @@ Tests cover:
 - Edge cases
 """
 
+import base64
+import json
+
 import pytest
 from fastapi import status
 
@@ -151,6 +154,12 @@ class TestSweetRetrieval:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert len(data) == len(create_sweets) - 2
+    
+    def test_pagination_parameters_are_bounded(self, client, create_sweets):
+        """Test oversized limits and negative offsets are rejected."""
+        for query in ("limit=1000000000", "limit=0", "skip=-1"):
+            response = client.get(f"/api/sweets/?{query}")
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
 class TestSweetSearch:
@@ -329,3 +338,254 @@ class TestSweetDeletion:
         response = client.delete(f"/api/sweets/{sweet_id}")
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSweetSorting:
+    """Test sorting and cursor pagination of sweets."""
+    
+    def test_sort_by_price_ascending(self, client, create_sweets):
+        """Test sweets are ordered by price ascending."""
+        response = client.get("/api/sweets/?sort=price_asc")
+        
+        assert response.status_code == status.HTTP_200_OK
+        prices = [s["price"] for s in response.json()]
+        assert prices == sorted(prices)
+    
+    def test_sort_by_price_descending(self, client, create_sweets):
+        """Test search results are ordered by price descending."""
+        response = client.get("/api/sweets/search?sort=price_desc")
+        
+        assert response.status_code == status.HTTP_200_OK
+        prices = [s["price"] for s in response.json()]
+        assert prices == sorted(prices, reverse=True)
+    
+    def test_sort_by_popularity(self, client, test_user_token, create_sweets):
+        """Test most purchased sweets come first."""
+        lollipop = next(s for s in create_sweets if s["name"] == "Lollipop")
+        client.post(
+            f"/api/sweets/{lollipop['sweet_id']}/purchase",
+            json={"quantity": 3},
+            headers=test_user_token["headers"]
+        )
+        
+        data = client.get("/api/sweets/?sort=popular").json()
+        assert data[0]["sweet_id"] == lollipop["sweet_id"]
+        assert data[0]["units_sold"] == 3
+    
+    def test_sort_by_rating(self, client, test_user_token, create_sweets):
+        """Test highest rated sweets come first."""
+        sweet_id = create_sweets[2]["sweet_id"]
+        client.post(
+            f"/api/sweets/{sweet_id}/rate",
+            json={"rating": 5},
+            headers=test_user_token["headers"]
+        )
+        
+        data = client.get("/api/sweets/?sort=rating").json()
+        assert data[0]["sweet_id"] == sweet_id
+    
+    def test_cursor_pagination_walks_all_pages(self, client, create_sweets):
+        """Test following X-Next-Cursor returns every sweet once in sort order."""
+        seen = []
+        url = "/api/sweets/?sort=price_desc&limit=2"
+        response = client.get(url)
+        while True:
+            seen.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = client.get(f"{url}&cursor={cursor}")
+        
+        assert len(seen) == len(create_sweets)
+        prices = [s["price"] for s in seen]
+        assert prices == sorted(prices, reverse=True)
+    
+    def test_cursor_pagination_with_filters(self, client, create_sweets):
+        """Test cursor pagination combined with category and price filters."""
+        url = "/api/sweets/search?category=Chocolate&max_price=5&sort=newest&limit=1"
+        first = client.get(url)
+        second = client.get(f"{url}&cursor={first.headers['X-Next-Cursor']}")
+        
+        ids = [first.json()[0]["sweet_id"], second.json()[0]["sweet_id"]]
+        chocolate_ids = [s["sweet_id"] for s in create_sweets if s["category"] == "Chocolate"]
+        assert ids == sorted(chocolate_ids, reverse=True)
+    
+    def test_cursor_for_different_sort_is_rejected(self, client, create_sweets):
+        """Test a cursor issued for one sort order cannot be reused for another."""
+        response = client.get("/api/sweets/?sort=price_asc&limit=1")
+        cursor = response.headers["X-Next-Cursor"]
+        
+        response = client.get(f"/api/sweets/?sort=popular&limit=1&cursor={cursor}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_invalid_cursor(self, client, create_sweets):
+        """Test a malformed cursor is rejected."""
+        response = client.get("/api/sweets/?cursor=not-a-cursor")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    @pytest.mark.parametrize("sort,payload", [
+        ("newest", ["newest", "garbage", 1]),
+        ("newest", ["newest", 5, 1]),
+        ("price_asc", ["price_asc", 1.0, "x"]),
+        ("price_asc", ["price_asc", "cheap", 1]),
+        ("popular", ["popular", True, 1]),
+        (None, [None, 1.5, 1]),
+    ])
+    def test_cursor_with_malformed_values(self, client, create_sweets, sort, payload):
+        """Test cursors with wrongly typed sort keys or ids return 400 from /api/sweets/."""
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+        url = f"/api/sweets/?cursor={cursor}" + (f"&sort={sort}" if sort else "")
+        
+        response = client.get(url)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestSweetSearchFacets:
+    """Test faceted search responses."""
+    
+    def test_search_without_facets_returns_list(self, client, create_sweets):
+        """Test the default search response is still a plain list."""
+        response = client.get("/api/sweets/search?category=Gummy")
+        
+        assert isinstance(response.json(), list)
+    
+    def test_category_counts(self, client, create_sweets):
+        """Test facets include a count per category."""
+        response = client.get("/api/sweets/search?facets=true")
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data["items"]) == len(create_sweets)
+        counts = {c["category"]: c["count"] for c in data["facets"]["categories"]}
+        assert counts == {"Chocolate": 2, "Gummy": 2, "Hard Candy": 1}
+    
+    def test_price_histogram(self, client, create_sweets):
+        """Test facets include a price histogram with the requested bucket size."""
+        response = client.get("/api/sweets/search?facets=true&price_bucket_size=2")
+        
+        histogram = response.json()["facets"]["price_histogram"]
+        assert [(b["min_price"], b["max_price"], b["count"]) for b in histogram] == [
+            (0.0, 2.0, 2), (2.0, 4.0, 3)
+        ]
+    
+    def test_facets_ignore_their_own_filter(self, client, create_sweets):
+        """Test category counts still list other categories while one is selected."""
+        response = client.get("/api/sweets/search?facets=true&category=Gummy&max_price=2.0")
+        
+        data = response.json()
+        assert [s["name"] for s in data["items"]] == ["Gummy Bears"]
+        counts = {c["category"]: c["count"] for c in data["facets"]["categories"]}
+        assert counts == {"Gummy": 1, "Hard Candy": 1}
+        assert sum(b["count"] for b in data["facets"]["price_histogram"]) == 2
+
+
+class TestCategories:
+    """Test normalized categories."""
+    
+    @pytest.fixture(autouse=True)
+    def clear_category_cache(self):
+        """Start every test with an empty category cache."""
+        from src.modules.V1.SweetsManager.services import category_cache
+        category_cache.clear()
+    
+    def test_list_categories_with_counts(self, client, create_sweets):
+        """Test categories are listed with the number of sweets in each."""
+        response = client.get("/api/categories/")
+        
+        assert response.status_code == status.HTTP_200_OK
+        counts = {c["slug"]: c["sweet_count"] for c in response.json()}
+        assert counts == {"chocolate": 2, "gummy": 2, "hard-candy": 1}
+    
+    def test_category_names_are_matched_case_insensitively(self, client, test_admin, create_sweets):
+        """Test a differently-cased category reuses the existing category."""
+        response = client.post(
+            "/api/sweets/",
+            data={"name": "Milk Chocolate", "category": "CHOCOLATE", "price": 2.0},
+            headers=test_admin["headers"]
+        )
+        
+        assert response.json()["category"] == "Chocolate"
+        chocolate = next(s for s in create_sweets if s["category"] == "Chocolate")
+        assert response.json()["category_id"] == chocolate["category_id"]
+    
+    def test_search_and_category_endpoint_agree(self, client, create_sweets):
+        """Test both category filters use the same case-insensitive matching."""
+        searched = client.get("/api/sweets/search?category=hard candy").json()
+        by_category = client.get("/api/sweets/category/Hard-Candy").json()
+        
+        assert [s["name"] for s in searched] == ["Lollipop"]
+        assert [s["name"] for s in by_category] == ["Lollipop"]
+    
+    def test_category_filter_requires_whole_category(self, client, create_sweets):
+        """Test the category filter no longer matches partial names."""
+        response = client.get("/api/sweets/search?category=Choc")
+        
+        assert response.json() == []
+    
+    def test_category_cache_is_invalidated_on_write(self, client, test_admin, create_sweets):
+        """Test category counts reflect newly created sweets."""
+        client.get("/api/categories/")
+        client.post(
+            "/api/sweets/",
+            data={"name": "Toffee Crunch", "category": "Toffee", "price": 1.5},
+            headers=test_admin["headers"]
+        )
+        
+        counts = {c["slug"]: c["sweet_count"] for c in client.get("/api/categories/").json()}
+        assert counts["toffee"] == 1
+    
+    def test_backfill_links_free_text_categories(self, db):
+        """Test sweets with only a free-text category are migrated to Category rows."""
+        from src.modules.V1.SweetsManager.dao import SweetsDAO
+        from src.modules.V1.SweetsManager.models import Sweet
+        
+        db.add_all([
+            Sweet(name="Old Toffee", category="Toffee", price=1.0, quantity_in_stock=1),
+            Sweet(name="Older Toffee", category="toffee", price=1.0, quantity_in_stock=1),
+        ])
+        db.commit()
+        
+        assert SweetsDAO.backfill_categories(db) == 2
+        sweets = db.query(Sweet).all()
+        assert len({s.category_id for s in sweets}) == 1
+        assert None not in {s.category_id for s in sweets}
+
+
+class TestSweetBatch:
+    """Test the multi-get endpoint."""
+    
+    def test_batch_preserves_requested_order(self, client, create_sweets):
+        """Test GET /api/sweets/batch returns sweets in the order asked for."""
+        ids = [create_sweets[2]["sweet_id"], create_sweets[0]["sweet_id"], create_sweets[1]["sweet_id"]]
+        response = client.get(f"/api/sweets/batch?ids={','.join(map(str, ids))}")
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["sweet_id"] for item in data["items"]] == ids
+        assert data["missing"] == []
+    
+    def test_batch_reports_missing_ids(self, client, create_sweets):
+        """Test unknown ids are listed in missing, duplicates collapsed."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        response = client.get(f"/api/sweets/batch?ids=99999,{sweet_id},{sweet_id},88888")
+        
+        data = response.json()
+        assert [item["sweet_id"] for item in data["items"]] == [sweet_id]
+        assert data["missing"] == [99999, 88888]
+    
+    def test_batch_with_fields(self, client, create_sweets):
+        """Test the multi-get honours sparse fieldsets."""
+        sweet_id = create_sweets[0]["sweet_id"]
+        response = client.get(f"/api/sweets/batch?ids={sweet_id}&fields=name,price")
+        
+        assert response.json()["items"] == [
+            {"sweet_id": sweet_id, "name": "Chocolate Bar", "price": 2.5}
+        ]
+    
+    def test_batch_rejects_invalid_ids(self, client):
+        """Test non-integer ids and oversized batches return 400."""
+        assert client.get("/api/sweets/batch?ids=1,abc").status_code == status.HTTP_400_BAD_REQUEST
+        too_many = ",".join(str(i) for i in range(1, 102))
+        assert client.get(f"/api/sweets/batch?ids={too_many}").status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,145 @@
+"""
+Test suite for the verified access token cache.
+
+Tests cover:
+- Hot tokens verified once
+- Entries expiring with the token's exp
+- Invalid tokens never cached
+- Token version revocation still enforced for cached tokens
+- Benchmark of the auth dependency with and without the cache (opt-in with RUN_BENCHMARKS=1)
+"""
+
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+
+from src.app import auth
+from src.app.auth import create_access_token, decode_access_token, get_current_user, token_cache
+from src.app.settings import settings
+from test.conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start and end every test with an empty token cache."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def jwt_decodes(monkeypatch):
+    """Count full signature verifications."""
+    calls = []
+    decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+
+class TestTokenCache:
+    """Test caching verified token payloads."""
+
+    def test_hot_token_verified_once(self, jwt_decodes):
+        """Test repeated decodes of one token verify its signature once and return equal payloads."""
+        token = create_access_token({"sub": "1", "ver": 0})
+
+        payloads = [decode_access_token(token) for _ in range(5)]
+
+        assert len(jwt_decodes) == 1
+        assert all(payload == payloads[0] for payload in payloads)
+        payloads[0]["sub"] = "tampered"
+        assert decode_access_token(token)["sub"] == "1"
+
+    def test_entry_expires_with_token(self, jwt_decodes):
+        """Test a cached token stops being accepted at its exp."""
+        token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=1))
+        exp = decode_access_token(token)["exp"]
+
+        # exp has whole-second precision and is rejected once strictly in the past
+        time.sleep(exp + 1 - time.time() + 0.05)
+
+        assert decode_access_token(token) is None
+        assert len(jwt_decodes) == 2
+
+    def test_invalid_tokens_not_cached(self, jwt_decodes):
+        """Test tokens failing verification are verified again on every attempt."""
+        forged = create_access_token({"sub": "1"})[:-2] + "xx"
+
+        assert decode_access_token(forged) is None
+        assert decode_access_token(forged) is None
+        assert len(jwt_decodes) == 2
+        assert len(token_cache._data) == 0
+
+    def test_cache_is_bounded(self, monkeypatch):
+        """Test the least recently used tokens are evicted beyond the maximum size."""
+        monkeypatch.setattr(token_cache, "maxsize", 2)
+        for user_id in range(5):
+            decode_access_token(create_access_token({"sub": str(user_id)}))
+
+        assert len(token_cache._data) == 2
+
+    def test_disabled(self, monkeypatch, jwt_decodes):
+        """Test AUTH_TOKEN_CACHE_SIZE=0 verifies every time."""
+        monkeypatch.setattr(settings, "AUTH_TOKEN_CACHE_SIZE", 0)
+        token = create_access_token({"sub": "1"})
+
+        decode_access_token(token)
+        decode_access_token(token)
+
+        assert len(jwt_decodes) == 2
+
+    def test_revocation_applies_to_cached_tokens(self, client, test_user_token, test_admin):
+        """Test a cached token is still rejected once a password change bumps the user's token version."""
+        headers = test_user_token["headers"]
+        assert client.get("/api/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+        client.put(f"/api/auth/users/{test_user_token['user_id']}", json={"password": "NewPassword456"},
+                   headers=test_admin["headers"])
+
+        assert client.get("/api/auth/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1 to run")
+class TestAuthDependencyCost:
+    """Benchmark get_current_user with and without the token cache."""
+
+    ROUNDS = 2000
+
+    def _time_dependency(self, token, db) -> float:
+        """Mean microseconds per get_current_user call."""
+        loop = asyncio.new_event_loop()
+        try:
+            start = time.perf_counter()
+            for _ in range(self.ROUNDS):
+                loop.run_until_complete(get_current_user(token, db))
+            return (time.perf_counter() - start) / self.ROUNDS * 1e6
+        finally:
+            loop.close()
+
+    def test_benchmark_with_and_without_cache(self, client, test_user_token, monkeypatch):
+        """Test the cache cuts the stateless auth dependency's cost; print both."""
+        monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+        db = TestingSessionLocal()
+        try:
+            token = test_user_token["token"]
+            self._time_dependency(token, db)  # load the token version
+
+            monkeypatch.setattr(settings, "AUTH_TOKEN_CACHE_SIZE", 0)
+            uncached_us = self._time_dependency(token, db)
+            monkeypatch.setattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000)
+            cached_us = self._time_dependency(token, db)
+        finally:
+            db.close()
+
+        print(f"\nget_current_user: {uncached_us:.1f} µs without cache, {cached_us:.1f} µs with cache")
+        assert cached_us < uncached_us
@@ -0,0 +1,218 @@
+"""
+Test suite for token versioning and stateless authorization.
+
+Tests cover:
+- Tokens carrying the user's token_version
+- Password, role and active-flag changes revoking existing tokens
+- Stateless mode authorizing from token claims without loading the user row
+- The per-worker token version cache
+- The shared Redis version map keeping bumps over stale miss fills
+"""
+
+import time
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, update
+
+from src.app import token_versions as token_versions_module
+from src.app.auth import decode_access_token
+from src.app.settings import settings
+from src.app.token_versions import TokenVersionMap
+from src.modules.V1.AuthManager.dao import AuthDAO
+from src.modules.V1.AuthManager.models import User
+from test.conftest import TestingSessionLocal, engine
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    """Authorize from token claims and the version map."""
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+
+
+@pytest.fixture
+def user_queries():
+    """Count statements reading the users table."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _update_user(client, admin_headers, user_id, **changes):
+    return client.put(f"/api/auth/users/{user_id}", json=changes, headers=admin_headers)
+
+
+def _me(client, headers):
+    return client.get("/api/auth/me", headers=headers)
+
+
+class TestTokenVersion:
+    """Test revoking tokens by bumping token_version."""
+
+    def test_token_carries_version(self, client, test_user_token):
+        """Test login tokens include the user's current version in the ver claim."""
+        assert decode_access_token(test_user_token["token"])["ver"] == 0
+
+    def test_password_change_revokes_tokens(self, client, test_user_token, test_admin):
+        """Test a password change rejects tokens issued before it; a new login works."""
+        _update_user(client, test_admin["headers"], test_user_token["user_id"], password="NewPassword456")
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_401_UNAUTHORIZED
+        login = client.post("/api/auth/login", json={"username": "testuser", "password": "NewPassword456"})
+        assert decode_access_token(login.json()["access_token"])["ver"] == 1
+
+    def test_role_change_revokes_tokens(self, client, test_user_token, test_admin):
+        """Test granting admin rights rejects tokens that claim the old role."""
+        _update_user(client, test_admin["headers"], test_user_token["user_id"], is_admin=True)
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivation_rejects_tokens(self, client, test_user_token, test_admin):
+        """Test deactivated users can neither use their tokens nor log in."""
+        _update_user(client, test_admin["headers"], test_user_token["user_id"], is_active=False)
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_403_FORBIDDEN
+        login = client.post("/api/auth/login", json={"username": "testuser", "password": "TestPassword123"})
+        assert login.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_other_changes_keep_tokens(self, client, test_user_token, test_admin, db):
+        """Test email changes and setting an unchanged role leave tokens valid."""
+        _update_user(client, test_admin["headers"], test_user_token["user_id"],
+                     email="renamed@example.com", is_admin=False)
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_200_OK
+        assert db.query(User).get(test_user_token["user_id"]).token_version == 0
+
+
+class TestStatelessMode:
+    """Test authorization from token claims."""
+
+    def test_admin_endpoint_skips_user_row(self, client, test_admin, stateless, user_queries):
+        """Test only the first request loads the version; later ones read no user data at all."""
+        headers = test_admin["headers"]
+        assert client.get("/api/metrics/rate-limits", headers=headers).status_code == status.HTTP_200_OK
+        assert len(user_queries) == 1
+        assert "token_version" in user_queries[0] and "password" not in user_queries[0]
+
+        for _ in range(3):
+            assert client.get("/api/metrics/rate-limits", headers=headers).status_code == status.HTTP_200_OK
+
+        assert len(user_queries) == 1
+
+    def test_regular_user_forbidden_from_admin_endpoint(self, client, test_user_token, stateless):
+        """Test the is_admin claim is enforced."""
+        response = client.get("/api/metrics/rate-limits", headers=test_user_token["headers"])
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_purchase_and_me(self, client, test_user_token, create_sweets, stateless):
+        """Test user endpoints work with the token principal; /api/auth/me still returns the full user."""
+        purchase = client.post(f"/api/sweets/{create_sweets[0]['sweet_id']}/purchase", json={"quantity": 1},
+                               headers=test_user_token["headers"])
+        me = _me(client, test_user_token["headers"])
+
+        assert purchase.json()["user_id"] == test_user_token["user_id"]
+        assert me.json()["email"] == "testuser@example.com"
+
+    def test_revocation_is_immediate(self, client, test_user_token, test_admin, stateless):
+        """Test a role change commits a new version that the map serves right away."""
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_200_OK
+
+        _update_user(client, test_admin["headers"], test_user_token["user_id"], is_admin=True)
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deleted_and_inactive_users_rejected(self, client, test_user_token, test_admin, stateless):
+        """Test users without a current version cannot authenticate."""
+        client.delete(f"/api/auth/users/{test_user_token['user_id']}", headers=test_admin["headers"])
+
+        assert _me(client, test_user_token["headers"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestTokenVersionMap:
+    """Test the per-worker version cache."""
+
+    def test_cache_expires(self, client, test_user):
+        """Test a bump made elsewhere (no commit hook here) is seen once the cached entry expires."""
+        versions = TokenVersionMap(ttl_seconds=0.05)
+        session = TestingSessionLocal()
+        try:
+            assert versions.get(session, test_user["user_id"]) == 0
+            session.execute(update(User).where(User.user_id == test_user["user_id"]).values(token_version=5))
+            session.commit()
+
+            assert versions.get(session, test_user["user_id"]) == 0
+            time.sleep(0.06)
+            assert versions.get(session, test_user["user_id"]) == 5
+            assert versions.get(session, 99999) is None
+        finally:
+            session.close()
+
+
+class FakeRedis:
+    """Just the hash commands the version map uses."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(str(field))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[str(field)] = str(value)
+
+    def hsetnx(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        if str(field) in fields:
+            return 0
+        fields[str(field)] = str(value)
+        return 1
+
+
+class TestSharedTokenVersionMap:
+    """Test the Redis-backed version map."""
+
+    @pytest.fixture
+    def shared(self, monkeypatch):
+        client = FakeRedis()
+        monkeypatch.setattr(token_versions_module, "get_redis", lambda: client)
+        versions = TokenVersionMap()
+        versions.use_redis("test_token_versions")
+        return versions, client
+
+    def test_miss_filled_from_users_table(self, client, test_user, shared):
+        """Test a miss loads the version from the users table and stores it in the hash."""
+        versions, redis_client = shared
+        session = TestingSessionLocal()
+        try:
+            assert versions.get(session, test_user["user_id"]) == 0
+            assert redis_client.hget("test_token_versions", test_user["user_id"]) == "0"
+            assert versions.get(session, 99999) is None
+        finally:
+            session.close()
+
+    def test_stale_fill_keeps_published_bump(self, client, test_user, shared, monkeypatch):
+        """Test a version read before a concurrent bump does not overwrite the bump's entry."""
+        versions, redis_client = shared
+        user_id = test_user["user_id"]
+        load = AuthDAO.get_token_state
+
+        def load_then_bump(db, user_id):
+            state = load(db, user_id)
+            # Another worker commits a bump after our read, before our fill
+            versions.set(user_id, state[0] + 1)
+            return state
+
+        monkeypatch.setattr(AuthDAO, "get_token_state", staticmethod(load_then_bump))
+        session = TestingSessionLocal()
+        try:
+            assert versions.get(session, user_id) == 1
+            assert redis_client.hget("test_token_versions", user_id) == "1"
+        finally:
+            session.close()